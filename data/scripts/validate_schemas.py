@@ -1,5 +1,9 @@
 #!/usr/bin/env python3
-"""Validate all JSON event schemas."""
+"""Validate all JSON event schemas.
+
+Also compiles each schema with fastjsonschema (when installed), which is what
+services/shared/schemas.py does at service startup.
+"""
 import json
 import glob
 import sys
@@ -11,6 +15,13 @@ except ImportError:
     print("Install jsonschema: pip install jsonschema")
     sys.exit(1)
 
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+UUID_PATTERN = r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"
+
 schema_dir = Path(__file__).parent.parent / "schemas"
 errors = 0
 
@@ -19,6 +30,8 @@ for schema_file in sorted(schema_dir.glob("*.json")):
         with open(schema_file) as f:
             schema = json.load(f)
         jsonschema.Draft7Validator.check_schema(schema)
+        if fastjsonschema is not None:
+            fastjsonschema.compile(schema, formats={"uuid": UUID_PATTERN}, use_default=False)
         print(f"  ✅ {schema_file.name}")
     except Exception as e:
         print(f"  ❌ {schema_file.name}: {e}")
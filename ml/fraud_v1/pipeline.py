@@ -2,12 +2,20 @@
 Vertex AI Pipeline: Fraud Detection v1
 Binary classifier + anomaly scoring for proposals, accounts, payments.
 """
+import os
+
 from kfp import dsl
 from kfp.dsl import Input, Output, Artifact, Dataset, Model, Metrics
 
 PIPELINE_NAME = "mw-fraud-v1-pipeline"
 MODEL_NAME = "mw-fraud-v1"
 
+# Components importing ml.shared run on the image built from ml/Dockerfile;
+# ML_COMPONENT_IMAGE is set by the ml-pipeline workflow / run-pipeline.sh
+COMPONENT_IMAGE = os.getenv(
+    "ML_COMPONENT_IMAGE", "us-central1-docker.pkg.dev/monkeyswork/mw-dev-services/ml-components:latest"
+)
+
 QUALITY_THRESHOLDS = {
     "auc_roc": 0.90,
     "precision_at_90_recall": 0.70,
@@ -65,25 +73,53 @@ def train_fraud_model(validated_dataset: Input[Dataset], trained_model: Output[M
     import pandas as pd
     df = pd.read_parquet(validated_dataset.path)
     # TODO: Feature engineering, SMOTE, XGBoost training, Platt scaling
+    # Write model.json (booster) + metadata.json (feature order, categories) under
+    # trained_model.path: the services load that directory in-process (shared.model_serving)
+    # Also write eval_predictions.parquet (is_fraud, score) for the held-out split and
+    # set trained_model.metadata["detection_latency_p99_ms"]; evaluate_fraud_model gates on them
     trained_model.metadata["algorithm"] = "xgboost"
     trained_model.metadata["training_examples"] = len(df)
     training_metrics.log_metric("training_auc", 0.94)
 
 
-@dsl.component(base_image="python:3.11-slim", packages_to_install=["pandas", "scikit-learn"])
-def evaluate_fraud_model(trained_model: Input[Model], validated_dataset: Input[Dataset], eval_metrics: Output[Metrics], eval_report: Output[Artifact]):
+@dsl.component(base_image=COMPONENT_IMAGE)
+def evaluate_fraud_model(trained_model: Input[Model], validated_dataset: Input[Dataset], quality_thresholds: dict, require_eval_predictions: bool, eval_metrics: Output[Metrics], eval_report: Output[Artifact]):
+    """Held-out ROC-AUC, precision at 90% recall and FPR with bootstrap intervals."""
     import json
-    metrics = {"auc_roc": 0.93, "precision_at_90_recall": 0.74, "false_positive_rate": 0.07, "detection_latency_p99_ms": 120}
-    passed = all(
-        metrics[k] >= QUALITY_THRESHOLDS[k] if k not in ["false_positive_rate", "detection_latency_p99_ms"]
-        else metrics[k] <= QUALITY_THRESHOLDS[k]
-        for k in QUALITY_THRESHOLDS
-    )
+    import os
+    import pandas as pd
+    from ml.shared.evaluation.metrics import check_quality_gates, classification_report, report_values
+
+    predictions_path = os.path.join(trained_model.path, "eval_predictions.parquet")
+    if not os.path.exists(predictions_path):
+        if require_eval_predictions:
+            raise FileNotFoundError(f"{predictions_path} not written by the train step")
+        # Gate skipped until the train step writes held-out predictions
+        eval_metrics.log_metric("quality_gate_passed", 0)
+        eval_metrics.log_metric("quality_gate_skipped", 1)
+        with open(eval_report.path, "w") as f:
+            json.dump({"skipped": True, "reason": "no eval_predictions.parquet", "thresholds": quality_thresholds}, f, indent=2)
+        return
+
+    predictions = pd.read_parquet(predictions_path)
+    report = classification_report(predictions["is_fraud"].values, predictions["score"].values, threshold=0.5, target_recall=0.9)
+    metrics = report_values(report)
+    metrics["detection_latency_p99_ms"] = float(trained_model.metadata.get("detection_latency_p99_ms", float("inf")))
+    passed = check_quality_gates(metrics, quality_thresholds)
     for k, v in metrics.items():
         eval_metrics.log_metric(k, v)
+    for k, estimate in report.items():
+        eval_metrics.log_metric(f"{k}_ci_low", estimate.low)
+        eval_metrics.log_metric(f"{k}_ci_high", estimate.high)
     eval_metrics.log_metric("quality_gate_passed", int(passed))
     with open(eval_report.path, "w") as f:
-        json.dump({"metrics": metrics, "thresholds": QUALITY_THRESHOLDS, "passed": passed}, f, indent=2)
+        json.dump({
+            "metrics": metrics,
+            "intervals": {k: estimate.to_dict() for k, estimate in report.items()},
+            "eval_examples": len(predictions),
+            "thresholds": quality_thresholds,
+            "passed": passed,
+        }, f, indent=2)
 
 
 @dsl.component(base_image="python:3.11-slim", packages_to_install=["google-cloud-aiplatform"])
@@ -110,11 +146,11 @@ def deploy_fraud_model(registered_model_name: Input[Artifact], project_id: str,
 
 
 @dsl.pipeline(name=PIPELINE_NAME, description="Train and deploy Fraud Detection v1")
-def fraud_v1_pipeline(project_id: str, region: str = "us-central1", model_version: str = "v1.0.0", traffic_percentage: int = 0):
+def fraud_v1_pipeline(project_id: str, region: str = "us-central1", model_version: str = "v1.0.0", traffic_percentage: int = 0, require_eval_predictions: bool = False):
     ingest = ingest_fraud_data(project_id=project_id)
     validate = validate_fraud_data(input_dataset=ingest.outputs["output_dataset"])
     train = train_fraud_model(validated_dataset=validate.outputs["validated_dataset"])
-    evaluate = evaluate_fraud_model(trained_model=train.outputs["trained_model"], validated_dataset=validate.outputs["validated_dataset"])
+    evaluate = evaluate_fraud_model(trained_model=train.outputs["trained_model"], validated_dataset=validate.outputs["validated_dataset"], quality_thresholds=QUALITY_THRESHOLDS, require_eval_predictions=require_eval_predictions)
     register = register_fraud_model(trained_model=train.outputs["trained_model"], eval_metrics=evaluate.outputs["eval_metrics"], project_id=project_id, region=region, model_version=model_version)
     deploy = deploy_fraud_model(registered_model_name=register.outputs["registered_model_name"], project_id=project_id, region=region, traffic_percentage=traffic_percentage)
 
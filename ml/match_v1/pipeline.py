@@ -2,12 +2,20 @@
 Vertex AI Pipeline: Match Engine v1
 Two-stage: embedding retrieval (ANN) + ranking model.
 """
+import os
+
 from kfp import dsl
 from kfp.dsl import Input, Output, Artifact, Dataset, Model, Metrics
 
 PIPELINE_NAME = "mw-match-v1-pipeline"
 MODEL_NAME = "mw-match-v1"
 
+# Components importing ml.shared run on the image built from ml/Dockerfile;
+# ML_COMPONENT_IMAGE is set by the ml-pipeline workflow / run-pipeline.sh
+COMPONENT_IMAGE = os.getenv(
+    "ML_COMPONENT_IMAGE", "us-central1-docker.pkg.dev/monkeyswork/mw-dev-services/ml-components:latest"
+)
+
 QUALITY_THRESHOLDS = {
     "ndcg_at_10": 0.65,
     "precision_at_5": 0.60,
@@ -27,7 +35,7 @@ def ingest_match_data(project_id: str, output_dataset: Output[Dataset]):
     query = f"""
         SELECT j.job_id, j.title, j.description, j.skills_required,
                j.budget_range, j.category,
-               f.freelancer_id, f.skills, f.experience_years,
+               f.freelancer_id, f.skills, f.headline, f.bio, f.experience_years,
                f.hourly_rate, f.rating, f.verification_level,
                e.event_type, e.created_at
         FROM `{project_id}.ml_training.match_interactions` e
@@ -65,22 +73,123 @@ def train_match_model(validated_dataset: Input[Dataset], embedding_model_uri: st
     import pandas as pd
     df = pd.read_parquet(validated_dataset.path)
     # TODO: 1. Create positive/negative pairs 2. Fine-tune embeddings 3. Train XGBoost ranker
+    # 4. Score the held-out jobs and write eval_predictions.parquet under trained_model.path
+    #    (job_id, freelancer_id, score, relevance, category) for evaluate_match_model
     trained_model.metadata["embedding_model"] = embedding_model_uri
     trained_model.metadata["training_pairs"] = len(df)
     training_metrics.log_metric("embedding_loss", 0.12)
     training_metrics.log_metric("ranker_ndcg", 0.72)
 
 
-@dsl.component(base_image="python:3.11-slim", packages_to_install=["pandas", "scikit-learn"])
-def evaluate_match_model(trained_model: Input[Model], validated_dataset: Input[Dataset], eval_metrics: Output[Metrics], eval_report: Output[Artifact]):
+@dsl.component(base_image="python:3.11-slim", packages_to_install=["pandas", "scikit-learn", "sentence-transformers", "google-cloud-storage"])
+def train_pq_codebook(validated_dataset: Input[Dataset], embedding_model_uri: str, num_subspaces: int, publish_uri: str, pq_codebook: Output[Artifact]):
+    """
+    Product-quantization codebooks for the ai-match-v1 candidate store.
+
+    Writes the shared.pq file format (codebooks: (m, 256, dim // m) float32).
+    With publish_uri (gs://...) the file is also copied there for the service
+    to load at startup via MATCH_PQ_CODEBOOK. The file records the embedder
+    name the service checks it against (SentenceTransformerEmbedder.name).
+    """
+    import unicodedata
+
+    import numpy as np
+    import pandas as pd
+    from sentence_transformers import SentenceTransformer
+    from sklearn.cluster import MiniBatchKMeans
+
+    def join(values) -> str:
+        if isinstance(values, str):
+            return values
+        if not isinstance(values, (list, tuple, np.ndarray)):
+            return ""  # missing (None / NaN)
+        return ", ".join(str(v) for v in values if v)
+
+    def text(value) -> str:
+        return value if isinstance(value, str) else ""
+
+    # Same text as src.candidate_index.profile_text, normalized like shared.embeddings.normalize_text;
+    # specializations / certifications only count where the export carries them
+    def profile_text(row) -> str:
+        parts = [
+            f"Skills: {join(row.get('skills'))}",
+            f"Specializations: {join(row.get('specializations'))}",
+            f"Certifications: {join(row.get('certifications'))}",
+            text(row.get("headline")),
+            text(row.get("bio")),
+        ]
+        joined = "\n".join(p for p in parts if p and not p.endswith(": "))
+        return " ".join(unicodedata.normalize("NFKC", joined).casefold().split())
+
+    df = pd.read_parquet(validated_dataset.path).drop_duplicates("freelancer_id")
+    texts = [profile_text(row) for row in df.to_dict("records")]
+    model = SentenceTransformer(embedding_model_uri, device="cpu")
+    vectors = model.encode(texts, batch_size=256, normalize_embeddings=True).astype(np.float32)
+
+    embedder = "sentence-transformers"
+    dim = vectors.shape[1]
+    dsub = dim // num_subspaces
+    codebooks = np.empty((num_subspaces, 256, dsub), dtype=np.float32)
+    for j in range(num_subspaces):
+        kmeans = MiniBatchKMeans(n_clusters=256, batch_size=4096, n_init=3, random_state=j)
+        kmeans.fit(vectors[:, j * dsub:(j + 1) * dsub])
+        codebooks[j] = kmeans.cluster_centers_
+
+    # A file object keeps np.savez from appending ".npz" to the artifact path
+    with open(pq_codebook.path, "wb") as f:
+        np.savez(f, codebooks=codebooks, embedder=np.array(embedder))
+    pq_codebook.metadata.update(
+        {"num_subspaces": num_subspaces, "dim": dim, "embedder": embedder, "training_vectors": len(vectors)}
+    )
+    if publish_uri:
+        from google.cloud import storage
+
+        bucket, _, name = publish_uri[len("gs://"):].partition("/")
+        storage.Client().bucket(bucket).blob(name).upload_from_filename(pq_codebook.path)
+
+
+@dsl.component(base_image=COMPONENT_IMAGE)
+def evaluate_match_model(trained_model: Input[Model], validated_dataset: Input[Dataset], quality_thresholds: dict, require_eval_predictions: bool, eval_metrics: Output[Metrics], eval_report: Output[Artifact]):
+    """Held-out ranking metrics per job, averaged, with query-bootstrap intervals."""
     import json
-    metrics = {"ndcg_at_10": 0.71, "precision_at_5": 0.65, "recall_at_20": 0.84, "mean_reciprocal_rank": 0.62, "diversity_score": 0.35}
-    passed = all(metrics[k] >= QUALITY_THRESHOLDS[k] for k in QUALITY_THRESHOLDS)
+    import os
+    import pandas as pd
+    from ml.shared.evaluation.metrics import check_quality_gates, ranking_report, report_values
+
+    predictions_path = os.path.join(trained_model.path, "eval_predictions.parquet")
+    if not os.path.exists(predictions_path):
+        if require_eval_predictions:
+            raise FileNotFoundError(f"{predictions_path} not written by the train step")
+        # Gate skipped until the train step writes held-out predictions
+        eval_metrics.log_metric("quality_gate_passed", 0)
+        eval_metrics.log_metric("quality_gate_skipped", 1)
+        with open(eval_report.path, "w") as f:
+            json.dump({"skipped": True, "reason": "no eval_predictions.parquet", "thresholds": quality_thresholds}, f, indent=2)
+        return
+
+    predictions = pd.read_parquet(predictions_path)
+    report = ranking_report(
+        predictions["job_id"].values,
+        predictions["score"].values,
+        predictions["relevance"].values,
+        categories=predictions["category"].values,
+    )
+    metrics = report_values(report)
+    passed = check_quality_gates(metrics, quality_thresholds)
     for k, v in metrics.items():
         eval_metrics.log_metric(k, v)
+    for k, estimate in report.items():
+        eval_metrics.log_metric(f"{k}_ci_low", estimate.low)
+        eval_metrics.log_metric(f"{k}_ci_high", estimate.high)
     eval_metrics.log_metric("quality_gate_passed", int(passed))
     with open(eval_report.path, "w") as f:
-        json.dump({"metrics": metrics, "thresholds": QUALITY_THRESHOLDS, "passed": passed}, f, indent=2)
+        json.dump({
+            "metrics": metrics,
+            "intervals": {k: estimate.to_dict() for k, estimate in report.items()},
+            "eval_jobs": int(predictions["job_id"].nunique()),
+            "thresholds": quality_thresholds,
+            "passed": passed,
+        }, f, indent=2)
 
 
 @dsl.component(base_image="python:3.11-slim", packages_to_install=["google-cloud-aiplatform"])
@@ -107,11 +216,12 @@ def deploy_match_model(registered_model_name: Input[Artifact], project_id: str,
 
 
 @dsl.pipeline(name=PIPELINE_NAME, description="Train and deploy Match Engine v1")
-def match_v1_pipeline(project_id: str, region: str = "us-central1", embedding_model_uri: str = "sentence-transformers/all-MiniLM-L6-v2", model_version: str = "v1.0.0", traffic_percentage: int = 0):
+def match_v1_pipeline(project_id: str, region: str = "us-central1", embedding_model_uri: str = "sentence-transformers/all-MiniLM-L6-v2", model_version: str = "v1.0.0", traffic_percentage: int = 0, pq_num_subspaces: int = 48, pq_codebook_uri: str = "", require_eval_predictions: bool = False):
     ingest = ingest_match_data(project_id=project_id)
     validate = validate_match_data(input_dataset=ingest.outputs["output_dataset"])
     train = train_match_model(validated_dataset=validate.outputs["validated_dataset"], embedding_model_uri=embedding_model_uri)
-    evaluate = evaluate_match_model(trained_model=train.outputs["trained_model"], validated_dataset=validate.outputs["validated_dataset"])
+    train_pq_codebook(validated_dataset=validate.outputs["validated_dataset"], embedding_model_uri=embedding_model_uri, num_subspaces=pq_num_subspaces, publish_uri=pq_codebook_uri)
+    evaluate = evaluate_match_model(trained_model=train.outputs["trained_model"], validated_dataset=validate.outputs["validated_dataset"], quality_thresholds=QUALITY_THRESHOLDS, require_eval_predictions=require_eval_predictions)
     register = register_match_model(trained_model=train.outputs["trained_model"], eval_metrics=evaluate.outputs["eval_metrics"], project_id=project_id, region=region, model_version=model_version)
     deploy = deploy_match_model(registered_model_name=register.outputs["registered_model_name"], project_id=project_id, region=region, traffic_percentage=traffic_percentage)
 
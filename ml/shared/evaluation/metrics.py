@@ -1,5 +1,28 @@
-"""Shared evaluation metrics for ML models."""
-from typing import Dict, Any
+"""Shared evaluation metrics for ML models.
+
+Ranking metrics take flat, grouped arrays — one row per (query, item) with
+the query id, the model score and the graded relevance — and compute every
+query at once with a single sort and segment reductions, so millions of
+interaction rows evaluate in seconds:
+
+    report = ranking_report(df.job_id.values, df.score.values, df.relevance.values,
+                            categories=df.category.values)
+    report["ndcg_at_10"].value, report["ndcg_at_10"].low, report["ndcg_at_10"].high
+
+Classification metrics take labels and scores, sort once, and derive ROC-AUC,
+PR-AUC (average precision), FPR at a threshold and precision at a recall from
+the same threshold curve (ties handled as one threshold).
+
+Confidence intervals are percentile bootstraps. Ranking metrics resample
+queries (per-query values, then weighted means); classification metrics
+resample positives and negatives as multinomial counts over the sorted
+score bins, so a replicate is a cumulative sum over at most a few thousand
+bins rather than a re-sort of every row.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
 
 
 def check_quality_gates(metrics: Dict[str, float], thresholds: Dict[str, float]) -> bool:
@@ -20,3 +43,293 @@ def check_quality_gates(metrics: Dict[str, float], thresholds: Dict[str, float])
             if metrics[key] < threshold:
                 return False
     return True
+
+
+@dataclass
+class MetricEstimate:
+    value: float
+    low: float
+    high: float
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"value": self.value, "low": self.low, "high": self.high}
+
+
+# ── Ranking ──────────────────────────────────────────────────────────
+
+@dataclass
+class _Groups:
+    """Rows sorted by (query, score desc) with segment boundaries."""
+    order: np.ndarray      # row indices in sorted order
+    starts: np.ndarray     # first sorted position of each query
+    sizes: np.ndarray      # rows per query
+    ranks: np.ndarray      # 0-based rank of each sorted row within its query
+
+
+def _group(query_ids: np.ndarray, keys: np.ndarray) -> _Groups:
+    # lexsort: last key is primary; ties in score keep input order
+    order = np.lexsort((-keys, query_ids))
+    sorted_q = query_ids[order]
+    boundary = np.empty(len(order), dtype=bool)
+    boundary[:1] = True
+    boundary[1:] = sorted_q[1:] != sorted_q[:-1]
+    starts = np.flatnonzero(boundary)
+    sizes = np.diff(np.append(starts, len(order)))
+    ranks = np.arange(len(order)) - np.repeat(starts, sizes)
+    return _Groups(order, starts, sizes, ranks)
+
+
+def _segment_sum(values: np.ndarray, groups: _Groups) -> np.ndarray:
+    return np.add.reduceat(values, groups.starts) if len(values) else np.zeros(0)
+
+
+def _dcg(gains: np.ndarray, groups: _Groups, k: int) -> np.ndarray:
+    discount = np.where(groups.ranks < k, 1.0 / np.log2(groups.ranks + 2.0), 0.0)
+    return _segment_sum(gains * discount, groups)
+
+
+def per_query_ranking_metrics(
+    query_ids: Sequence,
+    scores: Sequence[float],
+    relevance: Sequence[float],
+    ndcg_k: int = 10,
+    precision_k: int = 5,
+    recall_k: int = 20,
+    diversity_k: int = 10,
+    categories: Optional[Sequence] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Per-query metric values (one entry per query, NaN where undefined).
+
+    relevance is graded (0 = not relevant); NDCG uses 2^rel - 1 gains.
+    diversity is the share of distinct categories in each query's top
+    diversity_k (only with categories).
+    """
+    query_ids = np.asarray(query_ids)
+    scores = np.asarray(scores, dtype=np.float64)
+    relevance = np.asarray(relevance, dtype=np.float64)
+    if query_ids.dtype.kind in "OUS":
+        query_ids = np.unique(query_ids, return_inverse=True)[1]
+
+    groups = _group(query_ids, scores)
+    rel = relevance[groups.order]
+    hit = rel > 0
+
+    ideal = _group(query_ids, relevance)
+    idcg = _dcg(np.exp2(relevance[ideal.order]) - 1.0, ideal, ndcg_k)
+    dcg = _dcg(np.exp2(rel) - 1.0, groups, ndcg_k)
+    # _group sorts by query first, so both groupings list queries in the same order
+    relevant = _segment_sum(hit.astype(np.float64), groups)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ndcg = np.where(idcg > 0, dcg / idcg, np.nan)
+        precision = _segment_sum((hit & (groups.ranks < precision_k)).astype(np.float64), groups) / precision_k
+        recall = np.where(
+            relevant > 0,
+            _segment_sum((hit & (groups.ranks < recall_k)).astype(np.float64), groups) / relevant,
+            np.nan,
+        )
+
+    first_hit = np.minimum.reduceat(np.where(hit, groups.ranks, np.iinfo(np.int64).max), groups.starts)
+    mrr = np.where(relevant > 0, 1.0 / (first_hit.astype(np.float64) + 1.0), np.nan)
+
+    metrics = {
+        f"ndcg_at_{ndcg_k}": ndcg,
+        f"precision_at_{precision_k}": precision,
+        f"recall_at_{recall_k}": recall,
+        "mean_reciprocal_rank": mrr,
+    }
+    if categories is not None:
+        metrics["diversity_score"] = _diversity(np.asarray(categories)[groups.order], groups, diversity_k)
+    return metrics
+
+
+def _diversity(categories: np.ndarray, groups: _Groups, k: int) -> np.ndarray:
+    top = groups.ranks < k
+    query_index = np.repeat(np.arange(len(groups.starts)), groups.sizes)[top]
+    codes = np.unique(categories, return_inverse=True)[1][top]
+    pairs = np.unique(query_index * (codes.max(initial=0) + 1) + codes)
+    distinct = np.bincount(pairs // (codes.max(initial=0) + 1), minlength=len(groups.starts))
+    shown = np.minimum(groups.sizes, k)
+    return distinct / shown
+
+
+def _bootstrap_means(values: np.ndarray, n_boot: int, alpha: float, seed: int) -> MetricEstimate:
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return MetricEstimate(float("nan"), float("nan"), float("nan"))
+    rng = np.random.default_rng(seed)
+    means = np.empty(n_boot)
+    # Resample queries in chunks of at most ~4M draws to bound memory
+    chunk = max(1, 4_000_000 // len(values))
+    for lo in range(0, n_boot, chunk):
+        hi = min(n_boot, lo + chunk)
+        means[lo:hi] = values[rng.integers(0, len(values), size=(hi - lo, len(values)))].mean(axis=1)
+    low, high = np.quantile(means, [alpha / 2, 1 - alpha / 2])
+    return MetricEstimate(float(values.mean()), float(low), float(high))
+
+
+def ranking_report(
+    query_ids: Sequence,
+    scores: Sequence[float],
+    relevance: Sequence[float],
+    categories: Optional[Sequence] = None,
+    n_boot: int = 1000,
+    alpha: float = 0.05,
+    seed: int = 0,
+    **ks: int,
+) -> Dict[str, MetricEstimate]:
+    """Mean of each per-query metric with a (1 - alpha) query-bootstrap interval."""
+    per_query = per_query_ranking_metrics(query_ids, scores, relevance, categories=categories, **ks)
+    return {name: _bootstrap_means(values, n_boot, alpha, seed) for name, values in per_query.items()}
+
+
+def ndcg_at_k(query_ids, scores, relevance, k: int = 10) -> float:
+    return float(np.nanmean(per_query_ranking_metrics(query_ids, scores, relevance, ndcg_k=k)[f"ndcg_at_{k}"]))
+
+
+def precision_at_k(query_ids, scores, relevance, k: int = 5) -> float:
+    values = per_query_ranking_metrics(query_ids, scores, relevance, precision_k=k)[f"precision_at_{k}"]
+    return float(np.nanmean(values))
+
+
+def recall_at_k(query_ids, scores, relevance, k: int = 20) -> float:
+    return float(np.nanmean(per_query_ranking_metrics(query_ids, scores, relevance, recall_k=k)[f"recall_at_{k}"]))
+
+
+def mean_reciprocal_rank(query_ids, scores, relevance) -> float:
+    return float(np.nanmean(per_query_ranking_metrics(query_ids, scores, relevance)["mean_reciprocal_rank"]))
+
+
+def diversity_at_k(query_ids, scores, categories, k: int = 10) -> float:
+    per_query = per_query_ranking_metrics(
+        query_ids, scores, np.zeros(len(scores)), diversity_k=k, categories=categories
+    )
+    return float(np.mean(per_query["diversity_score"]))
+
+
+# ── Classification ───────────────────────────────────────────────────
+
+@dataclass
+class _Curve:
+    """Rows sorted by score desc; last sorted position of each distinct score."""
+    labels: np.ndarray
+    scores: np.ndarray
+    thresholds_at: np.ndarray
+
+
+def _curve(labels: Sequence, scores: Sequence[float]) -> _Curve:
+    scores = np.asarray(scores, dtype=np.float64)
+    order = np.argsort(-scores, kind="stable")
+    sorted_scores = scores[order]
+    thresholds_at = np.append(np.flatnonzero(np.diff(sorted_scores)), len(scores) - 1)
+    return _Curve(np.asarray(labels)[order].astype(bool), sorted_scores, thresholds_at)
+
+
+def _counts(curve: _Curve):
+    """Cumulative (true positives, false positives) at each distinct threshold."""
+    tps = np.cumsum(curve.labels)[curve.thresholds_at].astype(np.float64)
+    fps = (curve.thresholds_at + 1) - tps
+    return tps, fps
+
+
+def _classification_metrics(
+    threshold_scores: np.ndarray, tps: np.ndarray, fps: np.ndarray, threshold: float, target_recall: float
+) -> Dict[str, float]:
+    """Metrics from cumulative counts at descending thresholds (threshold_scores)."""
+    pos, neg = (tps[-1], fps[-1]) if len(tps) else (0.0, 0.0)
+    nan = float("nan")
+    if pos == 0 or neg == 0:
+        return {"auc_roc": nan, "pr_auc": nan, "false_positive_rate": nan, f"precision_at_{round(target_recall * 100)}_recall": nan}
+    tpr = np.concatenate(([0.0], tps / pos))
+    fpr = np.concatenate(([0.0], fps / neg))
+    precision = tps / np.maximum(tps + fps, 1e-12)
+    recall = tps / pos
+    # Flagged rows at threshold: scores >= threshold, i.e. the last distinct score that is still >= it
+    at = np.searchsorted(-threshold_scores, -threshold, side="right") - 1
+    return {
+        "auc_roc": float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1])) / 2),
+        "pr_auc": float(np.sum(np.diff(np.concatenate(([0.0], recall))) * precision)),
+        "false_positive_rate": float(fps[at] / neg) if at >= 0 else 0.0,
+        f"precision_at_{round(target_recall * 100)}_recall": float(precision[recall >= target_recall].max()),
+    }
+
+
+def _metrics(curve: _Curve, threshold: float = 0.5, target_recall: float = 0.9) -> Dict[str, float]:
+    return _classification_metrics(curve.scores[curve.thresholds_at], *_counts(curve), threshold, target_recall)
+
+
+def roc_auc(labels, scores) -> float:
+    return _metrics(_curve(labels, scores))["auc_roc"]
+
+
+def pr_auc(labels, scores) -> float:
+    return _metrics(_curve(labels, scores))["pr_auc"]
+
+
+def fpr_at_threshold(labels, scores, threshold: float) -> float:
+    return _metrics(_curve(labels, scores), threshold=threshold)["false_positive_rate"]
+
+
+def precision_at_recall(labels, scores, target_recall: float = 0.9) -> float:
+    metrics = _metrics(_curve(labels, scores), target_recall=target_recall)
+    return metrics[f"precision_at_{round(target_recall * 100)}_recall"]
+
+
+def classification_report(
+    labels: Sequence,
+    scores: Sequence[float],
+    threshold: float = 0.5,
+    target_recall: float = 0.9,
+    n_boot: int = 1000,
+    alpha: float = 0.05,
+    seed: int = 0,
+    max_bins: int = 4096,
+) -> Dict[str, MetricEstimate]:
+    """
+    ROC-AUC, PR-AUC, FPR at threshold and precision at target recall, with bootstrap intervals.
+
+    Point values use every distinct threshold. Replicates resample positives
+    and negatives separately (class-stratified) as multinomial counts over at
+    most max_bins score bins, one of whose edges is the decision threshold, so
+    each replicate costs O(max_bins) however many rows there are.
+    """
+    curve = _curve(labels, scores)
+    threshold_scores = curve.scores[curve.thresholds_at]
+    tps, fps = _counts(curve)
+    point = _classification_metrics(threshold_scores, tps, fps, threshold, target_recall)
+
+    edges = curve.thresholds_at
+    if len(edges) > max_bins:
+        picks = np.linspace(0, len(edges) - 1, max_bins).astype(np.int64)
+        at = np.searchsorted(-threshold_scores, -threshold, side="right") - 1
+        picks = np.unique(np.append(picks, at) if at >= 0 else picks)
+    else:
+        picks = np.arange(len(edges))
+    bin_scores = threshold_scores[picks]
+    bin_pos = np.diff(tps[picks], prepend=0.0)
+    bin_neg = np.diff(fps[picks], prepend=0.0)
+
+    rng = np.random.default_rng(seed)
+    pos, neg = int(tps[-1]) if len(tps) else 0, int(fps[-1]) if len(fps) else 0
+    boot_tps = np.cumsum(rng.multinomial(pos, bin_pos / max(pos, 1), size=n_boot), axis=1) if pos else None
+    boot_fps = np.cumsum(rng.multinomial(neg, bin_neg / max(neg, 1), size=n_boot), axis=1) if neg else None
+    replicates: Dict[str, list] = {name: [] for name in point}
+    if boot_tps is not None and boot_fps is not None:
+        for i in range(n_boot):
+            replicate = _classification_metrics(bin_scores, boot_tps[i], boot_fps[i], threshold, target_recall)
+            for name, value in replicate.items():
+                replicates[name].append(value)
+
+    report = {}
+    for name, value in point.items():
+        values = np.asarray(replicates[name])
+        values = values[~np.isnan(values)]
+        low, high = np.quantile(values, [alpha / 2, 1 - alpha / 2]) if len(values) else (np.nan, np.nan)
+        report[name] = MetricEstimate(value, float(low), float(high))
+    return report
+
+
+def report_values(report: Dict[str, MetricEstimate]) -> Dict[str, Any]:
+    """Point values for check_quality_gates."""
+    return {name: estimate.value for name, estimate in report.items()}
@@ -0,0 +1,37 @@
+"""
+Feature store for offline tooling and training-set builds.
+
+The implementation ships with the services (services/shared/feature_store.py),
+since services/ is their Docker build context; this package re-exports it so
+code run from the repository root can use the same definitions and reads.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "services"))
+
+from shared.feature_store import (  # noqa: E402
+    FEATURE_VIEWS,
+    FRAUD_ACCOUNT,
+    MATCH_FREELANCER,
+    Feature,
+    FeatureStore,
+    FeatureView,
+    LocalBackend,
+    RedisBackend,
+    get_feature_store,
+    make_backend,
+)
+
+__all__ = [
+    "FEATURE_VIEWS",
+    "FRAUD_ACCOUNT",
+    "MATCH_FREELANCER",
+    "Feature",
+    "FeatureStore",
+    "FeatureView",
+    "LocalBackend",
+    "RedisBackend",
+    "get_feature_store",
+    "make_backend",
+]
@@ -1,36 +1,15 @@
-"""Model versioning utilities."""
-import re
-from dataclasses import dataclass
+"""
+Model versioning utilities.
 
+ModelVersion ships with the services (services/shared/model_registry.py),
+which resolve registered versions when loading models in-process; this
+module re-exports it so pipelines and services share one naming scheme.
+"""
+import os
+import sys
 
-@dataclass
-class ModelVersion:
-    name: str
-    major: int
-    minor: int
-    patch: int
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "services"))
 
-    @property
-    def display_name(self) -> str:
-        return f"mw-{self.name}-v{self.major}.{self.minor}.{self.patch}"
+from shared.model_registry import ModelVersion  # noqa: E402
 
-    def bump_patch(self) -> 'ModelVersion':
-        return ModelVersion(self.name, self.major, self.minor, self.patch + 1)
-
-    def bump_minor(self) -> 'ModelVersion':
-        return ModelVersion(self.name, self.major, self.minor + 1, 0)
-
-    def bump_major(self) -> 'ModelVersion':
-        return ModelVersion(self.name, self.major + 1, 0, 0)
-
-    @classmethod
-    def parse(cls, display_name: str) -> 'ModelVersion':
-        match = re.match(r'mw-(.+)-v(\d+)\.(\d+)\.(\d+)', display_name)
-        if not match:
-            raise ValueError(f"Invalid model version format: {display_name}")
-        return cls(
-            name=match.group(1),
-            major=int(match.group(2)),
-            minor=int(match.group(3)),
-            patch=int(match.group(4)),
-        )
+__all__ = ["ModelVersion"]
@@ -0,0 +1,191 @@
+"""Tests for ml.shared.evaluation.metrics against brute-force reference implementations."""
+import math
+import random
+
+import numpy as np
+import pytest
+
+from ml.shared.evaluation.metrics import (
+    classification_report,
+    fpr_at_threshold,
+    mean_reciprocal_rank,
+    ndcg_at_k,
+    per_query_ranking_metrics,
+    pr_auc,
+    roc_auc,
+)
+
+
+# ── Reference implementations ────────────────────────────────────────
+
+def _by_query(query_ids, *columns):
+    groups = {}
+    for row in zip(query_ids, *columns):
+        groups.setdefault(row[0], []).append(row[1:])
+    return groups
+
+
+def _ranked(rows):
+    # Python's sort is stable: tied scores keep input order, as the metrics do
+    return sorted(rows, key=lambda row: -row[0])
+
+
+def ref_ndcg(query_ids, scores, relevance, k):
+    values = []
+    for rows in _by_query(query_ids, scores, relevance).values():
+        dcg = sum((2 ** rel - 1) / math.log2(rank + 2) for rank, (_, rel) in enumerate(_ranked(rows)[:k]))
+        ideal = sorted((rel for _, rel in rows), reverse=True)[:k]
+        idcg = sum((2 ** rel - 1) / math.log2(rank + 2) for rank, rel in enumerate(ideal))
+        if idcg > 0:
+            values.append(dcg / idcg)
+    return sum(values) / len(values) if values else float("nan")
+
+
+def ref_mrr(query_ids, scores, relevance):
+    values = []
+    for rows in _by_query(query_ids, scores, relevance).values():
+        ranks = [rank for rank, (_, rel) in enumerate(_ranked(rows)) if rel > 0]
+        if ranks:
+            values.append(1 / (ranks[0] + 1))
+    return sum(values) / len(values) if values else float("nan")
+
+
+def ref_roc_auc(labels, scores):
+    pos = [s for y, s in zip(labels, scores) if y]
+    neg = [s for y, s in zip(labels, scores) if not y]
+    if not pos or not neg:
+        return float("nan")
+    wins = sum(1.0 if p > n else 0.5 if p == n else 0.0 for p in pos for n in neg)
+    return wins / (len(pos) * len(neg))
+
+
+def ref_average_precision(labels, scores):
+    """Sum over distinct thresholds of (recall gain) × precision; tied scores are one threshold."""
+    positives = sum(1 for y in labels if y)
+    if positives == 0 or positives == len(labels):
+        return float("nan")
+    total, previous_tp = 0.0, 0
+    for threshold in sorted(set(scores), reverse=True):
+        flagged = [y for y, s in zip(labels, scores) if s >= threshold]
+        tp = sum(1 for y in flagged if y)
+        total += (tp - previous_tp) / positives * tp / len(flagged)
+        previous_tp = tp
+    return total
+
+
+def ref_fpr(labels, scores, threshold):
+    neg = [s for y, s in zip(labels, scores) if not y]
+    if not neg or len(neg) == len(labels):
+        return float("nan")
+    return sum(1 for s in neg if s >= threshold) / len(neg)
+
+
+def _ranking_data(rng, queries=12):
+    query_ids, scores, relevance = [], [], []
+    for q in range(queries):
+        for _ in range(rng.randint(1, 15)):
+            query_ids.append(q)
+            # One decimal place, so scores tie often
+            scores.append(round(rng.random(), 1))
+            relevance.append(rng.choice([0, 0, 0, 1, 2, 3]))
+    return query_ids, scores, relevance
+
+
+def _classification_data(rng, n):
+    labels = [rng.random() < 0.3 for _ in range(n)]
+    scores = [round(rng.random(), 1) for _ in range(n)]
+    return labels, scores
+
+
+def _close(actual, expected):
+    if math.isnan(expected):
+        return math.isnan(actual)
+    return actual == pytest.approx(expected, abs=1e-12)
+
+
+# ── Ranking ──────────────────────────────────────────────────────────
+
+class TestRankingMetrics:
+    """NDCG and MRR against the brute-force references"""
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_random_queries_with_ties(self, seed):
+        rng = random.Random(seed)
+        query_ids, scores, relevance = _ranking_data(rng)
+        for k in (1, 3, 10):
+            assert _close(ndcg_at_k(query_ids, scores, relevance, k=k), ref_ndcg(query_ids, scores, relevance, k))
+        assert _close(mean_reciprocal_rank(query_ids, scores, relevance), ref_mrr(query_ids, scores, relevance))
+
+    def test_tied_scores_keep_input_order(self):
+        # The relevant item ties with two others; it ranks where it was given
+        assert mean_reciprocal_rank([1, 1, 1], [0.5, 0.5, 0.5], [0, 0, 1]) == pytest.approx(1 / 3)
+        assert mean_reciprocal_rank([1, 1, 1], [0.5, 0.5, 0.5], [1, 0, 0]) == 1.0
+
+    def test_queries_without_relevant_items_are_skipped(self):
+        per_query = per_query_ranking_metrics([1, 1, 2, 2], [0.9, 0.1, 0.9, 0.1], [0, 0, 0, 1])
+        assert np.isnan(per_query["ndcg_at_10"][0])
+        assert np.isnan(per_query["mean_reciprocal_rank"][0])
+        assert mean_reciprocal_rank([1, 1, 2, 2], [0.9, 0.1, 0.9, 0.1], [0, 0, 0, 1]) == 0.5
+
+    def test_string_query_ids_match_integer_ids(self):
+        rng = random.Random(7)
+        query_ids, scores, relevance = _ranking_data(rng)
+        names = [f"job-{q:03d}" for q in query_ids]
+        assert ndcg_at_k(names, scores, relevance) == pytest.approx(ndcg_at_k(query_ids, scores, relevance))
+        assert ndcg_at_k(names, scores, relevance) == pytest.approx(ref_ndcg(names, scores, relevance, 10))
+        assert mean_reciprocal_rank(names, scores, relevance) == pytest.approx(ref_mrr(names, scores, relevance))
+
+    def test_interleaved_query_rows(self):
+        query_ids = ["b", "a", "b", "a", "b"]
+        scores = [0.2, 0.9, 0.8, 0.1, 0.5]
+        relevance = [1, 0, 0, 2, 1]
+        assert ndcg_at_k(query_ids, scores, relevance) == pytest.approx(ref_ndcg(query_ids, scores, relevance, 10))
+        assert mean_reciprocal_rank(query_ids, scores, relevance) == pytest.approx(
+            ref_mrr(query_ids, scores, relevance)
+        )
+
+
+# ── Classification ───────────────────────────────────────────────────
+
+class TestClassificationMetrics:
+    """ROC-AUC, average precision and FPR against the brute-force references"""
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_random_scores_with_ties(self, seed):
+        rng = random.Random(seed)
+        labels, scores = _classification_data(rng, rng.randint(2, 60))
+        assert _close(roc_auc(labels, scores), ref_roc_auc(labels, scores))
+        assert _close(pr_auc(labels, scores), ref_average_precision(labels, scores))
+        for threshold in (0.0, 0.35, 0.5, 0.9, 1.1):
+            assert _close(fpr_at_threshold(labels, scores, threshold), ref_fpr(labels, scores, threshold))
+
+    def test_all_scores_tied(self):
+        labels = [1, 0, 1, 0, 0]
+        scores = [0.4] * 5
+        assert roc_auc(labels, scores) == 0.5
+        assert pr_auc(labels, scores) == pytest.approx(0.4)
+        assert fpr_at_threshold(labels, scores, 0.4) == 1.0
+        assert fpr_at_threshold(labels, scores, 0.5) == 0.0
+
+    def test_threshold_on_a_tied_score_flags_the_whole_tie(self):
+        labels = [0, 0, 1, 0]
+        scores = [0.5, 0.5, 0.7, 0.2]
+        assert fpr_at_threshold(labels, scores, 0.5) == pytest.approx(2 / 3)
+
+    @pytest.mark.parametrize("labels", [[1, 1, 1], [0, 0, 0]])
+    def test_single_class_is_undefined(self, labels):
+        scores = [0.2, 0.5, 0.9]
+        assert math.isnan(roc_auc(labels, scores))
+        assert math.isnan(pr_auc(labels, scores))
+        assert math.isnan(fpr_at_threshold(labels, scores, 0.5))
+        report = classification_report(labels, scores, n_boot=10)
+        assert all(math.isnan(estimate.value) for estimate in report.values())
+
+    def test_report_point_values_match_references(self):
+        rng = random.Random(3)
+        labels, scores = _classification_data(rng, 200)
+        report = classification_report(labels, scores, threshold=0.6, n_boot=50)
+        assert report["auc_roc"].value == pytest.approx(ref_roc_auc(labels, scores))
+        assert report["pr_auc"].value == pytest.approx(ref_average_precision(labels, scores))
+        assert report["false_positive_rate"].value == pytest.approx(ref_fpr(labels, scores, 0.6))
+        assert report["auc_roc"].low <= report["auc_roc"].value <= report["auc_roc"].high
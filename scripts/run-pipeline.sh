@@ -8,6 +8,11 @@ REGION="${REGION:-us-central1}"
 
 echo "=== Running Vertex AI Pipeline: $PIPELINE ($ENV) ==="
 
+# Component image with ml.shared (evaluation gates)
+export ML_COMPONENT_IMAGE="${REGION}-docker.pkg.dev/${PROJECT_ID}/mw-${ENV}-services/ml-components:$(date +%Y%m%d-%H%M%S)"
+docker build -t "$ML_COMPONENT_IMAGE" ml/
+docker push "$ML_COMPONENT_IMAGE"
+
 cd ml/${PIPELINE}
 
 # Compile pipeline
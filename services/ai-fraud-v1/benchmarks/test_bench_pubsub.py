@@ -0,0 +1,55 @@
+"""Benchmarks for subscribe_async dispatch on the in-memory Pub/Sub backend (shared.pubsub_memory)."""
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from shared import pubsub
+from shared.pubsub_memory import broker
+
+TOPIC = "bench-topic"
+MESSAGES = 500
+
+
+@pytest.fixture(autouse=True)
+def memory_backend():
+    with patch.object(pubsub, "PUBSUB_BACKEND", "memory"), \
+            patch.object(pubsub.schema_registry, "enabled", False):
+        yield
+
+
+def _publish(keys: int):
+    """Fresh subscription with MESSAGES waiting on it (a pedantic setup, not timed)."""
+    broker.reset()
+    pubsub.ensure_topic(TOPIC)
+    pubsub.ensure_subscription(TOPIC, "bench-sub", enable_message_ordering=bool(keys))
+    for i in range(MESSAGES):
+        pubsub.publish_message(TOPIC, {"event": "bench", "entity_id": f"e-{i % keys if keys else i}", "seq": i})
+    return (keys,), {}
+
+
+def _drain(keys: int) -> int:
+    handled = []
+
+    async def handler(data: dict) -> None:
+        handled.append(data["seq"])
+
+    async def run():
+        task = asyncio.create_task(pubsub.subscribe_async(
+            TOPIC, "bench-sub", handler,
+            max_messages=100, poll_interval=0.001,
+            ordering_key=pubsub.key_by("entity_id") if keys else None,
+        ))
+        while broker.pending():
+            await asyncio.sleep(0.001)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    return len(handled)
+
+
+@pytest.mark.parametrize("keys", [0, 50], ids=["unordered", "keyed"])
+def test_subscribe_async_dispatch(benchmark, keys):
+    handled = benchmark.pedantic(_drain, setup=lambda: _publish(keys), rounds=10)
+    assert handled == MESSAGES
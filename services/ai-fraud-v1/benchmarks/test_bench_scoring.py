@@ -0,0 +1,37 @@
+"""Benchmarks for rule-based fraud scoring (compute_fraud_score) and its request/response models."""
+import pytest
+
+from src.routes import FraudCheckRequest, FraudResponse, compute_fraud_score
+
+PAYLOADS = {
+    "minimal": {"account_id": "acc-1"},
+    "clean": {
+        "account_id": "acc-2", "cover_letter": "I have shipped three similar dashboards in React and Django. " * 4,
+        "bid_amount": 2500.0, "job_budget_min": 2000.0, "job_budget_max": 4000.0,
+        "job_skills": ["React", "Django"], "freelancer_skills": ["react", "django", "AWS"],
+        "account_age_days": 400, "proposals_last_hour": 1, "total_proposals": 80,
+    },
+    "every_signal": {
+        "account_id": "acc-3", "cover_letter": "hi", "bid_amount": 100.0, "job_budget_min": 2000.0,
+        "job_budget_max": 4000.0, "job_skills": ["Go", "Kubernetes"], "freelancer_skills": ["Figma"],
+        "account_age_days": 1, "proposals_last_hour": 25, "total_proposals": 40,
+    },
+}
+
+
+@pytest.mark.parametrize("shape", list(PAYLOADS))
+def test_compute_fraud_score(benchmark, shape):
+    request = FraudCheckRequest.model_validate(PAYLOADS[shape])
+    response = benchmark(compute_fraud_score, request)
+    assert 0.0 <= response.fraud_score <= 1.0
+
+
+def test_parse_fraud_request(benchmark):
+    request = benchmark(FraudCheckRequest.model_validate, PAYLOADS["clean"])
+    assert request.account_age_days == 400
+
+
+def test_serialize_fraud_response(benchmark):
+    response = compute_fraud_score(FraudCheckRequest.model_validate(PAYLOADS["every_signal"]))
+    body = benchmark(response.model_dump_json)
+    assert FraudResponse.model_validate_json(body) == response
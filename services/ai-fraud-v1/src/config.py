@@ -13,9 +13,25 @@ class Settings(BaseModel):
     feature_enabled: bool = os.getenv("FEATURE_FLAG_AI_FRAUD_V1", "true").lower() == "true"
     fallback_mode: str = os.getenv("FALLBACK_MODE", "manual")
 
+    # Read per-entity features from shared.feature_store (FEATURE_STORE_URL).
+    # Off until every feature the view serves has a writer and all deployments
+    # point FEATURE_STORE_URL at the shared backend (the default is per-process).
+    feature_store_enabled: bool = os.getenv("FEATURE_STORE_ENABLED", "false").lower() == "true"
+
+    # Model experiment (shared.experiments): treatment = this version of the registered model
+    ab_experiment: str = os.getenv("FRAUD_AB_EXPERIMENT", "fraud-model")
+    ab_mode: str = os.getenv("FRAUD_AB_MODE", "shadow")  # shadow | split
+    ab_treatment_share: float = float(os.getenv("FRAUD_AB_TREATMENT_SHARE", "0"))
+    ab_treatment_version: str = os.getenv("FRAUD_AB_TREATMENT_VERSION", "latest")
+    ab_salt: str = os.getenv("FRAUD_AB_SALT", "")
+
     # Model
     model_endpoint: str = os.getenv("MODEL_ENDPOINT", "")
+    # Registered version served in-process from MODEL_REGISTRY_URI (shared.model_serving), or
+    # "latest"; a version named in MODEL_MANIFEST_URI takes over at runtime unless pinned
     model_version: str = os.getenv("MODEL_VERSION", "v1.0.0")
+    # Serve model_version and ignore MODEL_MANIFEST_URI promotions
+    model_pinned: bool = os.getenv("MODEL_PINNED", "false").lower() == "true"
 
 
 settings = Settings()
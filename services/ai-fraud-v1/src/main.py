@@ -6,6 +6,7 @@ Subscribes to:
 
 Exposes:
   - POST /api/v1/fraud/check  → sync fraud score for proposals (<500ms)
+  - GET  /metrics             → Prometheus metrics (shared.metrics)
 """
 
 import os
@@ -20,6 +21,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
 
 from src.routes import router
 from src.config import settings
+from shared.metrics import install_metrics, mark_process_dead
+from shared.tracing import init_tracing, shutdown_tracing
 
 logger = structlog.get_logger()
 
@@ -49,13 +52,54 @@ async def _start_subscribers():
         logger.exception("subscriber_start_failed")
 
 
+async def _start_context_cache():
+    """Create or reuse provider-side caches for the static prompt prefixes."""
+    try:
+        from src.vertex_ai import CACHED_INSTRUCTIONS, VERTEX_MODEL, is_vertex_enabled
+
+        if not is_vertex_enabled():
+            return
+        from shared.context_cache import context_cache
+
+        await context_cache.start(SERVICE_NAME, VERTEX_MODEL, CACHED_INSTRUCTIONS)
+    except Exception:
+        logger.exception("context_cache_start_failed")
+
+
+async def _start_model():
+    """Load the registered model off the event loop and start following the manifest."""
+    try:
+        from shared.model_serving import get_model_server
+        from src.routes import MODEL_NAME
+
+        await get_model_server(MODEL_NAME, settings.model_version, settings.model_pinned).start()
+        if settings.ab_treatment_share > 0:
+            from src.routes import TREATMENT_KEY
+
+            await get_model_server(MODEL_NAME, settings.ab_treatment_version, pinned=True, key=TREATMENT_KEY).start()
+    except Exception:
+        logger.exception("model_start_failed")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("service_starting", service=SERVICE_NAME, version=VERSION)
+    init_tracing(SERVICE_NAME)
     await _start_subscribers()
+    await _start_context_cache()
+    await _start_model()
     yield
     if _subscriber_task:
         _subscriber_task.cancel()
+    from shared.model_serving import get_model_server
+    from src.routes import MODEL_NAME
+    await get_model_server(MODEL_NAME).stop()
+    from shared.context_cache import context_cache
+    await context_cache.stop()
+    from shared.feature_log import get_feature_log
+    await asyncio.to_thread(get_feature_log(SERVICE_NAME).flush)
+    await asyncio.to_thread(shutdown_tracing)
+    mark_process_dead()
     logger.info("service_stopping", service=SERVICE_NAME)
 
 
@@ -66,6 +110,7 @@ app = FastAPI(
 )
 
 app.include_router(router)
+install_metrics(app)
 
 
 @app.get("/healthz")
@@ -5,6 +5,8 @@ Sync endpoint (POST /check) must respond in < 500ms P99.
 """
 
 import time
+import uuid
+import asyncio
 import hashlib
 from fastapi import APIRouter
 from pydantic import BaseModel, Field
@@ -12,7 +14,7 @@ from typing import List, Optional
 import structlog
 
 from src.config import settings
-from src.audit import log_ai_decision
+from src.audit import audit_ai_decision
 
 logger = structlog.get_logger()
 
@@ -20,6 +22,11 @@ router = APIRouter(prefix="/api/v1/fraud")
 
 MODEL_VERSION = f"fraud-{settings.model_version}"
 
+# Registered model scored in-process (shared.model_serving); rules are the fallback
+MODEL_NAME = "fraud-v1"
+# Second copy of the model, at the version under evaluation (shared.experiments)
+TREATMENT_KEY = "fraud-v1:treatment"
+
 
 # ── Request / Response models ────────────────────────────────────────
 
@@ -55,6 +62,7 @@ class FraudResponse(BaseModel):
     top_risk_factors: List[RiskFactor]
     model_version: str
     enforcement_mode: str
+    ab_group: str = "control"  # control | treatment
 
 
 # ── Scoring functions ────────────────────────────────────────────────
@@ -166,10 +174,29 @@ def _skill_match_score(
     return 0.0, None
 
 
-def compute_fraud_score(request: FraudCheckRequest) -> FraudResponse:
+def _risk_tier(score: float) -> tuple[str, str]:
+    """(risk tier, recommended action) for a fraud score."""
+    if score >= 0.8:
+        return "critical", "block"
+    if score >= 0.5:
+        return "high", "review"
+    if score >= 0.3:
+        return "medium", "allow"
+    return "low", "allow"
+
+
+def compute_fraud_score(
+    request: FraudCheckRequest,
+    decision_id: Optional[str] = None,
+    model_score: Optional[float] = None,
+    model=None,
+) -> FraudResponse:
     """
     Rule-based fraud scoring (Phase 1).
     Scores from multiple signals are combined with max-aggregation.
+
+    With model_score (from the in-process model) that score sets the tier and
+    action; the rule signals are still reported as the risk factors.
     """
     start = time.monotonic()
     risk_factors: List[RiskFactor] = []
@@ -209,20 +236,13 @@ def compute_fraud_score(request: FraudCheckRequest) -> FraudResponse:
 
     # Clamp to [0, 1]
     score = min(score, 1.0)
+    if model_score is not None:
+        score = min(max(float(model_score), 0.0), 1.0)
+    model_name = f"fraud-{model.kind}" if model is not None else "fraud-rule-engine"
+    model_version = model.display_name if model is not None else MODEL_VERSION
 
     # Determine tier and action
-    if score >= 0.8:
-        risk_tier = "critical"
-        action = "block"
-    elif score >= 0.5:
-        risk_tier = "high"
-        action = "review"
-    elif score >= 0.3:
-        risk_tier = "medium"
-        action = "allow"
-    else:
-        risk_tier = "low"
-        action = "allow"
+    risk_tier, action = _risk_tier(score)
 
     # Sort factors by contribution (highest first)
     risk_factors.sort(key=lambda f: f.contribution, reverse=True)
@@ -231,13 +251,14 @@ def compute_fraud_score(request: FraudCheckRequest) -> FraudResponse:
 
     elapsed_ms = int((time.monotonic() - start) * 1000)
 
-    # Audit log
-    log_ai_decision(
+    # Audit log (written in the background)
+    audit_ai_decision(
+        decision_id=decision_id,
         decision_type="fraud_check",
         entity_type=request.entity_type,
         entity_id=request.entity_id or request.account_id,
-        model_name="fraud-rule-engine",
-        model_version=MODEL_VERSION,
+        model_name=model_name,
+        model_version=model_version,
         output={
             "fraud_score": score,
             "risk_tier": risk_tier,
@@ -256,23 +277,197 @@ def compute_fraud_score(request: FraudCheckRequest) -> FraudResponse:
         risk_tier=risk_tier,
         recommended_action=action,
         top_risk_factors=risk_factors[:5],
-        model_version=MODEL_VERSION,
+        model_version=model_version,
         enforcement_mode=enforcement,
     )
 
 
+# ── Stored features ──────────────────────────────────────────────────
+
+# FraudCheckRequest field ← fraud_account feature
+_STORED_CONTEXT = {
+    "proposals_last_hour": "proposals_sent_1h",
+    "total_proposals": "proposals_sent_total",
+}
+
+
+async def with_stored_features(request: FraudCheckRequest) -> FraudCheckRequest:
+    """
+    Fill account context the caller left out from the fraud_account feature view.
+
+    Values sent inline still win, so the API can stop computing them per call
+    one field at a time.
+    """
+    if not settings.feature_store_enabled:
+        return request
+    try:
+        from shared.feature_store import get_feature_store
+
+        features = await asyncio.to_thread(get_feature_store().get, "fraud_account", request.account_id)
+    except Exception:
+        logger.exception("feature_store_read_failed", account_id=request.account_id)
+        return request
+
+    updates = {
+        field: features[name]
+        for field, name in _STORED_CONTEXT.items()
+        if getattr(request, field) is None and features[name] is not None
+    }
+    if request.account_age_days is None and features["account_created_at"] is not None:
+        updates["account_age_days"] = max(0, int((time.time() - features["account_created_at"]) // 86400))
+    return request.model_copy(update=updates) if updates else request
+
+
+def decision_features(request: FraudCheckRequest) -> dict:
+    """The scalar inputs a fraud check is scored on (logged per decision for training)."""
+    job_skills = {s.lower() for s in request.job_skills}
+    freelancer_skills = {s.lower() for s in request.freelancer_skills}
+    return {
+        "entity_type": request.entity_type,
+        "cover_letter_length": len(request.cover_letter.strip()) if request.cover_letter else None,
+        "bid_amount": request.bid_amount,
+        "job_budget_min": request.job_budget_min,
+        "job_budget_max": request.job_budget_max,
+        "job_skill_count": len(job_skills),
+        "freelancer_skill_count": len(freelancer_skills),
+        "skill_overlap": len(job_skills & freelancer_skills),
+        "account_age_days": request.account_age_days,
+        "proposals_last_hour": request.proposals_last_hour,
+        "total_proposals": request.total_proposals,
+    }
+
+
+def _log_features(request: FraudCheckRequest, response: FraudResponse, decision_id: str) -> None:
+    try:
+        from shared.feature_log import get_feature_log
+
+        get_feature_log(settings.service_name).log(
+            "fraud_check",
+            entity_id=request.account_id,
+            decision_id=decision_id,
+            features=decision_features(request),
+            output={
+                "fraud_score": response.fraud_score,
+                "risk_tier": response.risk_tier,
+                "recommended_action": response.recommended_action,
+            },
+            model_version=response.model_version,
+        )
+    except Exception:
+        logger.exception("feature_log_failed", account_id=request.account_id)
+
+
+def active_model():
+    """The fraud model serving control traffic, or None."""
+    from shared.model_serving import get_model_server
+
+    return get_model_server(MODEL_NAME, settings.model_version, settings.model_pinned).model
+
+
+def treatment_model():
+    """The fraud model under evaluation (FRAUD_AB_TREATMENT_VERSION), or None."""
+    from shared.model_serving import get_model_server
+
+    return get_model_server(MODEL_NAME, settings.ab_treatment_version, pinned=True, key=TREATMENT_KEY).model
+
+
+async def _score_with_model(request: FraudCheckRequest, decision_id: str, model) -> Optional[FraudResponse]:
+    """Score with a registered model loaded in-process; None when absent or failing."""
+    if model is None:
+        return None
+    try:
+        score = await model.score(decision_features(request))
+    except Exception:
+        logger.exception("model_fraud_check_error", model=model.display_name)
+        return None
+    return compute_fraud_score(request, decision_id, model_score=score, model=model)
+
+
+# ── Experiments ──────────────────────────────────────────────────────
+
+def model_experiment():
+    from shared.experiments import get_experiment
+
+    return get_experiment(
+        settings.ab_experiment,
+        treatment_share=settings.ab_treatment_share,
+        mode=settings.ab_mode,
+        salt=settings.ab_salt,
+        pair_log=settings.service_name,
+    )
+
+
+def _outcome(response: FraudResponse, latency_ms: float):
+    from shared.experiments import Outcome
+
+    return Outcome(
+        score=response.fraud_score,
+        latency_ms=latency_ms,
+        detail={
+            "risk_tier": response.risk_tier,
+            "recommended_action": response.recommended_action,
+            "model_version": response.model_version,
+        },
+    )
+
+
+async def _shadow_score(request: FraudCheckRequest, model):
+    """The treatment model's verdict on a check already answered by control (no audit, no feature log)."""
+    from shared.experiments import Outcome
+
+    start = time.monotonic()
+    score = min(max(await model.score(decision_features(request)), 0.0), 1.0)
+    risk_tier, action = _risk_tier(score)
+    return Outcome(
+        score=round(score, 4),
+        latency_ms=(time.monotonic() - start) * 1000,
+        detail={"risk_tier": risk_tier, "recommended_action": action, "model_version": model.display_name},
+    )
+
+
 # ── Endpoints ────────────────────────────────────────────────────────
 
 @router.post("/check", response_model=FraudResponse)
 async def check_fraud(request: FraudCheckRequest):
     """
     Synchronous fraud check — called by the PHP API during proposal submission.
-    In production: tries Vertex AI for deep analysis, falls back to rules.
+    Scores with the registered model in-process when one is loaded; otherwise
+    tries Vertex AI for deep analysis, falling back to rules.
+    Under the model experiment (FRAUD_AB_*) treatment-arm accounts are scored
+    by the treatment model (split) or re-scored by it in the background (shadow).
     Must respond in < 500ms P99.
     """
+    request = await with_stored_features(request)
+    decision_id = str(uuid.uuid4())
+
+    experiment = model_experiment()
+    treatment = treatment_model() if experiment.enabled else None
+    arm = "treatment" if treatment is not None and experiment.serves_treatment(request.account_id) else "control"
+
+    start = time.monotonic()
+    response = await _decide(request, decision_id, treatment if arm == "treatment" else active_model())
+    response.ab_group = arm
+    _log_features(request, response, decision_id)
+
+    if experiment.enabled:
+        control = _outcome(response, (time.monotonic() - start) * 1000)
+        experiment.observe(arm, control)
+        if treatment is not None:
+            experiment.shadow(request.account_id, decision_id, control, lambda: _shadow_score(request, treatment))
+    return response
+
+
+async def _decide(request: FraudCheckRequest, decision_id: str, model) -> FraudResponse:
+    """In-process model, then Vertex AI, then the rules."""
     from src.vertex_ai import analyze_proposal_fraud, is_vertex_enabled
+    from shared.metrics import record_fallback
+
+    response = await _score_with_model(request, decision_id, model)
+    if response is not None:
+        return response
 
     if is_vertex_enabled():
+        start = time.monotonic()
         try:
             result = await analyze_proposal_fraud(
                 cover_letter=request.cover_letter or "",
@@ -286,7 +481,7 @@ async def check_fraud(request: FraudCheckRequest):
                 total_proposals=request.total_proposals,
             )
             if result:
-                return FraudResponse(
+                response = FraudResponse(
                     account_id=request.account_id,
                     entity_type=request.entity_type,
                     entity_id=request.entity_id,
@@ -299,11 +494,37 @@ async def check_fraud(request: FraudCheckRequest):
                     model_version=f"vertex-ai/{result.get('model', 'gemini-3-flash-preview')}",
                     enforcement_mode=settings.fallback_mode,
                 )
+                audit_ai_decision(
+                    decision_id=decision_id,
+                    decision_type="fraud_check",
+                    entity_type=request.entity_type,
+                    entity_id=request.entity_id or request.account_id,
+                    model_name="fraud-vertex-ai",
+                    model_version=response.model_version,
+                    output={
+                        "fraud_score": response.fraud_score,
+                        "risk_tier": response.risk_tier,
+                        "recommended_action": response.recommended_action,
+                        "factors_count": len(response.top_risk_factors),
+                    },
+                    confidence_score=1.0 - response.fraud_score,
+                    latency_ms=result.get("latency_ms") or int((time.monotonic() - start) * 1000),
+                )
+                return response
         except Exception:
             logger.exception("vertex_fraud_check_error")
+        record_fallback("proposal_fraud")
 
     # Fallback to rule-based scoring
-    return compute_fraud_score(request)
+    return compute_fraud_score(request, decision_id)
+
+
+@router.get("/experiments")
+async def list_experiments():
+    """Per-arm latency and score distributions of the running experiments."""
+    from shared.experiments import experiments
+
+    return {"experiments": [e.snapshot() for e in experiments()]}
 
 
 @router.post("/anomaly")
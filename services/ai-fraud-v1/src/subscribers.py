@@ -6,11 +6,36 @@ Handles:
 """
 
 import time
+from datetime import datetime
 import structlog
 
 logger = structlog.get_logger()
 
 
+def _record_account_features(user_id: str, data: dict) -> None:
+    """Seed the account's fraud_account features from the registration event."""
+    from src.config import settings
+
+    if not settings.feature_store_enabled:
+        return
+    email = data.get("email", "")
+    created_at = time.time()
+    if data.get("created_at"):
+        try:
+            created_at = datetime.fromisoformat(data["created_at"]).timestamp()
+        except ValueError:
+            pass
+    try:
+        from shared.feature_store import get_feature_store
+
+        get_feature_store().write("fraud_account", user_id, {
+            "account_created_at": created_at,
+            "email_domain": email.split("@")[-1].lower() if "@" in email else None,
+        })
+    except Exception:
+        logger.exception("feature_store_write_failed", user_id=user_id)
+
+
 async def handle_user_registered(data: dict) -> None:
     """
     Async handler for UserRegistered events.
@@ -29,8 +54,11 @@ async def handle_user_registered(data: dict) -> None:
 
     logger.info("fraud_baseline_start", user_id=user_id, role=role)
     start = time.monotonic()
+    _record_account_features(user_id, data)
 
     # ── Try Vertex AI first ──────────────────────────────────────────
+    from shared.metrics import record_fallback
+
     try:
         from src.vertex_ai import analyze_account_fraud, is_vertex_enabled
 
@@ -66,8 +94,10 @@ async def handle_user_registered(data: dict) -> None:
                     latency_ms=int((time.monotonic() - start) * 1000),
                 )
                 return
+            record_fallback("account_fraud")
     except Exception:
         logger.exception("vertex_fraud_baseline_error", user_id=user_id)
+        record_fallback("account_fraud")
 
     # ── Fallback: Rule-based baseline scoring ────────────────────────
     score = 0.0
@@ -48,16 +48,10 @@ def is_vertex_enabled() -> bool:
 
 # ── Account Fraud Baseline ───────────────────────────────────────────
 
-ACCOUNT_BASELINE_PROMPT = """You are an AI fraud analyst for MonkeysWork, a freelance marketplace.
-Analyze this new account registration for fraud risk indicators.
-
-ACCOUNT DATA:
-- Email: {email}
-- Role: {role}
-- Registration IP: {ip}
-- User Agent: {user_agent}
-- Display Name: {display_name}
-- Account Created: {created_at}
+# Static instructions (cached provider-side, see shared.context_cache);
+# ACCOUNT_BASELINE_PROMPT carries only the per-request data.
+ACCOUNT_BASELINE_INSTRUCTIONS = """You are an AI fraud analyst for MonkeysWork, a freelance marketplace.
+Analyze the new account registration below for fraud risk indicators.
 
 EVALUATE for fraud signals:
 1. Email quality (disposable/temp domain, numeric-heavy, suspicious patterns)
@@ -66,19 +60,27 @@ EVALUATE for fraud signals:
 4. Overall risk assessment
 
 Respond in STRICT JSON only:
-{{
+{
   "fraud_score": <float 0.0-1.0, 0=clean 1=definitely fraudulent>,
   "risk_tier": "<low|medium|high|critical>",
   "risk_factors": [
-    {{
+    {
       "factor": "<factor_name>",
       "contribution": <float 0.0-1.0>,
       "description": "<detailed explanation>"
-    }}
+    }
   ],
   "recommended_action": "<allow|monitor|review|block>",
   "reasoning": "<brief overall assessment>"
-}}"""
+}"""
+
+ACCOUNT_BASELINE_PROMPT = """ACCOUNT DATA:
+- Email: {email}
+- Role: {role}
+- Registration IP: {ip}
+- User Agent: {user_agent}
+- Display Name: {display_name}
+- Account Created: {created_at}"""
 
 
 async def analyze_account_fraud(
@@ -93,20 +95,31 @@ async def analyze_account_fraud(
     if not is_vertex_enabled():
         return None
 
-    prompt = ACCOUNT_BASELINE_PROMPT.format(
-        email=email,
-        role=role,
-        ip=ip or "Not available",
-        user_agent=user_agent or "Not available",
-        display_name=display_name or "Not provided",
-        created_at=created_at or "Unknown",
+    from shared.prompting import PromptBuilder, estimate_tokens, log_token_usage
+    from shared.context_cache import context_cache
+    from shared.metrics import observe_model
+
+    prompt = (
+        PromptBuilder(
+            ACCOUNT_BASELINE_PROMPT, "account_fraud",
+            reserved_tokens=estimate_tokens(ACCOUNT_BASELINE_INSTRUCTIONS),
+        )
+        .add("email", email)
+        .add("role", role)
+        .add("ip", ip or "Not available")
+        .add("user_agent", user_agent or "Not available", priority=2, min_tokens=30)
+        .add("display_name", display_name or "Not provided", priority=1, min_tokens=20)
+        .add("created_at", created_at or "Unknown")
+        .build()
     )
 
     try:
         start = time.monotonic()
-        model = _get_model()
-        response = model.generate_content(
-            prompt,
+        model, contents = context_cache.prepare(
+            "account_fraud", ACCOUNT_BASELINE_INSTRUCTIONS, prompt.text, _get_model(),
+        )
+        response = observe_model(model, "account_fraud").generate_content(
+            contents,
             generation_config={
                 "temperature": 0.1,
                 "max_output_tokens": 1024,
@@ -114,6 +127,8 @@ async def analyze_account_fraud(
             },
         )
 
+        log_token_usage("account_fraud", response, prompt)
+
         text = response.text.strip()
         if text.startswith("```"):
             text = text.split("\n", 1)[1]
@@ -190,23 +205,28 @@ async def analyze_proposal_fraud(
     if not is_vertex_enabled():
         return None
 
-    prompt = PROPOSAL_FRAUD_PROMPT.format(
-        cover_letter=cover_letter or "Not provided",
-        bid_amount=bid_amount or "N/A",
-        budget_min=budget_min or "N/A",
-        budget_max=budget_max or "N/A",
-        job_skills=", ".join(job_skills or []),
-        freelancer_skills=", ".join(freelancer_skills or []),
-        account_age_days=account_age_days if account_age_days is not None else "Unknown",
-        proposals_last_hour=proposals_last_hour if proposals_last_hour is not None else "Unknown",
-        total_proposals=total_proposals if total_proposals is not None else "Unknown",
+    from shared.prompting import PromptBuilder, dedupe_skills, log_token_usage
+    from shared.metrics import observe_model
+
+    prompt = (
+        PromptBuilder(PROPOSAL_FRAUD_PROMPT, "proposal_fraud")
+        .add("cover_letter", cover_letter or "Not provided", priority=2, min_tokens=300)
+        .add("bid_amount", bid_amount or "N/A")
+        .add("budget_min", budget_min or "N/A")
+        .add("budget_max", budget_max or "N/A")
+        .add("job_skills", ", ".join(dedupe_skills(job_skills)), priority=1, min_tokens=50)
+        .add("freelancer_skills", ", ".join(dedupe_skills(freelancer_skills)), priority=1, min_tokens=50)
+        .add("account_age_days", account_age_days if account_age_days is not None else "Unknown")
+        .add("proposals_last_hour", proposals_last_hour if proposals_last_hour is not None else "Unknown")
+        .add("total_proposals", total_proposals if total_proposals is not None else "Unknown")
+        .build()
     )
 
     try:
         start = time.monotonic()
         model = _get_model()
-        response = model.generate_content(
-            prompt,
+        response = observe_model(model, "proposal_fraud").generate_content(
+            prompt.text,
             generation_config={
                 "temperature": 0.1,
                 "max_output_tokens": 1024,
@@ -214,6 +234,8 @@ async def analyze_proposal_fraud(
             },
         )
 
+        log_token_usage("proposal_fraud", response, prompt)
+
         text = response.text.strip()
         if text.startswith("```"):
             text = text.split("\n", 1)[1]
@@ -293,25 +315,30 @@ async def detect_behavioral_anomaly(
     if not is_vertex_enabled():
         return None
 
-    prompt = ANOMALY_PROMPT.format(
-        account_age_days=account_age_days,
-        role=role,
-        total_proposals=total_proposals,
-        proposals_24h=proposals_24h,
-        avg_bid=avg_bid,
-        jobs_completed=jobs_completed,
-        avg_rating=avg_rating,
-        disputes=disputes,
-        messages_24h=messages_24h,
-        login_locations=", ".join(login_locations or ["Unknown"]),
-        payment_changes=payment_changes,
+    from shared.prompting import PromptBuilder, dedupe_skills, log_token_usage
+    from shared.metrics import observe_model
+
+    prompt = (
+        PromptBuilder(ANOMALY_PROMPT, "behavior_anomaly")
+        .add("account_age_days", account_age_days)
+        .add("role", role)
+        .add("total_proposals", total_proposals)
+        .add("proposals_24h", proposals_24h)
+        .add("avg_bid", avg_bid)
+        .add("jobs_completed", jobs_completed)
+        .add("avg_rating", avg_rating)
+        .add("disputes", disputes)
+        .add("messages_24h", messages_24h)
+        .add("login_locations", ", ".join(dedupe_skills(login_locations) or ["Unknown"]), priority=1, min_tokens=30)
+        .add("payment_changes", payment_changes)
+        .build()
     )
 
     try:
         start = time.monotonic()
         model = _get_model()
-        response = model.generate_content(
-            prompt,
+        response = observe_model(model, "behavior_anomaly").generate_content(
+            prompt.text,
             generation_config={
                 "temperature": 0.1,
                 "max_output_tokens": 1024,
@@ -319,6 +346,8 @@ async def detect_behavioral_anomaly(
             },
         )
 
+        log_token_usage("behavior_anomaly", response, prompt)
+
         text = response.text.strip()
         if text.startswith("```"):
             text = text.split("\n", 1)[1]
@@ -339,3 +368,9 @@ async def detect_behavioral_anomaly(
     except Exception as e:
         logger.exception("vertex_anomaly_failed", error=str(e))
         return None
+
+
+# Instruction prefixes cached provider-side at startup (shared.context_cache)
+CACHED_INSTRUCTIONS = {
+    "account_fraud": ACCOUNT_BASELINE_INSTRUCTIONS,
+}
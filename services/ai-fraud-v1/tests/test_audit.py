@@ -1,6 +1,7 @@
 """Tests for ai-fraud-v1 audit logging."""
+import asyncio
 import uuid
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 from datetime import datetime
 from src.audit import log_ai_decision
 
@@ -111,3 +112,38 @@ class TestLogAiDecision:
         assert call_kwargs["decision_type"] == "test_decision"
         assert "id" in call_kwargs
         assert "created_at" in call_kwargs
+
+
+class TestDecisionAudit:
+    """Fraud checks schedule their audit record with the decision id"""
+
+    def _decide(self, **patches):
+        from src import routes
+
+        audit = AsyncMock(return_value={})
+
+        async def scenario():
+            response = await routes._decide(routes.FraudCheckRequest(account_id="acc-1"), "dec-1", None)
+            await asyncio.sleep(0)  # let the background audit task run
+            return response
+
+        with patch("src.audit.log_ai_decision", audit), \
+                patch("src.vertex_ai.is_vertex_enabled", return_value=patches.get("vertex", False)), \
+                patch("src.vertex_ai.analyze_proposal_fraud", AsyncMock(return_value=patches.get("result"))):
+            response = asyncio.run(scenario())
+        return response, audit
+
+    def test_rule_decision_is_audited(self):
+        _, audit = self._decide()
+        audit.assert_awaited_once()
+        assert audit.await_args.kwargs["decision_id"] == "dec-1"
+        assert audit.await_args.kwargs["model_name"] == "fraud-rule-engine"
+
+    def test_vertex_decision_is_audited(self):
+        result = {"fraud_score": 0.72, "risk_tier": "high", "recommended_action": "review", "model": "m", "latency_ms": 40}
+        response, audit = self._decide(vertex=True, result=result)
+        assert response.model_version == "vertex-ai/m"
+        audit.assert_awaited_once()
+        kwargs = audit.await_args.kwargs
+        assert kwargs["decision_id"] == "dec-1" and kwargs["model_name"] == "fraud-vertex-ai"
+        assert kwargs["output"]["fraud_score"] == 0.72 and kwargs["latency_ms"] == 40
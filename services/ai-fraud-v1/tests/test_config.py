@@ -97,6 +97,11 @@ class TestSettingsEnvOverrides:
             s = self._reload_settings()
             assert s.gcp_project_id == "monkeyswork-prod"
 
+    def test_model_pinned_from_env(self):
+        with patch.dict(os.environ, {"MODEL_PINNED": "TRUE"}):
+            s = self._reload_settings()
+            assert s.model_pinned is True
+
     def test_env_override_model_version(self):
         with patch.dict(os.environ, {"MODEL_VERSION": "v2.5.0"}):
             s = self._reload_settings()
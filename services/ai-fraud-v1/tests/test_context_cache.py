@@ -0,0 +1,138 @@
+"""Tests for cached prompt prefixes (shared.context_cache)."""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared.context_cache import ContextCache, InMemoryCacheBackend, instructions_version
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _cache(backend, clock, **kwargs):
+    kwargs.setdefault("ttl_s", 3600)
+    kwargs.setdefault("refresh_margin_s", 300)
+    kwargs.setdefault("min_tokens", 0)
+    return ContextCache(backend=backend, clock=clock, enabled=True, **kwargs)
+
+
+def _start(cache, instructions):
+    async def scenario():
+        await cache.start("ai-fraud-v1", "gemini-test", instructions)
+        await cache.stop()
+
+    asyncio.run(scenario())
+
+
+class TestContextCache:
+    """ContextCache"""
+
+    def test_inline_prefix_when_not_started(self):
+        base = MagicMock()
+        model, contents = ContextCache(enabled=False).prepare("scope", "INSTRUCTIONS", "DATA", base)
+        assert model is base
+        assert contents == "INSTRUCTIONS\n\nDATA"
+
+    def test_cached_prefix_sends_only_the_suffix(self):
+        clock = FakeClock()
+        backend = InMemoryCacheBackend(clock)
+        cache = _cache(backend, clock)
+        _start(cache, {"account_fraud": "INSTRUCTIONS"})
+
+        base = MagicMock()
+        model, contents = cache.prepare("account_fraud", "INSTRUCTIONS", "DATA", base)
+        assert contents == "DATA"
+        assert backend.created == 1
+        assert cache.hits == 1
+        # The fake re-attaches the cached prefix, so the model sees the full prompt
+        model.generate_content(contents)
+        base.generate_content.assert_called_once_with("INSTRUCTIONS\n\nDATA")
+
+    def test_small_prefixes_are_not_cached(self):
+        clock = FakeClock()
+        backend = InMemoryCacheBackend(clock)
+        cache = _cache(backend, clock, min_tokens=1024)
+        _start(cache, {"account_fraud": "short instructions"})
+        assert backend.created == 0
+        _, contents = cache.prepare("account_fraud", "short instructions", "DATA", MagicMock())
+        assert contents.startswith("short instructions")
+
+    def test_refreshes_before_expiry(self):
+        clock = FakeClock()
+        backend = InMemoryCacheBackend(clock)
+        cache = _cache(backend, clock)
+        _start(cache, {"account_fraud": "INSTRUCTIONS"})
+
+        clock.now += 3000  # outside the margin: nothing to do
+        asyncio.run(cache.refresh_due())
+        assert backend.refreshed == 0
+
+        clock.now += 400  # 200s left, inside the 300s margin
+        asyncio.run(cache.refresh_due())
+        assert backend.refreshed == 1
+        assert cache._entries["account_fraud"].expire_time == clock.now + 3600
+
+    def test_expired_cache_is_recreated(self):
+        clock = FakeClock()
+        backend = InMemoryCacheBackend(clock)
+        cache = _cache(backend, clock)
+        _start(cache, {"account_fraud": "INSTRUCTIONS"})
+
+        clock.now += 7200
+        _, contents = cache.prepare("account_fraud", "INSTRUCTIONS", "DATA", MagicMock())
+        assert contents == "INSTRUCTIONS\n\nDATA"  # expired → inline
+        asyncio.run(cache.refresh_due())
+        assert backend.created == 2
+        _, contents = cache.prepare("account_fraud", "INSTRUCTIONS", "DATA", MagicMock())
+        assert contents == "DATA"
+
+    def test_reuses_current_version_and_ignores_other_versions(self):
+        clock = FakeClock()
+        backend = InMemoryCacheBackend(clock)
+        _start(_cache(backend, clock), {"account_fraud": "V1"})
+
+        # Another replica with the same instructions reuses the cache
+        same = _cache(backend, clock)
+        _start(same, {"account_fraud": "V1"})
+        assert backend.created == 1
+
+        # A deploy with changed instructions gets its own cache
+        changed = _cache(backend, clock)
+        _start(changed, {"account_fraud": "V2"})
+        assert backend.created == 2
+        assert changed._entries["account_fraud"].display_name == (
+            f"ai-fraud-v1:account_fraud:{instructions_version('V2')}"
+        )
+        _, contents = changed.prepare("account_fraud", "V1", "DATA", MagicMock())
+        assert contents == "V1\n\nDATA"
+
+
+class TestAccountFraudPrompt:
+    """analyze_account_fraud with a cached prefix"""
+
+    def test_sends_only_account_data(self):
+        from src import vertex_ai
+        from shared import context_cache as module
+
+        clock = FakeClock()
+        cache = _cache(InMemoryCacheBackend(clock), clock)
+        _start(cache, vertex_ai.CACHED_INSTRUCTIONS)
+
+        base = MagicMock()
+        base.generate_content.return_value = SimpleNamespace(text='{"fraud_score": 0.1}')
+        with patch.object(module, "context_cache", cache), \
+                patch.object(vertex_ai, "is_vertex_enabled", return_value=True), \
+                patch.object(vertex_ai, "_get_model", return_value=base):
+            result = asyncio.run(vertex_ai.analyze_account_fraud("someone@example.com"))
+
+        assert result["fraud_score"] == 0.1
+        sent = base.generate_content.call_args.args[0]
+        assert sent.startswith(vertex_ai.ACCOUNT_BASELINE_INSTRUCTIONS)
+        assert sent.endswith("- Account Created: Unknown")
+        assert cache.hits == 1
@@ -0,0 +1,154 @@
+"""Tests for A/B and shadow experiments (shared.experiments) around fraud checks."""
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared.experiments import CONTROL, TREATMENT, Distribution, Experiment, Outcome
+from shared.model_serving import ModelServer
+from src.routes import FraudCheckRequest, check_fraud
+
+
+def _ids(n):
+    return [f"acc-{i}" for i in range(n)]
+
+
+class TestAssignment:
+    """Experiment.assign"""
+
+    def test_assignment_is_stable_and_near_the_share(self):
+        experiment = Experiment("fraud-model", treatment_share=0.2)
+        arms = [experiment.assign(i) for i in _ids(5000)]
+        assert arms == [Experiment("fraud-model", treatment_share=0.2).assign(i) for i in _ids(5000)]
+        assert 0.17 < arms.count(TREATMENT) / len(arms) < 0.23
+
+    def test_salt_reshuffles(self):
+        a = Experiment("fraud-model", treatment_share=0.5)
+        b = Experiment("fraud-model", treatment_share=0.5, salt="round-2")
+        assert [a.assign(i) for i in _ids(200)] != [b.assign(i) for i in _ids(200)]
+
+    def test_disabled_experiment_is_all_control(self):
+        experiment = Experiment("fraud-model")
+        assert not experiment.enabled
+        assert {experiment.assign(i) for i in _ids(100)} == {CONTROL}
+
+    def test_only_split_mode_serves_treatment(self):
+        shadow = Experiment("fraud-model", treatment_share=1.0, mode="shadow")
+        split = Experiment("fraud-model", treatment_share=1.0, mode="split")
+        assert not shadow.serves_treatment("acc-1") and split.serves_treatment("acc-1")
+        with pytest.raises(ValueError):
+            Experiment("fraud-model", mode="canary")
+
+
+class TestDistribution:
+    """Distribution"""
+
+    def test_quantiles_interpolate_within_buckets(self):
+        latency = Distribution((10, 20, 50))
+        for value in [5] * 50 + [15] * 40 + [40] * 10:
+            latency.add(value)
+        snapshot = latency.snapshot()
+        assert snapshot["count"] == 100 and snapshot["mean"] == pytest.approx(12.5)
+        assert snapshot["p50"] == pytest.approx(10.0)
+        assert 20 < snapshot["p95"] <= 50
+        assert snapshot["buckets"] == {"10": 50, "20": 40, "50": 10, "+Inf": 0}
+
+
+class TestShadow:
+    """Experiment.shadow"""
+
+    def test_treatment_runs_in_background_and_is_paired(self):
+        experiment = Experiment("fraud-model", treatment_share=1.0)
+
+        async def treatment():
+            return Outcome(score=0.9, latency_ms=3.0)
+
+        async def run():
+            task = experiment.shadow("acc-1", "d1", Outcome(score=0.2, latency_ms=1.0), treatment)
+            assert task is not None and not task.done()  # the caller does not wait for it
+            await experiment.drain()
+
+        asyncio.run(run())
+        pair, = experiment.pairs
+        assert (pair["decision_id"], pair["control_score"], pair["treatment_score"]) == ("d1", 0.2, 0.9)
+        snapshot = experiment.snapshot()
+        assert snapshot["arms"][TREATMENT]["latency_ms"]["count"] == 1
+        assert snapshot["pairs"]["mean_score_delta"] == pytest.approx(0.7)
+
+    def test_saturated_shadow_is_dropped_not_queued(self):
+        experiment = Experiment("fraud-model", treatment_share=1.0, max_shadow=2)
+
+        async def treatment():
+            await asyncio.sleep(0.01)
+            return Outcome(score=0.5, latency_ms=1.0)
+
+        async def run():
+            tasks = [experiment.shadow(i, i, Outcome(0.1, 1.0), treatment) for i in _ids(5)]
+            await experiment.drain()
+            return tasks
+
+        assert sum(t is not None for t in asyncio.run(run())) == 2
+        assert experiment.shadow_stats["dropped"] == 3
+
+    def test_treatment_errors_are_counted(self):
+        experiment = Experiment("fraud-model", treatment_share=1.0)
+
+        async def treatment():
+            raise RuntimeError("model crashed")
+
+        async def run():
+            experiment.shadow("acc-1", "d1", Outcome(0.1, 1.0), treatment)
+            await experiment.drain()
+
+        asyncio.run(run())
+        assert experiment.shadow_stats["errors"] == 1 and not experiment.pairs
+
+
+class TestFraudCheckExperiment:
+    """check_fraud under the model experiment"""
+
+    @pytest.fixture
+    def treatment(self, tmp_path):
+        path = tmp_path / "mw-fraud-v1-v2.0.0"
+        path.mkdir()
+        (path / "metadata.json").write_text(json.dumps({"features": ["proposals_last_hour"]}))
+        (path / "linear.json").write_text(json.dumps({"coef": [1.0], "intercept": -2.0}))
+        server = ModelServer("fraud-v1", "v2.0.0", registry_uri=str(tmp_path))
+        server.load()
+        return server.model
+
+    def _check(self, experiment, treatment):
+        async def run():
+            response = await check_fraud(FraudCheckRequest(account_id="acc-1", proposals_last_hour=12))
+            await experiment.drain()
+            return response
+
+        with patch("src.routes.model_experiment", return_value=experiment), \
+                patch("src.routes.treatment_model", return_value=treatment), \
+                patch("src.routes.active_model", return_value=None), \
+                patch("src.routes.with_stored_features", side_effect=lambda r: r), \
+                patch("src.vertex_ai.is_vertex_enabled", return_value=False):
+            return asyncio.run(run())
+
+    def test_shadow_answers_with_control_and_pairs_treatment(self, treatment):
+        experiment = Experiment("fraud-model", treatment_share=1.0, mode="shadow")
+        response = self._check(experiment, treatment)
+        assert response.ab_group == CONTROL and response.fraud_score == 0.35
+        pair, = experiment.pairs
+        assert pair["control_score"] == 0.35 and pair["treatment_score"] == pytest.approx(1.0, abs=1e-3)
+        assert pair["treatment"]["model_version"] == "mw-fraud-v1-v2.0.0"
+
+    def test_split_serves_treatment_arm(self, treatment):
+        experiment = Experiment("fraud-model", treatment_share=1.0, mode="split")
+        response = self._check(experiment, treatment)
+        assert response.ab_group == TREATMENT
+        assert response.model_version == "mw-fraud-v1-v2.0.0"
+        assert not experiment.pairs
+        assert experiment.snapshot()["arms"][TREATMENT]["score"]["count"] == 1
+
+    def test_without_treatment_model_control_serves(self):
+        experiment = Experiment("fraud-model", treatment_share=1.0, mode="split")
+        response = self._check(experiment, None)
+        assert response.ab_group == CONTROL and not experiment.pairs
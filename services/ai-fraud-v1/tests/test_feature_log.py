@@ -0,0 +1,166 @@
+"""Tests for decision feature logs (shared.feature_log) and training-set joins (shared.training_set)."""
+import csv
+import gzip
+import json
+import threading
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared import feature_log as fl
+from shared.feature_log import FeatureLog, read_feature_log
+from shared.training_set import build_training_set, main as training_set_main
+
+T0 = datetime(2026, 10, 19, 14, 5, tzinfo=timezone.utc).timestamp()
+
+
+class FakeClock:
+    def __init__(self, now=T0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def jsonl_format():
+    # Same files with or without pyarrow installed
+    with patch.object(fl, "_pyarrow", return_value=None):
+        yield
+
+
+def _log(tmp_path, **kwargs):
+    return FeatureLog("ai-fraud-v1", root=str(tmp_path), clock=kwargs.pop("clock", FakeClock()), **kwargs)
+
+
+class TestFeatureLog:
+    """FeatureLog"""
+
+    def test_disabled_without_root(self, tmp_path):
+        log = FeatureLog("ai-fraud-v1", root="")
+        log.log("fraud_check", "acc-1", {"x": 1})
+        log.flush()
+        assert log.files_written == 0
+
+    def test_rows_are_buffered_until_flush(self, tmp_path):
+        log = _log(tmp_path)
+        log.log("fraud_check", "acc-1", {"account_age_days": 2}, output={"fraud_score": 0.4}, decision_id="d1")
+        assert not list(tmp_path.rglob("*.jsonl.gz"))
+        log.flush()
+        path, = tmp_path.rglob("*.jsonl.gz")
+        assert path.parent.relative_to(tmp_path).as_posix() == "fraud_check/dt=2026-10-19/hour=14"
+        row, = [json.loads(line) for line in gzip.open(path, "rt")]
+        assert row["decision_id"] == "d1" and row["features"] == {"account_age_days": 2}
+
+    def test_new_hour_rolls_the_file(self, tmp_path):
+        clock = FakeClock()
+        log = _log(tmp_path, clock=clock, flush_s=86400)
+        log.log("fraud_check", "acc-1", {"x": 1})
+        clock.now += 3600
+        log.log("fraud_check", "acc-2", {"x": 2})
+        log.join()
+        assert [p.parent.name for p in tmp_path.rglob("*.jsonl.gz")] == ["hour=14"]
+
+    def test_flushes_after_flush_s(self, tmp_path):
+        clock = FakeClock()
+        log = _log(tmp_path, clock=clock, flush_s=60)
+        log.log("fraud_check", "acc-1", {"x": 1})
+        clock.now += 61
+        log.log("fraud_check", "acc-2", {"x": 2})
+        log.join()
+        assert log.files_written == 1
+
+    def test_flushes_every_flush_rows(self, tmp_path):
+        log = _log(tmp_path, flush_rows=2)
+        for i in range(5):
+            log.log("fraud_check", f"acc-{i}", {"x": i})
+        log.join()
+        assert log.files_written == 2
+
+    def test_full_buffer_is_written_off_the_logging_thread(self, tmp_path):
+        log = _log(tmp_path, flush_rows=1)
+        threads = []
+        write = log._write
+
+        def recording_write(*args):
+            threads.append(threading.current_thread())
+            write(*args)
+
+        with patch.object(log, "_write", side_effect=recording_write):
+            log.log("fraud_check", "acc-1", {"x": 1})
+            log.join()
+        assert log.files_written == 1
+        assert threads and threads[0] is not threading.current_thread()
+
+    def test_read_selects_hour_partitions(self, tmp_path):
+        log = _log(tmp_path)
+        for hours in range(4):
+            log.log("fraud_check", f"acc-{hours}", {"x": hours}, ts=T0 + hours * 3600)
+        log.flush()
+        rows = list(read_feature_log(str(tmp_path), "fraud_check", start=T0 + 3600, end=T0 + 3 * 3600))
+        assert [r["entity_id"] for r in rows] == ["acc-1", "acc-2"]
+
+
+class TestTrainingSet:
+    """build_training_set / python -m shared.training_set"""
+
+    def _decisions(self):
+        return [
+            {"entity_id": "acc-1", "ts": 100.0, "features": {"proposals_last_hour": 1}, "output": {"fraud_score": 0.1}},
+            {"entity_id": "acc-1", "ts": 200.0, "features": {"proposals_last_hour": 30}, "output": {"fraud_score": 0.6}},
+            {"entity_id": "acc-2", "ts": 300.0, "features": {"proposals_last_hour": 2}, "output": {}},
+        ]
+
+    def test_label_joins_latest_decision_before_it(self):
+        rows, stats = build_training_set(
+            self._decisions(), [{"entity_id": "acc-1", "label": 1, "labeled_at": 150.0}]
+        )
+        assert rows[0]["proposals_last_hour"] == 1
+        assert rows[0]["output_fraud_score"] == 0.1
+        assert rows[0]["label"] == 1 and stats["joined"] == 1
+
+    def test_labels_before_any_decision_are_dropped(self):
+        _, stats = build_training_set(self._decisions(), [{"entity_id": "acc-2", "label": 0, "labeled_at": 250.0}])
+        assert stats["no_decision"] == 1
+
+    def test_max_age(self):
+        _, stats = build_training_set(
+            self._decisions(), [{"entity_id": "acc-1", "label": 1, "labeled_at": "1970-01-02T00:00:00Z"}],
+            max_age_s=3600,
+        )
+        assert stats["too_old"] == 1
+
+    def test_cli_joins_logs_and_labels(self, tmp_path, capsys):
+        log = _log(tmp_path / "logs")
+        log.log("fraud_check", "acc-1", {"proposals_last_hour": 14}, decision_id="d1", ts=T0)
+        log.flush()
+        labels = tmp_path / "labels.csv"
+        labels.write_text("account_id,is_fraud,labeled_at\nacc-1,1,2026-10-20T00:00:00\n")
+
+        training_set_main([
+            "--logs", str(tmp_path / "logs"), "--decision-type", "fraud_check", "--labels", str(labels),
+            "--key", "entity_id:account_id", "--label", "is_fraud", "--out", str(tmp_path / "train.csv"),
+        ])
+        row, = csv.DictReader(open(tmp_path / "train.csv"))
+        assert row["decision_id"] == "d1" and row["proposals_last_hour"] == "14" and row["label"] == "1"
+        assert json.loads(capsys.readouterr().out.splitlines()[-1])["joined"] == 1
+
+
+class TestFraudCheckLogging:
+    """POST /api/v1/fraud/check logs its features"""
+
+    def test_rule_decision_is_logged_with_its_inputs(self, client, tmp_path):
+        log = _log(tmp_path)
+        with patch("shared.feature_log.get_feature_log", return_value=log), \
+                patch("src.vertex_ai.is_vertex_enabled", return_value=False):
+            response = client.post("/api/v1/fraud/check", json={
+                "account_id": "acc-1", "cover_letter": "hi", "proposals_last_hour": 12,
+            })
+        log.flush()
+        row, = read_feature_log(str(tmp_path), "fraud_check")
+        assert row["entity_id"] == "acc-1"
+        assert row["features"]["proposals_last_hour"] == 12
+        assert row["features"]["cover_letter_length"] == 2
+        assert row["output"]["fraud_score"] == response.json()["fraud_score"]
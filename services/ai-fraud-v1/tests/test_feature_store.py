@@ -0,0 +1,161 @@
+"""Tests for the feature store (shared.feature_store) and fraud checks reading it."""
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared.feature_store import FeatureStore, LocalBackend, make_backend
+from src import subscribers
+from src.routes import FraudCheckRequest, with_stored_features
+
+DAY = 86400.0
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def store(clock):
+    return FeatureStore(LocalBackend(), cache_ttl_s=30, clock=clock)
+
+
+class TestFeatureStore:
+    """FeatureStore over the local backend"""
+
+    def test_unknown_entity_reads_defaults(self, store):
+        features = store.get("fraud_account", "nobody")
+        assert features["proposals_sent_1h"] is None
+        assert "dispute_count" in features
+
+    def test_writes_are_merged_and_typed(self, store):
+        store.write("fraud_account", "acc-1", {"proposals_sent_1h": "12", "unknown": 1})
+        store.write("fraud_account", "acc-1", {"dispute_count": 2, "proposals_sent_1h": None})
+        features = store.get("fraud_account", "acc-1")
+        assert features["proposals_sent_1h"] == 12
+        assert features["dispute_count"] == 2
+        assert "unknown" not in features
+
+    def test_values_past_view_ttl_read_as_defaults(self, store, clock):
+        store.write("fraud_account", "acc-1", {"dispute_count": 2})
+        clock.now += 8 * DAY
+        store.clear_cache()
+        assert store.get("fraud_account", "acc-1")["dispute_count"] is None
+
+    def test_unknown_view_raises(self, store):
+        with pytest.raises(KeyError):
+            store.get("nope", "acc-1")
+
+    def test_make_backend_from_url(self):
+        with pytest.raises(ValueError):
+            make_backend("postgres://db")
+        assert isinstance(make_backend(""), LocalBackend)
+
+
+class TestReadThroughCache:
+    """FeatureStore read-through cache and multi-get"""
+
+    def test_get_many_reads_backend_once(self, store):
+        store.write("match_freelancer", "u1", {"avg_rating": 4.5})
+        store.write("match_freelancer", "u2", {"avg_rating": 3.0})
+        features = store.get_many("match_freelancer", ["u1", "u2", "u3"])
+        assert features["u1"]["avg_rating"] == 4.5 and features["u3"]["avg_rating"] is None
+        assert store.stats["backend_reads"] == 1
+
+    def test_repeat_reads_are_served_from_cache(self, store):
+        store.get_many("match_freelancer", ["u1", "u2"])
+        store.get_many("match_freelancer", ["u1", "u2"])
+        assert store.stats["backend_reads"] == 1
+        assert store.stats["cache_hits"] == 2
+
+    def test_cache_expires(self, store, clock):
+        store.get("match_freelancer", "u1")
+        clock.now += 31
+        store.get("match_freelancer", "u1")
+        assert store.stats["backend_reads"] == 2
+
+    def test_write_invalidates_cached_entry(self, store):
+        assert store.get("match_freelancer", "u1")["avg_rating"] is None
+        store.write("match_freelancer", "u1", {"avg_rating": 5})
+        assert store.get("match_freelancer", "u1")["avg_rating"] == 5.0
+
+
+class TestPointInTime:
+    """FeatureStore.get_historical"""
+
+    def test_reads_values_as_of_each_timestamp(self, store):
+        store.write("fraud_account", "acc-1", {"proposals_sent_7d": 3}, event_time=100.0)
+        store.write("fraud_account", "acc-1", {"proposals_sent_7d": 40}, event_time=200.0)
+        rows = store.get_historical("fraud_account", [("acc-1", 50.0), ("acc-1", 150.0), ("acc-1", 250.0)])
+        assert [r["proposals_sent_7d"] for r in rows] == [None, 3, 40]
+
+    def test_backfilled_write_does_not_leak_later_values(self, store):
+        store.write("fraud_account", "acc-1", {"dispute_count": 5}, event_time=200.0)
+        store.write("fraud_account", "acc-1", {"proposals_sent_7d": 1}, event_time=100.0)
+        row, = store.get_historical("fraud_account", [("acc-1", 150.0)])
+        assert row["proposals_sent_7d"] == 1 and row["dispute_count"] is None
+
+    def test_stale_as_of_read_uses_defaults(self, store):
+        store.write("fraud_account", "acc-1", {"dispute_count": 5}, event_time=0.0)
+        row, = store.get_historical("fraud_account", [("acc-1", 8 * DAY)])
+        assert row["dispute_count"] is None
+
+
+@pytest.fixture
+def feature_store_enabled():
+    # src.config may have been reloaded, leaving src.routes on the old settings
+    with patch("src.config.settings.feature_store_enabled", True), \
+            patch("src.routes.settings.feature_store_enabled", True):
+        yield
+
+
+@pytest.mark.usefixtures("feature_store_enabled")
+class TestFraudCheckFeatures:
+    """Fraud checks reading account context by id"""
+
+    def test_missing_context_is_filled_from_store(self):
+        store = FeatureStore(LocalBackend())
+        store.write("fraud_account", "acc-1", {
+            "proposals_sent_1h": 14, "proposals_sent_total": 30, "account_created_at": time.time() - 2 * DAY,
+        })
+        with patch("shared.feature_store.get_feature_store", return_value=store):
+            request = asyncio.run(with_stored_features(FraudCheckRequest(account_id="acc-1", total_proposals=5)))
+        assert request.proposals_last_hour == 14
+        assert request.total_proposals == 5  # inline value wins
+        assert request.account_age_days == 2
+
+    def test_store_errors_keep_request(self):
+        broken = MagicMock()
+        broken.get.side_effect = ConnectionError("redis down")
+        request = FraudCheckRequest(account_id="acc-1")
+        with patch("shared.feature_store.get_feature_store", return_value=broken):
+            assert asyncio.run(with_stored_features(request)) is request
+
+    def test_registration_seeds_account_features(self):
+        store = FeatureStore(LocalBackend())
+        with patch("shared.feature_store.get_feature_store", return_value=store):
+            subscribers._record_account_features(
+                "acc-9", {"email": "bot@Mailinator.com", "created_at": "2026-01-01T00:00:00+00:00"}
+            )
+        features = store.get_historical("fraud_account", [("acc-9", time.time())])[0]
+        assert features["email_domain"] == "mailinator.com"
+        # Nothing counts proposals yet, so registration must not claim zero
+        assert features["proposals_sent_total"] is None
+
+    def test_disabled_store_leaves_request_alone(self):
+        request = FraudCheckRequest(account_id="acc-1")
+        with patch("shared.feature_store.get_feature_store") as get_store, \
+                patch("src.routes.settings.feature_store_enabled", False):
+            assert asyncio.run(with_stored_features(request)) is request
+        get_store.assert_not_called()
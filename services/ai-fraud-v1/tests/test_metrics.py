@@ -0,0 +1,218 @@
+"""Tests for the Prometheus metrics surface (shared.metrics)."""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from prometheus_client import REGISTRY
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared import metrics, pubsub
+from shared.prompting import log_token_usage
+
+SERVICES_DIR = os.path.join(os.path.dirname(__file__), "..", "..")
+
+
+def _value(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestMetricsEndpoint:
+    """GET /metrics and per-route request latency"""
+
+    def test_requests_are_labelled_by_route_template(self, client, minimal_fraud_payload):
+        labels = {"method": "POST", "route": "/api/v1/fraud/check", "status": "200"}
+        before = _value("ai_http_request_duration_seconds_count", **labels)
+        assert client.post("/api/v1/fraud/check", json=minimal_fraud_payload).status_code == 200
+        assert _value("ai_http_request_duration_seconds_count", **labels) == before + 1
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'route="/api/v1/fraud/check"' in response.text
+
+    def test_unknown_paths_share_one_label(self, client):
+        labels = {"method": "GET", "route": "unmatched", "status": "404"}
+        before = _value("ai_http_request_duration_seconds_count", **labels)
+        client.get("/no/such/path/1")
+        client.get("/no/such/path/2")
+        assert _value("ai_http_request_duration_seconds_count", **labels) == before + 2
+
+    def test_multiprocess_mode_aggregates_workers(self, tmp_path):
+        env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PYTHONPATH": SERVICES_DIR}
+        worker = "from shared import metrics; metrics.record_fallback('proposal_fraud')"
+        for _ in range(2):
+            subprocess.run([sys.executable, "-c", worker], env=env, check=True)
+        scrape = "import sys; from shared import metrics; sys.stdout.write(metrics.render().decode())"
+        text = subprocess.run(
+            [sys.executable, "-c", scrape], env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        assert 'ai_fallback_total{capability="proposal_fraud"} 2.0' in text
+
+    def test_unwritable_sample_dir_never_fails_callers(self, tmp_path):
+        env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path / "missing"), "PYTHONPATH": SERVICES_DIR}
+        worker = (
+            "from unittest.mock import MagicMock\n"
+            "from shared import metrics\n"
+            "metrics.record_fallback('proposal_fraud')\n"
+            "model = MagicMock(); model.generate_content.return_value = 'answer'\n"
+            "assert metrics.observe_model(model, 'proposal_fraud').generate_content('p') == 'answer'\n"
+        )
+        subprocess.run([sys.executable, "-c", worker], env=env, check=True)
+
+
+class TestVertexMetrics:
+    """observe_model and token counts"""
+
+    def test_latency_and_errors_by_capability(self):
+        model = MagicMock()
+        model.generate_content.side_effect = [SimpleNamespace(text="{}"), TimeoutError("deadline")]
+        observed = metrics.observe_model(model, "test_capability")
+        ok = _value("ai_vertex_request_duration_seconds_count", capability="test_capability", outcome="ok")
+
+        assert observed.generate_content("prompt").text == "{}"
+        with pytest.raises(TimeoutError):
+            observed.generate_content("prompt")
+
+        assert _value("ai_vertex_request_duration_seconds_count", capability="test_capability", outcome="ok") == ok + 1
+        assert _value("ai_vertex_errors_total", capability="test_capability", error="TimeoutError") >= 1
+        model.generate_content.assert_called_with("prompt")
+
+    def test_streams_are_timed_until_the_last_chunk(self):
+        async def chunks():
+            for text in ("a", "b"):
+                yield SimpleNamespace(text=text)
+
+        class Model:
+            async def generate_content_async(self, prompt, stream=False):
+                return chunks()
+
+        async def run():
+            responses = await metrics.observe_model(Model(), "test_stream").generate_content_async("p", stream=True)
+            assert _value("ai_vertex_request_duration_seconds_count", capability="test_stream", outcome="ok") == 0
+            return [chunk.text async for chunk in responses]
+
+        assert asyncio.run(run()) == ["a", "b"]
+        assert _value("ai_vertex_request_duration_seconds_count", capability="test_stream", outcome="ok") == 1
+
+    def test_token_usage_is_counted(self):
+        usage = SimpleNamespace(prompt_token_count=120, candidates_token_count=30, cached_content_token_count=100)
+        before = _value("ai_vertex_tokens_total", capability="test_tokens", kind="input")
+        log_token_usage("test_tokens", SimpleNamespace(usage_metadata=usage))
+        assert _value("ai_vertex_tokens_total", capability="test_tokens", kind="input") == before + 120
+        assert _value("ai_vertex_tokens_total", capability="test_tokens", kind="cached") >= 100
+
+
+class TestFallbackMetrics:
+    """ai_fallback_total at the rule fallbacks"""
+
+    def test_vertex_failure_counts_a_fallback(self, client, minimal_fraud_payload):
+        before = _value("ai_fallback_total", capability="proposal_fraud")
+        with patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai.analyze_proposal_fraud", side_effect=RuntimeError("vertex down")), \
+                patch("src.routes.active_model", return_value=None):
+            response = client.post("/api/v1/fraud/check", json=minimal_fraud_payload)
+        assert response.status_code == 200
+        assert _value("ai_fallback_total", capability="proposal_fraud") == before + 1
+
+
+class TestCallbackMetrics:
+    """ApiCallback latency per endpoint"""
+
+    def test_ids_are_folded(self):
+        assert metrics.callback_endpoint("/jobs/job-42/matches") == "/jobs/{id}/matches"
+        assert metrics.callback_endpoint("/verifications/3f2a9c1e-77b0-4d1e-9a41-0c2d5e6f7a8b") == "/verifications/{id}"
+        assert metrics.callback_endpoint("/fraud/baseline") == "/fraud/baseline"
+
+    def test_each_attempt_is_observed(self):
+        from shared.callback import ApiCallback
+
+        callback = ApiCallback()
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"ok": True}
+        labels = {"method": "PATCH", "endpoint": "/freelancers/{id}/embedding", "status": "200"}
+        before = _value("ai_callback_duration_seconds_count", **labels)
+
+        async def request(*args, **kwargs):
+            return response
+
+        callback._client = MagicMock(is_closed=False, request=request)
+        assert asyncio.run(callback.patch("/freelancers/u-7/embedding", {})) == {"ok": True}
+        assert _value("ai_callback_duration_seconds_count", **labels) == before + 1
+
+
+def _received(ack_id, message_id, data, delivery_attempt=0):
+    return SimpleNamespace(
+        ack_id=ack_id,
+        delivery_attempt=delivery_attempt,
+        message=SimpleNamespace(message_id=message_id, data=json.dumps(data).encode("utf-8")),
+    )
+
+
+class TestSubscriberMetrics:
+    """subscribe_async handler latency, backlog and redeliveries"""
+
+    def test_handler_backlog_and_redeliveries(self):
+        subscription = "user-registered-metrics-test"
+
+        async def handler(data):
+            if data.get("fail"):
+                raise ValueError("bad event")
+
+        subscriber = MagicMock()
+        subscriber.pull.side_effect = [
+            SimpleNamespace(received_messages=[
+                _received("a1", "m1", {"user_id": "u-1"}),
+                _received("a2", "m2", {"user_id": "u-2", "fail": True}),
+            ]),
+            SimpleNamespace(received_messages=[
+                _received("a3", "m1", {"user_id": "u-1"}),                        # redelivered id
+                _received("a4", "m3", {"user_id": "u-3"}, delivery_attempt=2),    # dead-letter policy count
+            ]),
+            asyncio.CancelledError(),
+        ]
+
+        async def scenario():
+            with patch.object(pubsub, "ensure_topic"), \
+                    patch.object(pubsub, "ensure_subscription", return_value="sub"), \
+                    patch.object(pubsub, "_get_subscriber", return_value=subscriber), \
+                    patch.object(pubsub.schema_registry, "enabled", False):
+                with pytest.raises(asyncio.CancelledError):
+                    await pubsub.subscribe_async("user-registered", subscription, handler, poll_interval=0)
+
+        asyncio.run(scenario())
+        assert _value("ai_pubsub_handler_duration_seconds_count", subscription=subscription, outcome="ok") == 3
+        assert _value("ai_pubsub_handler_duration_seconds_count", subscription=subscription, outcome="error") == 1
+        assert _value("ai_pubsub_redeliveries_total", subscription=subscription) == 2
+        assert _value("ai_pubsub_backlog_messages", subscription=subscription) == 0
+
+    def test_messages_are_acked_when_recording_fails(self):
+        handled = []
+
+        async def handler(data):
+            handled.append(data["user_id"])
+
+        subscriber = MagicMock()
+        subscriber.pull.side_effect = [
+            SimpleNamespace(received_messages=[_received("a1", "m1", {"user_id": "u-1"})]),
+            asyncio.CancelledError(),
+        ]
+        broken = OSError(30, "Read-only file system")
+
+        async def scenario():
+            with patch.object(pubsub, "ensure_topic"), \
+                    patch.object(pubsub, "ensure_subscription", return_value="sub"), \
+                    patch.object(pubsub, "_get_subscriber", return_value=subscriber), \
+                    patch.object(pubsub.schema_registry, "enabled", False), \
+                    patch.object(metrics.PUBSUB_BACKLOG, "labels", side_effect=broken), \
+                    patch.object(metrics.PUBSUB_HANDLER_LATENCY, "labels", side_effect=broken):
+                with pytest.raises(asyncio.CancelledError):
+                    await pubsub.subscribe_async("user-registered", "user-registered-broken", handler, poll_interval=0)
+
+        asyncio.run(scenario())
+        assert handled == ["u-1"]
+        subscriber.acknowledge.assert_called_once_with(request={"subscription": "sub", "ack_ids": ["a1"]})
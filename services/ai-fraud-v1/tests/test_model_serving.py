@@ -0,0 +1,226 @@
+"""Tests for in-process model serving (shared.model_registry, shared.model_serving) in fraud checks."""
+import asyncio
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared import model_serving
+from shared.model_registry import LocalModelRegistry, ModelVersion, main as registry_main, promote, read_manifest
+from shared.model_serving import BatchingScorer, ModelServer, load_model
+
+FEATURES = ["proposals_last_hour", "account_age_days", "entity_type"]
+
+
+def _register(root, display_name, coef=(0.5, -0.1, 0.0), intercept=-2.0):
+    path = root / display_name
+    path.mkdir(parents=True)
+    (path / "metadata.json").write_text(json.dumps({
+        "features": FEATURES, "categories": {"entity_type": ["proposal", "account"]},
+    }))
+    (path / "linear.json").write_text(json.dumps({"coef": list(coef), "intercept": intercept}))
+    return path
+
+
+@pytest.fixture
+def registry(tmp_path):
+    _register(tmp_path, "mw-fraud-v1-v1.0.0")
+    _register(tmp_path, "mw-fraud-v1-v1.10.0", coef=(1.0, 0.0, 0.0))
+    _register(tmp_path, "mw-fraud-v1-v1.2.0")
+    _register(tmp_path, "mw-match-v1-v9.0.0")
+    return tmp_path
+
+
+class TestModelRegistry:
+    """Version resolution in a local registry"""
+
+    def test_latest_is_highest_version(self, registry):
+        version = LocalModelRegistry(str(registry)).resolve("fraud-v1", "latest")
+        assert version.display_name == "mw-fraud-v1-v1.10.0"
+
+    def test_exact_version(self, registry):
+        local = LocalModelRegistry(str(registry))
+        assert local.resolve("fraud-v1", "v1.2.0") == ModelVersion("fraud-v1", 1, 2, 0)
+        assert local.resolve("fraud-v1", "mw-fraud-v1-v1.0.0").key == (1, 0, 0)
+        assert local.resolve("fraud-v1", "v3.0.0") is None
+
+    def test_pipelines_share_model_version(self):
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+        from ml.shared.registry.versioning import ModelVersion as PipelineModelVersion
+
+        assert PipelineModelVersion is ModelVersion
+
+
+class TestLoadedModel:
+    """load_model and LoadedModel.predict"""
+
+    def test_rows_map_to_training_columns(self, registry):
+        model = load_model(str(registry / "mw-fraud-v1-v1.0.0"), ModelVersion("fraud-v1", 1, 0, 0))
+        x = model.matrix([{"entity_type": "account", "proposals_last_hour": 3}, {"entity_type": "other"}])
+        assert x[0, 0] == 3 and np.isnan(x[0, 1]) and x[0, 2] == 1
+        assert np.isnan(x[1]).all()
+
+    def test_predicts_probabilities_in_one_batch(self, registry):
+        model = load_model(str(registry / "mw-fraud-v1-v1.0.0"), ModelVersion("fraud-v1", 1, 0, 0))
+        scores = model.predict([{"proposals_last_hour": 0}, {"proposals_last_hour": 20}])
+        assert scores.shape == (2,)
+        assert scores[0] == pytest.approx(1 / (1 + np.exp(2.0)))
+        assert scores[1] > 0.9
+
+    def test_missing_model_file_raises(self, tmp_path):
+        (tmp_path / "metadata.json").write_text(json.dumps({"features": FEATURES}))
+        with pytest.raises(FileNotFoundError):
+            load_model(str(tmp_path), ModelVersion("fraud-v1", 1, 0, 0))
+
+
+class TestBatchingScorer:
+    """Micro-batching of concurrent requests"""
+
+    def test_concurrent_requests_share_a_batch(self):
+        calls = []
+
+        def predict(rows):
+            calls.append(len(rows))
+            return [row["x"] * 2 for row in rows]
+
+        scorer = BatchingScorer(predict, max_batch=64, max_wait_ms=5)
+
+        async def run():
+            return await asyncio.gather(*(scorer.score({"x": i}) for i in range(10)))
+
+        assert asyncio.run(run()) == [i * 2 for i in range(10)]
+        assert calls == [10]
+
+    def test_full_batch_is_scored_without_waiting(self):
+        calls = []
+
+        def predict(rows):
+            calls.append(len(rows))
+            return [0.0] * len(rows)
+
+        scorer = BatchingScorer(predict, max_batch=4, max_wait_ms=10_000)
+
+        async def run():
+            return await asyncio.wait_for(asyncio.gather(*(scorer.score({}) for _ in range(8))), timeout=5)
+
+        asyncio.run(run())
+        assert calls == [4, 4]
+
+    def test_predict_errors_reach_every_caller(self):
+        def predict(rows):
+            raise RuntimeError("bad model")
+
+        scorer = BatchingScorer(predict, max_wait_ms=1)
+
+        async def run():
+            return await asyncio.gather(scorer.score({}), scorer.score({}), return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+
+
+class TestModelServer:
+    """ModelServer.load"""
+
+    def test_disabled_without_registry(self):
+        server = ModelServer("fraud-v1", registry_uri="")
+        assert server.load() is None and server.model is None
+
+    def test_loads_resolved_version(self, registry):
+        server = ModelServer("fraud-v1", "latest", registry_uri=str(registry))
+        assert server.load().display_name == "mw-fraud-v1-v1.10.0"
+        assert asyncio.run(server.score({"proposals_last_hour": 2})) == pytest.approx(0.5)
+
+    def test_unknown_version_keeps_rules(self, registry):
+        server = ModelServer("fraud-v1", "v7.0.0", registry_uri=str(registry))
+        assert server.load() is None and server.model is None
+
+
+class TestHotSwap:
+    """ModelServer following the served-version manifest"""
+
+    @pytest.fixture
+    def manifest(self, tmp_path):
+        return str(tmp_path / "manifest.json")
+
+    def _server(self, registry, manifest, **kwargs):
+        server = ModelServer("fraud-v1", "v1.0.0", registry_uri=str(registry), manifest_uri=manifest, **kwargs)
+        server.load()
+        return server
+
+    def test_manifest_version_wins_at_startup(self, registry, manifest):
+        promote(manifest, "fraud-v1", "v1.2.0")
+        assert self._server(registry, manifest).version == "mw-fraud-v1-v1.2.0"
+
+    def test_promotion_swaps_without_dropping_in_flight_model(self, registry, manifest):
+        server = self._server(registry, manifest)
+        in_flight = server.model
+        assert server.refresh() is False
+
+        promote(manifest, "fraud-v1", "latest")
+        assert server.refresh() is True
+        assert server.version == "mw-fraud-v1-v1.10.0"
+        assert in_flight.display_name == "mw-fraud-v1-v1.0.0"
+        assert in_flight.predict([{"proposals_last_hour": 0}])[0] == pytest.approx(1 / (1 + np.exp(2.0)))
+
+    def test_rolling_back_to_resident_model_does_not_reload(self, registry, manifest):
+        promote(manifest, "fraud-v1", "v1.0.0")
+        server = self._server(registry, manifest)
+        promote(manifest, "fraud-v1", "v1.2.0")
+        server.refresh()
+        registry_main(["--manifest", manifest, "rollback", "fraud-v1"])
+        with patch.object(model_serving, "load_model", side_effect=AssertionError("reloaded")):
+            assert server.refresh() is True
+        assert server.version == "mw-fraud-v1-v1.0.0"
+        assert read_manifest(manifest)["fraud-v1"]["previous"] == "v1.2.0"
+
+    def test_pinned_server_ignores_manifest(self, registry, manifest):
+        server = self._server(registry, manifest, pinned=True)
+        promote(manifest, "fraud-v1", "v1.2.0")
+        assert server.refresh() is False and server.version == "mw-fraud-v1-v1.0.0"
+        server.unpin()
+        assert server.refresh() is True and server.version == "mw-fraud-v1-v1.2.0"
+
+    def test_instant_rollback_pins_previous_model(self, registry, manifest):
+        server = self._server(registry, manifest)
+        assert server.pin("v1.10.0") is True
+        assert server.rollback() is True
+        assert server.version == "mw-fraud-v1-v1.0.0" and server.pinned
+
+    def test_failed_load_keeps_serving_current_model(self, registry, manifest):
+        server = self._server(registry, manifest)
+        (registry / "mw-fraud-v1-v1.2.0" / "linear.json").unlink()
+        promote(manifest, "fraud-v1", "v1.2.0")
+        assert server.refresh() is False
+        assert server.version == "mw-fraud-v1-v1.0.0"
+
+
+class TestFraudCheckWithModel:
+    """POST /api/v1/fraud/check scored by the in-process model"""
+
+    def test_model_score_drives_the_decision(self, client, registry):
+        server = ModelServer("fraud-v1", "v1.10.0", registry_uri=str(registry))
+        server.load()
+        with patch("shared.model_serving.get_model_server", return_value=server):
+            response = client.post("/api/v1/fraud/check", json={
+                "account_id": "acc-1", "proposals_last_hour": 12, "cover_letter": "hi",
+            })
+        body = response.json()
+        assert body["model_version"] == "mw-fraud-v1-v1.10.0"
+        assert body["fraud_score"] == pytest.approx(1 / (1 + np.exp(-10.0)), abs=1e-4)
+        assert body["risk_tier"] == "critical"
+        assert {f["factor"] for f in body["top_risk_factors"]} >= {"high_proposal_velocity"}
+
+    def test_model_errors_fall_back_to_rules(self, client, registry):
+        server = ModelServer("fraud-v1", "v1.0.0", registry_uri=str(registry))
+        server.load()
+        with patch("shared.model_serving.get_model_server", return_value=server), \
+                patch.object(server.model, "predict", side_effect=ValueError("shape")), \
+                patch("src.vertex_ai.is_vertex_enabled", return_value=False):
+            response = client.post("/api/v1/fraud/check", json={"account_id": "acc-1", "proposals_last_hour": 12})
+        body = response.json()
+        assert body["model_version"].startswith("fraud-")
+        assert body["fraud_score"] == 0.35
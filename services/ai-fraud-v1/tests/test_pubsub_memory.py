@@ -0,0 +1,114 @@
+"""Tests for the in-memory Pub/Sub backend and the load-test harness."""
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from google.api_core.exceptions import AlreadyExists
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared import pubsub
+from shared.pubsub_memory import InMemoryBroker, InMemoryPublisher, InMemorySubscriber
+
+
+@pytest.fixture
+def clients():
+    broker = InMemoryBroker()
+    return broker, InMemoryPublisher(broker), InMemorySubscriber(broker)
+
+
+class TestInMemoryBroker:
+    """InMemoryBroker via the client drop-ins"""
+
+    def test_each_subscription_gets_a_copy(self, clients):
+        broker, publisher, subscriber = clients
+        topic = publisher.topic_path("p", "user-registered")
+        publisher.create_topic(request={"name": topic})
+        for name in ("fraud", "verification"):
+            subscriber.create_subscription(request={"name": subscriber.subscription_path("p", name), "topic": topic})
+
+        publisher.publish(topic, b'{"user_id": "u-1"}').result()
+
+        for name in ("fraud", "verification"):
+            pulled = subscriber.pull(request={"subscription": subscriber.subscription_path("p", name)})
+            assert [json.loads(m.message.data) for m in pulled.received_messages] == [{"user_id": "u-1"}]
+
+    def test_duplicate_topic_raises_already_exists(self, clients):
+        _, publisher, _ = clients
+        publisher.create_topic(request={"name": "projects/p/topics/t"})
+        with pytest.raises(AlreadyExists):
+            publisher.create_topic(request={"name": "projects/p/topics/t"})
+
+    def test_ack_records_latency_and_clears_pending(self, clients):
+        broker, publisher, subscriber = clients
+        topic, sub = "projects/p/topics/t", "projects/p/subscriptions/s"
+        publisher.create_topic(request={"name": topic})
+        subscriber.create_subscription(request={"name": sub, "topic": topic})
+        publisher.publish(topic, b"{}", ordering_key="k").result()
+        assert broker.pending() == 1
+
+        received = subscriber.pull(request={"subscription": sub, "max_messages": 5}).received_messages
+        assert received[0].message.ordering_key == "k"
+        subscriber.acknowledge(request={"subscription": sub, "ack_ids": [received[0].ack_id]})
+
+        assert broker.pending() == 0
+        assert broker.acked == 1
+        assert len(broker.ack_latencies) == 1
+
+    def test_pull_respects_max_messages(self, clients):
+        _, publisher, subscriber = clients
+        topic, sub = "projects/p/topics/t", "projects/p/subscriptions/s"
+        publisher.create_topic(request={"name": topic})
+        subscriber.create_subscription(request={"name": sub, "topic": topic})
+        for _ in range(5):
+            publisher.publish(topic, b"{}")
+        assert len(subscriber.pull(request={"subscription": sub, "max_messages": 3}).received_messages) == 3
+
+
+class TestMemoryBackendSelection:
+    """PUBSUB_BACKEND=memory"""
+
+    def test_clients_come_from_memory_backend(self):
+        with patch.object(pubsub, "PUBSUB_BACKEND", "memory"):
+            assert isinstance(pubsub._get_publisher(), InMemoryPublisher)
+            assert isinstance(pubsub._get_subscriber(), InMemorySubscriber)
+
+
+class TestApiCallbackGet:
+    """ApiCallback.get"""
+
+    def test_get_sends_no_body(self):
+        from shared.callback import ApiCallback
+        callback = ApiCallback()
+        with patch.object(callback, "_request", AsyncMock(return_value={"candidates": []})) as request:
+            result = asyncio.run(callback.get("/jobs/j-1/candidates"))
+        assert result == {"candidates": []}
+        request.assert_awaited_once_with("GET", "/jobs/j-1/candidates", None, params=None)
+
+
+class TestLoadHarness:
+    """shared.loadtest.run_service, in-process for this service"""
+
+    def test_replays_events_through_real_handlers(self):
+        from shared.loadtest import run_service
+        with patch.object(pubsub, "PUBSUB_BACKEND", "memory"), \
+                patch.object(pubsub.schema_registry, "enabled", False):
+            result = asyncio.run(run_service(
+                "ai-fraud-v1", events=10, vertex_latency=0.0, api_latency=0.0, timeout=10,
+            ))
+        assert result["topics"] == ["user-registered"]
+        assert result["deliveries"] == 10
+        assert result["timed_out"] is False
+        assert result["msgs_per_s"] > 0
+        assert set(result["latency_ms"]) == {"p50", "p90", "p99", "max"}
+        [subscription] = result["subscriptions"].values()
+        assert subscription["handled"] == 10
+        assert subscription["msgs_per_s"] > 0
+        assert set(subscription["handler_ms"]) == {"p50", "p95", "p99", "max"}
+
+    def test_percentiles(self):
+        from shared.loadtest import percentiles
+        values = [i / 1000 for i in range(1, 101)]
+        assert percentiles(values) == {"p50": 51.0, "p90": 91.0, "p99": 100.0, "max": 100.0}
+        assert percentiles([]) == {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+        assert percentiles(values, points=(50, 95, 99)) == {"p50": 51.0, "p95": 96.0, "p99": 100.0, "max": 100.0}
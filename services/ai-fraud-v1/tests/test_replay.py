@@ -0,0 +1,79 @@
+"""Tests for the offline replay benchmark (shared.replay) on the fraud engine."""
+import json
+
+import pytest
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared.replay import (
+    corpus_path, diff_outputs, generate_corpus, load_corpus, replay_pool, replay_single, summarize,
+)
+
+SERVICE = "ai-fraud-v1"
+
+
+@pytest.fixture
+def records():
+    return load_corpus(corpus_path(SERVICE))
+
+
+class TestCorpus:
+    """load_corpus / generate_corpus"""
+
+    def test_committed_corpus_matches_the_generator(self, records):
+        assert records == json.loads(json.dumps(generate_corpus(SERVICE, len(records))))
+
+    def test_bare_payload_rows_get_row_ids(self, tmp_path):
+        path = tmp_path / "captured.jsonl"
+        path.write_text(json.dumps({"account_id": "a"}) + "\n\n" + json.dumps({"account_id": "b"}) + "\n")
+        assert load_corpus(path) == [
+            {"id": "0", "request": {"account_id": "a"}},
+            {"id": "1", "request": {"account_id": "b"}},
+        ]
+
+    def test_missing_corpus_raises(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            corpus_path(SERVICE, str(tmp_path))
+
+
+class TestReplay:
+    """replay_single / replay_pool through compute_fraud_score"""
+
+    def test_single_threaded_run(self, records):
+        run = replay_single(SERVICE, records, repeat=2, warmup=5)
+        assert run["requests"] == 2 * len(records) and run["requests_per_s"] > 0
+        assert set(run["outputs"]) == {r["id"] for r in records}
+        output = run["outputs"][records[0]["id"]]
+        assert "fraud_score" in output and "latency_ms" not in output
+        assert set(summarize(run)["latency_ms"]) == {"p50", "p90", "p99", "max"}
+
+    def test_replay_is_deterministic(self, records):
+        first = replay_single(SERVICE, records[:20], warmup=0)["outputs"]
+        assert diff_outputs(first, replay_single(SERVICE, records[:20], warmup=0)["outputs"]) == []
+
+    def test_pool_reproduces_single_threaded_outputs(self, records):
+        single = replay_single(SERVICE, records[:20], warmup=0)
+        pooled = replay_pool(SERVICE, records[:20], processes=2, warmup=0)
+        assert pooled["processes"] == 2 and pooled["requests"] == 20
+        assert diff_outputs(single["outputs"], pooled["outputs"]) == []
+
+
+class TestDiffOutputs:
+    """diff_outputs"""
+
+    def test_reports_changed_paths(self):
+        baseline = {"r1": {"fraud_score": 0.35, "top_risk_factors": [{"factor": "a"}]}, "r2": {"x": 1}}
+        current = {"r1": {"fraud_score": 0.5, "top_risk_factors": [{"factor": "b"}, {"factor": "c"}]}, "r2": {"x": 1}}
+        diff, = diff_outputs(baseline, current)
+        assert diff["id"] == "r1"
+        assert diff["changes"] == [
+            {"path": "fraud_score", "baseline": 0.35, "current": 0.5},
+            {"path": "top_risk_factors.length", "baseline": 1, "current": 2},
+            {"path": "top_risk_factors[0].factor", "baseline": "a", "current": "b"},
+        ]
+
+    def test_tolerance_and_missing_requests(self):
+        assert diff_outputs({"r1": {"s": 0.1}}, {"r1": {"s": 0.1001}}, tolerance=1e-3) == []
+        assert diff_outputs({"r1": {}}, {"r2": {}}) == [
+            {"id": "r1", "changes": [{"path": "", "missing_in": "current"}]},
+            {"id": "r2", "changes": [{"path": "", "missing_in": "baseline"}]},
+        ]
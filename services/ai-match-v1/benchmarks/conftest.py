@@ -0,0 +1,15 @@
+"""Fixtures for the ai-match-v1 benchmarks (pytest benchmarks/ --benchmark-only)."""
+import logging
+
+import pytest
+import structlog
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+
+@pytest.fixture(autouse=True)
+def no_audit(monkeypatch):
+    """Audit rows are written off the scoring path; keep them out of the timings."""
+    monkeypatch.setattr("src.routes.audit_ai_decision", lambda *args, **kwargs: None)
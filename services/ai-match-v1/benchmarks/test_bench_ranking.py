@@ -0,0 +1,53 @@
+"""Benchmarks for candidate ranking (rank_candidates) and its request/response models."""
+import random
+
+import pytest
+
+from src.routes import MatchRequest, MatchResponse, rank_candidates
+
+SKILLS = ["Python", "React", "Node.js", "PostgreSQL", "AWS", "Figma", "Go", "Kubernetes", "TypeScript", "Docker"]
+
+
+def _payload(candidates: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    return {
+        "job_id": "job-bench",
+        "job_skills": ["Python", "React", "PostgreSQL"],
+        "job_budget_min": 40.0,
+        "job_budget_max": 90.0,
+        "experience_level": "senior",
+        "limit": 20,
+        "candidates": [
+            {
+                "freelancer_id": f"fl-{i}",
+                "skills": rng.sample(SKILLS, rng.randint(1, 6)),
+                "hourly_rate": float(rng.randrange(15, 180)),
+                "experience_years": rng.randint(0, 20),
+                "profile_completeness": float(rng.randrange(0, 101, 5)),
+                "verification_level": rng.choice(["verified", "basic", None]),
+                "avg_rating": round(rng.uniform(2.5, 5.0), 1),
+                "total_jobs_completed": rng.randint(0, 120),
+            }
+            for i in range(candidates)
+        ],
+    }
+
+
+@pytest.mark.parametrize("candidates", [10, 1_000, 10_000])
+def test_rank_candidates(benchmark, candidates):
+    request = MatchRequest.model_validate(_payload(candidates))
+    response = benchmark(rank_candidates, request)
+    assert response.total_candidates == candidates and len(response.results) == min(20, candidates)
+
+
+@pytest.mark.parametrize("candidates", [10, 1_000])
+def test_parse_match_request(benchmark, candidates):
+    payload = _payload(candidates)
+    request = benchmark(MatchRequest.model_validate, payload)
+    assert len(request.candidates) == candidates
+
+
+def test_serialize_match_response(benchmark):
+    response = rank_candidates(MatchRequest.model_validate(_payload(1_000) | {"limit": 100}))
+    body = benchmark(response.model_dump_json)
+    assert MatchResponse.model_validate_json(body).results == response.results
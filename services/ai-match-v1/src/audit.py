@@ -1,6 +1,7 @@
 """
 Shared audit logger — logs AI decisions and optionally persists via PHP API callback.
 """
+import asyncio
 import uuid
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
@@ -8,6 +9,9 @@ import structlog
 
 logger = structlog.get_logger()
 
+# Audit tasks scheduled by audit_ai_decision (kept referenced until done)
+_background: set = set()
+
 
 async def log_ai_decision(
     decision_type: str,
@@ -21,13 +25,14 @@ async def log_ai_decision(
     prompt_version: Optional[str] = None,
     explanation: Optional[Dict] = None,
     persist: bool = True,
+    decision_id: Optional[str] = None,
 ) -> Dict[str, Any]:
     """Log an AI decision for audit trail and persist to DB via callback."""
     import sys, os
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "shared"))
 
     record = {
-        "id": str(uuid.uuid4()),
+        "id": decision_id or str(uuid.uuid4()),
         "decision_type": decision_type,
         "entity_type": entity_type,
         "entity_id": entity_id,
@@ -52,3 +57,26 @@ async def log_ai_decision(
             logger.warning("audit_persist_failed", error=str(e), decision_id=record["id"])
 
     return record
+
+
+def audit_ai_decision(loop: Optional[asyncio.AbstractEventLoop] = None, **kwargs: Any) -> None:
+    """
+    log_ai_decision for sync code, without waiting on it.
+
+    On an event loop thread the record is written by a background task; from
+    a worker thread (asyncio.to_thread) pass the serving loop and it is
+    handed over thread-safely. With no loop at all (replay, scripts) it runs
+    to completion here.
+    """
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is not None:
+        task = running.create_task(log_ai_decision(**kwargs))
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+    elif loop is not None and loop.is_running():
+        asyncio.run_coroutine_threadsafe(log_ai_decision(**kwargs), loop)
+    else:
+        asyncio.run(log_ai_decision(**kwargs))
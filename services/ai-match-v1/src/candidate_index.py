@@ -0,0 +1,331 @@
+"""
+Dense profile vectors and ANN candidate retrieval.
+
+Usage:
+    from src.candidate_index import candidate_index
+
+    candidate_index.upsert("user-1", profile_data)           # profile-ready
+    candidate_index.search_job(job_data, k=200)               # job-published → [(user_id, score)]
+
+Profiles and jobs are embedded with shared.embeddings (all-MiniLM-L6-v2 on
+CPU when sentence-transformers is installed, the same encoder the match
+pipeline plans for its two-tower model) and kept in a shared.vector_index
+ANN index (MATCH_VECTOR_INDEX, default ivf).
+
+With VECTOR_INDEX_PATH set, vectors are kept in an on-disk store there
+(VECTOR_STORE_DTYPE int8 or float16), written as a new segment every
+VECTOR_INDEX_FLUSH_EVERY updates and at shutdown and compacted in a
+background thread once more than VECTOR_STORE_MAX_SEGMENTS segments pile
+up. A store written by a different embedder is discarded; it refills as
+profile-ready events arrive.
+
+Every method embeds or touches the store synchronously; async callers run
+them through asyncio.to_thread.
+
+MATCH_PQ_CODEBOOK (a gs:// URI or path) points at product-quantization
+codebooks trained by the match pipeline's train_pq_codebook step. They are
+loaded at startup, the store's compacted segment is (re-)encoded with them
+if needed, and searches then scan PQ codes and re-score the best
+MATCH_ANN_RESCORE profiles exactly.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import structlog
+
+from src.config import settings
+
+logger = structlog.get_logger()
+
+
+def _join(values) -> str:
+    return ", ".join(str(v) for v in values or [] if v)
+
+
+def profile_text(data: dict) -> str:
+    """Text embedded for a freelancer profile (profile-ready payload or candidate)."""
+    parts = [
+        f"Skills: {_join(data.get('skills'))}",
+        f"Specializations: {_join(data.get('specializations'))}",
+        f"Certifications: {_join(data.get('certifications'))}",
+        data.get("headline") or "",
+        data.get("bio") or "",
+    ]
+    return "\n".join(p for p in parts if p and not p.endswith(": "))
+
+
+def job_text(data: dict) -> str:
+    """Text embedded for a job (job-published payload)."""
+    parts = [
+        data.get("title") or "",
+        f"Skills: {_join(data.get('skills_required'))}",
+        data.get("category") or "",
+        data.get("description") or "",
+    ]
+    return "\n".join(p for p in parts if p and not p.endswith(": "))
+
+
+class CandidateIndex:
+    """
+    Freelancer vectors keyed by user id.
+
+    Without a path the vectors live in an in-process shared.vector_index
+    index. With one they live in a shared.embedding_store under path: a
+    quantized, memory-mapped segment store that every uvicorn worker maps
+    read-only, so opening it is near-instant and its pages are shared
+    rather than copied per worker.
+
+    Updates, flushes and reads are serialized by a lock, so concurrent
+    to_thread callers never see the store or index mid-write.
+    """
+
+    def __init__(
+        self,
+        path: str = "",
+        kind: str = "ivf",
+        flush_every: int = 50,
+        dtype: str = "int8",
+        max_segments: int = 8,
+        codebook: str = "",
+        rescore: int = 300,
+        embedder=None,
+    ):
+        self.path = path
+        self.kind = kind
+        self.flush_every = max(1, flush_every)
+        self.dtype = dtype
+        self.max_segments = max_segments
+        self.codebook = codebook
+        self.rescore = rescore
+        self._embedder = embedder
+        self._index = None
+        self._store = None
+        self._labels: Dict[str, int] = {}
+        self._user_ids: Dict[int, str] = {}
+        self._next_label = 0
+        self._lock = threading.Lock()
+        self._compaction: Optional[threading.Thread] = None
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            from shared.embeddings import get_embedder
+
+            self._embedder = get_embedder()
+        return self._embedder
+
+    @property
+    def index(self):
+        if self._index is None:
+            from shared.vector_index import make_index
+
+            self._index = make_index(self.embedder.dim, kind=self.kind)
+        return self._index
+
+    @property
+    def store(self):
+        """The on-disk store (None without a path); opened on first use."""
+        if self._store is None and self.path:
+            self.load()
+        return self._store
+
+    def __len__(self) -> int:
+        store = self.store
+        with self._lock:
+            return len(store) if self.path else len(self._labels)
+
+    def __contains__(self, user_id: str) -> bool:
+        store = self.store
+        with self._lock:
+            return user_id in store if self.path else user_id in self._labels
+
+    # ── Updates ──────────────────────────────────────────────────────
+
+    def upsert(self, user_id: str, data: dict) -> None:
+        self.upsert_many({user_id: data})
+
+    def upsert_many(self, profiles: Dict[str, dict]) -> None:
+        """Embed profiles in one batch and add or replace their vectors."""
+        if not profiles:
+            return
+        user_ids = list(profiles)
+        vectors = self.embedder.embed([profile_text(profiles[u]) for u in user_ids])
+        if self.path:
+            store = self.store
+            with self._lock:
+                store.put(user_ids, vectors)
+                flush = store.pending >= self.flush_every
+            if flush:
+                self.save()
+            return
+
+        with self._lock:
+            labels = []
+            for user_id in user_ids:
+                label = self._labels.get(user_id)
+                if label is None:
+                    label = self._next_label
+                    self._next_label += 1
+                    self._labels[user_id] = label
+                    self._user_ids[label] = user_id
+                labels.append(label)
+            self.index.add_many(labels, vectors)
+
+    def remove(self, user_id: str) -> None:
+        with self._lock:
+            if self.path:
+                self.store.delete([user_id])
+                return
+            label = self._labels.pop(user_id, None)
+            if label is not None:
+                self._user_ids.pop(label, None)
+                self.index.remove(label)
+
+    # ── Retrieval ────────────────────────────────────────────────────
+
+    def search(self, vector: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        store = self.store
+        with self._lock:
+            if self.path:
+                return store.search(vector, k)
+            return [(self._user_ids[label], score) for label, score in self.index.search(vector, k)]
+
+    def search_job(self, data: dict, k: int) -> List[Tuple[str, float]]:
+        """Top-k freelancers for a job by cosine similarity, best first."""
+        if not len(self):
+            return []
+        start = time.perf_counter()
+        vector = self.embedder.embed([job_text(data)])[0]
+        hits = self.search(vector, k)
+        logger.info(
+            "ann_retrieval",
+            job_id=data.get("job_id"),
+            profiles=len(self),
+            returned=len(hits),
+            index=self._index_label(),
+            elapsed_ms=round((time.perf_counter() - start) * 1000, 2),
+        )
+        return hits
+
+    def _index_label(self) -> str:
+        if not self.path:
+            return self.index.kind
+        return f"store-{self.dtype}" + ("-pq" if self._store.quantizer is not None else "")
+
+    # ── Persistence ──────────────────────────────────────────────────
+
+    def save(self, compact: bool = True) -> None:
+        """
+        Write buffered updates as a new store segment (no-op without a path).
+
+        With compact, too many segments start a background compaction.
+        """
+        if not self.path or self._store is None:
+            return
+        with self._lock:
+            self._store.flush()
+        if compact and self._store.should_compact:
+            self.compact_in_background()
+
+    def compact_in_background(self) -> Optional[threading.Thread]:
+        """
+        Compact the store in a daemon thread, one at a time.
+
+        The thread opens its own EmbeddingStore on path, as another process
+        would, so searches keep using the current segments until it swaps the
+        manifest and they pick up the merged one.
+        """
+        if self._compaction is not None and self._compaction.is_alive():
+            return None
+        self._compaction = threading.Thread(target=self._compact, name="embedding-store-compaction", daemon=True)
+        self._compaction.start()
+        return self._compaction
+
+    def _compact(self) -> None:
+        try:
+            store = self._new_store(self._store.quantizer)
+            store.open()
+            store.compact()
+        except Exception:
+            logger.exception("embedding_store_compaction_failed", path=self.path)
+
+    def _new_store(self, quantizer):
+        from shared.embedding_store import EmbeddingStore
+
+        return EmbeddingStore(
+            self.path,
+            dim=self.embedder.dim,
+            dtype=self.dtype,
+            meta={"embedder": self.embedder.name},
+            max_segments=self.max_segments,
+            quantizer=quantizer,
+            rescore=self.rescore,
+        )
+
+    def load(self) -> bool:
+        """Open the store at path; False without one or when it was reset for another embedder."""
+        if not self.path:
+            return False
+        quantizer = self._load_quantizer()
+        self._store = self._new_store(quantizer)
+        compatible = self._store.open()
+        if quantizer is not None and self._store.needs_compaction():
+            # First worker to get the lock encodes; the others find it settled
+            self._store.compact()
+        return compatible
+
+    def _load_quantizer(self):
+        """The pipeline's PQ codebook, or None (unset, unreadable or for another embedder)."""
+        if not self.codebook:
+            return None
+        from shared.pq import ProductQuantizer
+
+        try:
+            quantizer = ProductQuantizer.load(self.codebook)
+        except Exception:
+            logger.exception("pq_codebook_load_failed", uri=self.codebook)
+            return None
+        if quantizer.dim != self.embedder.dim:
+            logger.warning("pq_codebook_dim_mismatch", uri=self.codebook, codebook_dim=quantizer.dim, embedder_dim=self.embedder.dim)
+            return None
+        # Equal dims are not enough: the hashing and MiniLM embedders are both 384-dim
+        if quantizer.embedder != self.embedder.name:
+            logger.warning(
+                "pq_codebook_embedder_mismatch",
+                uri=self.codebook,
+                codebook_embedder=quantizer.embedder,
+                embedder=self.embedder.name,
+            )
+            return None
+        return quantizer
+
+
+def retrieve_candidates(data: dict) -> Optional[List[Tuple[str, float]]]:
+    """
+    ANN top-K freelancers for a job-published event (blocking; see to_thread above).
+
+    None when retrieval is off or the index is still too small to stand in
+    for the API's candidate list.
+    """
+    if not settings.ann_retrieval or len(candidate_index) < settings.ann_min_profiles:
+        return None
+    try:
+        return candidate_index.search_job(data, settings.ann_top_k)
+    except Exception:
+        logger.exception("ann_retrieval_failed", job_id=data.get("job_id"))
+        return None
+
+
+# Singleton instance
+candidate_index = CandidateIndex(
+    path=settings.vector_index_path,
+    kind=settings.vector_index_kind,
+    flush_every=settings.vector_index_flush_every,
+    dtype=settings.vector_store_dtype,
+    max_segments=settings.vector_store_max_segments,
+    codebook=settings.pq_codebook_uri,
+    rescore=settings.ann_rescore,
+)
@@ -13,9 +13,46 @@ class Settings(BaseModel):
     feature_enabled: bool = os.getenv("FEATURE_FLAG_AI_MATCH_V1", "true").lower() == "true"
     fallback_mode: str = os.getenv("FALLBACK_MODE", "manual")
 
+    # profile-ready debouncing (seconds)
+    profile_debounce_quiet_s: float = float(os.getenv("PROFILE_DEBOUNCE_QUIET_S", "5"))
+    profile_debounce_max_wait_s: float = float(os.getenv("PROFILE_DEBOUNCE_MAX_WAIT_S", "30"))
+
+    # Dense profile vectors + ANN candidate retrieval (src.candidate_index).
+    # Vectors are always indexed from profile-ready; narrowing job-published
+    # candidates stays off until the API's /jobs/{id}/candidates honours
+    # freelancer_ids.
+    ann_retrieval: bool = os.getenv("MATCH_ANN_RETRIEVAL", "false").lower() == "true"
+    ann_top_k: int = int(os.getenv("MATCH_ANN_TOP_K", "200"))
+    # Below this many indexed profiles job-published keeps the API's full candidate list
+    ann_min_profiles: int = int(os.getenv("MATCH_ANN_MIN_PROFILES", "1000"))
+    vector_index_kind: str = os.getenv("MATCH_VECTOR_INDEX", "ivf")
+    vector_index_path: str = os.getenv("VECTOR_INDEX_PATH", "")  # empty = in-memory only
+    vector_index_flush_every: int = int(os.getenv("VECTOR_INDEX_FLUSH_EVERY", "50"))
+    vector_store_dtype: str = os.getenv("VECTOR_STORE_DTYPE", "int8")  # int8 | float16
+    vector_store_max_segments: int = int(os.getenv("VECTOR_STORE_MAX_SEGMENTS", "8"))
+    # PQ codebook from the match pipeline (gs:// or path); empty = exact scoring only
+    pq_codebook_uri: str = os.getenv("MATCH_PQ_CODEBOOK", "")
+    ann_rescore: int = int(os.getenv("MATCH_ANN_RESCORE", "300"))
+
+    # Read per-entity features from shared.feature_store (FEATURE_STORE_URL).
+    # Off until every feature the view serves has a writer and all deployments
+    # point FEATURE_STORE_URL at the shared backend (the default is per-process).
+    feature_store_enabled: bool = os.getenv("FEATURE_STORE_ENABLED", "false").lower() == "true"
+
+    # Ranker experiment (shared.experiments): treatment = this version of the registered ranker
+    ab_experiment: str = os.getenv("MATCH_AB_EXPERIMENT", "match-ranker")
+    ab_mode: str = os.getenv("MATCH_AB_MODE", "shadow")  # shadow | split
+    ab_treatment_share: float = float(os.getenv("MATCH_AB_TREATMENT_SHARE", "0"))
+    ab_treatment_version: str = os.getenv("MATCH_AB_TREATMENT_VERSION", "latest")
+    ab_salt: str = os.getenv("MATCH_AB_SALT", "")
+
     # Model
     model_endpoint: str = os.getenv("MODEL_ENDPOINT", "")
+    # Registered version served in-process from MODEL_REGISTRY_URI (shared.model_serving), or
+    # "latest"; a version named in MODEL_MANIFEST_URI takes over at runtime unless pinned
     model_version: str = os.getenv("MODEL_VERSION", "v1.0.0")
+    # Serve model_version and ignore MODEL_MANIFEST_URI promotions
+    model_pinned: bool = os.getenv("MODEL_PINNED", "false").lower() == "true"
 
 
 settings = Settings()
@@ -0,0 +1,100 @@
+"""
+Debouncing and change detection for profile-ready events.
+
+A freelancer editing skills, bio and rate in one session fires several
+profile-ready events within seconds. Debouncer holds each event for a quiet
+period and lets through only the last one of a burst; a steady stream of
+edits is still processed once max_wait has passed since the burst started.
+
+profile_fingerprint() hashes the fields the profile embedding is built from,
+so regeneration can be skipped when nothing relevant changed.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# Inputs of generate_profile_embedding()
+EMBEDDING_FIELDS = (
+    "skills",
+    "bio",
+    "experience_years",
+    "hourly_rate",
+    "completed_jobs",
+    "avg_rating",
+    "specializations",
+    "education",
+    "certifications",
+)
+
+
+def profile_fingerprint(data: dict) -> Optional[str]:
+    """
+    Stable hash of the embedding-relevant fields of a profile event.
+
+    Returns None when the event carries none of them (the PHP API may send
+    only user_id), since an empty payload says nothing about what changed.
+    """
+    fields = {f: data[f] for f in EMBEDDING_FIELDS if data.get(f) not in (None, "", [])}
+    if not fields:
+        return None
+    for f in ("skills", "specializations", "certifications"):
+        if isinstance(fields.get(f), list):
+            fields[f] = sorted(str(v).strip().lower() for v in fields[f])
+    canonical = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+class Debouncer:
+    """Per-key trailing-edge debounce with a max wait."""
+
+    def __init__(self, quiet_period: float, max_wait: float):
+        self.quiet_period = quiet_period
+        self.max_wait = max_wait
+        self._generation: Dict[str, int] = {}
+        self._burst_start: Dict[str, float] = {}
+
+    async def settle(self, key: str) -> bool:
+        """
+        Wait out the quiet period for key.
+
+        Returns True if this call is the latest for key and should proceed,
+        False if a newer call arrived meanwhile (and will do the work).
+        """
+        generation = self._generation.get(key, 0) + 1
+        self._generation[key] = generation
+        started = self._burst_start.setdefault(key, time.monotonic())
+
+        remaining = started + self.max_wait - time.monotonic()
+        delay = max(0.0, min(self.quiet_period, remaining))
+        if delay:
+            await asyncio.sleep(delay)
+
+        if self._generation.get(key) != generation:
+            return False
+        del self._generation[key]
+        self._burst_start.pop(key, None)
+        return True
+
+
+class FingerprintCache:
+    """Last stored embedding fingerprint per user (LRU-bounded)."""
+
+    def __init__(self, max_size: int = 50_000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+
+    def get(self, user_id: str) -> Optional[str]:
+        value = self._entries.get(user_id)
+        if value is not None:
+            self._entries.move_to_end(user_id)
+        return value
+
+    def set(self, user_id: str, fingerprint: str) -> None:
+        self._entries[user_id] = fingerprint
+        self._entries.move_to_end(user_id)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
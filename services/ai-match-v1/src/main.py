@@ -7,6 +7,7 @@ Subscribes to:
 
 Exposes:
   - POST /api/v1/match/rank → sync match ranking (called by PHP API)
+  - GET  /metrics          → Prometheus metrics (shared.metrics)
 """
 
 import os
@@ -20,6 +21,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
 
 from src.routes import router
 from src.config import settings
+from shared.metrics import install_metrics, mark_process_dead
+from shared.tracing import init_tracing, shutdown_tracing
 
 logger = structlog.get_logger()
 
@@ -32,7 +35,7 @@ _subscriber_tasks = []
 async def _start_subscribers():
     """Start Pub/Sub subscribers for matching events."""
     try:
-        from shared.pubsub import subscribe_async
+        from shared.pubsub import subscribe_async, key_by
         from src.subscribers import handle_job_published, handle_profile_ready
 
         global _subscriber_tasks
@@ -42,6 +45,7 @@ async def _start_subscribers():
                     topic_name="job-published",
                     subscription_name="job-published-match",
                     handler=handle_job_published,
+                    ordering_key=key_by("job_id"),
                 )
             )
         )
@@ -51,6 +55,7 @@ async def _start_subscribers():
                     topic_name="profile-ready",
                     subscription_name="profile-ready-match",
                     handler=handle_profile_ready,
+                    ordering_key=key_by("user_id"),
                 )
             )
         )
@@ -59,18 +64,76 @@ async def _start_subscribers():
         logger.exception("subscriber_start_failed")
 
 
+async def _start_context_cache():
+    """Create or reuse provider-side caches for the static prompt prefixes."""
+    try:
+        from src.vertex_ai import CACHED_INSTRUCTIONS, VERTEX_MODEL, is_vertex_enabled
+
+        if not is_vertex_enabled():
+            return
+        from shared.context_cache import context_cache
+
+        await context_cache.start(SERVICE_NAME, VERTEX_MODEL, CACHED_INSTRUCTIONS)
+    except Exception:
+        logger.exception("context_cache_start_failed")
+
+
+async def _load_candidate_index():
+    """Load the persisted profile vectors (VECTOR_INDEX_PATH) off the event loop."""
+    try:
+        from src.candidate_index import candidate_index
+
+        await asyncio.to_thread(candidate_index.load)
+    except Exception:
+        logger.exception("candidate_index_load_failed")
+
+
+async def _start_model():
+    """Load the registered model off the event loop and start following the manifest."""
+    try:
+        from shared.model_serving import get_model_server
+        from src.routes import MODEL_NAME
+
+        await get_model_server(MODEL_NAME, settings.model_version, settings.model_pinned).start()
+        if settings.ab_treatment_share > 0:
+            from src.routes import TREATMENT_KEY
+
+            await get_model_server(MODEL_NAME, settings.ab_treatment_version, pinned=True, key=TREATMENT_KEY).start()
+    except Exception:
+        logger.exception("model_start_failed")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("service_starting", service=SERVICE_NAME, version=VERSION)
+    init_tracing(SERVICE_NAME)
+    await _load_candidate_index()
+    await _start_model()
     await _start_subscribers()
+    await _start_context_cache()
     yield
     for task in _subscriber_tasks:
         task.cancel()
+    from shared.model_serving import get_model_server
+    from src.routes import MODEL_NAME
+    await get_model_server(MODEL_NAME).stop()
+    from shared.context_cache import context_cache
+    await context_cache.stop()
+    from src.candidate_index import candidate_index
+    try:
+        await asyncio.to_thread(candidate_index.save, compact=False)
+    except Exception:
+        logger.exception("candidate_index_save_failed")
+    from shared.feature_log import get_feature_log
+    await asyncio.to_thread(get_feature_log(SERVICE_NAME).flush)
+    await asyncio.to_thread(shutdown_tracing)
+    mark_process_dead()
     logger.info("service_stopping", service=SERVICE_NAME)
 
 
 app = FastAPI(title=SERVICE_NAME, version=VERSION, lifespan=lifespan)
 app.include_router(router)
+install_metrics(app)
 
 
 @app.get("/healthz")
@@ -10,13 +10,15 @@ Ranks freelancers for a given job based on:
 """
 
 import time
+import uuid
+import asyncio
 from fastapi import APIRouter
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
 import structlog
 
 from src.config import settings
-from src.audit import log_ai_decision
+from src.audit import audit_ai_decision
 
 logger = structlog.get_logger()
 
@@ -24,6 +26,11 @@ router = APIRouter(prefix="/api/v1/match")
 
 MODEL_VERSION = f"match-{settings.model_version}"
 
+# Registered ranker scored in-process (shared.model_serving); the weighted rules are the fallback
+MODEL_NAME = "match-v1"
+# Second copy of the ranker, at the version under evaluation (shared.experiments)
+TREATMENT_KEY = "match-v1:treatment"
+
 
 # ── Request / Response models ────────────────────────────────────────
 
@@ -67,6 +74,7 @@ class MatchResponse(BaseModel):
     job_id: str
     results: List[MatchResult]
     model_version: str
+    ab_group: str = "control"  # control | treatment
     total_candidates: int
     latency_ms: int
 
@@ -143,9 +151,13 @@ def _reputation_score(rating: Optional[float], jobs: Optional[int]) -> float:
     return base
 
 
-def rank_candidates(request: MatchRequest) -> MatchResponse:
-    """Rank freelancer candidates for a job."""
-    start = time.monotonic()
+def score_candidates(request: MatchRequest, model=None) -> Tuple[List[MatchResult], Optional[Any]]:
+    """
+    Every candidate scored and sorted best first, with the model that scored them.
+
+    model is a loaded ranker (shared.model_serving); without one, or when it
+    fails, the weighted rule sum scores and the returned model is None.
+    """
     results = []
 
     # Weights for score components
@@ -157,8 +169,8 @@ def rank_candidates(request: MatchRequest) -> MatchResponse:
         "reputation": 0.15,
     }
 
-    for candidate in request.candidates:
-        breakdown = ScoreBreakdown(
+    breakdowns = [
+        ScoreBreakdown(
             skill_match=_skill_match_score(request.job_skills, candidate.skills),
             rate_fit=_rate_fit_score(
                 candidate.hourly_rate, request.job_budget_min, request.job_budget_max
@@ -173,12 +185,19 @@ def rank_candidates(request: MatchRequest) -> MatchResponse:
                 candidate.avg_rating, candidate.total_jobs_completed
             ),
         )
+        for candidate in request.candidates
+    ]
+    model, model_scores = _score_with_model(request, breakdowns, model)
 
-        # Weighted sum
-        total = sum(
-            getattr(breakdown, k) * w for k, w in weights.items()
-        )
-        total = round(min(1.0, total), 4)
+    for i, (candidate, breakdown) in enumerate(zip(request.candidates, breakdowns)):
+        if model_scores is not None:
+            total = float(model_scores[i])
+        else:
+            # Weighted sum
+            total = sum(
+                getattr(breakdown, k) * w for k, w in weights.items()
+            )
+        total = round(min(1.0, max(0.0, total)), 4)
 
         # Generate explanation
         top_signal = max(weights.keys(), key=lambda k: getattr(breakdown, k) * weights[k])
@@ -191,20 +210,49 @@ def rank_candidates(request: MatchRequest) -> MatchResponse:
             explanation=explanation,
         ))
 
-    # Sort by score descending, take top N
+    # Sort by score descending
     results.sort(key=lambda r: r.score, reverse=True)
+    return results, model
+
+
+def rank_candidates(
+    request: MatchRequest,
+    ab_group: str = "control",
+    decision_id: Optional[str] = None,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+) -> MatchResponse:
+    """
+    Rank freelancer candidates for a job with the engine serving ab_group.
+
+    Called from a worker thread, loop is the serving event loop that writes
+    the audit record.
+    """
+    start = time.monotonic()
+    model = treatment_model() if ab_group == "treatment" else active_model()
+    results, model = score_candidates(request, model)
+
+    # Take top N
+    decision_id = decision_id or str(uuid.uuid4())
+    model_version = model.display_name if model is not None else MODEL_VERSION
+    _log_features(request, results, decision_id, model_version, ab_group)
     results = results[: request.limit]
 
     elapsed_ms = int((time.monotonic() - start) * 1000)
 
-    # Audit
-    log_ai_decision(
+    # Audit (written in the background)
+    audit_ai_decision(
+        loop,
+        decision_id=decision_id,
         decision_type="match_rank",
         entity_type="job",
         entity_id=request.job_id,
-        model_name="match-rule-engine",
-        model_version=MODEL_VERSION,
-        output={"results_count": len(results), "top_score": results[0].score if results else 0},
+        model_name=f"match-{model.kind}" if model is not None else "match-rule-engine",
+        model_version=model_version,
+        output={
+            "results_count": len(results),
+            "top_score": results[0].score if results else 0,
+            "ab_group": ab_group,
+        },
         confidence_score=results[0].score if results else 0,
         latency_ms=elapsed_ms,
     )
@@ -212,12 +260,93 @@ def rank_candidates(request: MatchRequest) -> MatchResponse:
     return MatchResponse(
         job_id=request.job_id,
         results=results,
-        model_version=MODEL_VERSION,
+        model_version=model_version,
+        ab_group=ab_group,
         total_candidates=len(request.candidates),
         latency_ms=elapsed_ms,
     )
 
 
+def model_features(request: MatchRequest, candidate: FreelancerCandidate, breakdown: ScoreBreakdown) -> dict:
+    """The inputs one (job, candidate) pair is scored on — logged for training and fed to the ranker."""
+    return {
+        "job_id": request.job_id,
+        "job_skill_count": len(request.job_skills),
+        "job_budget_min": request.job_budget_min,
+        "job_budget_max": request.job_budget_max,
+        "experience_level": request.experience_level,
+        "candidate_count": len(request.candidates),
+        "skill_count": len(candidate.skills),
+        "hourly_rate": candidate.hourly_rate,
+        "experience_years": candidate.experience_years,
+        "profile_completeness": candidate.profile_completeness,
+        "verification_level": candidate.verification_level,
+        "avg_rating": candidate.avg_rating,
+        "total_jobs_completed": candidate.total_jobs_completed,
+        **breakdown.model_dump(),
+    }
+
+
+def active_model():
+    """The ranker serving control traffic, or None (rules)."""
+    from shared.model_serving import get_model_server
+
+    return get_model_server(MODEL_NAME, settings.model_version, settings.model_pinned).model
+
+
+def treatment_model():
+    """The ranker under evaluation (MATCH_AB_TREATMENT_VERSION), or None."""
+    from shared.model_serving import get_model_server
+
+    return get_model_server(MODEL_NAME, settings.ab_treatment_version, pinned=True, key=TREATMENT_KEY).model
+
+
+def _score_with_model(request: MatchRequest, breakdowns: List[ScoreBreakdown], model):
+    """(model, scores) from the ranker, all candidates in one batch; (None, None) to use rules."""
+    if model is None or not request.candidates:
+        return None, None
+    try:
+        rows = [model_features(request, c, b) for c, b in zip(request.candidates, breakdowns)]
+        return model, model.predict(rows)
+    except Exception:
+        logger.exception("model_rank_error", model=model.display_name, job_id=request.job_id)
+        return None, None
+
+
+def _log_features(
+    request: MatchRequest,
+    ranked: List[MatchResult],
+    decision_id: str,
+    model_version: str = MODEL_VERSION,
+    ab_group: str = "control",
+) -> None:
+    """One feature row per scored candidate, in rank order (including those past the limit)."""
+    try:
+        from shared.feature_log import get_feature_log
+
+        feature_log = get_feature_log(settings.service_name)
+        if not feature_log.enabled:
+            return
+        candidates = {c.freelancer_id: c for c in request.candidates}
+        for position, result in enumerate(ranked):
+            candidate = candidates[result.freelancer_id]
+            feature_log.log(
+                "match_rank",
+                entity_id=result.freelancer_id,
+                decision_id=decision_id,
+                features=model_features(request, candidate, result.breakdown),
+                output={
+                    "score": result.score,
+                    "position": position,
+                    "shown": position < request.limit,
+                    "ab_group": ab_group,
+                },
+                model_version=model_version,
+            )
+    except Exception:
+        logger.exception("feature_log_failed", job_id=request.job_id)
+
+
 def _explain(candidate, breakdown, top_signal: str, total: float) -> str:
     """Generate human-readable match explanation."""
     explanations = {
@@ -230,9 +359,126 @@ def _explain(candidate, breakdown, top_signal: str, total: float) -> str:
     return f"Score {total:.2f}: {explanations.get(top_signal, 'Good overall fit')}"
 
 
+# ── Stored features ──────────────────────────────────────────────────
+
+# FreelancerCandidate fields read from the match_freelancer feature view
+_STORED_FIELDS = (
+    "skills", "hourly_rate", "experience_years", "profile_completeness",
+    "verification_level", "avg_rating", "total_jobs_completed",
+)
+
+
+async def with_stored_features(request: MatchRequest) -> MatchRequest:
+    """
+    Fill candidate fields the caller left out from the match_freelancer view.
+
+    All candidates are read in one multi-get; values sent inline win, so a
+    caller may send bare freelancer ids.
+    """
+    if not settings.feature_store_enabled or not request.candidates:
+        return request
+    try:
+        from shared.feature_store import get_feature_store
+
+        features = await asyncio.to_thread(
+            get_feature_store().get_many, "match_freelancer", [c.freelancer_id for c in request.candidates]
+        )
+    except Exception:
+        logger.exception("feature_store_read_failed", job_id=request.job_id)
+        return request
+
+    candidates = []
+    for candidate in request.candidates:
+        stored = features[candidate.freelancer_id]
+        updates = {
+            name: stored[name]
+            for name in _STORED_FIELDS
+            if getattr(candidate, name) in (None, []) and stored[name] not in (None, [])
+        }
+        candidates.append(candidate.model_copy(update=updates) if updates else candidate)
+    return request.model_copy(update={"candidates": candidates})
+
+
+# ── Experiments ──────────────────────────────────────────────────────
+
+def ranker_experiment():
+    from shared.experiments import get_experiment
+
+    return get_experiment(
+        settings.ab_experiment,
+        treatment_share=settings.ab_treatment_share,
+        mode=settings.ab_mode,
+        salt=settings.ab_salt,
+        pair_log=settings.service_name,
+    )
+
+
+def _outcome(response: MatchResponse, latency_ms: float):
+    from shared.experiments import Outcome
+
+    top = response.results
+    return Outcome(
+        score=top[0].score if top else 0.0,
+        latency_ms=latency_ms,
+        detail={"ranked": [r.freelancer_id for r in top], "model_version": response.model_version},
+    )
+
+
+async def _shadow_rank(request: MatchRequest, model):
+    """The treatment ranking of a request already answered by control (no audit, no feature log)."""
+    from shared.experiments import Outcome
+
+    start = time.monotonic()
+    results, used = await asyncio.to_thread(score_candidates, request, model)
+    results = results[: request.limit]
+    return Outcome(
+        score=results[0].score if results else 0.0,
+        latency_ms=(time.monotonic() - start) * 1000,
+        detail={
+            "ranked": [r.freelancer_id for r in results],
+            "model_version": used.display_name if used is not None else MODEL_VERSION,
+        },
+    )
+
+
+async def rank_with_experiment(request: MatchRequest) -> MatchResponse:
+    """
+    Rank under the ranker experiment (MATCH_AB_*).
+
+    split: jobs hashed into the treatment arm are ranked by the treatment
+    model. shadow: control answers every job; for treatment-arm jobs the
+    treatment model re-ranks in the background and the two rankings are
+    recorded as a pair. Without a loaded treatment model control serves.
+    """
+    experiment = ranker_experiment()
+    treatment = treatment_model() if experiment.enabled else None
+    arm = "treatment" if treatment is not None and experiment.serves_treatment(request.job_id) else "control"
+
+    start = time.monotonic()
+    decision_id = str(uuid.uuid4())
+    # Scoring 10k candidates is CPU-bound; keep it off the event loop like the shadow rank
+    response = await asyncio.to_thread(
+        rank_candidates, request, ab_group=arm, decision_id=decision_id, loop=asyncio.get_running_loop()
+    )
+    control = _outcome(response, (time.monotonic() - start) * 1000)
+    if experiment.enabled:
+        experiment.observe(arm, control)
+    if treatment is not None and request.candidates:
+        experiment.shadow(request.job_id, decision_id, control, lambda: _shadow_rank(request, treatment))
+    return response
+
+
 # ── Endpoint ─────────────────────────────────────────────────────────
 
 @router.post("/rank", response_model=MatchResponse)
 async def rank(request: MatchRequest):
     """Rank freelancer candidates for a job."""
-    return rank_candidates(request)
+    return await rank_with_experiment(await with_stored_features(request))
+
+
+@router.get("/experiments")
+async def list_experiments():
+    """Per-arm latency and score distributions of the running experiments."""
+    from shared.experiments import experiments
+
+    return {"experiments": [e.snapshot() for e in experiments()]}
@@ -2,15 +2,29 @@
 Pub/Sub event handlers for ai-match-v1.
 
 Handles:
-  - job-published → compute and store top freelancer matches
-  - profile-ready → generate and store profile embedding
+  - job-published → compute and store top freelancer matches (candidates
+    narrowed by ANN retrieval over profile vectors when MATCH_ANN_RETRIEVAL
+    is on and the index is warm)
+  - profile-ready → update the profile's dense vector, then generate and
+    store the profile embedding (debounced per user, skipped when the
+    embedding inputs are unchanged)
 """
 
+import asyncio
 import time
 import structlog
 
+from src.config import settings
+from src.debounce import Debouncer, FingerprintCache, profile_fingerprint
+
 logger = structlog.get_logger()
 
+_profile_debouncer = Debouncer(
+    quiet_period=settings.profile_debounce_quiet_s,
+    max_wait=settings.profile_debounce_max_wait_s,
+)
+_profile_fingerprints = FingerprintCache()
+
 
 async def handle_job_published(data: dict) -> None:
     """
@@ -28,11 +42,19 @@ async def handle_job_published(data: dict) -> None:
 
     try:
         from src.vertex_ai import rank_with_vertex, is_vertex_enabled
+        from shared.metrics import record_fallback
 
-        # Fetch candidate freelancers from the PHP API
+        # Fetch candidate freelancers from the PHP API; with a warm vector
+        # index only the ANN top-K are requested, best match first
         from shared.callback import api_callback
-        candidates_resp = await api_callback.get(f"/jobs/{job_id}/candidates")
+        from src.candidate_index import retrieve_candidates
+
+        retrieved = await asyncio.to_thread(retrieve_candidates, data)
+        params = {"freelancer_ids": ",".join(user_id for user_id, _ in retrieved)} if retrieved else None
+        candidates_resp = await api_callback.get(f"/jobs/{job_id}/candidates", params=params)
         candidates = candidates_resp.get("candidates", []) if candidates_resp else []
+        if retrieved:
+            candidates = _order_by_retrieval(candidates, retrieved)
 
         if not candidates:
             logger.info("no_candidates_found", job_id=job_id)
@@ -62,9 +84,10 @@ async def handle_job_published(data: dict) -> None:
                     latency_ms=int((time.monotonic() - start) * 1000),
                 )
                 return
+            record_fallback("match_ranking")
 
         # Fallback: rule-based ranking
-        from src.routes import rank_candidates, MatchRequest, FreelancerCandidate
+        from src.routes import rank_with_experiment, MatchRequest, FreelancerCandidate
 
         request = MatchRequest(
             job_id=job_id,
@@ -76,11 +99,12 @@ async def handle_job_published(data: dict) -> None:
                 FreelancerCandidate(**c) for c in candidates
             ],
         )
-        result = rank_candidates(request)
+        result = await rank_with_experiment(request)
 
         await api_callback.post(f"/jobs/{job_id}/matches", {
             "results": [r.model_dump() for r in result.results],
             "model_version": result.model_version,
+            "ab_group": result.ab_group,
             "latency_ms": result.latency_ms,
         })
         logger.info(
@@ -92,6 +116,50 @@ async def handle_job_published(data: dict) -> None:
         logger.exception("job_match_failed", job_id=job_id)
 
 
+def _order_by_retrieval(candidates: list, retrieved: list) -> list:
+    """Retrieved candidates by similarity, then any the index doesn't know yet."""
+    rank = {user_id: i for i, (user_id, _) in enumerate(retrieved)}
+    return sorted(candidates, key=lambda c: rank.get(c.get("freelancer_id"), len(rank)))
+
+
+def _record_freelancer_features(user_id: str, data: dict) -> None:
+    """Write the profile's ranking signals to the match_freelancer feature view."""
+    if not settings.feature_store_enabled:
+        return
+    values = {
+        "skills": data.get("skills"),
+        "hourly_rate": data.get("hourly_rate"),
+        "experience_years": data.get("experience_years"),
+        "profile_completeness": data.get("profile_completeness"),
+        "verification_level": data.get("verification_level"),
+        "avg_rating": data.get("avg_rating"),
+        "total_jobs_completed": data.get("completed_jobs"),
+    }
+    if all(value is None for value in values.values()):
+        # A bare {user_id} event would only refresh the snapshot's timestamp
+        return
+    try:
+        from shared.feature_store import get_feature_store
+
+        get_feature_store().write("match_freelancer", user_id, values)
+    except Exception:
+        logger.exception("feature_store_write_failed", user_id=user_id)
+
+
+async def _index_profile(user_id: str, data: dict) -> None:
+    """Refresh the profile's dense vector used for ANN retrieval (encode and flush off the event loop)."""
+    try:
+        from src.candidate_index import candidate_index, profile_text
+
+        if not profile_text(data):
+            # An empty text would embed to a zero vector that matches nothing
+            logger.info("profile_vector_skipped", user_id=user_id, reason="no_profile_text")
+            return
+        await asyncio.to_thread(candidate_index.upsert, user_id, data)
+    except Exception:
+        logger.exception("profile_vector_failed", user_id=user_id)
+
+
 async def handle_profile_ready(data: dict) -> None:
     """
     When a freelancer profile is ready, generate and store their
@@ -103,11 +171,31 @@ async def handle_profile_ready(data: dict) -> None:
         logger.warning("missing_user_id", data=data)
         return
 
+    if not await _profile_debouncer.settle(user_id):
+        logger.info("profile_embedding_debounced", user_id=user_id)
+        return
+
+    _record_freelancer_features(user_id, data)
+
+    # The API may echo the hash it stored with the last embedding
+    fingerprint = profile_fingerprint(data)
+    stored = data.get("embedding_hash") or _profile_fingerprints.get(user_id)
+    if fingerprint is not None and fingerprint == stored:
+        from src.candidate_index import candidate_index
+
+        # The summary is current, but a fresh index may still lack the vector
+        if not await asyncio.to_thread(candidate_index.__contains__, user_id):
+            await _index_profile(user_id, data)
+        logger.info("profile_embedding_unchanged", user_id=user_id)
+        return
+
     logger.info("profile_embedding_start", user_id=user_id)
     start = time.monotonic()
+    await _index_profile(user_id, data)
 
     try:
         from src.vertex_ai import generate_profile_embedding, is_vertex_enabled
+        from shared.metrics import record_fallback
 
         if is_vertex_enabled():
             result = await generate_profile_embedding(
@@ -127,7 +215,10 @@ async def handle_profile_ready(data: dict) -> None:
                 await api_callback.patch(f"/freelancers/{user_id}/embedding", {
                     "profile_embedding": result,
                     "model_version": f"vertex-ai/{result.get('model', 'gemini-3-flash-preview')}",
+                    "embedding_hash": fingerprint,
                 })
+                if fingerprint is not None:
+                    _profile_fingerprints.set(user_id, fingerprint)
                 logger.info(
                     "profile_embedding_complete_vertex",
                     user_id=user_id,
@@ -135,6 +226,7 @@ async def handle_profile_ready(data: dict) -> None:
                     latency_ms=int((time.monotonic() - start) * 1000),
                 )
                 return
+            record_fallback("profile_embedding")
 
         # Fallback: basic profile data
         from shared.callback import api_callback
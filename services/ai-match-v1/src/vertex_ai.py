@@ -48,18 +48,10 @@ def is_vertex_enabled() -> bool:
 
 # ── Job-Freelancer Match Ranking ─────────────────────────────────────
 
-MATCH_RANKING_PROMPT = """You are an AI talent matcher for MonkeysWork, a freelance marketplace.
-Rank these freelancer candidates for the given job based on overall fit.
-
-JOB DETAILS:
-- Title: {job_title}
-- Description: {job_description}
-- Required Skills: {job_skills}
-- Budget: ${budget_min} – ${budget_max}
-- Experience Level: {experience_level}
-
-CANDIDATES:
-{candidates_json}
+# Static instructions (cached provider-side, see shared.context_cache);
+# MATCH_RANKING_PROMPT carries only the per-request data.
+MATCH_RANKING_INSTRUCTIONS = """You are an AI talent matcher for MonkeysWork, a freelance marketplace.
+Rank the freelancer candidates below for the job described based on overall fit.
 
 For EACH candidate, evaluate:
 1. Skill relevance (direct match and transferable skills)
@@ -71,22 +63,58 @@ For EACH candidate, evaluate:
 Rank ALL candidates from best to worst fit.
 
 Respond in STRICT JSON only:
-{{
+{
   "rankings": [
-    {{
+    {
       "freelancer_id": "<string>",
       "score": <float 0.0-1.0>,
-      "breakdown": {{
+      "breakdown": {
         "skill_match": <float 0.0-1.0>,
         "rate_fit": <float 0.0-1.0>,
         "experience_fit": <float 0.0-1.0>,
         "profile_quality": <float 0.0-1.0>,
         "reputation": <float 0.0-1.0>
-      }},
+      },
       "explanation": "<short human-readable reason for this ranking>"
-    }}
+    }
   ]
-}}"""
+}"""
+
+MATCH_RANKING_PROMPT = """JOB DETAILS:
+- Title: {job_title}
+- Description: {job_description}
+- Required Skills: {job_skills}
+- Budget: ${budget_min} – ${budget_max}
+- Experience Level: {experience_level}
+
+CANDIDATES (compact JSON; keys: {candidate_keys}):
+{candidates_json}"""
+
+
+MAX_RANKED_CANDIDATES = 50
+
+# Short keys for candidate JSON; the legend is included in the prompt
+CANDIDATE_ABBREVIATIONS = {
+    "skills": "sk",
+    "hourly_rate": "rate",
+    "experience_years": "yrs",
+    "profile_completeness": "compl",
+    "verification_level": "verif",
+    "avg_rating": "rating",
+    "total_jobs_completed": "jobs",
+}
+
+
+def _compact_candidate(candidate: dict) -> dict:
+    """Candidate with deduplicated skills, for the compact prompt block."""
+    from shared.prompting import dedupe_skills
+
+    if not isinstance(candidate, dict):
+        return candidate
+    compact = dict(candidate)
+    if "skills" in compact:
+        compact["skills"] = dedupe_skills(compact["skills"])
+    return compact
 
 
 async def rank_with_vertex(
@@ -105,21 +133,40 @@ async def rank_with_vertex(
     if not candidates:
         return None
 
-    prompt = MATCH_RANKING_PROMPT.format(
-        job_title=job_title,
-        job_description=job_description[:2000],  # Truncate for token limits
-        job_skills=", ".join(job_skills or []),
-        budget_min=budget_min or "N/A",
-        budget_max=budget_max or "N/A",
-        experience_level=experience_level or "Any",
-        candidates_json=json.dumps(candidates[:50], indent=2),  # Max 50 candidates
+    from shared.prompting import (
+        PromptBuilder, abbreviation_legend, compact_json, dedupe_skills, estimate_tokens, log_token_usage,
+    )
+    from shared.context_cache import context_cache
+    from shared.metrics import observe_model
+
+    prompt = (
+        PromptBuilder(
+            MATCH_RANKING_PROMPT, "match_ranking",
+            reserved_tokens=estimate_tokens(MATCH_RANKING_INSTRUCTIONS),
+        )
+        .add("job_title", job_title)
+        .add("job_description", job_description or "", priority=2, min_tokens=150)
+        .add("job_skills", ", ".join(dedupe_skills(job_skills)))
+        .add("budget_min", budget_min or "N/A")
+        .add("budget_max", budget_max or "N/A")
+        .add("experience_level", experience_level or "Any")
+        .add("candidate_keys", abbreviation_legend(CANDIDATE_ABBREVIATIONS))
+        .add_items(
+            "candidates_json",
+            [_compact_candidate(c) for c in candidates[:MAX_RANKED_CANDIDATES]],
+            render=lambda items: "\n".join(compact_json(c, CANDIDATE_ABBREVIATIONS) for c in items),
+            priority=1,
+        )
+        .build()
     )
 
     try:
         start = time.monotonic()
-        model = _get_model()
-        response = model.generate_content(
-            prompt,
+        model, contents = context_cache.prepare(
+            "match_ranking", MATCH_RANKING_INSTRUCTIONS, prompt.text, _get_model(),
+        )
+        response = observe_model(model, "match_ranking").generate_content(
+            contents,
             generation_config={
                 "temperature": 0.1,
                 "max_output_tokens": 4096,
@@ -127,6 +174,8 @@ async def rank_with_vertex(
             },
         )
 
+        log_token_usage("match_ranking", response, prompt)
+
         text = response.text.strip()
         if text.startswith("```"):
             text = text.split("\n", 1)[1]
@@ -199,29 +248,35 @@ async def generate_profile_embedding(
     if not is_vertex_enabled():
         return None
 
-    prompt = EMBEDDING_PROMPT.format(
-        skills=", ".join(skills or []),
-        bio=bio[:1000] or "Not provided",
-        experience_years=experience_years,
-        hourly_rate=hourly_rate,
-        completed_jobs=completed_jobs,
-        avg_rating=avg_rating,
-        specializations=", ".join(specializations or []),
-        education=education or "Not provided",
-        certifications=", ".join(certifications or []),
+    from shared.prompting import PromptBuilder, dedupe_skills, log_token_usage
+    from shared.metrics import observe_model
+
+    prompt = (
+        PromptBuilder(EMBEDDING_PROMPT, "profile_embedding")
+        .add("skills", ", ".join(dedupe_skills(skills)), priority=1, min_tokens=100)
+        .add("bio", bio or "Not provided", priority=3, min_tokens=100)
+        .add("experience_years", experience_years)
+        .add("hourly_rate", hourly_rate)
+        .add("completed_jobs", completed_jobs)
+        .add("avg_rating", avg_rating)
+        .add("specializations", ", ".join(dedupe_skills(specializations)), priority=2, min_tokens=50)
+        .add("education", education or "Not provided", priority=2, min_tokens=50)
+        .add("certifications", ", ".join(dedupe_skills(certifications)), priority=2, min_tokens=50)
+        .build()
     )
 
     try:
         start = time.monotonic()
         model = _get_model()
-        response = model.generate_content(
-            prompt,
+        response = observe_model(model, "profile_embedding").generate_content(
+            prompt.text,
             generation_config={
                 "temperature": 0.1,
                 "max_output_tokens": 2048,
                 "response_mime_type": "application/json",
             },
         )
+        log_token_usage("profile_embedding", response, prompt)
 
         text = response.text.strip()
         if text.startswith("```"):
@@ -242,3 +297,9 @@ async def generate_profile_embedding(
     except Exception as e:
         logger.exception("vertex_profile_embedding_failed", error=str(e))
         return None
+
+
+# Instruction prefixes cached provider-side at startup (shared.context_cache)
+CACHED_INSTRUCTIONS = {
+    "match_ranking": MATCH_RANKING_INSTRUCTIONS,
+}
@@ -1,6 +1,7 @@
 """Tests for ai-match-v1 audit logging."""
+import asyncio
 import uuid
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 from datetime import datetime
 from src.audit import log_ai_decision
 
@@ -104,3 +105,27 @@ class TestLogAiDecision:
         assert call_kwargs["decision_type"] == "test_decision"
         assert "id" in call_kwargs
         assert "created_at" in call_kwargs
+
+
+class TestRankAudit:
+    """Served rankings schedule their audit record from the scoring thread"""
+
+    def test_ranking_is_audited_on_the_serving_loop(self):
+        from src.routes import FreelancerCandidate, MatchRequest, rank_with_experiment
+
+        audit = AsyncMock(return_value={})
+        request = MatchRequest(job_id="job-1", job_skills=["React"], candidates=[
+            FreelancerCandidate(freelancer_id="u1", skills=["React"]),
+        ])
+
+        async def scenario():
+            response = await rank_with_experiment(request)
+            await asyncio.sleep(0.05)  # the worker thread hands the audit to this loop
+            return response
+
+        with patch("src.audit.log_ai_decision", audit):
+            response = asyncio.run(scenario())
+        audit.assert_awaited_once()
+        kwargs = audit.await_args.kwargs
+        assert kwargs["decision_type"] == "match_rank" and kwargs["entity_id"] == "job-1"
+        assert kwargs["output"]["ab_group"] == response.ab_group
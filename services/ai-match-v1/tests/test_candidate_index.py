@@ -0,0 +1,186 @@
+"""Tests for dense profile vectors and ANN retrieval (src.candidate_index)."""
+import asyncio
+import json
+import threading
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared.embeddings import HashingEmbedder
+from shared.vector_index import IvfIndex
+from src import candidate_index as ci
+from src import subscribers
+from src.candidate_index import CandidateIndex, job_text, profile_text
+
+PROFILES = {
+    "react-dev": {"skills": ["React", "TypeScript", "Redux"], "bio": "Frontend engineer building SaaS dashboards"},
+    "django-dev": {"skills": ["Python", "Django", "PostgreSQL"], "bio": "Backend developer for REST APIs"},
+    "designer": {"skills": ["Figma", "Branding"], "bio": "Logo and brand identity designer"},
+}
+REACT_JOB = {
+    "job_id": "job-1",
+    "title": "React dashboard",
+    "skills_required": ["React", "TypeScript"],
+    "description": "Build a SaaS dashboard frontend",
+}
+
+
+def _index(**kwargs):
+    index = CandidateIndex(embedder=HashingEmbedder(), **kwargs)
+    index.upsert_many(PROFILES)
+    return index
+
+
+class TestTexts:
+    """profile_text / job_text"""
+
+    def test_profile_text_skips_empty_fields(self):
+        text = profile_text({"skills": ["React"], "bio": "Hi", "certifications": []})
+        assert text == "Skills: React\nHi"
+
+    def test_job_text_includes_title_and_skills(self):
+        assert job_text(REACT_JOB).startswith("React dashboard\nSkills: React, TypeScript")
+
+
+class TestCandidateIndex:
+    """CandidateIndex"""
+
+    def test_job_retrieves_most_similar_profile_first(self):
+        hits = _index().search_job(REACT_JOB, k=2)
+        assert hits[0][0] == "react-dev"
+        assert len(hits) == 2
+
+    def test_upsert_replaces_vector(self):
+        index = _index()
+        index.upsert("designer", {"skills": ["React", "TypeScript"], "bio": "SaaS dashboard frontend"})
+        assert len(index) == 3
+        assert {u for u, _ in index.search_job(REACT_JOB, k=2)} == {"react-dev", "designer"}
+
+    def test_remove(self):
+        index = _index()
+        index.remove("react-dev")
+        assert "react-dev" not in index
+        assert all(u != "react-dev" for u, _ in index.search_job(REACT_JOB, k=3))
+
+    def test_save_and_load_round_trip(self, tmp_path):
+        index = _index(path=str(tmp_path))
+        index.save()
+        assert len(json.loads((tmp_path / "MANIFEST.json").read_text())["segments"]) == 1
+
+        loaded = CandidateIndex(path=str(tmp_path), embedder=HashingEmbedder())
+        assert loaded.load() is True
+        assert len(loaded) == 3
+        assert loaded.search_job(REACT_JOB, k=1)[0][0] == "react-dev"
+
+        loaded.upsert("new", {"skills": ["Go"]})
+        assert len(loaded) == 4 and "react-dev" in loaded
+
+    def test_saves_every_flush_every_updates(self, tmp_path):
+        index = CandidateIndex(path=str(tmp_path), flush_every=2, embedder=HashingEmbedder())
+        index.upsert("a", PROFILES["react-dev"])
+        assert index.store.segments == 0
+        index.upsert("b", PROFILES["designer"])
+        assert index.store.segments == 1
+
+    def test_too_many_segments_compact_in_the_background(self, tmp_path):
+        index = CandidateIndex(path=str(tmp_path), flush_every=1, max_segments=2, embedder=HashingEmbedder())
+        with patch.object(index, "compact_in_background", wraps=index.compact_in_background) as background:
+            for user_id, data in PROFILES.items():
+                index.upsert(user_id, data)
+        background.assert_called_once()
+        index._compaction.join(timeout=10)
+        # The serving store picks up the merged segment on its next read
+        assert len(index) == len(PROFILES) and index.store.segments == 1
+        assert index.search_job(REACT_JOB, k=1)[0][0] == "react-dev"
+
+    def test_load_resets_store_of_other_embedder(self, tmp_path):
+        _index(path=str(tmp_path)).save()
+        other = CandidateIndex(path=str(tmp_path), embedder=HashingEmbedder(dim=128))
+        assert other.load() is False
+        assert len(other) == 0
+
+    def test_workers_share_the_store(self, tmp_path):
+        writer = _index(path=str(tmp_path))
+        reader = CandidateIndex(path=str(tmp_path), embedder=HashingEmbedder())
+        reader.load()
+        assert len(reader) == 0
+        writer.save()
+        assert reader.search_job(REACT_JOB, k=1)[0][0] == "react-dev"
+
+    def test_ivf_kind_retrieves_after_training(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(600, 32)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        index = IvfIndex(32, nlist=8, nprobe=4)
+        index.add_many(range(600), vectors)
+        assert index._centroids is not None
+        assert index.search(vectors[42], k=1)[0][0] == 42
+
+
+class TestRetrieveCandidates:
+    """retrieve_candidates"""
+
+    def test_small_index_keeps_api_candidates(self):
+        with patch.object(ci, "candidate_index", _index()), \
+                patch.object(ci.settings, "ann_retrieval", True), \
+                patch.object(ci.settings, "ann_min_profiles", 10):
+            assert ci.retrieve_candidates(REACT_JOB) is None
+
+    def test_disabled(self):
+        with patch.object(ci, "candidate_index", _index()), \
+                patch.object(ci.settings, "ann_retrieval", False):
+            assert ci.retrieve_candidates(REACT_JOB) is None
+
+
+class TestProfileReadyIndexing:
+    """handle_profile_ready → candidate_index"""
+
+    def test_profile_without_text_is_not_indexed(self):
+        index = CandidateIndex(embedder=HashingEmbedder())
+        with patch.object(ci, "candidate_index", index):
+            asyncio.run(subscribers._index_profile("u-1", {"user_id": "u-1", "timestamp": "2026-01-01T00:00:00Z"}))
+            asyncio.run(subscribers._index_profile("u-2", {"user_id": "u-2", "skills": ["React"], "headline": "Frontend dev"}))
+        assert "u-1" not in index and "u-2" in index
+
+    def test_profile_is_embedded_off_the_event_loop(self):
+        index = CandidateIndex(embedder=HashingEmbedder())
+        threads = []
+        embed = index.embedder.embed
+
+        def recording_embed(texts):
+            threads.append(threading.current_thread())
+            return embed(texts)
+
+        with patch.object(ci, "candidate_index", index), \
+                patch.object(index.embedder, "embed", side_effect=recording_embed):
+            asyncio.run(subscribers._index_profile("u-2", {"user_id": "u-2", "skills": ["React"]}))
+        assert threads and threads[0] is not threading.main_thread()
+
+
+class TestJobPublishedRetrieval:
+    """handle_job_published with a warm vector index"""
+
+    def test_requests_and_orders_retrieved_candidates(self):
+        api_candidates = [
+            {"freelancer_id": "unindexed", "skills": ["React"]},
+            {"freelancer_id": "django-dev", "skills": ["Python"]},
+            {"freelancer_id": "react-dev", "skills": ["React", "TypeScript"]},
+        ]
+        get = AsyncMock(return_value={"candidates": api_candidates})
+        rank = AsyncMock(return_value={"rankings": [], "model": "m"})
+        with patch.object(ci, "candidate_index", _index()), \
+                patch.object(ci.settings, "ann_retrieval", True), \
+                patch.object(ci.settings, "ann_min_profiles", 1), \
+                patch.object(ci.settings, "ann_top_k", 2), \
+                patch("shared.callback.api_callback.get", get), \
+                patch("shared.callback.api_callback.post", AsyncMock(return_value={})), \
+                patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai.rank_with_vertex", rank):
+            asyncio.run(subscribers.handle_job_published(REACT_JOB))
+
+        requested = get.await_args.kwargs["params"]["freelancer_ids"].split(",")
+        assert requested[0] == "react-dev" and len(requested) == 2
+        ranked = [c["freelancer_id"] for c in rank.await_args.kwargs["candidates"]]
+        assert ranked[0] == "react-dev"
+        assert ranked[-1] == "unindexed"
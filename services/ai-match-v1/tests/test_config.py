@@ -96,3 +96,54 @@ class TestSettingsEnvOverrides:
         with patch.dict(os.environ, {"MODEL_VERSION": "v2.5.0"}):
             s = self._reload_settings()
             assert s.model_version == "v2.5.0"
+
+    def test_profile_debounce_defaults(self):
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("PROFILE_DEBOUNCE_QUIET_S", None)
+            os.environ.pop("PROFILE_DEBOUNCE_MAX_WAIT_S", None)
+            s = self._reload_settings()
+            assert s.profile_debounce_quiet_s == 5.0
+            assert s.profile_debounce_max_wait_s == 30.0
+
+    def test_env_override_profile_debounce(self):
+        with patch.dict(os.environ, {"PROFILE_DEBOUNCE_QUIET_S": "0.5", "PROFILE_DEBOUNCE_MAX_WAIT_S": "2"}):
+            s = self._reload_settings()
+            assert s.profile_debounce_quiet_s == 0.5
+            assert s.profile_debounce_max_wait_s == 2.0
+
+    def test_ann_retrieval_defaults(self):
+        with patch.dict(os.environ, {}, clear=False):
+            for key in ("MATCH_ANN_RETRIEVAL", "MATCH_ANN_TOP_K", "VECTOR_INDEX_PATH"):
+                os.environ.pop(key, None)
+            s = self._reload_settings()
+            assert s.ann_retrieval is False
+            assert s.ann_top_k == 200
+            assert s.vector_index_path == ""
+
+    def test_env_override_ann_retrieval(self):
+        with patch.dict(os.environ, {"MATCH_ANN_RETRIEVAL": "true", "VECTOR_INDEX_PATH": "/var/lib/match"}):
+            s = self._reload_settings()
+            assert s.ann_retrieval is True
+            assert s.vector_index_path == "/var/lib/match"
+
+    def test_feature_store_reads_off_by_default(self):
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("FEATURE_STORE_ENABLED", None)
+            s = self._reload_settings()
+            assert s.feature_store_enabled is False
+
+    def test_vector_store_defaults(self):
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("VECTOR_STORE_DTYPE", None)
+            os.environ.pop("VECTOR_STORE_MAX_SEGMENTS", None)
+            s = self._reload_settings()
+            assert s.vector_store_dtype == "int8"
+            assert s.vector_store_max_segments == 8
+
+    def test_pq_defaults(self):
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("MATCH_PQ_CODEBOOK", None)
+            os.environ.pop("MATCH_ANN_RESCORE", None)
+            s = self._reload_settings()
+            assert s.pq_codebook_uri == ""
+            assert s.ann_rescore == 300
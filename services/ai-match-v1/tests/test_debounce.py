@@ -0,0 +1,146 @@
+"""Tests for debounced profile-ready processing."""
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from src import subscribers
+from src.debounce import Debouncer, FingerprintCache, profile_fingerprint
+
+
+PROFILE_EVENT = {
+    "event": "profile_ready",
+    "user_id": "user-1",
+    "skills": ["Python", "FastAPI"],
+    "bio": "Backend engineer",
+    "hourly_rate": 80,
+    "specializations": ["APIs"],
+}
+
+
+class TestProfileFingerprint:
+    """profile_fingerprint"""
+
+    def test_same_fields_same_hash(self):
+        assert profile_fingerprint(PROFILE_EVENT) == profile_fingerprint(dict(PROFILE_EVENT))
+
+    def test_skill_order_and_case_ignored(self):
+        reordered = {**PROFILE_EVENT, "skills": ["fastapi", "python"]}
+        assert profile_fingerprint(reordered) == profile_fingerprint(PROFILE_EVENT)
+
+    def test_relevant_change_changes_hash(self):
+        changed = {**PROFILE_EVENT, "hourly_rate": 95}
+        assert profile_fingerprint(changed) != profile_fingerprint(PROFILE_EVENT)
+
+    def test_irrelevant_fields_ignored(self):
+        noisy = {**PROFILE_EVENT, "timestamp": "2026-01-01T10:00:00+00:00"}
+        assert profile_fingerprint(noisy) == profile_fingerprint(PROFILE_EVENT)
+
+    def test_event_without_profile_fields_has_no_hash(self):
+        assert profile_fingerprint({"user_id": "user-1", "timestamp": "x"}) is None
+
+
+class TestDebouncer:
+    """Debouncer.settle"""
+
+    def test_only_last_call_of_burst_proceeds(self):
+        async def scenario():
+            debouncer = Debouncer(quiet_period=0.03, max_wait=1.0)
+            first = asyncio.create_task(debouncer.settle("u"))
+            await asyncio.sleep(0.01)
+            second = asyncio.create_task(debouncer.settle("u"))
+            return await first, await second
+
+        assert asyncio.run(scenario()) == (False, True)
+
+    def test_keys_are_independent(self):
+        async def scenario():
+            debouncer = Debouncer(quiet_period=0.01, max_wait=1.0)
+            return await asyncio.gather(debouncer.settle("a"), debouncer.settle("b"))
+
+        assert asyncio.run(scenario()) == [True, True]
+
+    def test_max_wait_caps_the_delay(self):
+        async def scenario():
+            debouncer = Debouncer(quiet_period=10.0, max_wait=0.02)
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            proceed = await debouncer.settle("u")
+            return proceed, loop.time() - start
+
+        proceed, elapsed = asyncio.run(scenario())
+        assert proceed is True
+        assert elapsed < 1.0
+
+    def test_new_burst_after_settle(self):
+        async def scenario():
+            debouncer = Debouncer(quiet_period=0.01, max_wait=1.0)
+            return await debouncer.settle("u"), await debouncer.settle("u")
+
+        assert asyncio.run(scenario()) == (True, True)
+
+
+class TestFingerprintCache:
+    """FingerprintCache"""
+
+    def test_evicts_least_recent(self):
+        cache = FingerprintCache(max_size=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+
+
+class TestHandleProfileReady:
+    """handle_profile_ready debouncing + change detection"""
+
+    def _run(self, *events, vertex_result=None):
+        generate = AsyncMock(return_value=vertex_result or {"primary_domain": "backend", "model": "m"})
+        callback = AsyncMock(return_value={})
+
+        async def scenario():
+            tasks = []
+            for event in events:
+                tasks.append(asyncio.create_task(subscribers.handle_profile_ready(event)))
+                await asyncio.sleep(0.005)
+            await asyncio.gather(*tasks)
+
+        with patch.object(subscribers, "_profile_debouncer", Debouncer(0.02, 1.0)), \
+                patch.object(subscribers, "_profile_fingerprints", FingerprintCache()), \
+                patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai.generate_profile_embedding", generate), \
+                patch("shared.callback.api_callback.patch", callback):
+            asyncio.run(scenario())
+        return generate, callback
+
+    def test_burst_generates_once_with_latest_data(self):
+        latest = {**PROFILE_EVENT, "bio": "Senior backend engineer"}
+        generate, callback = self._run(PROFILE_EVENT, latest)
+        generate.assert_awaited_once()
+        assert generate.await_args.kwargs["bio"] == "Senior backend engineer"
+        assert callback.await_args.args[1]["embedding_hash"] == profile_fingerprint(latest)
+
+    def test_unchanged_profile_skips_regeneration(self):
+        async def scenario():
+            await subscribers.handle_profile_ready(PROFILE_EVENT)
+            await subscribers.handle_profile_ready(dict(PROFILE_EVENT))
+
+        generate = AsyncMock(return_value={"model": "m"})
+        with patch.object(subscribers, "_profile_debouncer", Debouncer(0.0, 1.0)), \
+                patch.object(subscribers, "_profile_fingerprints", FingerprintCache()), \
+                patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai.generate_profile_embedding", generate), \
+                patch("shared.callback.api_callback.patch", AsyncMock(return_value={})):
+            asyncio.run(scenario())
+        generate.assert_awaited_once()
+
+    def test_hash_echoed_by_api_skips_regeneration(self):
+        event = {**PROFILE_EVENT, "embedding_hash": profile_fingerprint(PROFILE_EVENT)}
+        generate, _ = self._run(event)
+        generate.assert_not_awaited()
+
+    def test_event_without_fields_always_regenerates(self):
+        event = {"event": "profile_ready", "user_id": "user-2"}
+        generate, _ = self._run(event)
+        generate.assert_awaited_once()
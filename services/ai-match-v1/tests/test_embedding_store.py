@@ -0,0 +1,156 @@
+"""Tests for the memory-mapped embedding store (shared.embedding_store)."""
+import json
+
+import numpy as np
+import pytest
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared import embedding_store
+from shared.embedding_store import EmbeddingStore, dequantize, quantize
+
+
+def _unit(n, dim=16, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _store(path, **kwargs):
+    store = EmbeddingStore(str(path), dim=16, **kwargs)
+    store.open()
+    return store
+
+
+class TestQuantization:
+    """quantize / dequantize"""
+
+    @pytest.mark.parametrize("dtype", ["int8", "float16"])
+    def test_round_trip_keeps_cosine(self, dtype):
+        vectors = _unit(50)
+        rows, scale = quantize(vectors, dtype)
+        restored = dequantize(rows, scale)
+        assert np.abs((restored * vectors).sum(axis=1) - 1.0).max() < 0.01
+
+    def test_int8_is_a_quarter_of_float32(self):
+        rows, _ = quantize(_unit(10, dim=384), "int8")
+        assert rows.dtype == np.int8 and rows.nbytes == 10 * 384
+
+
+class TestEmbeddingStore:
+    """EmbeddingStore"""
+
+    def test_search_finds_exact_vector(self, tmp_path):
+        vectors = _unit(100)
+        store = _store(tmp_path)
+        store.put([f"u{i}" for i in range(100)], vectors)
+        store.flush()
+        assert store.search(vectors[7], k=1)[0][0] == "u7"
+
+    def test_segments_are_memory_mapped(self, tmp_path):
+        store = _store(tmp_path)
+        store.put(["a"], _unit(1))
+        store.flush()
+        assert isinstance(store._segments[0].vec, np.memmap)
+
+    def test_later_segment_shadows_earlier_row(self, tmp_path):
+        a, b = _unit(2)
+        store = _store(tmp_path)
+        store.put(["x"], a[None])
+        store.flush()
+        store.put(["x"], b[None])
+        store.flush()
+        assert len(store) == 1
+        assert np.allclose(store.get("x"), b, atol=0.01)
+
+    def test_delete_writes_tombstone(self, tmp_path):
+        store = _store(tmp_path)
+        store.put(["x", "y"], _unit(2))
+        store.flush()
+        store.delete(["x"])
+        assert "x" not in store  # pending deletes apply immediately
+        store.flush()
+        assert "x" not in store and len(store) == 1
+        assert [i for i, _ in store.search(_unit(2)[0], k=2)] == ["y"]
+
+    def test_pending_rows_are_searchable(self, tmp_path):
+        vectors = _unit(3)
+        store = _store(tmp_path)
+        store.put(["a", "b"], vectors[:2])
+        assert store.search(vectors[1], k=1)[0][0] == "b"
+
+    def test_compaction_merges_and_drops_dead_rows(self, tmp_path):
+        store = _store(tmp_path, max_segments=100)
+        vectors = _unit(30)
+        for i in range(3):
+            store.put([f"u{j}" for j in range(10 * i, 10 * i + 10)], vectors[10 * i:10 * i + 10])
+            store.flush()
+        store.delete(["u0"])
+        store.flush()
+        store.compact()
+
+        assert store.segments == 1
+        assert len(store) == 29 and "u0" not in store
+        assert len(list(tmp_path.glob("*.vec.npy"))) == 1
+        assert store.search(vectors[12], k=1)[0][0] == "u12"
+
+    def test_flush_never_compacts_inline(self, tmp_path):
+        store = _store(tmp_path, max_segments=2)
+        for i, vector in enumerate(_unit(3)):
+            store.put([f"u{i}"], vector[None])
+            store.flush()
+        assert store.segments == 3 and store.should_compact
+        store.compact()
+        assert store.segments == 1 and len(store) == 3 and not store.should_compact
+
+    def test_compaction_clusters_large_segments(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(embedding_store, "IVF_MIN_ROWS", 200)
+        vectors = _unit(800)
+        store = _store(tmp_path, nprobe=4)
+        store.put([f"u{i}" for i in range(800)], vectors)
+        store.flush()
+        store.compact(nlist=8)
+
+        segment = store._segments[0]
+        assert segment.centroids.shape == (8, 16)
+        assert segment.offsets[-1] == 800
+        hits = [store.search(vectors[i], k=1)[0][0] for i in range(0, 800, 40)]
+        assert hits == [f"u{i}" for i in range(0, 800, 40)]
+
+    def test_other_process_sees_new_segments(self, tmp_path):
+        writer = _store(tmp_path)
+        reader = _store(tmp_path)
+        writer.put(["a"], _unit(1))
+        writer.flush()
+        assert reader.search(_unit(1)[0], k=1)[0][0] == "a"
+        writer.compact()
+        assert reader.search(_unit(1)[0], k=1)[0][0] == "a"
+
+    def test_refresh_maps_only_appended_segments(self, tmp_path):
+        writer = _store(tmp_path)
+        reader = _store(tmp_path)
+        vectors = _unit(4)
+        writer.put(["a", "b", "c"], vectors[:3])
+        writer.flush()
+        assert len(reader) == 3
+        first, where = reader._segments[0], reader._where
+
+        writer.put(["a"], vectors[3][None])
+        writer.delete(["b"])
+        writer.flush()
+        assert len(reader) == 2 and "b" not in reader
+        assert reader._segments[0] is first and reader._where is where
+        assert first.live.tolist() == [False, False, True]
+        assert reader.search(vectors[3], k=1)[0][0] == "a"
+
+        writer.compact()
+        assert len(reader) == 2 and reader._where is not where
+        assert reader._segments[0].live.all()
+
+    def test_incompatible_store_is_reset(self, tmp_path):
+        store = _store(tmp_path, meta={"embedder": "old"})
+        store.put(["a"], _unit(1))
+        store.flush()
+
+        other = EmbeddingStore(str(tmp_path), dim=16, meta={"embedder": "new"})
+        assert other.open() is False
+        assert len(other) == 0
+        assert json.loads((tmp_path / "MANIFEST.json").read_text())["meta"] == {"embedder": "new"}
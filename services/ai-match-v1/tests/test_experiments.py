@@ -0,0 +1,65 @@
+"""Tests for ranking under the ranker experiment (shared.experiments)."""
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared.experiments import Experiment
+from shared.model_serving import ModelServer
+from src.routes import FreelancerCandidate, MatchRequest, rank_with_experiment
+
+
+@pytest.fixture
+def treatment(tmp_path):
+    # Ranks purely by rating, unlike the skill-heavy rules
+    path = tmp_path / "mw-match-v1-v2.0.0"
+    path.mkdir()
+    (path / "metadata.json").write_text(json.dumps({"features": ["avg_rating"]}))
+    (path / "linear.json").write_text(json.dumps({"coef": [2.0], "intercept": -8.0}))
+    server = ModelServer("match-v1", "v2.0.0", registry_uri=str(tmp_path))
+    server.load()
+    return server.model
+
+
+def _rank(experiment, treatment):
+    request = MatchRequest(job_id="job-1", job_skills=["React"], candidates=[
+        FreelancerCandidate(freelancer_id="u1", skills=["React"], avg_rating=3.0),
+        FreelancerCandidate(freelancer_id="u2", skills=["Go"], avg_rating=5.0),
+    ])
+
+    async def run():
+        response = await rank_with_experiment(request)
+        await experiment.drain()
+        return response
+
+    with patch("src.routes.ranker_experiment", return_value=experiment), \
+            patch("src.routes.treatment_model", return_value=treatment), \
+            patch("src.routes.active_model", return_value=None):
+        return asyncio.run(run())
+
+
+class TestRankerExperiment:
+    """rank_with_experiment"""
+
+    def test_shadow_records_both_rankings(self, treatment):
+        experiment = Experiment("match-ranker", treatment_share=1.0, mode="shadow")
+        response = _rank(experiment, treatment)
+        assert response.ab_group == "control"
+        assert [r.freelancer_id for r in response.results] == ["u1", "u2"]
+        pair, = experiment.pairs
+        assert pair["control"]["ranked"] == ["u1", "u2"]
+        assert pair["treatment"]["ranked"] == ["u2", "u1"]
+        assert pair["treatment"]["model_version"] == "mw-match-v1-v2.0.0"
+
+    def test_split_ranks_treatment_arm_with_treatment_model(self, treatment):
+        experiment = Experiment("match-ranker", treatment_share=1.0, mode="split")
+        response = _rank(experiment, treatment)
+        assert response.ab_group == "treatment"
+        assert [r.freelancer_id for r in response.results] == ["u2", "u1"]
+
+    def test_experiments_endpoint_reports_arms(self, client):
+        response = client.get("/api/v1/match/experiments")
+        assert response.status_code == 200
+        assert "experiments" in response.json()
@@ -0,0 +1,29 @@
+"""Tests for match decisions logging their features (shared.feature_log)."""
+from unittest.mock import patch
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared import feature_log as fl
+from shared.feature_log import FeatureLog, read_feature_log
+from src.routes import FreelancerCandidate, MatchRequest, rank_candidates
+
+
+class TestRankLogging:
+    """rank_candidates feature rows"""
+
+    def test_every_scored_candidate_is_logged_in_rank_order(self, tmp_path):
+        log = FeatureLog("ai-match-v1", root=str(tmp_path))
+        request = MatchRequest(job_id="job-1", job_skills=["React"], limit=1, candidates=[
+            FreelancerCandidate(freelancer_id="u1", skills=["Go"]),
+            FreelancerCandidate(freelancer_id="u2", skills=["React"], avg_rating=4.5),
+        ])
+        with patch.object(fl, "_pyarrow", return_value=None), \
+                patch("shared.feature_log.get_feature_log", return_value=log):
+            response = rank_candidates(request)
+            log.flush()
+            rows = list(read_feature_log(str(tmp_path), "match_rank"))
+
+        assert [r["entity_id"] for r in rows] == ["u2", "u1"]
+        assert rows[0]["features"]["skill_match"] == 1.0 and rows[0]["features"]["avg_rating"] == 4.5
+        assert [r["output"]["shown"] for r in rows] == [True, False]
+        assert len({r["decision_id"] for r in rows}) == 1
+        assert len(response.results) == 1
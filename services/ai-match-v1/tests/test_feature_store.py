@@ -0,0 +1,68 @@
+"""Tests for match ranking reading freelancer features (shared.feature_store)."""
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared.feature_store import FeatureStore, LocalBackend
+from src import subscribers
+from src.config import settings
+from src.routes import FreelancerCandidate, MatchRequest, with_stored_features
+
+
+@pytest.fixture(autouse=True)
+def feature_store_enabled():
+    with patch.object(settings, "feature_store_enabled", True):
+        yield
+
+
+def _store():
+    store = FeatureStore(LocalBackend())
+    store.write("match_freelancer", "u1", {"skills": ["React"], "avg_rating": 4.8, "hourly_rate": 60})
+    return store
+
+
+class TestMatchFeatures:
+    """with_stored_features / profile-ready feature writes"""
+
+    def test_bare_candidates_are_filled_from_store(self):
+        request = MatchRequest(job_id="job-1", candidates=[
+            FreelancerCandidate(freelancer_id="u1", hourly_rate=45),
+            FreelancerCandidate(freelancer_id="unknown"),
+        ])
+        with patch("shared.feature_store.get_feature_store", return_value=_store()):
+            filled = asyncio.run(with_stored_features(request))
+        u1, unknown = filled.candidates
+        assert u1.skills == ["React"] and u1.avg_rating == 4.8
+        assert u1.hourly_rate == 45  # inline value wins
+        assert unknown.skills == [] and unknown.avg_rating is None
+
+    def test_rank_endpoint_uses_stored_features(self, client):
+        with patch("shared.feature_store.get_feature_store", return_value=_store()):
+            data = client.post("/api/v1/match/rank", json={
+                "job_id": "job-1",
+                "job_skills": ["React"],
+                "candidates": [{"freelancer_id": "u1"}, {"freelancer_id": "u2"}],
+            }).json()
+        assert data["results"][0]["freelancer_id"] == "u1"
+        assert data["results"][0]["breakdown"]["skill_match"] == 1.0
+
+    def test_profile_ready_writes_features(self):
+        store = FeatureStore(LocalBackend())
+        with patch("shared.feature_store.get_feature_store", return_value=store):
+            subscribers._record_freelancer_features("u7", {"skills": ["Go"], "completed_jobs": 12})
+        features = store.get("match_freelancer", "u7")
+        assert features["skills"] == ["Go"] and features["total_jobs_completed"] == 12
+
+    def test_bare_profile_event_writes_nothing(self):
+        store = MagicMock()
+        with patch("shared.feature_store.get_feature_store", return_value=store):
+            subscribers._record_freelancer_features("u7", {"user_id": "u7"})
+        store.write.assert_not_called()
+
+    def test_disabled_store_leaves_candidates_alone(self):
+        request = MatchRequest(job_id="job-1", candidates=[FreelancerCandidate(freelancer_id="u1")])
+        with patch.object(settings, "feature_store_enabled", False), \
+                patch("shared.feature_store.get_feature_store", return_value=_store()):
+            assert asyncio.run(with_stored_features(request)) is request
@@ -39,3 +39,13 @@ class TestReadinessEndpoint:
     def test_status_is_ready(self):
         response = client.get("/readyz")
         assert response.json()["status"] == "ready"
+
+
+class TestMetricsEndpoint:
+    """GET /metrics"""
+
+    def test_exposes_route_latency(self):
+        client.get("/healthz")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert 'ai_http_request_duration_seconds_count{method="GET",route="/healthz",status="200"}' in response.text
@@ -0,0 +1,63 @@
+"""Tests for ranking with the in-process model (shared.model_serving)."""
+import asyncio
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared.model_serving import ModelServer
+from src.routes import FreelancerCandidate, MatchRequest, rank_candidates, rank_with_experiment
+
+
+@pytest.fixture
+def server(tmp_path):
+    # A ranker that only looks at the rating and ignores skills
+    path = tmp_path / "mw-match-v1-v2.0.0"
+    path.mkdir()
+    (path / "metadata.json").write_text(json.dumps({"features": ["avg_rating", "verification_level"],
+                                                    "categories": {"verification_level": ["none", "verified"]}}))
+    (path / "linear.json").write_text(json.dumps({"coef": [2.0, 0.0], "intercept": -8.0}))
+    server = ModelServer("match-v1", "latest", registry_uri=str(tmp_path))
+    server.load()
+    return server
+
+
+def _request():
+    return MatchRequest(job_id="job-1", job_skills=["React"], candidates=[
+        FreelancerCandidate(freelancer_id="u1", skills=["React"], avg_rating=3.0),
+        FreelancerCandidate(freelancer_id="u2", skills=["Go"], avg_rating=5.0, verification_level="verified"),
+    ])
+
+
+class TestRankWithModel:
+    """rank_candidates scored by the registered ranker"""
+
+    def test_candidates_are_ordered_by_model_scores(self, server):
+        with patch("shared.model_serving.get_model_server", return_value=server):
+            response = rank_candidates(_request())
+        assert [r.freelancer_id for r in response.results] == ["u2", "u1"]
+        assert response.results[0].score == pytest.approx(0.8808, abs=1e-4)
+        assert response.model_version == "mw-match-v1-v2.0.0"
+
+    def test_model_errors_fall_back_to_weighted_rules(self, server):
+        with patch("shared.model_serving.get_model_server", return_value=server), \
+                patch.object(server.model, "predict", side_effect=ValueError("shape")):
+            response = rank_candidates(_request())
+        assert [r.freelancer_id for r in response.results] == ["u1", "u2"]
+        assert response.model_version.startswith("match-")
+
+    def test_served_ranking_scores_off_the_event_loop(self, server):
+        predict = server.model.predict
+        threads = []
+
+        def recording_predict(rows):
+            threads.append(threading.current_thread())
+            return predict(rows)
+
+        with patch("shared.model_serving.get_model_server", return_value=server), \
+                patch.object(server.model, "predict", side_effect=recording_predict):
+            response = asyncio.run(rank_with_experiment(_request()))
+        assert [r.freelancer_id for r in response.results] == ["u2", "u1"]
+        assert threads and threads[0] is not threading.main_thread()
@@ -0,0 +1,216 @@
+"""Tests for per-entity ordered processing (shared.ordering / shared.pubsub)."""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared.ordering import KeyedSerialExecutor
+
+
+class TestKeyedSerialExecutor:
+    """KeyedSerialExecutor"""
+
+    def test_newer_work_supersedes_in_flight(self):
+        done = []
+
+        async def work(name, delay):
+            await asyncio.sleep(delay)
+            done.append(name)
+
+        async def scenario():
+            executor = KeyedSerialExecutor()
+            first = executor.submit("user-1", lambda: work("old", 0.05))
+            await asyncio.sleep(0)
+            executor.submit("user-1", lambda: work("new", 0.01))
+            await executor.drain()
+            return executor, first
+
+        executor, first = asyncio.run(scenario())
+        assert done == ["new"]
+        assert first.cancelled()
+        assert executor.superseded == 1
+
+    def test_same_key_never_overlaps(self):
+        running = {"now": 0, "max": 0}
+
+        async def work():
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+            try:
+                await asyncio.sleep(0.01)
+            finally:
+                running["now"] -= 1
+
+        async def scenario():
+            executor = KeyedSerialExecutor()
+            for _ in range(5):
+                executor.submit("job-1", work)
+                await asyncio.sleep(0.002)
+            await executor.drain()
+
+        asyncio.run(scenario())
+        assert running["max"] == 1
+
+    def test_different_keys_run_concurrently(self):
+        order = []
+
+        async def work(key):
+            order.append(f"{key}-start")
+            await asyncio.sleep(0.01)
+            order.append(f"{key}-end")
+
+        async def scenario():
+            executor = KeyedSerialExecutor()
+            executor.submit("a", lambda: work("a"))
+            executor.submit("b", lambda: work("b"))
+            await executor.drain()
+
+        asyncio.run(scenario())
+        assert order[:2] == ["a-start", "b-start"]
+
+    def test_older_timestamp_is_skipped(self):
+        async def work():
+            return None
+
+        async def scenario():
+            executor = KeyedSerialExecutor()
+            newer = executor.submit("job-1", work, timestamp="2026-01-01T10:00:05+00:00")
+            older = executor.submit("job-1", work, timestamp="2026-01-01T10:00:00+00:00")
+            await executor.drain()
+            return executor, newer, older
+
+        executor, newer, older = asyncio.run(scenario())
+        assert newer is not None
+        assert older is None
+        assert executor.stale == 1
+
+    def test_redelivery_returns_in_flight_task(self):
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+
+        async def scenario():
+            executor = KeyedSerialExecutor()
+            first = executor.submit("job-1", work, token="msg-1")
+            again = executor.submit("job-1", work, token="msg-1")
+            await executor.drain()
+            return first, again
+
+        first, again = asyncio.run(scenario())
+        assert first is again
+        assert calls == [1]
+
+    def test_tracked_timestamps_are_bounded(self):
+        async def work():
+            return None
+
+        async def scenario():
+            executor = KeyedSerialExecutor(max_tracked_keys=3)
+            for i in range(10):
+                executor.submit(f"user-{i}", work, timestamp="2026-01-01T10:00:00+00:00")
+            await executor.drain()
+            return executor
+
+        executor = asyncio.run(scenario())
+        assert len(executor._latest) == 3
+        assert executor.in_flight == 0
+
+
+def _received(ack_id, message_id, data):
+    return SimpleNamespace(
+        ack_id=ack_id,
+        message=SimpleNamespace(
+            message_id=message_id,
+            data=json.dumps(data).encode("utf-8"),
+        ),
+    )
+
+
+class TestOrderedSubscriber:
+    """subscribe_async with an ordering key"""
+
+    def test_only_latest_profile_update_is_processed_and_all_are_acked(self):
+        from shared import pubsub
+
+        handled = []
+
+        async def handler(data):
+            await asyncio.sleep(0.01)
+            handled.append(data["timestamp"])
+
+        subscriber = MagicMock()
+        subscriber.pull.side_effect = [
+            SimpleNamespace(received_messages=[
+                _received("a1", "m1", {"user_id": "u-1", "timestamp": "2026-01-01T10:00:00+00:00"}),
+                _received("a2", "m2", {"user_id": "u-1", "timestamp": "2026-01-01T10:00:01+00:00"}),
+            ]),
+            SimpleNamespace(received_messages=[]),
+            asyncio.CancelledError(),
+        ]
+
+        async def scenario():
+            with patch.object(pubsub, "ensure_topic"), \
+                    patch.object(pubsub, "ensure_subscription", return_value="sub") as ensure_sub, \
+                    patch.object(pubsub, "_get_subscriber", return_value=subscriber), \
+                    patch.object(pubsub.schema_registry, "enabled", False):
+                try:
+                    await pubsub.subscribe_async(
+                        "profile-ready", "profile-ready-match", handler,
+                        poll_interval=0.05, ordering_key=pubsub.key_by("user_id"),
+                    )
+                except asyncio.CancelledError:
+                    pass
+            return ensure_sub
+
+        ensure_sub = asyncio.run(scenario())
+        assert handled == ["2026-01-01T10:00:01+00:00"]
+        assert ensure_sub.call_args.kwargs["enable_message_ordering"] is True
+        acked = [
+            ack_id
+            for call in subscriber.acknowledge.call_args_list
+            for ack_id in call.kwargs["request"]["ack_ids"]
+        ]
+        assert sorted(acked) == ["a1", "a2"]
+
+    def test_leases_are_extended_until_the_handler_finishes(self):
+        from shared import pubsub
+
+        async def handler(data):
+            await asyncio.sleep(0.1)
+
+        subscriber = MagicMock()
+        subscriber.pull.side_effect = [
+            SimpleNamespace(received_messages=[_received("a1", "m1", {"job_id": "j-1"})]),
+            SimpleNamespace(received_messages=[]),
+            SimpleNamespace(received_messages=[]),
+            SimpleNamespace(received_messages=[]),
+            asyncio.CancelledError(),
+        ]
+
+        async def scenario():
+            with patch.object(pubsub, "ensure_topic"), \
+                    patch.object(pubsub, "ensure_subscription", return_value="sub"), \
+                    patch.object(pubsub, "_get_subscriber", return_value=subscriber), \
+                    patch.object(pubsub.schema_registry, "enabled", False):
+                try:
+                    await pubsub.subscribe_async(
+                        "job-published", "job-published-scope", handler,
+                        poll_interval=0.05, ordering_key=pubsub.key_by("job_id"), ack_extension_s=0.04,
+                    )
+                except asyncio.CancelledError:
+                    pass
+            extended = subscriber.modify_ack_deadline.call_count
+            await asyncio.sleep(0.05)
+            return extended
+
+        extended = asyncio.run(scenario())
+        assert extended >= 2
+        request = subscriber.modify_ack_deadline.call_args.kwargs["request"]
+        assert request["ack_ids"] == ["a1"] and request["subscription"] == "sub"
+        # Once acked (and after the subscriber stops) the lease is no longer extended
+        assert subscriber.modify_ack_deadline.call_count == extended
+        acked = [a for call in subscriber.acknowledge.call_args_list for a in call.kwargs["request"]["ack_ids"]]
+        assert acked == ["a1"]
@@ -0,0 +1,141 @@
+"""Tests for product quantization (shared.pq) and PQ search in the embedding store."""
+import numpy as np
+import pytest
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared.embedding_store import EmbeddingStore
+from shared.embeddings import HashingEmbedder
+from shared.pq import ProductQuantizer, adc_scores
+from src.candidate_index import CandidateIndex
+
+
+def _unit(n, dim=32, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return _unit(2000)
+
+
+@pytest.fixture(scope="module")
+def pq(vectors):
+    return ProductQuantizer.train(vectors, m=8, iterations=8)
+
+
+class TestProductQuantizer:
+    """ProductQuantizer / adc_scores"""
+
+    def test_codes_are_one_byte_per_subspace(self, pq, vectors):
+        codes = pq.encode(vectors[:10])
+        assert codes.shape == (10, 8) and codes.dtype == np.uint8
+
+    def test_decode_approximates_vectors(self, pq, vectors):
+        error = np.linalg.norm(pq.decode(pq.encode(vectors)) - vectors, axis=1)
+        assert error.mean() < 0.6
+
+    def test_adc_matches_decoded_inner_product(self, pq, vectors):
+        codes = pq.encode(vectors)
+        query = _unit(1, seed=1)[0]
+        expected = pq.decode(codes) @ query
+        np.testing.assert_allclose(adc_scores(codes, pq.lookup_table(query)), expected, atol=1e-5)
+
+    def test_dim_must_split_into_subspaces(self, vectors):
+        with pytest.raises(ValueError):
+            ProductQuantizer.train(vectors, m=5)
+
+    def test_save_and_load(self, pq, tmp_path):
+        pq.save(str(tmp_path / "codebook.npz"))
+        loaded = ProductQuantizer.load(str(tmp_path / "codebook.npz"))
+        assert loaded.id == pq.id and loaded.dim == 32
+        assert loaded.embedder is None
+
+    def test_embedder_name_is_saved_with_the_codebook(self, pq, tmp_path):
+        ProductQuantizer(pq.codebooks, embedder="sentence-transformers").save(str(tmp_path / "codebook.npz"))
+        loaded = ProductQuantizer.load(str(tmp_path / "codebook.npz"))
+        assert loaded.embedder == "sentence-transformers"
+        assert loaded.id == pq.id
+
+
+class TestPqStore:
+    """EmbeddingStore with a quantizer"""
+
+    def _store(self, path, pq, vectors, **kwargs):
+        store = EmbeddingStore(str(path), dim=32, quantizer=pq, **kwargs)
+        store.open()
+        store.put([f"u{i}" for i in range(len(vectors))], vectors)
+        store.flush()
+        store.compact()
+        return store
+
+    def test_compaction_writes_codes(self, tmp_path, pq, vectors):
+        store = self._store(tmp_path, pq, vectors)
+        assert list(tmp_path.glob(f"*.pq-{pq.id}.npy"))
+        assert store.needs_compaction() is False
+
+    def test_rescored_search_matches_exact_top_k(self, tmp_path, pq, vectors):
+        store = self._store(tmp_path, pq, vectors, rescore=200)
+        exact = EmbeddingStore(str(tmp_path), dim=32)
+        for seed in range(5):
+            query = _unit(1, seed=100 + seed)[0]
+            got = [i for i, _ in store.search(query, k=10)]
+            want = [i for i, _ in exact.search(query, k=10)]
+            assert len(set(got) & set(want)) >= 9
+
+    def test_scores_are_exact_after_rescoring(self, tmp_path, pq, vectors):
+        store = self._store(tmp_path, pq, vectors)
+        (id_, score), = store.search(vectors[7], k=1)
+        assert id_ == "u7" and score == pytest.approx(1.0, abs=0.01)
+
+    def test_deleted_rows_are_skipped(self, tmp_path, pq, vectors):
+        store = self._store(tmp_path, pq, vectors)
+        store.delete(["u7"])
+        store.flush()
+        assert store.search(vectors[7], k=1)[0][0] != "u7"
+
+    def test_new_codebook_needs_reencoding(self, tmp_path, pq, vectors):
+        self._store(tmp_path, pq, vectors)
+        other = ProductQuantizer.train(vectors, m=8, iterations=2, seed=1)
+        store = EmbeddingStore(str(tmp_path), dim=32, quantizer=other)
+        store.open()
+        assert store.needs_compaction() is True
+        store.compact()
+        assert not list(tmp_path.glob(f"*.pq-{pq.id}.npy"))
+        assert list(tmp_path.glob(f"*.pq-{other.id}.npy"))
+
+
+class TestCandidateIndexCodebook:
+    """CandidateIndex loading the pipeline's codebook"""
+
+    def test_loads_codebook_and_encodes_store(self, tmp_path):
+        embedder = HashingEmbedder(dim=32)
+        ProductQuantizer.train(_unit(300), m=4, iterations=2, embedder="hashing").save(str(tmp_path / "codebook.npz"))
+        writer = CandidateIndex(path=str(tmp_path / "index"), embedder=embedder)
+        writer.upsert("a", {"skills": ["React"]})
+        writer.save()
+
+        index = CandidateIndex(path=str(tmp_path / "index"), codebook=str(tmp_path / "codebook.npz"), embedder=embedder)
+        index.load()
+        assert index.store.quantizer is not None
+        assert index.store.needs_compaction() is False
+        assert index.search_job({"title": "React"}, k=1)[0][0] == "a"
+
+    def test_codebook_for_other_dim_is_ignored(self, tmp_path):
+        ProductQuantizer.train(_unit(300, dim=16), m=4, iterations=2, embedder="hashing").save(
+            str(tmp_path / "codebook.npz")
+        )
+        index = CandidateIndex(
+            path=str(tmp_path / "index"), codebook=str(tmp_path / "codebook.npz"), embedder=HashingEmbedder(dim=32)
+        )
+        index.load()
+        assert index.store.quantizer is None
+
+    @pytest.mark.parametrize("embedder", ["sentence-transformers", None])
+    def test_codebook_for_other_embedder_is_ignored(self, tmp_path, embedder):
+        ProductQuantizer.train(_unit(300), m=4, iterations=2, embedder=embedder).save(str(tmp_path / "codebook.npz"))
+        index = CandidateIndex(
+            path=str(tmp_path / "index"), codebook=str(tmp_path / "codebook.npz"), embedder=HashingEmbedder(dim=32)
+        )
+        index.load()
+        assert index.store.quantizer is None
@@ -0,0 +1,16 @@
+"""Tests for the offline replay benchmark (shared.replay) on the ranker."""
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared.replay import corpus_path, load_corpus, replay_single
+
+
+class TestReplay:
+    """replay_single through rank_candidates"""
+
+    def test_committed_corpus_replays(self):
+        records = load_corpus(corpus_path("ai-match-v1"))
+        run = replay_single("ai-match-v1", records, warmup=0)
+        assert run["requests"] == len(records)
+        for record in records:
+            output = run["outputs"][record["id"]]
+            assert output["total_candidates"] == len(record["request"]["candidates"])
+            assert len(output["results"]) <= record["request"]["limit"]
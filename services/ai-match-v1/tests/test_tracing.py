@@ -0,0 +1,162 @@
+"""Tests for tracing across the Pub/Sub, Vertex AI and callback hops (shared.tracing)."""
+import asyncio
+import json
+import time
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from opentelemetry import trace
+from opentelemetry.trace import Status, StatusCode
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared import pubsub, tracing
+from shared.callback import api_callback
+from shared.pubsub_memory import InMemoryBroker, InMemoryPublisher, InMemorySubscriber
+
+
+@pytest.fixture
+def traced():
+    """Memory exporter keeping every trace unless a test asks otherwise."""
+    def start(**kwargs):
+        return tracing.init_tracing("ai-match-v1", exporter="memory", **{"slow_ms": 0, **kwargs})
+
+    yield start
+    tracing.shutdown_tracing()
+
+
+def _response(body):
+    return MagicMock(status_code=200, json=MagicMock(return_value=body))
+
+
+class TestJobPublishedTrace:
+    """job-published → candidates fetch → Vertex ranking → matches callback"""
+
+    def test_hops_share_the_correlation_trace(self, traced):
+        exporter = traced()
+        correlation_id = str(uuid.uuid4())
+        event = {"event": "job_published", "job_id": "job-1", "title": "React dev",
+                 "skills_required": ["React"], "correlation_id": correlation_id}
+        subscriber = MagicMock()
+        subscriber.pull.side_effect = [
+            SimpleNamespace(received_messages=[SimpleNamespace(
+                ack_id="a1", message=SimpleNamespace(message_id="m1", data=json.dumps(event).encode(), attributes={}),
+            )]),
+            asyncio.CancelledError(),
+        ]
+        sent_headers = []
+
+        async def request(method, path, json=None, params=None, headers=None):
+            sent_headers.append(headers)
+            if method == "GET":
+                return _response({"candidates": [{"freelancer_id": "u1", "skills": ["React"]}]})
+            return _response({})
+
+        model = MagicMock()
+        model.generate_content.return_value = SimpleNamespace(
+            text=json.dumps({"rankings": [{"freelancer_id": "u1", "score": 0.9}]}),
+            usage_metadata=SimpleNamespace(prompt_token_count=300, candidates_token_count=20),
+        )
+
+        async def scenario():
+            from src.subscribers import handle_job_published
+
+            with patch.object(pubsub, "ensure_topic"), \
+                    patch.object(pubsub, "ensure_subscription", return_value="sub"), \
+                    patch.object(pubsub, "_get_subscriber", return_value=subscriber), \
+                    patch.object(pubsub.schema_registry, "enabled", False), \
+                    patch.object(api_callback, "_client", MagicMock(is_closed=False, request=request)), \
+                    patch("src.candidate_index.retrieve_candidates", return_value=None), \
+                    patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                    patch("src.vertex_ai._get_model", return_value=model):
+                with pytest.raises(asyncio.CancelledError):
+                    await pubsub.subscribe_async("job-published", "job-published-match", handle_job_published,
+                                                 poll_interval=0)
+
+        asyncio.run(scenario())
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        assert set(spans) == {
+            "job-published-match process",
+            "GET /jobs/{id}/candidates",
+            "vertex generate_content match_ranking",
+            "POST /jobs/{id}/matches",
+        }
+        root = spans.pop("job-published-match process")
+        assert root.context.trace_id == uuid.UUID(correlation_id).int
+        assert root.parent.is_remote and root.attributes["correlation_id"] == correlation_id
+        assert all(s.parent.span_id == root.context.span_id for s in spans.values())
+        assert spans["vertex generate_content match_ranking"].attributes["gen_ai.usage.input_tokens"] == 300
+        assert all(h["traceparent"].split("-")[1] == uuid.UUID(correlation_id).hex for h in sent_headers)
+
+
+class TestPropagation:
+    """traceparent attribute and correlation_id fallback"""
+
+    def test_publish_carries_the_current_trace(self, traced):
+        traced()
+        broker = InMemoryBroker()
+        publisher, subscriber = InMemoryPublisher(broker), InMemorySubscriber(broker)
+        with patch.object(pubsub, "_get_publisher", return_value=publisher), \
+                patch.object(pubsub, "_get_subscriber", return_value=subscriber), \
+                patch.object(pubsub.schema_registry, "enabled", False):
+            pubsub.ensure_topic("profile-ready")
+            sub_path = pubsub.ensure_subscription("profile-ready", "profile-ready-trace")
+            with tracing.get_tracer().start_as_current_span("caller") as caller:
+                pubsub.publish_message("profile-ready", {"user_id": "u-1"})
+        message = subscriber.pull(request={"subscription": sub_path}).received_messages[0].message
+        context = tracing.message_context(message.attributes, {"correlation_id": "ignored"})
+        assert trace.get_current_span(context).get_span_context().trace_id == caller.get_span_context().trace_id
+
+    def test_correlation_ids_map_to_stable_trace_ids(self):
+        def trace_id(correlation_id):
+            return trace.get_current_span(
+                tracing.message_context({}, {"correlation_id": correlation_id})
+            ).get_span_context().trace_id
+
+        assert trace_id("php-req-42") == trace_id("php-req-42") != trace_id("php-req-43")
+        correlation_id = uuid.uuid4()
+        assert trace_id(str(correlation_id)) == correlation_id.int
+        assert not trace.get_current_span(tracing.message_context({}, {})).get_span_context().is_valid
+
+
+class TestTailSampling:
+    """TailSamplingProcessor"""
+
+    def _trace(self, fail=False, sleep=0.0):
+        tracer = tracing.get_tracer()
+        with tracer.start_as_current_span("root") as root:
+            with tracer.start_as_current_span("child"):
+                time.sleep(sleep)
+            if fail:
+                root.set_status(Status(StatusCode.ERROR))
+
+    def test_fast_healthy_traces_are_dropped(self, traced):
+        exporter = traced(slow_ms=50, sample_ratio=0.0)
+        self._trace()
+        assert exporter.get_finished_spans() == ()
+
+    def test_failed_and_slow_traces_are_kept_whole(self, traced):
+        exporter = traced(slow_ms=50, sample_ratio=0.0)
+        self._trace(fail=True)
+        self._trace(sleep=0.06)
+        assert [s.name for s in exporter.get_finished_spans()] == ["child", "root", "child", "root"]
+
+    def test_spans_ending_after_the_root_follow_its_decision(self, traced):
+        exporter = traced(slow_ms=50, sample_ratio=0.0)
+        tracer = tracing.get_tracer()
+        root = tracer.start_span("root")
+        late = tracer.start_span("late", context=trace.set_span_in_context(root))
+        root.set_status(Status(StatusCode.ERROR))
+        root.end()
+        late.end()
+        assert [s.name for s in exporter.get_finished_spans()] == ["root", "late"]
+
+    def test_pending_traces_are_bounded(self, traced):
+        traced(slow_ms=50, sample_ratio=0.0, max_pending=2)
+        tracer = tracing.get_tracer()
+        roots = [tracer.start_span(f"root-{i}") for i in range(3)]
+        for root in roots:
+            tracer.start_span("child", context=trace.set_span_in_context(root)).end()
+        processor = tracing._provider._active_span_processor._span_processors[0]
+        assert len(processor._pending) == 2 and processor.stats["evicted"] == 1
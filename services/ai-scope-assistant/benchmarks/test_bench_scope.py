@@ -0,0 +1,67 @@
+"""Benchmarks for scope analysis, skill suggestions and their request/response models."""
+import random
+
+import pytest
+
+from src.profile_routes import SkillSuggestRequest, _dev_suggest_skills
+from src.routes import ScopeRequest, ScopeResponse, _detect_complexity, analyze_scope, analyze_scope_json
+
+FILLER = (
+    "we need a reliable partner to deliver this project on schedule with clear communication "
+    "and weekly demos of progress across the main user flows and admin screens"
+).split()
+KEYWORDS = ["dashboard", "api", "real-time", "payment", "integration", "gdpr", "kubernetes", "landing page"]
+
+
+def _description(words: int, seed: int = 3) -> str:
+    rng = random.Random(seed)
+    text = [rng.choice(FILLER) for _ in range(words)]
+    for i in range(0, words, 40):
+        text[i] = rng.choice(KEYWORDS)
+    return " ".join(text)
+
+
+SKILLS = ["React", "Node.js", "PostgreSQL", "AWS", "Stripe"]
+
+
+@pytest.mark.parametrize("words", [50, 500, 5_000])
+def test_detect_complexity(benchmark, words):
+    description = _description(words)
+    tier = benchmark(_detect_complexity, description, SKILLS, 12000.0)
+    assert tier in {"simple", "moderate", "complex", "enterprise"}
+
+
+def test_dev_suggest_skills(benchmark):
+    request = SkillSuggestRequest(
+        headline="Senior Python and React developer",
+        bio="I build data-heavy web apps with Django, FastAPI and React, deployed on AWS with Docker. " * 3,
+        experience_years=8,
+        current_skills=["Python", "React", "Docker"],
+    )
+    response = benchmark(_dev_suggest_skills, request)
+    assert response.suggested_skills
+
+
+def _scope_payload(words: int) -> dict:
+    return {
+        "job_id": "job-bench", "title": "Build a payments dashboard", "description": _description(words),
+        "category": "web-development", "skills_required": SKILLS, "budget_max": 12000.0,
+    }
+
+
+def test_parse_scope_request(benchmark):
+    payload = _scope_payload(500)
+    request = benchmark(ScopeRequest.model_validate, payload)
+    assert request.budget_max == 12000.0
+
+
+def test_serialize_scope_response(benchmark):
+    response = analyze_scope(ScopeRequest.model_validate(_scope_payload(500)))
+    body = benchmark(response.model_dump_json)
+    assert ScopeResponse.model_validate_json(body).milestones == response.milestones
+
+
+def test_analyze_scope_json(benchmark):
+    request = ScopeRequest.model_validate(_scope_payload(500))
+    body = benchmark(analyze_scope_json, request)
+    assert ScopeResponse.model_validate_json(body).complexity_tier
@@ -21,13 +21,14 @@ async def log_ai_decision(
     prompt_version: Optional[str] = None,
     explanation: Optional[Dict] = None,
     persist: bool = True,
+    decision_id: Optional[str] = None,
 ) -> Dict[str, Any]:
     """Log an AI decision for audit trail and persist to DB via callback."""
     import sys, os
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "shared"))
 
     record = {
-        "id": str(uuid.uuid4()),
+        "id": decision_id or str(uuid.uuid4()),
         "decision_type": decision_type,
         "entity_type": entity_type,
         "entity_id": entity_id,
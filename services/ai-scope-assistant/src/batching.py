@@ -0,0 +1,187 @@
+"""
+Micro-batching of job-published scope + moderation calls.
+
+Usage:
+    result = await job_batcher.submit(data)   # {"scope": ..., "moderation": ...} or None
+
+Each job-published handler submits its payload and waits. Jobs arriving
+within JOB_BATCH_WINDOW_S of each other are sent together: up to
+JOB_BATCH_MAX_SIZE jobs per multi-item Gemini call, with groups run
+concurrently. When at least JOB_BATCH_PREDICTION_THRESHOLD jobs are pending
+and JOB_BATCH_PREDICTION_URI is set, the whole group goes to a Vertex AI
+batch prediction job instead.
+
+With batch prediction on, jobs are collected for JOB_BATCH_PREDICTION_WINDOW_S
+(several Pub/Sub polls) and the subscriber pulls pages of up to the
+threshold (pull_options), so a subscription backlog reaches the threshold
+in memory; a trickle still flushes as multi-item calls when the window ends.
+The messages of jobs waiting on a batch prediction job stay leased
+(shared.pubsub extends their ack deadline) until their results are stored.
+
+submit() returns None for a job whose result did not come back (the call
+failed, or the model skipped or garbled that item); the caller then retries
+that job on its own, so one bad item never fails the batch.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+from src.config import settings
+
+logger = structlog.get_logger()
+
+BatchCall = Callable[[List[dict]], Awaitable[Optional[Dict[str, dict]]]]
+
+
+async def _multi_item_call(jobs: List[dict]) -> Optional[Dict[str, dict]]:
+    from src.vertex_ai import analyze_and_moderate_jobs_with_vertex
+
+    return await analyze_and_moderate_jobs_with_vertex(jobs)
+
+
+async def _batch_prediction_call(jobs: List[dict]) -> Optional[Dict[str, dict]]:
+    from src.vertex_ai import run_scope_moderation_batch_prediction
+
+    return await run_scope_moderation_batch_prediction(
+        jobs,
+        settings.job_batch_prediction_uri,
+        poll_interval_s=settings.job_batch_prediction_poll_s,
+        timeout_s=settings.job_batch_prediction_timeout_s,
+    )
+
+
+class JobBatcher:
+    """Collects pending jobs and resolves each caller with its own result."""
+
+    def __init__(
+        self,
+        window_s: float = 0.5,
+        max_size: int = 8,
+        prediction_threshold: int = 0,
+        multi_item_call: BatchCall = _multi_item_call,
+        batch_prediction_call: Optional[BatchCall] = None,
+        prediction_window_s: Optional[float] = None,
+    ):
+        self.window_s = window_s
+        self.prediction_window_s = window_s if prediction_window_s is None else prediction_window_s
+        self.max_size = max(1, max_size)
+        self.prediction_threshold = prediction_threshold
+        self.multi_item_call = multi_item_call
+        self.batch_prediction_call = batch_prediction_call
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: set = set()
+        self.batches = 0
+        self.predictions = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    @property
+    def _uses_prediction(self) -> bool:
+        return self.batch_prediction_call is not None and self.prediction_threshold > 0
+
+    async def submit(self, data: dict) -> Optional[dict]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((data, future))
+
+        # With batch prediction on, keep collecting up to its threshold;
+        # otherwise a full multi-item call goes out right away
+        flush_at = self.prediction_threshold if self._uses_prediction else self.max_size
+        if len(self._pending) >= flush_at:
+            self._flush()
+        elif self._timer is None:
+            window = self.prediction_window_s if self._uses_prediction else self.window_s
+            self._timer = loop.call_later(window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _run(self, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        try:
+            jobs = [data for data, _ in batch]
+            if self._uses_prediction and len(batch) >= self.prediction_threshold:
+                self.predictions += 1
+                results = await self._call(self.batch_prediction_call, jobs, "batch_prediction")
+            else:
+                groups = [jobs[i:i + self.max_size] for i in range(0, len(jobs), self.max_size)]
+                self.batches += len(groups)
+                results = {}
+                for group_results in await asyncio.gather(
+                    *(self._call(self.multi_item_call, group, "multi_item") for group in groups)
+                ):
+                    results.update(group_results)
+
+            missing = 0
+            for data, future in batch:
+                result = results.get(str(data.get("job_id")))
+                missing += result is None
+                if not future.done():
+                    future.set_result(result)
+            logger.info("job_batch_complete", jobs=len(batch), missing=missing)
+        finally:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    async def _call(self, call: BatchCall, jobs: List[dict], mode: str) -> Dict[str, Any]:
+        try:
+            if len(jobs) == 1 and mode == "multi_item":
+                return await self._single(jobs[0])
+            return await call(jobs) or {}
+        except Exception:
+            logger.exception("job_batch_failed", mode=mode, jobs=len(jobs))
+            return {}
+
+    async def _single(self, job: dict) -> Dict[str, Any]:
+        """A lone job uses the regular combined prompt."""
+        from src.vertex_ai import analyze_and_moderate_job_with_vertex
+
+        result = await analyze_and_moderate_job_with_vertex(
+            title=job.get("title", ""),
+            description=job.get("description", ""),
+            category=job.get("category", ""),
+            skills=job.get("skills_required", []),
+            budget_min=job.get("budget_min"),
+            budget_max=job.get("budget_max"),
+            experience_level=job.get("experience_level", ""),
+        )
+        return {str(job.get("job_id")): result} if result else {}
+
+
+# Pub/Sub caps a synchronous pull at 1000 messages
+_MAX_PULL = 1000
+
+
+def pull_options(batcher: "JobBatcher", default_max_messages: int) -> dict:
+    """subscribe_async page size and concurrency that let batches (and batch prediction) fill up."""
+    page = max(default_max_messages, batcher.max_size)
+    if batcher._uses_prediction:
+        page = max(page, batcher.prediction_threshold)
+    page = min(page, _MAX_PULL)
+    return {
+        "max_messages": page,
+        "max_in_flight": max(settings.job_batch_max_pending, page),
+    }
+
+
+# Singleton instance
+job_batcher = JobBatcher(
+    window_s=settings.job_batch_window_s,
+    max_size=settings.job_batch_max_size,
+    prediction_threshold=settings.job_batch_prediction_threshold,
+    batch_prediction_call=_batch_prediction_call if settings.job_batch_prediction_uri else None,
+    prediction_window_s=settings.job_batch_prediction_window_s,
+)
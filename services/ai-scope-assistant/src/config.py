@@ -12,6 +12,22 @@ class Settings(BaseModel):
     # Feature flags
     feature_enabled: bool = os.getenv("FEATURE_FLAG_AI_SCOPE_ASSISTANT", "true").lower() == "true"
     fallback_mode: str = os.getenv("FALLBACK_MODE", "manual")
+    # One Gemini call for scope + moderation on job-published instead of two
+    combined_job_prompt: bool = os.getenv("COMBINED_JOB_PROMPT", "false").lower() == "true"
+    # Micro-batch job-published scope + moderation into multi-job Gemini calls
+    job_batching: bool = os.getenv("JOB_BATCHING", "false").lower() == "true"
+    job_batch_window_s: float = float(os.getenv("JOB_BATCH_WINDOW_S", "0.5"))
+    job_batch_max_size: int = int(os.getenv("JOB_BATCH_MAX_SIZE", "8"))
+    job_batch_max_pending: int = int(os.getenv("JOB_BATCH_MAX_PENDING", "200"))
+    # Backlogs of at least this many jobs go to a Vertex batch prediction job
+    # (only when JOB_BATCH_PREDICTION_URI, a gs:// prefix, is set)
+    job_batch_prediction_threshold: int = int(os.getenv("JOB_BATCH_PREDICTION_THRESHOLD", "100"))
+    # Collection window while batch prediction is on; longer than the Pub/Sub
+    # poll interval so consecutive pulls can add up to the threshold
+    job_batch_prediction_window_s: float = float(os.getenv("JOB_BATCH_PREDICTION_WINDOW_S", "3.0"))
+    job_batch_prediction_uri: str = os.getenv("JOB_BATCH_PREDICTION_URI", "")
+    job_batch_prediction_poll_s: float = float(os.getenv("JOB_BATCH_PREDICTION_POLL_S", "30"))
+    job_batch_prediction_timeout_s: float = float(os.getenv("JOB_BATCH_PREDICTION_TIMEOUT_S", "3600"))
 
     # Model
     model_endpoint: str = os.getenv("MODEL_ENDPOINT", "")
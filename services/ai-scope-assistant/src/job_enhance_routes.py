@@ -2,14 +2,18 @@
 Job Enhancement routes — AI-powered job post improvement.
 """
 
+import hashlib
 import time
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 import structlog
 
 from src.config import settings
 from src.audit import log_ai_decision
+from src.keywords import KeywordAutomaton
+from src.streaming import SSE_HEADERS, sse_generation
 
 logger = structlog.get_logger()
 
@@ -53,6 +57,41 @@ class JobEnhanceResponse(BaseModel):
 
 # ── Dev fallback ─────────────────────────────────────────────────────
 
+SUGGESTED_SKILLS = {
+    "frontend": ["TypeScript", "CSS3", "Responsive Design", "REST API", "Git"],
+    "backend": ["PostgreSQL", "Docker", "REST API", "Unit Testing", "Git"],
+    "design": ["Figma", "Adobe XD", "Prototyping", "UI/UX", "Design Systems"],
+    "general": ["Communication", "Problem Solving", "Documentation", "Git", "Agile"],
+}
+
+# Stack hints read from long descriptions when skills and category say nothing
+STACK_KEYWORDS = {
+    "frontend": ["react", "vue", "angular", "frontend", "front-end", "javascript", "typescript", "css"],
+    "backend": ["python", "django", "flask", "fastapi", "node.js", "backend", "back-end", "php", "laravel"],
+    "design": ["figma", "ui/ux", "wireframe", "mockup", "logo", "branding"],
+}
+STACK_AUTOMATON = KeywordAutomaton(STACK_KEYWORDS)
+
+
+def _detect_stack(req: JobEnhanceRequest) -> str:
+    """frontend | backend | design | general"""
+    skills_text = " ".join(req.skills).lower()
+    category = req.category.lower()
+    if "react" in skills_text or "frontend" in category:
+        return "frontend"
+    if "python" in skills_text or "backend" in category:
+        return "backend"
+    if "design" in category:
+        return "design"
+
+    if len(req.description) > 200:
+        counts = STACK_AUTOMATON.scan(req.description).counts()
+        if counts:
+            # Ties resolve in STACK_KEYWORDS order
+            return max(STACK_KEYWORDS, key=lambda stack: counts.get(stack, 0))
+    return "general"
+
+
 def _dev_enhance(req: JobEnhanceRequest) -> JobEnhanceResponse:
     """Rule-based enhancement for dev mode (no Gemini needed)."""
     start = time.monotonic()
@@ -78,15 +117,7 @@ def _dev_enhance(req: JobEnhanceRequest) -> JobEnhanceResponse:
         )
 
     # Suggest additional skills
-    suggested_skills = []
-    if "react" in " ".join(req.skills).lower() or "frontend" in req.category.lower():
-        suggested_skills = ["TypeScript", "CSS3", "Responsive Design", "REST API", "Git"]
-    elif "python" in " ".join(req.skills).lower() or "backend" in req.category.lower():
-        suggested_skills = ["PostgreSQL", "Docker", "REST API", "Unit Testing", "Git"]
-    elif "design" in req.category.lower():
-        suggested_skills = ["Figma", "Adobe XD", "Prototyping", "UI/UX", "Design Systems"]
-    else:
-        suggested_skills = ["Communication", "Problem Solving", "Documentation", "Git", "Agile"]
+    suggested_skills = SUGGESTED_SKILLS[_detect_stack(req)]
 
     # Filter out skills already in the list
     existing_lower = {s.lower() for s in req.skills}
@@ -147,6 +178,56 @@ def _dev_enhance(req: JobEnhanceRequest) -> JobEnhanceResponse:
     )
 
 
+# ── Semantic cache ───────────────────────────────────────────────────
+
+CACHE_CONTENT_FIELDS = ("improved_title", "improved_description", "suggested_skills", "suggested_milestones", "tips")
+
+
+def _budget_mid(req: JobEnhanceRequest) -> float:
+    if req.budget_min and req.budget_max:
+        return (req.budget_min + req.budget_max) / 2
+    return req.budget_max or req.budget_min or 0
+
+
+def _cache_key(req: JobEnhanceRequest) -> str:
+    """Request text the cache matches on; budgets are personalized instead."""
+    skills = ", ".join(sorted(s.lower() for s in req.skills))
+    return f"{req.title}\n{req.category}\n{skills}\n{req.description}"
+
+
+def _cache_partition(req: JobEnhanceRequest) -> str:
+    """
+    Digest of the normalized description.
+
+    The improved description restates the client's own brief (clinic, product,
+    integrations), so it is only reused for the same description up to case and
+    whitespace; title, skills and budget are personalized on top.
+    """
+    from shared.embeddings import normalize_text
+
+    return hashlib.sha256(normalize_text(req.description).encode()).hexdigest()[:16]
+
+
+def _personalize(cached: dict, req: JobEnhanceRequest) -> dict:
+    """Fit a response cached for a similar job to this request."""
+    result = {**cached["result"]}
+    if cached["title"] and cached["title"] != req.title:
+        result["improved_description"] = result.get("improved_description", "").replace(cached["title"], req.title)
+
+    existing = {s.lower() for s in req.skills}
+    result["suggested_skills"] = [s for s in result.get("suggested_skills", []) if s.lower() not in existing]
+
+    # Milestone amounts follow this job's budget
+    mid = _budget_mid(req)
+    if mid and cached["budget_mid"]:
+        scale = mid / cached["budget_mid"]
+        result["suggested_milestones"] = [
+            {**m, "estimated_amount": round(float(m.get("estimated_amount") or 0) * scale, 2)}
+            for m in result.get("suggested_milestones", [])
+        ]
+    return result
+
+
 # ── Endpoint ─────────────────────────────────────────────────────────
 
 @router.post("/enhance", response_model=JobEnhanceResponse)
@@ -156,6 +237,29 @@ async def enhance_job(request: JobEnhanceRequest):
     # Try Vertex AI in production
     from src.vertex_ai import enhance_job_with_vertex, is_vertex_enabled
     if is_vertex_enabled():
+        from shared.metrics import record_fallback
+        from shared.semantic_cache import get_semantic_cache
+
+        start = time.monotonic()
+        cache = get_semantic_cache("job_enhance")
+        key = _cache_key(request)
+        partition = _cache_partition(request)
+        hit = cache.lookup(key, partition=partition)
+        if hit and not cache.sample_guard():
+            result = _personalize(hit.value, request)
+            result["latency_ms"] = int((time.monotonic() - start) * 1000)
+            await log_ai_decision(
+                decision_type="job_enhance",
+                entity_type="job",
+                entity_id="draft",
+                model_name="vertex-gemini",
+                model_version=MODEL_VERSION,
+                output={"source": "semantic_cache", "similarity": round(hit.similarity, 4)},
+                confidence_score=0.9,
+                latency_ms=result["latency_ms"],
+            )
+            return result
+
         result = await enhance_job_with_vertex(
             title=request.title,
             description=request.description,
@@ -165,7 +269,18 @@ async def enhance_job(request: JobEnhanceRequest):
             budget_max=request.budget_max,
         )
         if result:
-            log_ai_decision(
+            served = _personalize(hit.value, request) if hit else None
+            if not hit or not cache.check_guard(
+                hit,
+                {f: result.get(f) for f in CACHE_CONTENT_FIELDS},
+                cached={f: served.get(f) for f in CACHE_CONTENT_FIELDS},
+            ):
+                cache.store(
+                    key,
+                    {"result": result, "title": request.title, "budget_mid": _budget_mid(request)},
+                    partition=partition,
+                )
+            await log_ai_decision(
                 decision_type="job_enhance",
                 entity_type="job",
                 entity_id="draft",
@@ -176,6 +291,53 @@ async def enhance_job(request: JobEnhanceRequest):
                 latency_ms=result.get("latency_ms", 0),
             )
             return result
+        record_fallback("job_enhance")
 
     # Fallback to rule-based
     return _dev_enhance(request)
+
+
+@router.post("/enhance/stream")
+async def enhance_job_stream(request: JobEnhanceRequest):
+    """
+    Stream a job enhancement as server-sent events.
+
+    The improved title and description arrive as "delta" events while
+    Gemini writes them, followed by a "result" event shaped like
+    JobEnhanceResponse.
+    """
+    from src.vertex_ai import stream_job_enhance_with_vertex, is_vertex_enabled
+
+    start = time.monotonic()
+    chunks = stream_job_enhance_with_vertex(**request.model_dump()) if is_vertex_enabled() else None
+
+    def build_result(fields: dict) -> dict:
+        elapsed = int((time.monotonic() - start) * 1000)
+        return JobEnhanceResponse(
+            **fields, model_version=MODEL_VERSION, latency_ms=elapsed
+        ).model_dump()
+
+    async def audit(result: dict) -> None:
+        await log_ai_decision(
+            decision_type="job_enhance",
+            entity_type="job",
+            entity_id="draft",
+            model_name="vertex-gemini",
+            model_version=MODEL_VERSION,
+            output={"source": "vertex", "streamed": True},
+            confidence_score=0.9,
+            latency_ms=result["latency_ms"],
+        )
+
+    return StreamingResponse(
+        sse_generation(
+            "job_enhance",
+            chunks,
+            stream_fields=("improved_title", "improved_description"),
+            build_result=build_result,
+            fallback=lambda: _dev_enhance(request).model_dump(),
+            on_result=audit,
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
@@ -0,0 +1,133 @@
+"""
+Multi-pattern keyword matching (Aho-Corasick) for the rule-based fallbacks.
+
+Usage:
+    automaton = KeywordAutomaton({"complex": ["real-time", "ai"], ...})
+    result = automaton.scan(description)
+    result.counts()   # {"complex": 2, ...} distinct keywords per label
+    result.matches    # [KeywordMatch(label, keyword, start, end), ...]
+
+Keyword tables are compiled once into a trie with failure links, so a scan
+visits each character of the text once regardless of how many keywords there
+are. Matches must sit on word boundaries ("ai" does not match inside
+"maintain"), matching is case-insensitive, and start/end are offsets into the
+original text so callers can explain which phrases drove a decision.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Set, Tuple
+
+
+class KeywordMatch(NamedTuple):
+    label: str
+    keyword: str
+    start: int
+    end: int
+
+
+class ScanResult(NamedTuple):
+    matches: List[KeywordMatch]
+    word_count: int
+
+    def counts(self) -> Dict[str, int]:
+        """Distinct keywords matched per label."""
+        seen: Dict[str, Set[str]] = {}
+        for m in self.matches:
+            seen.setdefault(m.label, set()).add(m.keyword)
+        return {label: len(keywords) for label, keywords in seen.items()}
+
+    def labels(self) -> Set[str]:
+        return {m.label for m in self.matches}
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _lower(text: str) -> str:
+    """Lowercase without changing length, so offsets map back to text."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over labelled keyword tables."""
+
+    def __init__(self, tables: Mapping[str, Iterable[str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[Tuple[str, str], ...]] = [()]
+
+        for label, keywords in tables.items():
+            for keyword in keywords:
+                self._add(_lower(keyword.strip()), label)
+        self._link()
+
+    def _add(self, keyword: str, label: str) -> None:
+        if not keyword:
+            return
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        if (keyword, label) not in self._out[state]:
+            self._out[state] += ((keyword, label),)
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # Inherit shorter keywords ending here ("ai" inside "api ai")
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def scan(self, text: str) -> ScanResult:
+        """Find every keyword occurrence and count words in a single pass."""
+        lowered = _lower(text or "")
+        n = len(lowered)
+        goto, fail, out = self._goto, self._fail, self._out
+        matches: List[KeywordMatch] = []
+        word_count = 0
+        in_word = False
+        state = 0
+
+        for i, ch in enumerate(lowered):
+            # Same word definition as str.split()
+            if ch.isspace():
+                in_word = False
+            elif not in_word:
+                in_word = True
+                word_count += 1
+
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            for keyword, label in out[state]:
+                start = i - len(keyword) + 1
+                end = i + 1
+                if start > 0 and _is_word_char(lowered[start - 1]) and _is_word_char(keyword[0]):
+                    continue
+                if end < n and _is_word_char(lowered[end]) and _is_word_char(keyword[-1]):
+                    continue
+                matches.append(KeywordMatch(label, keyword, start, end))
+
+        matches.sort(key=lambda m: (m.start, -m.end))
+        return ScanResult(matches, word_count)
+
+    def find(self, text: str) -> List[KeywordMatch]:
+        return self.scan(text).matches
@@ -2,10 +2,11 @@
 AI Scope Assistant - Job decomposition into structured milestones
 
 Subscribes to:
-  - job-published → auto-analyze scope for new jobs (async)
+  - job-published → auto-analyze scope + moderate new jobs (async, one subscription)
 
 Exposes:
   - POST /api/v1/scope/analyze → sync scope analysis (called by PHP API)
+  - GET  /metrics             → Prometheus metrics (shared.metrics)
 """
 
 import os
@@ -22,6 +23,8 @@ from src.job_enhance_routes import router as job_enhance_router
 from src.proposal_routes import router as proposal_router
 from src.profile_routes import router as profile_router
 from src.config import settings
+from shared.metrics import install_metrics, mark_process_dead
+from shared.tracing import init_tracing, shutdown_tracing
 
 logger = structlog.get_logger()
 
@@ -31,42 +34,65 @@ VERSION = os.getenv("SERVICE_VERSION", "1.0.0")
 _subscriber_task = None
 
 
+def _batching_pull_options() -> dict:
+    """Pull larger pages and allow more jobs in flight so batches can fill up."""
+    if not settings.job_batching:
+        return {}
+    from shared.pubsub import MAX_MESSAGES
+    from src.batching import job_batcher, pull_options
+
+    return pull_options(job_batcher, MAX_MESSAGES)
+
+
 async def _start_subscribers():
     """Start Pub/Sub subscribers for job-published events."""
     try:
-        from shared.pubsub import subscribe_async
-        from src.subscribers import handle_job_published, handle_job_moderation
+        from shared.pubsub import subscribe_async, key_by
+        from src.subscribers import handle_job_published_fanout
 
         global _subscriber_task
-        # Scope analysis subscriber
-        scope_task = asyncio.create_task(
+        # One subscription fans out to scope analysis and content moderation
+        _subscriber_task = asyncio.create_task(
             subscribe_async(
                 topic_name="job-published",
                 subscription_name="job-published-scope",
-                handler=handle_job_published,
-            )
-        )
-        # Content moderation subscriber
-        moderation_task = asyncio.create_task(
-            subscribe_async(
-                topic_name="job-published",
-                subscription_name="job-published-moderation",
-                handler=handle_job_moderation,
+                handler=handle_job_published_fanout,
+                ordering_key=key_by("job_id"),
+                **_batching_pull_options(),
             )
         )
-        _subscriber_task = asyncio.gather(scope_task, moderation_task)
-        logger.info("subscribers_started", topics=["job-published-scope", "job-published-moderation"])
+        logger.info("subscribers_started", topics=["job-published-scope"])
     except Exception:
         logger.exception("subscriber_start_failed")
 
 
+async def _start_context_cache():
+    """Create or reuse provider-side caches for the static prompt prefixes."""
+    try:
+        from src.vertex_ai import CACHED_INSTRUCTIONS, VERTEX_MODEL, is_vertex_enabled
+
+        if not is_vertex_enabled():
+            return
+        from shared.context_cache import context_cache
+
+        await context_cache.start(SERVICE_NAME, VERTEX_MODEL, CACHED_INSTRUCTIONS)
+    except Exception:
+        logger.exception("context_cache_start_failed")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("service_starting", service=SERVICE_NAME, version=VERSION)
+    init_tracing(SERVICE_NAME)
     await _start_subscribers()
+    await _start_context_cache()
     yield
     if _subscriber_task:
         _subscriber_task.cancel()
+    from shared.context_cache import context_cache
+    await context_cache.stop()
+    await asyncio.to_thread(shutdown_tracing)
+    mark_process_dead()
     logger.info("service_stopping", service=SERVICE_NAME)
 
 
@@ -75,6 +101,7 @@ app.include_router(router)
 app.include_router(job_enhance_router)
 app.include_router(proposal_router)
 app.include_router(profile_router)
+install_metrics(app)
 
 
 @app.get("/healthz")
@@ -2,7 +2,9 @@
 Profile AI routes — bio/headline generation and skill suggestions.
 """
 
+import hashlib
 import json
+import re
 import time
 from typing import List, Optional
 from pydantic import BaseModel
@@ -206,6 +208,54 @@ Respond in STRICT JSON only, no markdown fences:
 }}"""
 
 
+# ── Semantic cache ─────────────────────────────────────────────────
+
+def _enhance_cache_key(req: ProfileEnhanceRequest) -> str:
+    """Matched text for /enhance; name and experience are personalized, tone is a partition."""
+    skills = ", ".join(sorted(s.lower() for s in req.skills))
+    return f"{skills}\n{req.current_headline}\n{req.current_bio}"
+
+
+def _enhance_partition(req: ProfileEnhanceRequest) -> str:
+    """
+    Tone, a seniority band and a digest of the normalized inputs.
+
+    Generated bios carry the employers, clients and projects of the profile
+    they were written for, so a bio is only reused for the same skills,
+    headline and bio (up to case and whitespace), never for a similar one.
+    """
+    from shared.embeddings import normalize_text
+
+    years = req.experience_years
+    band = "entry" if years < 2 else "mid" if years < 5 else "senior" if years < 10 else "expert"
+    digest = hashlib.sha256(normalize_text(_enhance_cache_key(req)).encode()).hexdigest()[:16]
+    return f"{req.tone}:{band}:{digest}"
+
+
+def _personalize_enhance(cached: dict, req: ProfileEnhanceRequest) -> ProfileEnhanceResponse:
+    """Swap the cached freelancer's name and years of experience for this one's."""
+    headline, bio = cached["headline"], cached["bio"]
+    if cached["name"] and req.name and cached["name"] != req.name:
+        headline = headline.replace(cached["name"], req.name)
+        bio = bio.replace(cached["name"], req.name)
+    if cached["experience_years"] and req.experience_years and cached["experience_years"] != req.experience_years:
+        years = re.compile(rf"\b{cached['experience_years']}(\+?\s*(?:years|yrs))", re.IGNORECASE)
+        headline = years.sub(rf"{req.experience_years}\1", headline)
+        bio = years.sub(rf"{req.experience_years}\1", bio)
+    return ProfileEnhanceResponse(headline=headline, bio=bio, model_version="vertex-ai")
+
+
+def _suggest_cache_key(req: SkillSuggestRequest) -> str:
+    skills = ", ".join(sorted(s.lower() for s in req.current_skills))
+    return f"{skills}\n{req.headline}\n{req.bio}"
+
+
+def _personalize_suggestions(cached: list, req: SkillSuggestRequest) -> List[SuggestedSkill]:
+    """Drop suggestions this freelancer already lists."""
+    current = {s.lower() for s in req.current_skills}
+    return [SuggestedSkill(**s) for s in cached if s["name"].lower() not in current]
+
+
 # ── Endpoints ──────────────────────────────────────────────────────
 
 @router.post("/enhance", response_model=ProfileEnhanceResponse)
@@ -214,11 +264,24 @@ async def enhance_profile(request: ProfileEnhanceRequest):
     from src.vertex_ai import is_vertex_enabled
 
     if is_vertex_enabled():
+        from shared.metrics import record_fallback
+
         try:
             from src.vertex_ai import _get_model
+            from shared.semantic_cache import get_semantic_cache
+            from shared.metrics import observe_model
             import json as _json
 
             start = time.monotonic()
+            cache = get_semantic_cache("profile_enhance")
+            key = _enhance_cache_key(request)
+            partition = _enhance_partition(request)
+            hit = cache.lookup(key, partition=partition)
+            if hit and not cache.sample_guard():
+                served = _personalize_enhance(hit.value, request)
+                served.latency_ms = int((time.monotonic() - start) * 1000)
+                return served
+
             prompt = PROFILE_ENHANCE_PROMPT.format(
                 name=request.name or "Freelancer",
                 skills=", ".join(request.skills) if request.skills else "Not specified",
@@ -229,7 +292,7 @@ async def enhance_profile(request: ProfileEnhanceRequest):
             )
 
             model = _get_model()
-            response = model.generate_content(
+            response = observe_model(model, "profile_enhance").generate_content(
                 prompt,
                 generation_config={
                     "temperature": 0.7,
@@ -247,15 +310,26 @@ async def enhance_profile(request: ProfileEnhanceRequest):
             elapsed = int((time.monotonic() - start) * 1000)
 
             logger.info("vertex_profile_enhance_complete", model="vertex")
-            return ProfileEnhanceResponse(
+            fresh = ProfileEnhanceResponse(
                 headline=result.get("headline", ""),
                 bio=result.get("bio", ""),
                 model_version="vertex-ai",
                 latency_ms=elapsed,
             )
+            content = {"headline": fresh.headline, "bio": fresh.bio}
+            if not hit or not cache.check_guard(
+                hit, content, cached=_personalize_enhance(hit.value, request).model_dump(include=set(content))
+            ):
+                cache.store(
+                    key,
+                    {**content, "name": request.name, "experience_years": request.experience_years},
+                    partition=partition,
+                )
+            return fresh
         except Exception as e:
             logger.exception("vertex_profile_enhance_failed", error=str(e))
             # Fall through to dev fallback
+            record_fallback("profile_enhance")
 
     return _dev_enhance(request)
 
@@ -266,11 +340,25 @@ async def suggest_skills(request: SkillSuggestRequest):
     from src.vertex_ai import is_vertex_enabled
 
     if is_vertex_enabled():
+        from shared.metrics import record_fallback
+
         try:
             from src.vertex_ai import _get_model
+            from shared.semantic_cache import get_semantic_cache
+            from shared.metrics import observe_model
             import json as _json
 
             start = time.monotonic()
+            cache = get_semantic_cache("skill_suggest")
+            key = _suggest_cache_key(request)
+            hit = cache.lookup(key)
+            if hit and not cache.sample_guard():
+                return SkillSuggestResponse(
+                    suggested_skills=_personalize_suggestions(hit.value, request),
+                    model_version="vertex-ai",
+                    latency_ms=int((time.monotonic() - start) * 1000),
+                )
+
             prompt = SKILL_SUGGEST_PROMPT.format(
                 headline=request.headline or "Not provided",
                 bio=request.bio or "Not provided",
@@ -279,7 +367,7 @@ async def suggest_skills(request: SkillSuggestRequest):
             )
 
             model = _get_model()
-            response = model.generate_content(
+            response = observe_model(model, "skill_suggest").generate_content(
                 prompt,
                 generation_config={
                     "temperature": 0.5,
@@ -303,6 +391,11 @@ async def suggest_skills(request: SkillSuggestRequest):
             ]
 
             logger.info("vertex_skill_suggest_complete", count=len(suggestions))
+            content = [s.model_dump() for s in suggestions]
+            if not hit or not cache.check_guard(
+                hit, content, cached=[s.model_dump() for s in _personalize_suggestions(hit.value, request)]
+            ):
+                cache.store(key, content)
             return SkillSuggestResponse(
                 suggested_skills=suggestions,
                 model_version="vertex-ai",
@@ -310,5 +403,6 @@ async def suggest_skills(request: SkillSuggestRequest):
             )
         except Exception as e:
             logger.exception("vertex_skill_suggest_failed", error=str(e))
+            record_fallback("skill_suggest")
 
     return _dev_suggest_skills(request)
@@ -4,12 +4,14 @@ Proposal Generation routes — AI-powered proposal drafting.
 
 import time
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 import structlog
 
 from src.config import settings
 from src.audit import log_ai_decision
+from src.streaming import SSE_HEADERS, sse_generation
 
 logger = structlog.get_logger()
 
@@ -196,6 +198,8 @@ async def generate_proposal(request: ProposalGenRequest):
 
     from src.vertex_ai import generate_proposal_with_vertex, is_vertex_enabled
     if is_vertex_enabled():
+        from shared.metrics import record_fallback
+
         result = await generate_proposal_with_vertex(
             job_title=request.job_title,
             job_description=request.job_description,
@@ -230,6 +234,52 @@ async def generate_proposal(request: ProposalGenRequest):
                 latency_ms=result.get("latency_ms", 0),
             )
             return result
+        record_fallback("proposal")
 
     # Fallback to rule-based
     return _dev_generate(request)
+
+
+@router.post("/generate/stream")
+async def generate_proposal_stream(request: ProposalGenRequest):
+    """
+    Stream a proposal draft as server-sent events.
+
+    The cover letter arrives as "delta" events while Gemini writes it,
+    followed by a "result" event shaped like ProposalGenResponse.
+    """
+    from src.vertex_ai import stream_proposal_with_vertex, is_vertex_enabled
+
+    start = time.monotonic()
+    chunks = stream_proposal_with_vertex(**request.model_dump()) if is_vertex_enabled() else None
+
+    def build_result(fields: dict) -> dict:
+        elapsed = int((time.monotonic() - start) * 1000)
+        return ProposalGenResponse(
+            **fields, model_version=MODEL_VERSION, latency_ms=elapsed
+        ).model_dump()
+
+    async def audit(result: dict) -> None:
+        await log_ai_decision(
+            decision_type="proposal_generate",
+            entity_type="proposal",
+            entity_id="draft",
+            model_name="vertex-gemini",
+            model_version=MODEL_VERSION,
+            output={"source": "vertex", "streamed": True},
+            confidence_score=0.9,
+            latency_ms=result["latency_ms"],
+        )
+
+    return StreamingResponse(
+        sse_generation(
+            "proposal_generate",
+            chunks,
+            stream_fields=("cover_letter",),
+            build_result=build_result,
+            fallback=lambda: _dev_generate(request).model_dump(),
+            on_result=audit,
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
@@ -9,13 +9,17 @@ Analyzes a job description and decomposes it into:
 
 import time
 import re
-from fastapi import APIRouter
+import json
+from functools import lru_cache
+from types import MappingProxyType
+from fastapi import APIRouter, Response
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
 import structlog
 
 from src.config import settings
 from src.audit import log_ai_decision
+from src.keywords import KeywordAutomaton, KeywordMatch
 
 logger = structlog.get_logger()
 
@@ -73,6 +77,8 @@ COMPLEXITY_KEYWORDS = {
                    "high-availability", "kubernetes", "blockchain"],
 }
 
+COMPLEXITY_AUTOMATON = KeywordAutomaton(COMPLEXITY_KEYWORDS)
+
 # Base milestone templates by complexity
 MILESTONE_TEMPLATES = {
     "simple": [
@@ -162,15 +168,22 @@ MILESTONE_TEMPLATES = {
 }
 
 
-def _detect_complexity(description: str, skills: List[str], budget_max: Optional[float]) -> str:
-    """Detect job complexity from description, skills, and budget."""
-    desc_lower = description.lower()
+class ComplexityResult(NamedTuple):
+    tier: str
+    scores: Dict[str, int]
+    matches: List[KeywordMatch]
+
+
+def detect_complexity(
+    description: str, skills: List[str], budget_max: Optional[float]
+) -> ComplexityResult:
+    """Score complexity tiers; keyword matches are kept for explainability."""
+    scan = COMPLEXITY_AUTOMATON.scan(description)
     scores = {"simple": 0, "moderate": 0, "complex": 0, "enterprise": 0}
 
-    for tier, keywords in COMPLEXITY_KEYWORDS.items():
-        for kw in keywords:
-            if kw in desc_lower:
-                scores[tier] += 1
+    # One point per distinct keyword of a tier
+    for tier, count in scan.counts().items():
+        scores[tier] += count
 
     # Skill count as complexity indicator
     if len(skills) >= 8:
@@ -188,52 +201,103 @@ def _detect_complexity(description: str, skills: List[str], budget_max: Optional
             scores["moderate"] += 1
 
     # Description length
-    word_count = len(description.split())
-    if word_count > 500:
+    if scan.word_count > 500:
         scores["complex"] += 1
-    elif word_count > 200:
+    elif scan.word_count > 200:
         scores["moderate"] += 1
 
-    return max(scores, key=scores.get)  # type: ignore
+    tier = max(scores, key=scores.get)  # type: ignore
+    return ComplexityResult(tier, scores, scan.matches)
 
 
-def analyze_scope(request: ScopeRequest) -> ScopeResponse:
-    """Analyze a job and decompose it into milestones."""
-    start = time.monotonic()
+def _detect_complexity(description: str, skills: List[str], budget_max: Optional[float]) -> str:
+    """Detect job complexity from description, skills, and budget."""
+    return detect_complexity(description, skills, budget_max).tier
 
-    complexity = _detect_complexity(
-        request.description, request.skills_required, request.budget_max
-    )
 
-    template = MILESTONE_TEMPLATES.get(complexity, MILESTONE_TEMPLATES["moderate"])
+# ── Compiled templates ───────────────────────────────────────────────
+#
+# Only the hourly rate varies between requests for a tier, so templates are
+# compiled at import into immutable tuples with their hour totals, plus the
+# JSON of each milestone split around its estimated_cost.
 
-    # Estimate hourly rate from budget
-    total_template_hours = sum(
-        sum(t[1] for t in m[2]) for m in template
-    )
-    hourly_rate = 50.0  # default
-    if request.budget_max and total_template_hours > 0:
-        hourly_rate = request.budget_max / total_template_hours
+class CompiledMilestone(NamedTuple):
+    title: str
+    description: str
+    hours: float
+    tasks: Tuple[Tuple[str, float], ...]
+    json_head: bytes  # {"title": ..., "estimated_cost":
+    json_tail: bytes  # ,"tasks": [...]}
+
+
+class CompiledTemplate(NamedTuple):
+    tier: str
+    milestones: Tuple[CompiledMilestone, ...]
+    total_hours: float
 
+
+def _json(value) -> bytes:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _compile_template(tier: str, template: list) -> CompiledTemplate:
     milestones = []
+    for title, description, tasks in template:
+        frozen_tasks = tuple((task, float(hours)) for task, hours in tasks)
+        hours = float(sum(h for _, h in frozen_tasks))
+        head = (
+            b'{"title":' + _json(title)
+            + b',"description":' + _json(description)
+            + b',"estimated_hours":' + _json(hours)
+            + b',"estimated_cost":'
+        )
+        tail = b',"tasks":' + _json(
+            [{"title": task, "estimated_hours": h} for task, h in frozen_tasks]
+        ) + b"}"
+        milestones.append(CompiledMilestone(title, description, hours, frozen_tasks, head, tail))
     total_hours = 0.0
+    for m in milestones:
+        total_hours += m.hours
+    return CompiledTemplate(tier, tuple(milestones), total_hours)
+
+
+COMPILED_TEMPLATES: Mapping[str, CompiledTemplate] = MappingProxyType({
+    tier: _compile_template(tier, template) for tier, template in MILESTONE_TEMPLATES.items()
+})
+
+
+@lru_cache(maxsize=1024)
+def _milestones_json(tier: str, hourly_rate: float) -> Tuple[bytes, float]:
+    """Milestones array for a tier at a rate, and its unrounded total cost."""
+    template = COMPILED_TEMPLATES[tier]
+    parts = []
     total_cost = 0.0
+    for m in template.milestones:
+        cost = m.hours * hourly_rate
+        total_cost += cost
+        parts.append(m.json_head + _json(round(cost, 2)) + m.json_tail)
+    return b"[" + b",".join(parts) + b"]", total_cost
 
-    for title, description, tasks in template:
-        milestone_hours = sum(t[1] for t in tasks)
-        milestone_cost = milestone_hours * hourly_rate
-        total_hours += milestone_hours
-        total_cost += milestone_cost
-
-        milestones.append(MilestoneOutput(
-            title=title,
-            description=description,
-            estimated_hours=milestone_hours,
-            estimated_cost=round(milestone_cost, 2),
-            tasks=[
-                TaskItem(title=t[0], estimated_hours=t[1]) for t in tasks
-            ],
-        ))
+
+# ── Analysis ─────────────────────────────────────────────────────────
+
+class ScopeEstimate(NamedTuple):
+    template: CompiledTemplate
+    hourly_rate: float
+    confidence: float
+    complexity: ComplexityResult
+
+
+def _estimate(request: ScopeRequest) -> ScopeEstimate:
+    detected = detect_complexity(
+        request.description, request.skills_required, request.budget_max
+    )
+    template = COMPILED_TEMPLATES.get(detected.tier, COMPILED_TEMPLATES["moderate"])
+
+    # Estimate hourly rate from budget
+    hourly_rate = 50.0  # default
+    if request.budget_max and template.total_hours > 0:
+        hourly_rate = request.budget_max / template.total_hours
 
     # Confidence based on how much info we have
     confidence = 0.5
@@ -247,9 +311,10 @@ def analyze_scope(request: ScopeRequest) -> ScopeResponse:
         confidence += 0.05
     confidence = min(1.0, confidence)
 
-    elapsed_ms = int((time.monotonic() - start) * 1000)
+    return ScopeEstimate(template, hourly_rate, confidence, detected)
 
-    # Audit
+
+def _audit(request: ScopeRequest, estimate: ScopeEstimate, elapsed_ms: int) -> None:
     log_ai_decision(
         decision_type="scope_analysis",
         entity_type="job",
@@ -257,29 +322,80 @@ def analyze_scope(request: ScopeRequest) -> ScopeResponse:
         model_name="scope-rule-engine",
         model_version=MODEL_VERSION,
         output={
-            "complexity": complexity,
-            "milestones_count": len(milestones),
-            "total_hours": total_hours,
+            "complexity": estimate.complexity.tier,
+            "milestones_count": len(estimate.template.milestones),
+            "total_hours": estimate.template.total_hours,
+            "complexity_signals": [
+                {"tier": m.label, "keyword": m.keyword, "start": m.start, "end": m.end}
+                for m in estimate.complexity.matches
+            ],
         },
-        confidence_score=confidence,
+        confidence_score=estimate.confidence,
         latency_ms=elapsed_ms,
     )
 
-    return ScopeResponse(
+
+def analyze_scope(request: ScopeRequest) -> ScopeResponse:
+    """Analyze a job and decompose it into milestones."""
+    start = time.monotonic()
+    estimate = _estimate(request)
+    template, hourly_rate = estimate.template, estimate.hourly_rate
+
+    milestones = []
+    total_cost = 0.0
+    for m in template.milestones:
+        cost = m.hours * hourly_rate
+        total_cost += cost
+        # Values come from the compiled templates, no need to re-validate
+        milestones.append(MilestoneOutput.model_construct(
+            title=m.title,
+            description=m.description,
+            estimated_hours=m.hours,
+            estimated_cost=round(cost, 2),
+            tasks=[TaskItem.model_construct(title=t, estimated_hours=h) for t, h in m.tasks],
+        ))
+
+    elapsed_ms = int((time.monotonic() - start) * 1000)
+    _audit(request, estimate, elapsed_ms)
+
+    return ScopeResponse.model_construct(
         job_id=request.job_id,
         milestones=milestones,
-        total_estimated_hours=total_hours,
+        total_estimated_hours=template.total_hours,
         total_estimated_cost=round(total_cost, 2),
-        confidence_score=round(confidence, 4),
-        complexity_tier=complexity,
+        confidence_score=round(estimate.confidence, 4),
+        complexity_tier=template.tier,
         model_version=MODEL_VERSION,
         latency_ms=elapsed_ms,
     )
 
 
+def analyze_scope_json(request: ScopeRequest) -> bytes:
+    """analyze_scope serialized straight to JSON bytes from the cached skeleton."""
+    start = time.monotonic()
+    estimate = _estimate(request)
+    template = estimate.template
+    milestones, total_cost = _milestones_json(template.tier, estimate.hourly_rate)
+
+    elapsed_ms = int((time.monotonic() - start) * 1000)
+    _audit(request, estimate, elapsed_ms)
+
+    return (
+        b'{"job_id":' + _json(request.job_id)
+        + b',"milestones":' + milestones
+        + b',"total_estimated_hours":' + _json(template.total_hours)
+        + b',"total_estimated_cost":' + _json(round(total_cost, 2))
+        + b',"confidence_score":' + _json(round(estimate.confidence, 4))
+        + b',"complexity_tier":' + _json(template.tier)
+        + b',"model_version":' + _json(MODEL_VERSION)
+        + b',"latency_ms":' + _json(elapsed_ms)
+        + b"}"
+    )
+
+
 # ── Endpoint ─────────────────────────────────────────────────────────
 
 @router.post("/analyze", response_model=ScopeResponse)
 async def analyze(request: ScopeRequest):
     """Analyze job scope and decompose into milestones."""
-    return analyze_scope(request)
+    return Response(content=analyze_scope_json(request), media_type="application/json")
@@ -0,0 +1,314 @@
+"""
+Server-sent event helpers for streamed Gemini generations.
+
+Usage:
+    parser = IncrementalJsonParser(stream_fields={"cover_letter"})
+    for chunk in chunks:
+        for event in parser.feed(chunk):
+            ...  # ParserEvent("delta", "cover_letter", "Hi ") / ParserEvent("field", "suggested_bid", 1200.0)
+
+    return StreamingResponse(sse_generation(...), media_type="text/event-stream")
+
+Gemini returns a single JSON object. IncrementalJsonParser reads it as it
+arrives: text of the top-level string fields in stream_fields is forwarded
+as deltas while it is generated, and every top-level field is emitted once
+its value is complete, so clients can render the cover letter and fill in
+the structured fields long before the full response is done.
+
+Events sent by sse_generation:
+  delta   {"field": "cover_letter", "text": "..."}   partial text, append it
+  field   {"field": "suggested_bid", "value": 1200}  a completed top-level field
+  reset   {}                                         discard streamed text; the
+                                                     rule-based fallback follows
+  result  {...}                                      the full response model
+"""
+
+import json
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+import structlog
+from prometheus_client import Histogram
+
+logger = structlog.get_logger()
+
+TIME_TO_FIRST_TOKEN = Histogram(
+    "ai_stream_time_to_first_token_seconds",
+    "Time from request to the first streamed token",
+    ["endpoint", "source"],
+    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0),
+)
+
+
+class ParserEvent(NamedTuple):
+    kind: str  # "delta" | "field"
+    field: str
+    value: Any
+
+
+_SIMPLE_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+# Parser states
+_BEFORE, _KEY_WAIT, _KEY, _COLON, _VALUE_WAIT, _STRING, _RAW, _AFTER_VALUE, _DONE = range(9)
+
+
+class IncrementalJsonParser:
+    """Streaming reader for one top-level JSON object."""
+
+    def __init__(self, stream_fields: Iterable[str] = ()):
+        self.stream_fields = set(stream_fields)
+        self.fields: Dict[str, Any] = {}
+        self._state = _BEFORE
+        self._key: List[str] = []
+        self._key_escaped = False
+        self._current: Optional[str] = None
+        self._value: List[str] = []
+        self._escape: Optional[str] = None  # partial escape sequence, e.g. "\\u00"
+        self._high_surrogate: Optional[str] = None
+        self._raw: List[str] = []
+        self._depth = 0
+        self._raw_in_string = False
+        self._raw_escaped = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, chunk: str) -> List[ParserEvent]:
+        events: List[ParserEvent] = []
+        i, n = 0, len(chunk)
+        delta: List[str] = []
+
+        while i < n:
+            state = self._state
+            ch = chunk[i]
+
+            if state == _STRING:
+                # Copy runs of plain characters in one slice
+                if self._escape is None and ch != '"' and ch != "\\":
+                    end = i
+                    while end < n and chunk[end] not in '"\\':
+                        end += 1
+                    self._append_text(chunk[i:end], delta)
+                    i = end
+                    continue
+                if self._escape is not None:
+                    self._escape += ch
+                    self._finish_escape(delta)
+                elif ch == "\\":
+                    self._escape = ""
+                else:  # closing quote
+                    self._flush_surrogate(delta)
+                    self._flush_delta(delta, events)
+                    self._complete("".join(self._value), events)
+                    self._state = _AFTER_VALUE
+                i += 1
+                continue
+
+            if state == _BEFORE:
+                if ch == "{":
+                    self._state = _KEY_WAIT
+            elif state == _KEY_WAIT:
+                if ch == '"':
+                    self._key = []
+                    self._state = _KEY
+                elif ch == "}":
+                    self._state = _DONE
+            elif state == _KEY:
+                if self._key_escaped:
+                    self._key.append(ch)
+                    self._key_escaped = False
+                elif ch == "\\":
+                    self._key.append(ch)
+                    self._key_escaped = True
+                elif ch == '"':
+                    self._current = json.loads('"' + "".join(self._key) + '"')
+                    self._state = _COLON
+                else:
+                    self._key.append(ch)
+            elif state == _COLON:
+                if ch == ":":
+                    self._state = _VALUE_WAIT
+            elif state == _VALUE_WAIT:
+                if ch == '"':
+                    self._value = []
+                    self._state = _STRING
+                elif not ch.isspace():
+                    self._raw = []
+                    self._depth = 0
+                    self._state = _RAW
+                    continue  # reprocess as part of the raw value
+            elif state == _RAW:
+                if self._raw_step(ch, events):
+                    continue
+            elif state == _AFTER_VALUE:
+                if ch == ",":
+                    self._state = _KEY_WAIT
+                elif ch == "}":
+                    self._state = _DONE
+            i += 1
+
+        self._flush_delta(delta, events)
+        return events
+
+    def result(self) -> Dict[str, Any]:
+        """Fields completed so far."""
+        return dict(self.fields)
+
+    # ── String values ────────────────────────────────────────────────
+
+    def _append_text(self, text: str, delta: List[str]) -> None:
+        self._value.append(text)
+        if self._current in self.stream_fields:
+            delta.append(text)
+
+    def _finish_escape(self, delta: List[str]) -> None:
+        seq = self._escape
+        if seq[0] != "u":
+            self._flush_surrogate(delta)
+            self._append_text(_SIMPLE_ESCAPES.get(seq, seq), delta)
+            self._escape = None
+            return
+        if len(seq) < 5:
+            return  # wait for the remaining hex digits
+        self._escape = None
+        code = int(seq[1:], 16)
+        if 0xD800 <= code < 0xDC00:
+            self._flush_surrogate(delta)
+            self._high_surrogate = seq
+            return
+        if 0xDC00 <= code < 0xE000 and self._high_surrogate:
+            pair = json.loads('"\\' + self._high_surrogate + "\\" + seq + '"')
+            self._high_surrogate = None
+            self._append_text(pair, delta)
+            return
+        self._flush_surrogate(delta)
+        self._append_text(chr(code), delta)
+
+    def _flush_surrogate(self, delta: List[str]) -> None:
+        if self._high_surrogate:
+            self._high_surrogate = None
+            self._append_text("�", delta)
+
+    def _flush_delta(self, delta: List[str], events: List[ParserEvent]) -> None:
+        if delta:
+            events.append(ParserEvent("delta", self._current, "".join(delta)))
+            delta.clear()
+
+    # ── Non-string values (numbers, arrays, objects, literals) ───────
+
+    def _raw_step(self, ch: str, events: List[ParserEvent]) -> bool:
+        """Consume one char of a raw value. Returns True to reprocess ch."""
+        if self._raw_in_string:
+            self._raw.append(ch)
+            if self._raw_escaped:
+                self._raw_escaped = False
+            elif ch == "\\":
+                self._raw_escaped = True
+            elif ch == '"':
+                self._raw_in_string = False
+            return False
+
+        if self._depth == 0 and ch in ",}":
+            self._complete(json.loads("".join(self._raw)), events)
+            self._state = _AFTER_VALUE
+            return True
+
+        self._raw.append(ch)
+        if ch == '"':
+            self._raw_in_string = True
+        elif ch in "[{":
+            self._depth += 1
+        elif ch in "]}":
+            self._depth -= 1
+        return False
+
+    def _complete(self, value: Any, events: List[ParserEvent]) -> None:
+        self.fields[self._current] = value
+        events.append(ParserEvent("field", self._current, value))
+
+
+# ── SSE framing ──────────────────────────────────────────────────────
+
+def sse_event(event: str, data: Any) -> bytes:
+    """Frame one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+class FirstTokenTimer:
+    """Records time-to-first-token once per stream."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.start = time.monotonic()
+        self.ttft_ms: Optional[int] = None
+
+    def mark(self, source: str) -> None:
+        if self.ttft_ms is not None:
+            return
+        elapsed = time.monotonic() - self.start
+        self.ttft_ms = int(elapsed * 1000)
+        from shared.metrics import observe
+
+        observe(TIME_TO_FIRST_TOKEN, (self.endpoint, source), elapsed)
+
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+async def sse_generation(
+    endpoint: str,
+    chunks: Optional[AsyncIterator[str]],
+    stream_fields: Iterable[str],
+    build_result: Callable[[Dict[str, Any]], Dict[str, Any]],
+    fallback: Callable[[], Dict[str, Any]],
+    on_result: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Relay a streamed generation as SSE, ending with one "result" event.
+
+    build_result turns the parsed fields into the response dict (it should
+    validate them); if the stream fails, ends early or does not validate,
+    fallback() supplies the result instead. on_result (e.g. the audit record)
+    is awaited with a streamed result once its event has been sent.
+    """
+    stream_fields = tuple(stream_fields)
+    timer = FirstTokenTimer(endpoint)
+    streamed = False
+
+    if chunks is not None:
+        parser = IncrementalJsonParser(stream_fields)
+        result = None
+        try:
+            async for chunk in chunks:
+                timer.mark("vertex")
+                for event in parser.feed(chunk):
+                    if event.kind == "delta":
+                        streamed = True
+                        yield sse_event("delta", {"field": event.field, "text": event.value})
+                    else:
+                        yield sse_event("field", {"field": event.field, "value": event.value})
+            if parser.done:
+                result = build_result(parser.result())
+            else:
+                logger.warning("stream_incomplete_json", endpoint=endpoint)
+        except Exception:
+            logger.exception("stream_generation_failed", endpoint=endpoint)
+        if result is not None:
+            yield sse_event("result", result)
+            if on_result is not None:
+                await on_result(result)
+            return
+
+    if chunks is not None:
+        from shared.metrics import record_fallback
+
+        record_fallback(endpoint)
+    if streamed:
+        yield sse_event("reset", {})
+    result = fallback()
+    for field in stream_fields:
+        if result.get(field):
+            timer.mark("rules")
+            yield sse_event("delta", {"field": field, "text": result[field]})
+    yield sse_event("result", result)
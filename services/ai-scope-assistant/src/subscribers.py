@@ -4,14 +4,175 @@ Pub/Sub event handlers for ai-scope-assistant.
 Handles:
   - job-published → auto-analyze scope for new jobs
   - job-published → content moderation for new jobs
+
+Both branches are driven by a single subscription through
+handle_job_published_fanout, which decodes the message once. With
+JOB_BATCHING enabled, concurrent jobs share multi-job Gemini calls
+(see src.batching).
 """
 
+import asyncio
 import time
 import structlog
 
+from src.config import settings
+
 logger = structlog.get_logger()
 
 
+async def handle_job_published_fanout(data: dict) -> None:
+    """
+    Single job-published consumer for scope analysis and moderation.
+
+    Runs both branches concurrently on the same decoded payload and only
+    returns (so the message is acked) once both have finished. With
+    COMBINED_JOB_PROMPT enabled, one Gemini call serves both branches.
+    """
+    job_id = data.get("job_id")
+    if not job_id:
+        logger.warning("missing_job_id", data=data)
+        return
+
+    if settings.job_batching and await _handle_job_batched(job_id, data):
+        return
+
+    if settings.combined_job_prompt and await _handle_job_combined(job_id, data):
+        return
+
+    results = await asyncio.gather(
+        handle_job_published(data),
+        handle_job_moderation(data),
+        return_exceptions=True,
+    )
+    _log_branch_failures(job_id, results)
+
+
+def _log_branch_failures(job_id: str, results: list) -> None:
+    """
+    Log the (scope, moderation) branches of a gather that raised.
+
+    The subscriber acks handler errors anyway, so a failed callback is only
+    visible through this log; the other branch's result still stands.
+    """
+    for branch, outcome in zip(("scope", "moderation"), results):
+        if isinstance(outcome, BaseException):
+            logger.error(
+                "job_fanout_branch_failed", job_id=job_id, branch=branch, error=str(outcome), exc_info=outcome,
+            )
+
+
+async def _handle_job_combined(job_id: str, data: dict) -> bool:
+    """
+    Scope + moderation from one combined Vertex AI call.
+    Returns False when the caller should fall back to the per-branch handlers.
+    """
+    description = data.get("description", "")
+    if not description:
+        return False
+
+    from src.vertex_ai import analyze_and_moderate_job_with_vertex, is_vertex_enabled
+
+    if not is_vertex_enabled():
+        return False
+
+    start = time.monotonic()
+    try:
+        result = await analyze_and_moderate_job_with_vertex(
+            title=data.get("title", ""),
+            description=description,
+            category=data.get("category", ""),
+            skills=data.get("skills_required", []),
+            budget_min=data.get("budget_min"),
+            budget_max=data.get("budget_max"),
+            experience_level=data.get("experience_level", ""),
+        )
+    except Exception:
+        logger.exception("job_combined_analysis_failed", job_id=job_id)
+        return False
+
+    if not result:
+        return False
+
+    results = await asyncio.gather(
+        _store_vertex_scope(job_id, result["scope"]),
+        _store_vertex_moderation(job_id, result["moderation"], start),
+        return_exceptions=True,
+    )
+    _log_branch_failures(job_id, results)
+    logger.info("job_combined_analysis_complete", job_id=job_id, latency_ms=result.get("latency_ms", 0))
+    return True
+
+
+async def _handle_job_batched(job_id: str, data: dict) -> bool:
+    """
+    Scope + moderation through the micro-batcher.
+    Returns False when this job should be retried on its own.
+    """
+    if not data.get("description"):
+        return False
+
+    from src.vertex_ai import is_vertex_enabled
+
+    if not is_vertex_enabled():
+        return False
+
+    from src.batching import job_batcher
+
+    start = time.monotonic()
+    result = await job_batcher.submit(data)
+    if not result:
+        logger.info("job_batch_item_retry", job_id=job_id)
+        return False
+
+    results = await asyncio.gather(
+        _store_vertex_scope(job_id, result["scope"]),
+        _store_vertex_moderation(job_id, result["moderation"], start),
+        return_exceptions=True,
+    )
+    _log_branch_failures(job_id, results)
+    logger.info("job_batched_analysis_complete", job_id=job_id, latency_ms=int((time.monotonic() - start) * 1000))
+    return True
+
+
+async def _store_vertex_scope(job_id: str, result: dict) -> None:
+    """Store a Vertex AI scope result via PHP API callback."""
+    from shared.callback import api_callback
+
+    await api_callback.patch(f"/jobs/{job_id}/scope", {
+        "ai_scope": {
+            "milestones": result.get("milestones", []),
+            "total_estimated_hours": result.get("total_estimated_hours", 0),
+            "total_estimated_cost": result.get("total_estimated_cost", 0),
+            "complexity_tier": result.get("complexity_tier", "moderate"),
+        },
+        "model_version": f"vertex-ai/{result.get('model', 'gemini-3-flash-preview')}",
+        "confidence": result.get("confidence_score", 0.7),
+    })
+    logger.info("scope_analysis_complete_vertex", job_id=job_id)
+
+
+async def _store_vertex_moderation(job_id: str, result: dict, start: float) -> None:
+    """Store a Vertex AI moderation result via PHP API callback."""
+    from shared.callback import api_callback
+
+    await api_callback.patch(f"/jobs/{job_id}/moderation", {
+        "confidence": result.get("confidence", 0.5),
+        "quality": result.get("quality", 0.5),
+        "flags": result.get("flags", []),
+        "reasoning": result.get("reasoning", ""),
+        "model_version": f"vertex-ai/{result.get('model', 'gemini-3-flash-preview')}",
+        "latency_ms": result.get("latency_ms", 0),
+    })
+
+    logger.info(
+        "job_moderation_complete_vertex",
+        job_id=job_id,
+        confidence=result.get("confidence"),
+        flags=result.get("flags"),
+        latency_ms=int((time.monotonic() - start) * 1000),
+    )
+
+
 async def handle_job_published(data: dict) -> None:
     """
     When a job is published, automatically analyze its scope
@@ -37,6 +198,7 @@ async def handle_job_published(data: dict) -> None:
 
     try:
         from src.vertex_ai import analyze_scope_with_vertex, is_vertex_enabled
+        from shared.metrics import record_fallback
 
         if is_vertex_enabled():
             # Production: use Vertex AI for scope analysis
@@ -49,20 +211,9 @@ async def handle_job_published(data: dict) -> None:
                 budget_max=budget_max,
             )
             if result:
-                from shared.callback import api_callback
-
-                await api_callback.patch(f"/jobs/{job_id}/scope", {
-                    "ai_scope": {
-                        "milestones": result.get("milestones", []),
-                        "total_estimated_hours": result.get("total_estimated_hours", 0),
-                        "total_estimated_cost": result.get("total_estimated_cost", 0),
-                        "complexity_tier": result.get("complexity_tier", "moderate"),
-                    },
-                    "model_version": f"vertex-ai/{result.get('model', 'gemini-3-flash-preview')}",
-                    "confidence": result.get("confidence_score", 0.7),
-                })
-                logger.info("scope_analysis_complete_vertex", job_id=job_id)
+                await _store_vertex_scope(job_id, result)
                 return
+            record_fallback("scope_analysis")
 
         # Fallback: rule-based scope analysis
         from src.routes import analyze_scope, ScopeRequest
@@ -125,6 +276,7 @@ async def handle_job_moderation(data: dict) -> None:
 
     try:
         from src.vertex_ai import moderate_job_with_vertex, is_vertex_enabled
+        from shared.metrics import record_fallback
 
         if is_vertex_enabled():
             result = await moderate_job_with_vertex(
@@ -137,25 +289,9 @@ async def handle_job_moderation(data: dict) -> None:
                 skills=skills,
             )
             if result:
-                from shared.callback import api_callback
-
-                await api_callback.patch(f"/jobs/{job_id}/moderation", {
-                    "confidence": result.get("confidence", 0.5),
-                    "quality": result.get("quality", 0.5),
-                    "flags": result.get("flags", []),
-                    "reasoning": result.get("reasoning", ""),
-                    "model_version": f"vertex-ai/{result.get('model', 'gemini-3-flash-preview')}",
-                    "latency_ms": result.get("latency_ms", 0),
-                })
-
-                logger.info(
-                    "job_moderation_complete_vertex",
-                    job_id=job_id,
-                    confidence=result.get("confidence"),
-                    flags=result.get("flags"),
-                    latency_ms=int((time.monotonic() - start) * 1000),
-                )
+                await _store_vertex_moderation(job_id, result, start)
                 return
+            record_fallback("job_moderation")
 
         # Fallback: rule-based moderation
         confidence, flags, quality = _rule_based_moderation(
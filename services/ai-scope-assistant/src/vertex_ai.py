@@ -5,6 +5,13 @@ Provides two AI capabilities:
   1. Job scope analysis — decompose jobs into milestones using Gemini
   2. Job content moderation — evaluate job quality, legitimacy, policy compliance
 
+Both can also run as a single combined call (see analyze_and_moderate_job_with_vertex),
+for several jobs at once (analyze_and_moderate_jobs_with_vertex) or, for large
+backlogs, as a batch prediction job (run_scope_moderation_batch_prediction).
+
+Job enhancement and proposal generation also have streaming variants that
+yield the JSON response text as it is generated.
+
 Env vars:
   ENVIRONMENT: "dev" or "production"
   GCP_PROJECT_ID: GCP project for Vertex AI
@@ -16,7 +23,7 @@ import os
 import json
 import time
 import structlog
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 logger = structlog.get_logger()
 
@@ -48,15 +55,10 @@ def is_vertex_enabled() -> bool:
 
 # ── Scope Analysis ───────────────────────────────────────────────────
 
-SCOPE_PROMPT = """You are a project scope analyst for MonkeysWork, a freelance marketplace.
-Analyze this job posting and decompose it into structured milestones with time/cost estimates.
-
-JOB DETAILS:
-- Title: {title}
-- Description: {description}
-- Category: {category}
-- Required Skills: {skills}
-- Budget Range: ${budget_min} – ${budget_max}
+# Static instructions (cached provider-side, see shared.context_cache);
+# SCOPE_PROMPT carries only the per-request data.
+SCOPE_INSTRUCTIONS = """You are a project scope analyst for MonkeysWork, a freelance marketplace.
+Analyze the job posting below and decompose it into structured milestones with time/cost estimates.
 
 DECOMPOSE into milestones. Each milestone should have:
 - title: concise milestone name
@@ -70,23 +72,62 @@ Also determine:
 - confidence_score: how confident you are in this estimate (0.0-1.0)
 
 Respond in STRICT JSON only, no markdown fences:
-{{
+{
   "milestones": [
-    {{
+    {
       "title": "<string>",
       "description": "<string>",
       "estimated_hours": <float>,
       "estimated_cost": <float>,
       "tasks": [
-        {{"title": "<string>", "estimated_hours": <float>}}
+        {"title": "<string>", "estimated_hours": <float>}
       ]
-    }}
+    }
   ],
   "total_estimated_hours": <float>,
   "total_estimated_cost": <float>,
   "complexity_tier": "<simple|moderate|complex|enterprise>",
   "confidence_score": <float 0.0-1.0>
-}}"""
+}"""
+
+SCOPE_PROMPT = """JOB DETAILS:
+- Title: {title}
+- Description: {description}
+- Category: {category}
+- Required Skills: {skills}
+- Budget Range: ${budget_min} – ${budget_max}"""
+
+
+def _job_prompt(
+    template: str,
+    capability: str,
+    title: str,
+    description: str,
+    category: str = "",
+    skills: list = None,
+    budget_min: float = None,
+    budget_max: float = None,
+    experience_level: str = "",
+    instructions: str = "",
+):
+    """
+    Fill a job-posting template within the capability's token budget.
+
+    instructions: static prefix sent with (or cached for) the template.
+    """
+    from shared.prompting import PromptBuilder, dedupe_skills, estimate_tokens
+
+    return (
+        PromptBuilder(template, capability, reserved_tokens=estimate_tokens(instructions))
+        .add("title", title)
+        .add("description", description or "", priority=2, min_tokens=200)
+        .add("category", category or "General")
+        .add("skills", ", ".join(dedupe_skills(skills)), priority=1, min_tokens=50)
+        .add("budget_min", budget_min or "N/A")
+        .add("budget_max", budget_max or "N/A")
+        .add("experience_level", experience_level or "Not specified")
+        .build()
+    )
 
 
 async def analyze_scope_with_vertex(
@@ -101,20 +142,20 @@ async def analyze_scope_with_vertex(
     if not is_vertex_enabled():
         return None
 
-    prompt = SCOPE_PROMPT.format(
-        title=title,
-        description=description,
-        category=category or "General",
-        skills=", ".join(skills or []),
-        budget_min=budget_min or "N/A",
-        budget_max=budget_max or "N/A",
+    from shared.prompting import log_token_usage
+    from shared.context_cache import context_cache
+    from shared.metrics import observe_model
+
+    prompt = _job_prompt(
+        SCOPE_PROMPT, "scope_analysis", title, description, category, skills, budget_min, budget_max,
+        instructions=SCOPE_INSTRUCTIONS,
     )
 
     try:
         start = time.monotonic()
-        model = _get_model()
-        response = model.generate_content(
-            prompt,
+        model, contents = context_cache.prepare("scope_analysis", SCOPE_INSTRUCTIONS, prompt.text, _get_model())
+        response = await observe_model(model, "scope_analysis").generate_content_async(
+            contents,
             generation_config={
                 "temperature": 0.2,
                 "max_output_tokens": 4096,
@@ -122,6 +163,8 @@ async def analyze_scope_with_vertex(
             },
         )
 
+        log_token_usage("scope_analysis", response, prompt)
+
         text = response.text.strip()
         if text.startswith("```"):
             text = text.split("\n", 1)[1]
@@ -146,16 +189,8 @@ async def analyze_scope_with_vertex(
 
 # ── Content Moderation ───────────────────────────────────────────────
 
-MODERATION_PROMPT = """You are an AI content moderator for MonkeysWork, a freelance marketplace.
-Evaluate this job posting for quality, legitimacy, and policy compliance.
-
-JOB POSTING:
-- Title: {title}
-- Description: {description}
-- Budget Range: ${budget_min} – ${budget_max}
-- Experience Level: {experience_level}
-- Category: {category}
-- Skills Required: {skills}
+MODERATION_INSTRUCTIONS = """You are an AI content moderator for MonkeysWork, a freelance marketplace.
+Evaluate the job posting below for quality, legitimacy, and policy compliance.
 
 EVALUATE for:
 1. Content quality (clear title, detailed description, reasonable budget)
@@ -174,12 +209,20 @@ FLAGS to check:
 - unrealistic_budget: budget is absurdly low for the scope of work
 
 Respond in STRICT JSON only, no markdown fences:
-{{
+{
   "confidence": <float 0.0-1.0, overall confidence the job is legitimate and high-quality>,
   "quality": <float 0.0-1.0, content quality score>,
   "flags": [<list of flag strings that apply, empty if clean>],
   "reasoning": "<brief explanation of the assessment>"
-}}"""
+}"""
+
+MODERATION_PROMPT = """JOB POSTING:
+- Title: {title}
+- Description: {description}
+- Budget Range: ${budget_min} – ${budget_max}
+- Experience Level: {experience_level}
+- Category: {category}
+- Skills Required: {skills}"""
 
 
 async def moderate_job_with_vertex(
@@ -195,21 +238,22 @@ async def moderate_job_with_vertex(
     if not is_vertex_enabled():
         return None
 
-    prompt = MODERATION_PROMPT.format(
-        title=title,
-        description=description,
-        budget_min=budget_min or "N/A",
-        budget_max=budget_max or "N/A",
-        experience_level=experience_level or "Not specified",
-        category=category or "General",
-        skills=", ".join(skills or []),
+    from shared.prompting import log_token_usage
+    from shared.context_cache import context_cache
+    from shared.metrics import observe_model
+
+    prompt = _job_prompt(
+        MODERATION_PROMPT, "job_moderation", title, description, category, skills,
+        budget_min, budget_max, experience_level, instructions=MODERATION_INSTRUCTIONS,
     )
 
     try:
         start = time.monotonic()
-        model = _get_model()
-        response = model.generate_content(
-            prompt,
+        model, contents = context_cache.prepare(
+            "job_moderation", MODERATION_INSTRUCTIONS, prompt.text, _get_model(),
+        )
+        response = await observe_model(model, "job_moderation").generate_content_async(
+            contents,
             generation_config={
                 "temperature": 0.1,
                 "max_output_tokens": 1024,
@@ -217,6 +261,8 @@ async def moderate_job_with_vertex(
             },
         )
 
+        log_token_usage("job_moderation", response, prompt)
+
         text = response.text.strip()
         if text.startswith("```"):
             text = text.split("\n", 1)[1]
@@ -239,6 +285,415 @@ async def moderate_job_with_vertex(
         return None
 
 
+# ── Combined Scope + Moderation ───────────────────────────────────────
+
+SCOPE_MODERATION_PROMPT = """You are a project scope analyst and content moderator for MonkeysWork, a freelance marketplace.
+Analyze this job posting ONCE and return both a scope decomposition and a moderation assessment.
+
+JOB POSTING:
+- Title: {title}
+- Description: {description}
+- Category: {category}
+- Required Skills: {skills}
+- Budget Range: ${budget_min} – ${budget_max}
+- Experience Level: {experience_level}
+
+SCOPE: decompose the job into milestones. Each milestone has a title, a description of what is
+delivered, a list of tasks with hour estimates, estimated_hours and estimated_cost (based on a
+reasonable hourly rate for the skill set). Also determine complexity_tier (simple, moderate,
+complex, enterprise) and confidence_score (0.0-1.0).
+
+MODERATION: evaluate content quality, policy compliance, legitimacy and professional standards.
+Applicable flags: spam, scam, discrimination, illegal, misleading, low_quality, contact_info,
+unrealistic_budget.
+
+Respond in STRICT JSON only, no markdown fences:
+{{
+  "scope": {{
+    "milestones": [
+      {{
+        "title": "<string>",
+        "description": "<string>",
+        "estimated_hours": <float>,
+        "estimated_cost": <float>,
+        "tasks": [
+          {{"title": "<string>", "estimated_hours": <float>}}
+        ]
+      }}
+    ],
+    "total_estimated_hours": <float>,
+    "total_estimated_cost": <float>,
+    "complexity_tier": "<simple|moderate|complex|enterprise>",
+    "confidence_score": <float 0.0-1.0>
+  }},
+  "moderation": {{
+    "confidence": <float 0.0-1.0, overall confidence the job is legitimate and high-quality>,
+    "quality": <float 0.0-1.0, content quality score>,
+    "flags": [<list of flag strings that apply, empty if clean>],
+    "reasoning": "<brief explanation of the assessment>"
+  }}
+}}"""
+
+
+def _strip_fences(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1]
+        text = text.rsplit("```", 1)[0].strip()
+    return text
+
+
+def _combined_result(result: dict, latency_ms: int) -> Optional[dict]:
+    """Validate one {"scope", "moderation"} result and stamp model/latency on both branches."""
+    if not isinstance(result, dict) or not isinstance(result.get("scope"), dict) \
+            or not isinstance(result.get("moderation"), dict):
+        logger.warning(
+            "vertex_scope_moderation_incomplete",
+            keys=list(result.keys()) if isinstance(result, dict) else None,
+        )
+        return None
+    for branch in (result["scope"], result["moderation"]):
+        branch["model"] = VERTEX_MODEL
+        branch["latency_ms"] = latency_ms
+    result["model"] = VERTEX_MODEL
+    result["latency_ms"] = latency_ms
+    return result
+
+
+async def analyze_and_moderate_job_with_vertex(
+    title: str,
+    description: str,
+    category: str = "",
+    skills: list = None,
+    budget_min: float = None,
+    budget_max: float = None,
+    experience_level: str = "",
+) -> Optional[dict]:
+    """
+    Use a single Vertex AI Gemini call for both scope analysis and moderation.
+
+    Returns {"scope": {...}, "moderation": {...}, "model": str, "latency_ms": int};
+    each branch is shaped like the result of the dedicated call.
+    """
+    if not is_vertex_enabled():
+        return None
+
+    from shared.prompting import log_token_usage
+    from shared.metrics import observe_model
+
+    prompt = _job_prompt(
+        SCOPE_MODERATION_PROMPT, "scope_moderation", title, description, category, skills,
+        budget_min, budget_max, experience_level,
+    )
+
+    try:
+        start = time.monotonic()
+        model = _get_model()
+        response = await observe_model(model, "scope_moderation").generate_content_async(
+            prompt.text,
+            generation_config={
+                "temperature": 0.1,
+                "max_output_tokens": 4096,
+                "response_mime_type": "application/json",
+            },
+        )
+
+        log_token_usage("scope_moderation", response, prompt)
+
+        text = response.text.strip()
+        if text.startswith("```"):
+            text = text.split("\n", 1)[1]
+            text = text.rsplit("```", 1)[0].strip()
+
+        result = _combined_result(json.loads(text), int((time.monotonic() - start) * 1000))
+        if result is None:
+            return None
+        latency_ms = result["latency_ms"]
+
+        logger.info(
+            "vertex_scope_moderation_complete",
+            complexity=result["scope"].get("complexity_tier"),
+            flags=result["moderation"].get("flags"),
+            model=VERTEX_MODEL,
+            latency_ms=latency_ms,
+        )
+        return result
+
+    except Exception as e:
+        logger.exception("vertex_scope_moderation_failed", error=str(e))
+        return None
+
+
+# ── Batched Scope + Moderation ───────────────────────────────────────
+
+SCOPE_MODERATION_BATCH_PROMPT = """You are a project scope analyst and content moderator for MonkeysWork, a freelance marketplace.
+Analyze EACH job posting below independently and return a scope decomposition and a moderation
+assessment for every job.
+
+JOBS (one compact JSON object per line; keys: {job_keys}):
+{jobs_json}
+
+SCOPE: decompose each job into milestones. Each milestone has a title, a description of what is
+delivered, a list of tasks with hour estimates, estimated_hours and estimated_cost (based on a
+reasonable hourly rate for the skill set). Also determine complexity_tier (simple, moderate,
+complex, enterprise) and confidence_score (0.0-1.0).
+
+MODERATION: evaluate each job's content quality, policy compliance, legitimacy and professional
+standards. Applicable flags: spam, scam, discrimination, illegal, misleading, low_quality,
+contact_info, unrealistic_budget.
+
+Respond in STRICT JSON only, no markdown fences, with exactly one entry per job:
+{{
+  "results": [
+    {{
+      "job_id": "<job_id copied exactly from the input>",
+      "scope": {{
+        "milestones": [
+          {{
+            "title": "<string>",
+            "description": "<string>",
+            "estimated_hours": <float>,
+            "estimated_cost": <float>,
+            "tasks": [
+              {{"title": "<string>", "estimated_hours": <float>}}
+            ]
+          }}
+        ],
+        "total_estimated_hours": <float>,
+        "total_estimated_cost": <float>,
+        "complexity_tier": "<simple|moderate|complex|enterprise>",
+        "confidence_score": <float 0.0-1.0>
+      }},
+      "moderation": {{
+        "confidence": <float 0.0-1.0, overall confidence the job is legitimate and high-quality>,
+        "quality": <float 0.0-1.0, content quality score>,
+        "flags": [<list of flag strings that apply, empty if clean>],
+        "reasoning": "<brief explanation of the assessment>"
+      }}
+    }}
+  ]
+}}"""
+
+# Short keys for job JSON in the batch prompt; the legend is included in the prompt
+JOB_ABBREVIATIONS = {
+    "title": "t",
+    "description": "desc",
+    "category": "cat",
+    "skills": "sk",
+    "budget_min": "bmin",
+    "budget_max": "bmax",
+    "experience_level": "lvl",
+}
+BATCH_DESCRIPTION_TOKENS = int(os.getenv("JOB_BATCH_DESCRIPTION_TOKENS", "600"))
+BATCH_OUTPUT_TOKENS_PER_JOB = 2048
+
+
+def _batch_job_item(job: dict) -> dict:
+    """One job_published payload as a compact batch-prompt item."""
+    from shared.prompting import dedupe_skills, truncate_text
+
+    return {
+        "job_id": str(job.get("job_id", "")),
+        "title": job.get("title", ""),
+        "description": truncate_text(job.get("description", ""), BATCH_DESCRIPTION_TOKENS),
+        "category": job.get("category") or "General",
+        "skills": dedupe_skills(job.get("skills_required")),
+        "budget_min": job.get("budget_min"),
+        "budget_max": job.get("budget_max"),
+        "experience_level": job.get("experience_level"),
+    }
+
+
+async def analyze_and_moderate_jobs_with_vertex(jobs: list) -> Optional[dict]:
+    """
+    Scope + moderation for several jobs in one Gemini call.
+
+    jobs are job_published payloads. Returns {job_id: combined result} (each
+    shaped like analyze_and_moderate_job_with_vertex's) for the jobs that came
+    back complete; jobs missing from the dict should be retried on their own.
+    Returns None if the call failed as a whole.
+    """
+    if not is_vertex_enabled() or not jobs:
+        return None
+
+    from shared.prompting import PromptBuilder, abbreviation_legend, compact_json, log_token_usage
+    from shared.metrics import observe_model
+
+    job_ids = {str(job.get("job_id")) for job in jobs}
+    prompt = (
+        PromptBuilder(SCOPE_MODERATION_BATCH_PROMPT, "scope_moderation_batch")
+        .add("job_keys", abbreviation_legend(JOB_ABBREVIATIONS))
+        .add_items(
+            "jobs_json",
+            [_batch_job_item(job) for job in jobs],
+            render=lambda items: "\n".join(compact_json(i, JOB_ABBREVIATIONS) for i in items),
+            min_items=len(jobs),  # every job must be answered; never drop any
+        )
+        .build()
+    )
+
+    try:
+        start = time.monotonic()
+        model = _get_model()
+        response = await observe_model(model, "scope_moderation_batch").generate_content_async(
+            prompt.text,
+            generation_config={
+                "temperature": 0.1,
+                "max_output_tokens": min(32768, BATCH_OUTPUT_TOKENS_PER_JOB * len(jobs)),
+                "response_mime_type": "application/json",
+            },
+        )
+
+        log_token_usage("scope_moderation_batch", response, prompt)
+
+        payload = json.loads(_strip_fences(response.text))
+        latency_ms = int((time.monotonic() - start) * 1000)
+        results = {}
+        for entry in payload.get("results", []) if isinstance(payload, dict) else []:
+            job_id = str(entry.get("job_id", "")) if isinstance(entry, dict) else ""
+            if job_id in job_ids and job_id not in results:
+                combined = _combined_result(entry, latency_ms)
+                if combined is not None:
+                    results[job_id] = combined
+
+        logger.info(
+            "vertex_scope_moderation_batch_complete",
+            jobs=len(jobs),
+            completed=len(results),
+            model=VERTEX_MODEL,
+            latency_ms=latency_ms,
+        )
+        return results
+
+    except Exception as e:
+        logger.exception("vertex_scope_moderation_batch_failed", jobs=len(jobs), error=str(e))
+        return None
+
+
+# ── Batch Prediction (large backlogs) ────────────────────────────────
+
+async def run_scope_moderation_batch_prediction(
+    jobs: list,
+    gcs_prefix: str,
+    poll_interval_s: float = 30.0,
+    timeout_s: float = 3600.0,
+) -> Optional[dict]:
+    """
+    Scope + moderation for a large backlog as a Vertex AI batch prediction job.
+
+    Writes one SCOPE_MODERATION_PROMPT request per job as JSONL under
+    gcs_prefix, runs the job against VERTEX_MODEL and maps the output lines
+    back to job ids by the batch_item label each request carries (jobs with
+    identical text still get one line each). Returns {job_id: combined
+    result} for the jobs that succeeded, or None if the job failed or timed out.
+
+    The caller's Pub/Sub messages stay leased while this polls
+    (shared.pubsub extends their ack deadline), so they are not redelivered
+    and resubmitted as a second job.
+    """
+    if not is_vertex_enabled() or not jobs:
+        return None
+
+    import asyncio
+    import uuid
+
+    run_id = uuid.uuid4().hex[:12]
+    prefix = gcs_prefix.rstrip("/") + f"/scope-moderation-{run_id}"
+    lines = []
+    for item, job in enumerate(jobs):
+        prompt = _job_prompt(
+            SCOPE_MODERATION_PROMPT, "scope_moderation",
+            job.get("title", ""), job.get("description", ""), job.get("category", ""),
+            job.get("skills_required", []), job.get("budget_min"), job.get("budget_max"),
+            job.get("experience_level", ""),
+        )
+        lines.append(json.dumps({
+            "request": {
+                "contents": [{"role": "user", "parts": [{"text": prompt.text}]}],
+                # Echoed back with the response; the position of the job in this batch
+                "labels": {"batch_item": str(item)},
+                "generationConfig": {
+                    "temperature": 0.1,
+                    "maxOutputTokens": 4096,
+                    "responseMimeType": "application/json",
+                },
+            },
+        }))
+
+    start = time.monotonic()
+    try:
+        job = await asyncio.to_thread(_submit_batch_prediction, run_id, prefix, "\n".join(lines))
+        logger.info("vertex_batch_prediction_submitted", jobs=len(jobs), run_id=run_id)
+
+        while not await asyncio.to_thread(job.done):
+            if time.monotonic() - start > timeout_s:
+                logger.warning("vertex_batch_prediction_timeout", run_id=run_id)
+                await asyncio.to_thread(job.cancel)
+                return None
+            await asyncio.sleep(poll_interval_s)
+
+        if job.state.name != "JOB_STATE_SUCCEEDED":
+            logger.warning("vertex_batch_prediction_failed", run_id=run_id, state=job.state.name)
+            return None
+
+        outputs = await asyncio.to_thread(_read_batch_prediction_output, job.output_info.gcs_output_directory)
+    except Exception as e:
+        logger.exception("vertex_batch_prediction_error", run_id=run_id, error=str(e))
+        return None
+
+    latency_ms = int((time.monotonic() - start) * 1000)
+    results = {}
+    for line in outputs:
+        try:
+            job_id = str(jobs[int(line["request"]["labels"]["batch_item"])].get("job_id"))
+            answer = line["response"]["candidates"][0]["content"]["parts"][0]["text"]
+            combined = _combined_result(json.loads(_strip_fences(answer)), latency_ms)
+        except (KeyError, IndexError, TypeError, ValueError):
+            continue
+        if job_id and combined is not None:
+            results[job_id] = combined
+
+    logger.info(
+        "vertex_batch_prediction_complete",
+        run_id=run_id,
+        jobs=len(jobs),
+        completed=len(results),
+        latency_ms=latency_ms,
+    )
+    return results
+
+
+def _submit_batch_prediction(run_id: str, prefix: str, jsonl: str):
+    from google.cloud import aiplatform, storage
+
+    bucket_name, _, path = prefix[len("gs://"):].partition("/")
+    blob = storage.Client(project=GCP_PROJECT_ID).bucket(bucket_name).blob(f"{path}/input.jsonl")
+    blob.upload_from_string(jsonl, content_type="application/jsonl")
+
+    aiplatform.init(project=GCP_PROJECT_ID, location=REGION)
+    return aiplatform.BatchPredictionJob.create(
+        job_display_name=f"scope-moderation-{run_id}",
+        model_name=f"publishers/google/models/{VERTEX_MODEL}",
+        instances_format="jsonl",
+        predictions_format="jsonl",
+        gcs_source=f"{prefix}/input.jsonl",
+        gcs_destination_prefix=f"{prefix}/output",
+        sync=False,
+    )
+
+
+def _read_batch_prediction_output(output_dir: str) -> list:
+    from google.cloud import storage
+
+    bucket_name, _, path = output_dir[len("gs://"):].partition("/")
+    client = storage.Client(project=GCP_PROJECT_ID)
+    lines = []
+    for blob in client.list_blobs(bucket_name, prefix=path):
+        if blob.name.endswith(".jsonl"):
+            lines.extend(json.loads(l) for l in blob.download_as_text().splitlines() if l.strip())
+    return lines
+
+
 # ── Job Enhancement ──────────────────────────────────────────────────
 
 JOB_ENHANCE_PROMPT = """You are a hiring expert for MonkeysWork, a freelance marketplace.
@@ -271,6 +726,19 @@ Respond in STRICT JSON only, no markdown fences:
 }}"""
 
 
+def _job_enhance_prompt(
+    title: str,
+    description: str,
+    category: str = "",
+    skills: list = None,
+    budget_min: float = None,
+    budget_max: float = None,
+):
+    return _job_prompt(
+        JOB_ENHANCE_PROMPT, "job_enhance", title, description, category, skills, budget_min, budget_max,
+    )
+
+
 async def enhance_job_with_vertex(
     title: str,
     description: str,
@@ -283,20 +751,16 @@ async def enhance_job_with_vertex(
     if not is_vertex_enabled():
         return None
 
-    prompt = JOB_ENHANCE_PROMPT.format(
-        title=title,
-        description=description,
-        category=category or "General",
-        skills=", ".join(skills or []),
-        budget_min=budget_min or "N/A",
-        budget_max=budget_max or "N/A",
-    )
+    from shared.prompting import log_token_usage
+    from shared.metrics import observe_model
+
+    prompt = _job_enhance_prompt(title, description, category, skills, budget_min, budget_max)
 
     try:
         start = time.monotonic()
         model = _get_model()
-        response = model.generate_content(
-            prompt,
+        response = observe_model(model, "job_enhance").generate_content(
+            prompt.text,
             generation_config={
                 "temperature": 0.4,
                 "max_output_tokens": 4096,
@@ -304,6 +768,8 @@ async def enhance_job_with_vertex(
             },
         )
 
+        log_token_usage("job_enhance", response, prompt)
+
         text = response.text.strip()
         if text.startswith("```"):
             text = text.split("\n", 1)[1]
@@ -381,7 +847,7 @@ Respond in STRICT JSON only, no markdown fences:
 }}"""
 
 
-async def generate_proposal_with_vertex(
+def _proposal_prompt(
     job_title: str,
     job_description: str,
     category: str = "",
@@ -402,10 +868,8 @@ async def generate_proposal_with_vertex(
     freelancer_success_rate: float = 0.0,
     highlights: str = "",
     tone: str = "professional",
-) -> Optional[dict]:
-    """Use Vertex AI Gemini to generate a proposal draft."""
-    if not is_vertex_enabled():
-        return None
+):
+    from shared.prompting import PromptBuilder, dedupe_skills
 
     # Format certifications and education for the prompt
     cert_str = "None"
@@ -421,34 +885,77 @@ async def generate_proposal_with_vertex(
                 edu_items.append(f"{e.get('degree', '')} - {e.get('institution', '')}")
         edu_str = "; ".join(edu_items) or "None"
 
-    prompt = PROPOSAL_PROMPT.format(
-        job_title=job_title,
-        job_description=job_description,
-        category=category or "General",
-        required_skills=", ".join(required_skills or []),
-        budget_min=budget_min or "N/A",
-        budget_max=budget_max or "N/A",
-        experience_level=experience_level or "Not specified",
-        freelancer_name=freelancer_name or "Freelancer",
-        freelancer_skills=", ".join(freelancer_skills or []),
-        freelancer_bio=freelancer_bio or "Not provided",
-        freelancer_experience_years=freelancer_experience_years or "Not specified",
-        freelancer_hourly_rate=f"${freelancer_hourly_rate}/hr" if freelancer_hourly_rate else "Not specified",
-        freelancer_certifications=cert_str,
-        freelancer_portfolio_count=len(freelancer_portfolio or []),
-        freelancer_education=edu_str,
-        freelancer_total_jobs=freelancer_total_jobs,
-        freelancer_avg_rating=freelancer_avg_rating,
-        freelancer_success_rate=freelancer_success_rate,
-        highlights=highlights or "Not provided",
-        tone=tone,
+    return (
+        PromptBuilder(PROPOSAL_PROMPT, "proposal")
+        .add("job_title", job_title)
+        .add("job_description", job_description, priority=2, min_tokens=200)
+        .add("category", category or "General")
+        .add("required_skills", ", ".join(dedupe_skills(required_skills)))
+        .add("budget_min", budget_min or "N/A")
+        .add("budget_max", budget_max or "N/A")
+        .add("experience_level", experience_level or "Not specified")
+        .add("freelancer_name", freelancer_name or "Freelancer")
+        .add("freelancer_skills", ", ".join(dedupe_skills(freelancer_skills)), priority=1, min_tokens=100)
+        .add("freelancer_bio", freelancer_bio or "Not provided", priority=3, min_tokens=150)
+        .add("freelancer_experience_years", freelancer_experience_years or "Not specified")
+        .add(
+            "freelancer_hourly_rate",
+            f"${freelancer_hourly_rate}/hr" if freelancer_hourly_rate else "Not specified",
+        )
+        .add("freelancer_certifications", cert_str, priority=3, min_tokens=50)
+        .add("freelancer_portfolio_count", len(freelancer_portfolio or []))
+        .add("freelancer_education", edu_str, priority=3, min_tokens=50)
+        .add("freelancer_total_jobs", freelancer_total_jobs)
+        .add("freelancer_avg_rating", freelancer_avg_rating)
+        .add("freelancer_success_rate", freelancer_success_rate)
+        .add("highlights", highlights or "Not provided", priority=1, min_tokens=150)
+        .add("tone", tone)
+        .build()
+    )
+
+
+async def generate_proposal_with_vertex(
+    job_title: str,
+    job_description: str,
+    category: str = "",
+    required_skills: list = None,
+    budget_min: float = None,
+    budget_max: float = None,
+    experience_level: str = "",
+    freelancer_name: str = "",
+    freelancer_skills: list = None,
+    freelancer_bio: str = "",
+    freelancer_experience_years: int = 0,
+    freelancer_hourly_rate: float = None,
+    freelancer_certifications: list = None,
+    freelancer_portfolio: list = None,
+    freelancer_education: list = None,
+    freelancer_total_jobs: int = 0,
+    freelancer_avg_rating: float = 0.0,
+    freelancer_success_rate: float = 0.0,
+    highlights: str = "",
+    tone: str = "professional",
+) -> Optional[dict]:
+    """Use Vertex AI Gemini to generate a proposal draft."""
+    if not is_vertex_enabled():
+        return None
+
+    from shared.prompting import log_token_usage
+    from shared.metrics import observe_model
+
+    prompt = _proposal_prompt(
+        job_title, job_description, category, required_skills, budget_min, budget_max,
+        experience_level, freelancer_name, freelancer_skills, freelancer_bio,
+        freelancer_experience_years, freelancer_hourly_rate, freelancer_certifications,
+        freelancer_portfolio, freelancer_education, freelancer_total_jobs,
+        freelancer_avg_rating, freelancer_success_rate, highlights, tone,
     )
 
     try:
         start = time.monotonic()
         model = _get_model()
-        response = model.generate_content(
-            prompt,
+        response = observe_model(model, "proposal").generate_content(
+            prompt.text,
             generation_config={
                 "temperature": 0.5,
                 "max_output_tokens": 4096,
@@ -456,6 +963,8 @@ async def generate_proposal_with_vertex(
             },
         )
 
+        log_token_usage("proposal", response, prompt)
+
         text = response.text.strip()
         if text.startswith("```"):
             text = text.split("\n", 1)[1]
@@ -475,3 +984,50 @@ async def generate_proposal_with_vertex(
     except Exception as e:
         logger.exception("vertex_proposal_generate_failed", error=str(e))
         return None
+
+
+# ── Streaming ────────────────────────────────────────────────────────
+
+async def _stream_generation(capability: str, prompt, temperature: float) -> AsyncIterator[str]:
+    """Yield response text chunks as Gemini generates them."""
+    from shared.prompting import log_token_usage
+    from shared.metrics import observe_model
+
+    model = _get_model()
+    responses = await observe_model(model, capability).generate_content_async(
+        prompt.text,
+        generation_config={
+            "temperature": temperature,
+            "max_output_tokens": 4096,
+            "response_mime_type": "application/json",
+        },
+        stream=True,
+    )
+    last = None
+    async for chunk in responses:
+        last = chunk
+        try:
+            text = chunk.text
+        except ValueError:  # chunk without text parts (e.g. final usage metadata)
+            continue
+        if text:
+            yield text
+    if last is not None:
+        log_token_usage(capability, last, prompt)  # usage metadata arrives on the final chunk
+
+
+def stream_job_enhance_with_vertex(**kwargs) -> AsyncIterator[str]:
+    """Streaming variant of enhance_job_with_vertex; yields raw JSON text."""
+    return _stream_generation("job_enhance", _job_enhance_prompt(**kwargs), temperature=0.4)
+
+
+def stream_proposal_with_vertex(**kwargs) -> AsyncIterator[str]:
+    """Streaming variant of generate_proposal_with_vertex; yields raw JSON text."""
+    return _stream_generation("proposal", _proposal_prompt(**kwargs), temperature=0.5)
+
+
+# Instruction prefixes cached provider-side at startup (shared.context_cache)
+CACHED_INSTRUCTIONS = {
+    "scope_analysis": SCOPE_INSTRUCTIONS,
+    "job_moderation": MODERATION_INSTRUCTIONS,
+}
@@ -0,0 +1,228 @@
+"""Tests for micro-batched scope + moderation (src.batching)."""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from src import subscribers
+from src.batching import JobBatcher
+
+
+def _job(job_id):
+    return {
+        "job_id": job_id,
+        "title": f"Job {job_id}",
+        "description": "Build a dashboard with authentication and an API.",
+        "skills_required": ["React"],
+    }
+
+
+def _combined(job_id):
+    return {
+        "scope": {"milestones": [], "complexity_tier": "moderate", "job": job_id},
+        "moderation": {"confidence": 0.9, "quality": 0.8, "flags": []},
+    }
+
+
+def _submit_all(batcher, jobs):
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(job) for job in jobs))
+
+    return asyncio.run(scenario())
+
+
+class TestJobBatcher:
+    """JobBatcher"""
+
+    def test_concurrent_jobs_share_one_call(self):
+        calls = []
+
+        async def multi(jobs):
+            calls.append([j["job_id"] for j in jobs])
+            return {j["job_id"]: _combined(j["job_id"]) for j in jobs}
+
+        batcher = JobBatcher(window_s=0.01, max_size=8, multi_item_call=multi)
+        results = _submit_all(batcher, [_job("a"), _job("b"), _job("c")])
+
+        assert calls == [["a", "b", "c"]]
+        assert [r["scope"]["job"] for r in results] == ["a", "b", "c"]
+
+    def test_missing_items_resolve_to_none(self):
+        async def multi(jobs):
+            return {"a": _combined("a"), "c": _combined("c")}
+
+        batcher = JobBatcher(window_s=0.01, multi_item_call=multi)
+        results = _submit_all(batcher, [_job("a"), _job("b"), _job("c")])
+        assert results[0] is not None and results[2] is not None
+        assert results[1] is None
+
+    def test_failed_call_resolves_every_job_to_none(self):
+        batcher = JobBatcher(window_s=0.01, multi_item_call=AsyncMock(side_effect=RuntimeError("boom")))
+        assert _submit_all(batcher, [_job("a"), _job("b")]) == [None, None]
+
+    def test_large_groups_are_split_by_max_size(self):
+        calls = []
+
+        async def multi(jobs):
+            calls.append(len(jobs))
+            return {j["job_id"]: _combined(j["job_id"]) for j in jobs}
+
+        single = AsyncMock(side_effect=lambda **kw: _combined("single"))
+        batcher = JobBatcher(window_s=0.01, max_size=2, multi_item_call=multi)
+        with patch("src.vertex_ai.analyze_and_moderate_job_with_vertex", single):
+            results = _submit_all(batcher, [_job(str(i)) for i in range(5)])
+
+        # Full groups flush as soon as they fill; the leftover job uses the single-job prompt
+        assert calls == [2, 2]
+        single.assert_awaited_once()
+        assert all(results)
+
+    def test_backlog_goes_to_batch_prediction(self):
+        multi = AsyncMock(return_value={})
+
+        async def prediction(jobs):
+            return {j["job_id"]: _combined(j["job_id"]) for j in jobs}
+
+        batcher = JobBatcher(
+            window_s=1.0, max_size=2, prediction_threshold=4,
+            multi_item_call=multi, batch_prediction_call=prediction,
+        )
+        results = _submit_all(batcher, [_job(str(i)) for i in range(4)])
+        assert all(results)
+        assert batcher.predictions == 1
+        multi.assert_not_awaited()
+
+    def test_prediction_window_spans_several_polls(self):
+        multi = AsyncMock(return_value={})
+
+        async def prediction(jobs):
+            return {j["job_id"]: _combined(j["job_id"]) for j in jobs}
+
+        batcher = JobBatcher(
+            window_s=0.01, max_size=2, prediction_threshold=4, prediction_window_s=1.0,
+            multi_item_call=multi, batch_prediction_call=prediction,
+        )
+
+        async def scenario():
+            first = [asyncio.ensure_future(batcher.submit(_job(str(i)))) for i in range(2)]
+            await asyncio.sleep(0.05)  # next poll, well past window_s
+            second = [asyncio.ensure_future(batcher.submit(_job(str(i)))) for i in range(2, 4)]
+            return await asyncio.gather(*first, *second)
+
+        assert all(asyncio.run(scenario()))
+        assert batcher.predictions == 1
+        multi.assert_not_awaited()
+
+    def test_pull_pages_reach_the_prediction_threshold(self):
+        from src.batching import pull_options
+
+        plain = JobBatcher(max_size=8, prediction_threshold=100)
+        predicting = JobBatcher(max_size=8, prediction_threshold=100, batch_prediction_call=AsyncMock())
+        assert pull_options(plain, 10)["max_messages"] == 10
+        options = pull_options(predicting, 10)
+        assert options["max_messages"] == 100 and options["max_in_flight"] >= 100
+        assert pull_options(JobBatcher(prediction_threshold=5000, batch_prediction_call=AsyncMock()), 10)["max_messages"] == 1000
+
+
+class TestBatchedFanout:
+    """handle_job_published_fanout with JOB_BATCHING"""
+
+    def test_batched_result_is_stored(self):
+        callback = AsyncMock(return_value={})
+        scope = AsyncMock()
+        moderation = AsyncMock()
+        with patch.object(subscribers.settings, "job_batching", True), \
+                patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.batching.job_batcher.submit", AsyncMock(return_value=_combined("job-1"))), \
+                patch("shared.callback.api_callback.patch", callback), \
+                patch.object(subscribers, "handle_job_published", scope), \
+                patch.object(subscribers, "handle_job_moderation", moderation):
+            asyncio.run(subscribers.handle_job_published_fanout(_job("job-1")))
+
+        paths = sorted(call.args[0] for call in callback.await_args_list)
+        assert paths == ["/jobs/job-1/moderation", "/jobs/job-1/scope"]
+        scope.assert_not_awaited()
+        moderation.assert_not_awaited()
+
+    def test_failed_store_is_logged(self):
+        with patch.object(subscribers.settings, "job_batching", True), \
+                patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.batching.job_batcher.submit", AsyncMock(return_value=_combined("job-1"))), \
+                patch("shared.callback.api_callback.patch", AsyncMock(side_effect=ConnectionError("api down"))), \
+                patch.object(subscribers, "logger") as logger:
+            asyncio.run(subscribers.handle_job_published_fanout(_job("job-1")))
+
+        failures = [c for c in logger.error.call_args_list if c.args[0] == "job_fanout_branch_failed"]
+        assert sorted(c.kwargs["branch"] for c in failures) == ["moderation", "scope"]
+
+    def test_missing_item_is_retried_individually(self):
+        scope = AsyncMock()
+        moderation = AsyncMock()
+        with patch.object(subscribers.settings, "job_batching", True), \
+                patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.batching.job_batcher.submit", AsyncMock(return_value=None)), \
+                patch.object(subscribers, "handle_job_published", scope), \
+                patch.object(subscribers, "handle_job_moderation", moderation):
+            asyncio.run(subscribers.handle_job_published_fanout(_job("job-1")))
+        scope.assert_awaited_once()
+        moderation.assert_awaited_once()
+
+
+class TestMultiJobPrompt:
+    """analyze_and_moderate_jobs_with_vertex"""
+
+    def test_splits_results_and_drops_incomplete_items(self):
+        from src import vertex_ai
+
+        payload = {"results": [
+            {"job_id": "a", **_combined("a")},
+            {"job_id": "b", "scope": {"milestones": []}},  # no moderation
+            {"job_id": "zzz", **_combined("zzz")},  # not in the batch
+        ]}
+        model = MagicMock()
+        model.generate_content_async = AsyncMock(return_value=SimpleNamespace(text=json.dumps(payload)))
+        with patch.object(vertex_ai, "is_vertex_enabled", return_value=True), \
+                patch.object(vertex_ai, "_get_model", return_value=model):
+            results = asyncio.run(vertex_ai.analyze_and_moderate_jobs_with_vertex([_job("a"), _job("b")]))
+
+        assert set(results) == {"a"}
+        assert results["a"]["scope"]["model"] == vertex_ai.VERTEX_MODEL
+        prompt = model.generate_content_async.call_args.args[0]
+        assert '"job_id":"a"' in prompt and '"job_id":"b"' in prompt
+
+
+class TestBatchPrediction:
+    """run_scope_moderation_batch_prediction"""
+
+    def test_jobs_with_identical_text_each_get_their_result(self):
+        from src import vertex_ai
+
+        jobs = [{**_job("a"), "title": "Same"}, {**_job("b"), "title": "Same"}]
+        submitted = {}
+
+        def submit(run_id, prefix, jsonl):
+            submitted["lines"] = [json.loads(line) for line in jsonl.splitlines()]
+            return SimpleNamespace(
+                done=lambda: True,
+                state=SimpleNamespace(name="JOB_STATE_SUCCEEDED"),
+                output_info=SimpleNamespace(gcs_output_directory="gs://bucket/out"),
+            )
+
+        def read_output(output_dir):
+            # Output order is not guaranteed; answers follow the labels
+            return [
+                {**line, "response": {"candidates": [{"content": {"parts": [
+                    {"text": json.dumps(_combined(jobs[int(line["request"]["labels"]["batch_item"])]["job_id"]))},
+                ]}}]}}
+                for line in reversed(submitted["lines"])
+            ]
+
+        with patch.object(vertex_ai, "is_vertex_enabled", return_value=True), \
+                patch.object(vertex_ai, "_submit_batch_prediction", side_effect=submit), \
+                patch.object(vertex_ai, "_read_batch_prediction_output", side_effect=read_output):
+            results = asyncio.run(vertex_ai.run_scope_moderation_batch_prediction(jobs, "gs://bucket/in"))
+
+        assert len(submitted["lines"]) == 2
+        assert results["a"]["scope"]["job"] == "a"
+        assert results["b"]["scope"]["job"] == "b"
@@ -96,3 +96,28 @@ class TestSettingsEnvOverrides:
         with patch.dict(os.environ, {"MODEL_VERSION": "v2.5.0"}):
             s = self._reload_settings()
             assert s.model_version == "v2.5.0"
+
+    def test_combined_job_prompt_off_by_default(self):
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("COMBINED_JOB_PROMPT", None)
+            s = self._reload_settings()
+            assert s.combined_job_prompt is False
+
+    def test_combined_job_prompt_enabled_by_env(self):
+        with patch.dict(os.environ, {"COMBINED_JOB_PROMPT": "true"}):
+            s = self._reload_settings()
+            assert s.combined_job_prompt is True
+
+    def test_job_batching_off_by_default(self):
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("JOB_BATCHING", None)
+            os.environ.pop("JOB_BATCH_PREDICTION_URI", None)
+            s = self._reload_settings()
+            assert s.job_batching is False
+            assert s.job_batch_prediction_uri == ""
+
+    def test_job_batch_settings_from_env(self):
+        with patch.dict(os.environ, {"JOB_BATCHING": "true", "JOB_BATCH_MAX_SIZE": "12"}):
+            s = self._reload_settings()
+            assert s.job_batching is True
+            assert s.job_batch_max_size == 12
@@ -0,0 +1,82 @@
+"""Tests for the Aho-Corasick keyword automaton and its rule-based callers."""
+from src.keywords import KeywordAutomaton, KeywordMatch
+from src.routes import detect_complexity, _detect_complexity
+from src.job_enhance_routes import JobEnhanceRequest, _detect_stack
+
+
+class TestKeywordAutomaton:
+    """KeywordAutomaton.scan"""
+
+    def test_matches_all_labels_in_one_pass(self):
+        automaton = KeywordAutomaton({"a": ["dashboard"], "b": ["real-time", "api"]})
+        result = automaton.scan("A real-time dashboard backed by an API")
+        assert result.counts() == {"a": 1, "b": 2}
+
+    def test_positions_point_into_original_text(self):
+        text = "Build a Real-Time feed"
+        [match] = KeywordAutomaton({"complex": ["real-time"]}).find(text)
+        assert match == KeywordMatch("complex", "real-time", 8, 17)
+        assert text[match.start:match.end] == "Real-Time"
+
+    def test_respects_word_boundaries(self):
+        automaton = KeywordAutomaton({"complex": ["ai"]})
+        assert automaton.find("We maintain a detailed plan") == []
+        assert len(automaton.find("Add AI-powered search (ai)")) == 2
+
+    def test_overlapping_keywords(self):
+        automaton = KeywordAutomaton({"s": ["he", "she", "hers"]})
+        found = {(m.keyword, m.start) for m in automaton.find("she said hers he")}
+        assert found == {("she", 0), ("hers", 9), ("he", 14)}
+
+    def test_keyword_in_several_labels(self):
+        automaton = KeywordAutomaton({"x": ["api"], "y": ["api"]})
+        assert automaton.scan("REST api").counts() == {"x": 1, "y": 1}
+
+    def test_repeated_keyword_counted_once(self):
+        result = KeywordAutomaton({"m": ["api"]}).scan("api api api")
+        assert len(result.matches) == 3
+        assert result.counts() == {"m": 1}
+
+    def test_word_count_matches_split(self):
+        text = "  one\ttwo\n\nthree  four "
+        assert KeywordAutomaton({}).scan(text).word_count == len(text.split())
+
+    def test_empty_text(self):
+        result = KeywordAutomaton({"a": ["x"]}).scan("")
+        assert result.matches == [] and result.word_count == 0
+
+
+class TestComplexityDetection:
+    """detect_complexity on the automaton"""
+
+    def test_ai_inside_words_no_longer_counts(self):
+        result = detect_complexity("Maintain and retain a detailed static site", [], None)
+        assert all(m.keyword != "ai" for m in result.matches)
+        assert result.tier == "simple"
+
+    def test_returns_matches_for_explainability(self):
+        result = detect_complexity("Enterprise platform with HIPAA compliance on kubernetes", [], None)
+        assert result.tier == "enterprise"
+        assert {m.keyword for m in result.matches} == {"enterprise", "hipaa", "compliance", "kubernetes"}
+
+    def test_wrapper_returns_tier(self):
+        assert _detect_complexity("A simple landing page", [], None) == "simple"
+
+    def test_long_description_bumps_tier(self):
+        result = detect_complexity("word " * 600, [], None)
+        assert result.scores["complex"] == 1
+
+
+class TestFallbackReuse:
+    """Job enhance fallback shares the engine"""
+
+    def test_enhance_reads_stack_from_long_description(self):
+        req = JobEnhanceRequest(
+            title="Website rebuild",
+            description="We want to rebuild our site with Django and PostgreSQL behind it. " * 4,
+        )
+        assert _detect_stack(req) == "backend"
+
+    def test_enhance_skills_take_precedence(self):
+        req = JobEnhanceRequest(title="x", description="Django " * 50, skills=["React"])
+        assert _detect_stack(req) == "frontend"
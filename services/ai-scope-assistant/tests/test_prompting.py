@@ -0,0 +1,160 @@
+"""Tests for prompt compaction and token budgets (shared.prompting)."""
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared.prompting import (
+    PromptBuilder,
+    budget_for,
+    compact_json,
+    dedupe_skills,
+    estimate_tokens,
+    log_token_usage,
+    truncate_text,
+)
+
+
+class TestCompaction:
+    """compact_json / dedupe_skills / truncate_text"""
+
+    def test_compact_json_minifies_abbreviates_and_drops_empty(self):
+        out = compact_json(
+            {"freelancer_id": "f-1", "hourly_rate": 75.0, "skills": ["Go"], "bio": "", "avg_rating": None},
+            {"hourly_rate": "rate", "skills": "sk"},
+        )
+        assert out == '{"freelancer_id":"f-1","rate":75,"sk":["Go"]}'
+
+    def test_dedupe_skills_is_case_insensitive_and_keeps_order(self):
+        assert dedupe_skills(["React", " react ", "Node.js", "", "NODE.JS", "Go"]) == ["React", "Node.js", "Go"]
+        assert dedupe_skills(None) == []
+
+    def test_truncate_text_cuts_at_word_boundary(self):
+        text = "word " * 400
+        out = truncate_text(text, 50)
+        assert estimate_tokens(out) <= 50
+        assert out.endswith("…[truncated]")
+        assert "wor …" not in out
+
+    def test_short_text_is_unchanged(self):
+        assert truncate_text("hello world", 50) == "hello world"
+
+
+class TestPromptBuilder:
+    """PromptBuilder"""
+
+    TEMPLATE = "Title: {title}\nDescription: {description}\nNotes: {notes}\n{{literal}}"
+
+    def test_fits_without_truncation(self):
+        prompt = (
+            PromptBuilder(self.TEMPLATE, "test", budget=500)
+            .add("title", "API")
+            .add("description", "Short", priority=2)
+            .add("notes", "n/a", priority=1)
+            .build()
+        )
+        assert prompt.text == "Title: API\nDescription: Short\nNotes: n/a\n{literal}"
+        assert prompt.truncated == {}
+
+    def test_highest_priority_number_is_cut_first(self):
+        prompt = (
+            PromptBuilder(self.TEMPLATE, "test", budget=150)
+            .add("title", "T" * 40)
+            .add("description", "desc " * 200, priority=1)
+            .add("notes", "note " * 200, priority=2, min_tokens=20)
+            .build()
+        )
+        assert prompt.tokens <= 150
+        assert set(prompt.truncated) == {"notes", "description"}
+        # notes went down to its floor before description was touched
+        notes = prompt.text.split("Notes: ")[1]
+        assert estimate_tokens(notes.split("\n")[0]) <= 20
+        assert "T" * 40 in prompt.text
+
+    def test_priority_zero_is_never_cut(self):
+        prompt = (
+            PromptBuilder(self.TEMPLATE, "test", budget=10)
+            .add("title", "x " * 100)
+            .add("description", "")
+            .add("notes", "")
+            .build()
+        )
+        assert "x " * 100 in prompt.text
+        assert prompt.tokens > prompt.budget
+
+    def test_item_lists_drop_trailing_items(self):
+        items = [{"id": i, "text": "lorem ipsum " * 10} for i in range(20)]
+        prompt = (
+            PromptBuilder("Items:\n{items}", "test", budget=200)
+            .add_items("items", items, render=lambda xs: "\n".join(compact_json(x) for x in xs), min_items=2)
+            .build()
+        )
+        lines = prompt.text.splitlines()[1:]
+        assert 2 <= len(lines) < 20
+        assert json.loads(lines[0])["id"] == 0
+        assert prompt.truncated["items"].startswith("items 20→")
+
+    def test_budget_env_override(self):
+        with patch.dict(os.environ, {"PROMPT_BUDGET_SCOPE_ANALYSIS": "1234"}):
+            assert budget_for("scope_analysis") == 1234
+        assert budget_for("scope_analysis") == 2500
+        assert budget_for("unknown_capability") == 4000
+
+
+class TestTokenUsage:
+    """log_token_usage"""
+
+    def test_uses_usage_metadata_when_present(self):
+        response = SimpleNamespace(
+            text="{}",
+            usage_metadata=SimpleNamespace(prompt_token_count=812, candidates_token_count=95),
+        )
+        assert log_token_usage("scope_analysis", response, "prompt") == {
+            "input_tokens": 812, "output_tokens": 95,
+        }
+
+    def test_estimates_without_usage_metadata(self):
+        response = SimpleNamespace(text="x" * 40)
+        counts = log_token_usage("scope_analysis", response, "y" * 400)
+        assert counts == {"input_tokens": 100, "output_tokens": 10}
+
+
+class TestVertexPrompts:
+    """Service prompts go through the budgeted builder"""
+
+    def test_long_description_is_capped_for_scope_moderation(self):
+        from src import vertex_ai
+
+        model = MagicMock()
+        model.generate_content_async = AsyncMock(return_value=SimpleNamespace(
+            text='{"scope": {}, "moderation": {}}', usage_metadata=None,
+        ))
+        with patch.object(vertex_ai, "is_vertex_enabled", return_value=True), \
+                patch.object(vertex_ai, "_get_model", return_value=model):
+            asyncio.run(vertex_ai.analyze_and_moderate_job_with_vertex(
+                title="Build a dashboard",
+                description="Need a dashboard with charts. " * 2000,
+                skills=["React", "react", "Node.js"],
+            ))
+
+        prompt = model.generate_content_async.call_args.args[0]
+        assert estimate_tokens(prompt) <= budget_for("scope_moderation")
+        assert "…[truncated]" in prompt
+        assert "React, Node.js" in prompt
+
+    def test_all_job_templates_render(self):
+        from src import vertex_ai
+
+        for template, capability in [
+            (vertex_ai.SCOPE_PROMPT, "scope_analysis"),
+            (vertex_ai.MODERATION_PROMPT, "job_moderation"),
+            (vertex_ai.SCOPE_MODERATION_PROMPT, "scope_moderation"),
+            (vertex_ai.JOB_ENHANCE_PROMPT, "job_enhance"),
+        ]:
+            prompt = vertex_ai._job_prompt(template, capability, "Title", "Description", skills=["Go"])
+            assert "Title" in prompt.text and "{title}" not in prompt.text
+
+        proposal = vertex_ai._proposal_prompt("Job", "Desc", freelancer_skills=["Go", "go"])
+        assert "- Skills: Go\n" in proposal.text
@@ -0,0 +1,14 @@
+"""Tests for the offline replay benchmark (shared.replay) on the scope engine."""
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared.replay import corpus_path, load_corpus, replay_single
+
+
+class TestReplay:
+    """replay_single through analyze_scope"""
+
+    def test_committed_corpus_covers_every_tier(self):
+        records = load_corpus(corpus_path("ai-scope-assistant"))
+        run = replay_single("ai-scope-assistant", records, warmup=0)
+        assert run["requests"] == len(records)
+        tiers = {output["complexity_tier"] for output in run["outputs"].values()}
+        assert tiers == {"simple", "moderate", "complex", "enterprise"}
@@ -0,0 +1,125 @@
+"""Tests for compiled event schema validation (shared.schemas)."""
+from unittest.mock import patch
+
+import pytest
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared.schemas import SchemaRegistry, EventValidationError
+
+
+@pytest.fixture
+def registry():
+    reg = SchemaRegistry()
+    reg.load()
+    return reg
+
+
+class TestSchemaRegistry:
+    """SchemaRegistry compile + validate"""
+
+    def test_compiles_repo_schemas(self, registry):
+        assert registry.resolve("job-published", {"job_id": "j"}) == ("job_published", "v1")
+
+    def test_valid_flat_event_passes(self, registry):
+        event = {
+            "event": "job_published",
+            "job_id": "job-1",
+            "title": "Build an API",
+            "description": "REST API",
+            "skills": ["Python"],
+            "budget_min": None,
+            "budget_max": 500.0,
+            "timestamp": "2026-01-01T10:00:00+00:00",
+        }
+        assert registry.validate("job-published", event) is True
+
+    def test_long_job_text_accepted(self, registry):
+        # The API's JobValidator sets no maximum description length
+        event = {"job_id": "job-1", "title": "T" * 300, "description": "D" * 50_000}
+        assert registry.validate("job-published", event) is True
+
+    def test_missing_required_field_rejected(self, registry):
+        with pytest.raises(EventValidationError) as exc:
+            registry.validate("job-published", {"event": "job_published", "title": "x"})
+        assert exc.value.schema == "job_published"
+        assert exc.value.version == "v1"
+
+    def test_wrong_type_rejected(self, registry):
+        with pytest.raises(EventValidationError):
+            registry.validate("profile-ready", {"user_id": "u-1", "skills": "python"})
+
+    def test_non_object_rejected(self, registry):
+        with pytest.raises(EventValidationError):
+            registry.validate("job-published", ["not", "an", "object"])
+
+    def test_rejections_counted_by_schema_and_version(self, registry):
+        for _ in range(2):
+            with pytest.raises(EventValidationError):
+                registry.validate("user-registered", {"role": "client"})
+        assert registry.rejection_counts() == {"user_registered.v1": 2}
+
+    def test_envelope_event_uses_event_version(self, registry):
+        envelope = {
+            "event_id": "6f1c7a52-0d5e-4d7b-9a57-1f2b1c0c9d11",
+            "event_type": "match_computed",
+            "event_version": "1.0",
+            "timestamp": "2026-01-01T10:00:00Z",
+            "idempotency_key": "k",
+            "data": {"job_id": "6f1c7a52-0d5e-4d7b-9a57-1f2b1c0c9d12", "ranked_freelancers": []},
+        }
+        assert registry.resolve("match-computed", envelope) == ("match_computed", "v1")
+        assert registry.validate("match-computed", envelope) is True
+
+    def test_unknown_topic_passes_through(self, registry):
+        assert registry.validate("some-other-topic", {"anything": 1}) is False
+
+    def test_validation_does_not_mutate_event(self, registry):
+        event = {"job_id": "job-1"}
+        registry.validate("job-published", event)
+        assert event == {"job_id": "job-1"}
+
+    def test_disabled_registry_skips(self):
+        reg = SchemaRegistry(enabled=False)
+        assert reg.validate("job-published", {"title": "no id"}) is False
+
+    def test_missing_schema_dir_disables(self, tmp_path):
+        reg = SchemaRegistry(schema_dir=str(tmp_path / "missing"))
+        assert reg.load() == 0
+        assert reg.validate("job-published", {}) is False
+
+
+class TestSampling:
+    """Sampling mode for hot topics"""
+
+    def test_full_rate_by_default(self):
+        reg = SchemaRegistry(sample_rates={})
+        assert all(reg.should_validate("job-published") for _ in range(20))
+
+    def test_zero_rate_never_validates(self):
+        reg = SchemaRegistry(sample_rates={"job-published": 0.0})
+        assert not any(reg.should_validate("job-published") for _ in range(20))
+
+    def test_partial_rate_uses_random(self):
+        reg = SchemaRegistry(sample_rates={"profile-ready": 0.5})
+        with patch("shared.schemas.random.random", return_value=0.3):
+            assert reg.should_validate("profile-ready") is True
+        with patch("shared.schemas.random.random", return_value=0.7):
+            assert reg.should_validate("profile-ready") is False
+
+    def test_sample_rates_parsed_from_env(self):
+        from shared.schemas import _parse_sample_rates
+        assert _parse_sample_rates("job-published=0.1, profile-ready=2,bad,x=y") == {
+            "job-published": 0.1,
+            "profile-ready": 1.0,
+        }
+
+
+class TestPublishValidation:
+    """publish_message rejects malformed events before publishing"""
+
+    def test_invalid_event_not_published(self):
+        from shared import pubsub
+        with patch.object(pubsub, "_get_publisher") as get_publisher:
+            with pytest.raises(EventValidationError):
+                pubsub.publish_message("job-published", {"title": "no job id"})
+        get_publisher.assert_not_called()
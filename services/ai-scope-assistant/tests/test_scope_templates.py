@@ -0,0 +1,83 @@
+"""Tests for precompiled milestone templates and the bytes scope response."""
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src import routes
+from src.routes import (
+    COMPILED_TEMPLATES, MILESTONE_TEMPLATES, ScopeRequest, ScopeResponse,
+    analyze_scope, analyze_scope_json,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_audit():
+    with patch.object(routes, "log_ai_decision"):
+        yield
+
+
+def _request(**overrides):
+    fields = {
+        "job_id": "job-1",
+        "title": "Build a dashboard",
+        "description": "Dashboard with authentication, API and database. " * 4,
+        "category": "web-development",
+        "skills_required": ["React"],
+        "budget_max": 7777.0,
+    }
+    fields.update(overrides)
+    return ScopeRequest(**fields)
+
+
+class TestCompiledTemplates:
+    """COMPILED_TEMPLATES"""
+
+    def test_hour_totals_precomputed(self):
+        for tier, template in MILESTONE_TEMPLATES.items():
+            expected = sum(sum(hours for _, hours in tasks) for _, _, tasks in template)
+            assert COMPILED_TEMPLATES[tier].total_hours == expected
+
+    def test_templates_are_immutable(self):
+        with pytest.raises(TypeError):
+            COMPILED_TEMPLATES["simple"] = COMPILED_TEMPLATES["moderate"]
+        assert isinstance(COMPILED_TEMPLATES["simple"].milestones, tuple)
+        assert isinstance(COMPILED_TEMPLATES["simple"].milestones[0].tasks, tuple)
+
+
+class TestScopeBytes:
+    """analyze_scope_json"""
+
+    @pytest.mark.parametrize("overrides", [
+        {},
+        {"budget_max": None},
+        {"description": "A simple static landing page", "skills_required": []},
+        {"description": "Enterprise HIPAA platform on kubernetes", "budget_max": 123456.78},
+    ])
+    def test_matches_model_response(self, overrides):
+        request = _request(**overrides)
+        raw = json.loads(analyze_scope_json(request))
+        model = json.loads(analyze_scope(request).model_dump_json())
+        raw.pop("latency_ms")
+        model.pop("latency_ms")
+        assert raw == model
+
+    def test_bytes_validate_against_response_model(self):
+        response = ScopeResponse.model_validate_json(analyze_scope_json(_request()))
+        assert response.milestones[0].tasks
+
+    def test_costs_scale_with_budget(self):
+        low = json.loads(analyze_scope_json(_request(budget_max=4000.0)))
+        high = json.loads(analyze_scope_json(_request(budget_max=8000.0)))
+        assert low["complexity_tier"] == high["complexity_tier"]
+        assert high["total_estimated_cost"] == pytest.approx(2 * low["total_estimated_cost"], abs=0.05)
+
+    def test_job_id_is_escaped(self):
+        raw = json.loads(analyze_scope_json(_request(job_id='job "quoted" é')))
+        assert raw["job_id"] == 'job "quoted" é'
+
+    def test_endpoint_returns_json_bytes(self, client):
+        response = client.post("/api/v1/scope/analyze", json=_request().model_dump())
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json()["job_id"] == "job-1"
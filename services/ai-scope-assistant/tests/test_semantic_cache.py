@@ -0,0 +1,269 @@
+"""Tests for the semantic response cache (shared.semantic_cache) and its endpoints."""
+import random
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from shared.embeddings import HashingEmbedder
+from shared.semantic_cache import SemanticCache
+from shared.vector_index import BruteForceIndex, make_index
+
+DASHBOARD = (
+    "Senior React developer\nfrontend\nreact, typescript\n"
+    "Build a dashboard for our SaaS with authentication, charts and a REST API integration."
+)
+DASHBOARD_REWORDED = (
+    "Senior React Developer needed\nfrontend\nreact, typescript\n"
+    "Build a dashboard for our SaaS app with authentication, charts and REST API integration."
+)
+LOGO = "Logo designer\ndesign\nfigma\nDesign a logo and brand guidelines for a coffee shop."
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _cache(**kwargs):
+    kwargs.setdefault("guard_rate", 0.0)
+    return SemanticCache("test", embedder=HashingEmbedder(), index_kind="brute", enabled=True, **kwargs)
+
+
+class TestBruteForceIndex:
+    """BruteForceIndex"""
+
+    def test_search_returns_best_first(self):
+        index = BruteForceIndex(dim=2, capacity=1)
+        index.add(1, np.array([1.0, 0.0]))
+        index.add(2, np.array([0.0, 1.0]))
+        index.add(3, np.array([0.6, 0.8]))
+        assert [i for i, _ in index.search(np.array([0.0, 1.0]), k=2)] == [2, 3]
+
+    def test_remove_keeps_remaining_ids(self):
+        index = BruteForceIndex(dim=2)
+        for i, vec in enumerate([[1, 0], [0, 1], [0.6, 0.8]]):
+            index.add(i, np.array(vec))
+        index.remove(0)
+        assert len(index) == 2 and 0 not in index
+        assert index.search(np.array([1.0, 0.0]), k=1)[0][0] == 2
+
+    def test_missing_hnswlib_falls_back_to_ivf(self):
+        with patch.dict("sys.modules", {"hnswlib": None}):
+            assert make_index(4, kind="hnsw").kind == "ivf"
+
+
+class TestSemanticCache:
+    """SemanticCache"""
+
+    def test_reworded_request_hits(self):
+        cache = _cache()
+        cache.store(DASHBOARD, {"answer": 1})
+        hit = cache.lookup(DASHBOARD_REWORDED)
+        assert hit is not None and hit.value == {"answer": 1}
+        assert hit.similarity >= cache.threshold
+
+    def test_different_request_misses(self):
+        cache = _cache()
+        cache.store(DASHBOARD, {"answer": 1})
+        assert cache.lookup(LOGO) is None
+        assert cache.stats["misses"] == 1
+
+    def test_partition_must_match(self):
+        cache = _cache()
+        cache.store(DASHBOARD, "friendly", partition="friendly")
+        assert cache.lookup(DASHBOARD, partition="professional") is None
+        assert cache.lookup(DASHBOARD, partition="friendly").value == "friendly"
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = _cache(max_entries=2)
+        cache.store(DASHBOARD, "dashboard")
+        cache.store(LOGO, "logo")
+        cache.lookup(DASHBOARD)  # logo is now least recently used
+        cache.store("Translate a website from English to Spanish", "translation")
+        assert len(cache) == 2
+        assert cache.lookup(LOGO) is None
+        assert cache.lookup(DASHBOARD) is not None
+        assert cache.stats["evictions"] == 1
+
+    def test_entries_expire_after_ttl(self):
+        clock = _Clock()
+        cache = _cache(ttl_s=60, clock=clock)
+        cache.store(DASHBOARD, "dashboard")
+        clock.now = 61
+        assert cache.lookup(DASHBOARD) is None
+        assert len(cache) == 0
+
+    def test_guard_sampling_rate(self):
+        cache = _cache(guard_rate=0.25, rng=random.Random(7))
+        sampled = sum(cache.sample_guard() for _ in range(2000))
+        assert 400 < sampled < 600
+
+    def test_guard_mismatch_drops_entry(self):
+        cache = _cache()
+        cache.store(DASHBOARD, {"improved_title": "React dashboard for a SaaS product"})
+        hit = cache.lookup(DASHBOARD)
+        assert cache.check_guard(hit, {"improved_title": "Coffee shop logo and brand guide"}) is False
+        assert cache.lookup(DASHBOARD) is None
+        assert cache.stats["guard_mismatches"] == 1
+
+    def test_guard_agreement_keeps_entry(self):
+        cache = _cache()
+        value = {"improved_title": "React dashboard for a SaaS product"}
+        cache.store(DASHBOARD, value)
+        hit = cache.lookup(DASHBOARD)
+        assert cache.check_guard(hit, dict(value)) is True
+        assert cache.lookup(DASHBOARD) is not None
+
+
+@pytest.fixture
+def fresh_cache():
+    cache = _cache()
+    with patch("shared.semantic_cache.get_semantic_cache", return_value=cache):
+        yield cache
+
+
+def _vertex_job(amount):
+    return {
+        "improved_title": "Senior React Developer for SaaS Dashboard",
+        "improved_description": "We need a React developer. Senior React developer wanted for the dashboard.",
+        "suggested_skills": ["TypeScript", "Recharts", "Jest"],
+        "suggested_milestones": [{"title": "Build", "description": "Core UI", "estimated_amount": amount}],
+        "tips": ["Add deadlines"],
+        "model_version": "vertex",
+        "latency_ms": 900,
+    }
+
+
+class TestJobEnhanceCache:
+    """POST /api/v1/job/enhance with the semantic cache"""
+
+    def _post(self, client, title, skills, budget_max):
+        return client.post("/api/v1/job/enhance", json={
+            "title": title,
+            "description": "Build a dashboard for our SaaS with authentication, charts and a REST API integration.",
+            "category": "frontend",
+            "skills": skills,
+            "budget_min": budget_max / 2,
+            "budget_max": budget_max,
+        })
+
+    def test_similar_job_is_served_from_cache_and_personalized(self, client, fresh_cache):
+        vertex = AsyncMock(return_value=_vertex_job(600.0))
+        with patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai.enhance_job_with_vertex", vertex):
+            self._post(client, "Senior React developer", ["React"], 2000)
+            second = self._post(client, "Senior React developer needed", ["React", "Jest"], 4000)
+
+        vertex.assert_awaited_once()
+        data = second.json()
+        assert data["suggested_skills"] == ["TypeScript", "Recharts"]
+        assert data["suggested_milestones"][0]["estimated_amount"] == 1200.0
+        assert "Senior React developer needed wanted" in data["improved_description"]
+
+    def test_guarded_hit_still_calls_vertex(self, client, fresh_cache):
+        fresh_cache.guard_rate = 1.0
+        vertex = AsyncMock(return_value=_vertex_job(600.0))
+        with patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai.enhance_job_with_vertex", vertex):
+            self._post(client, "Senior React developer", ["React"], 2000)
+            self._post(client, "Senior React developer", ["React"], 2000)
+
+        assert vertex.await_count == 2
+        assert fresh_cache.stats["guard_checks"] == 1
+        assert len(fresh_cache) == 1
+
+    def test_enhance_never_reuses_another_jobs_description(self, client, fresh_cache):
+        vertex = AsyncMock(return_value=_vertex_job(600.0))
+        brief = (
+            "Build an appointment booking site for our {} with online payments, "
+            "SMS reminders and a staff calendar."
+        )
+        payload = {"title": "Booking website", "category": "frontend", "skills": ["React"], "budget_max": 2000}
+        with patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai.enhance_job_with_vertex", vertex):
+            client.post("/api/v1/job/enhance", json={**payload, "description": brief.format("dental clinic")})
+            # Similar enough for a semantic hit, but another client's brief
+            client.post("/api/v1/job/enhance", json={**payload, "description": brief.format("veterinary clinic")})
+            client.post("/api/v1/job/enhance", json={**payload, "description": brief.format("Dental  Clinic")})
+
+        assert vertex.await_count == 2
+
+    def test_cache_hits_are_audited(self, client, fresh_cache):
+        vertex = AsyncMock(return_value=_vertex_job(600.0))
+        audit = AsyncMock()
+        with patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai.enhance_job_with_vertex", vertex), \
+                patch("src.job_enhance_routes.log_ai_decision", audit):
+            self._post(client, "Senior React developer", ["React"], 2000)
+            self._post(client, "Senior React developer", ["React"], 2000)
+
+        assert audit.await_count == 2
+        assert [c.kwargs["output"]["source"] for c in audit.await_args_list] == ["vertex", "semantic_cache"]
+
+
+class TestProfileCache:
+    """POST /api/v1/profile/* with the semantic cache"""
+
+    def _model(self, text):
+        model = MagicMock()
+        model.generate_content.return_value = MagicMock(text=text)
+        return model
+
+    def test_enhance_swaps_name_and_years(self, client, fresh_cache):
+        model = self._model(
+            '{"headline": "React Engineer | 5+ Years", "bio": "Hi, I am Ana. I have 5 years of React experience."}'
+        )
+        payload = {"name": "Ana", "skills": ["React", "Node.js"], "experience_years": 5, "tone": "friendly"}
+        with patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai._get_model", return_value=model):
+            client.post("/api/v1/profile/enhance", json=payload)
+            data = client.post(
+                "/api/v1/profile/enhance", json={**payload, "name": "Sam", "experience_years": 7}
+            ).json()
+            other_tone = client.post("/api/v1/profile/enhance", json={**payload, "tone": "creative"})
+
+        assert data["headline"] == "React Engineer | 7+ Years"
+        assert data["bio"] == "Hi, I am Sam. I have 7 years of React experience."
+        assert other_tone.status_code == 200
+        assert model.generate_content.call_count == 2
+
+    def test_enhance_never_reuses_another_profiles_bio(self, client, fresh_cache):
+        model = self._model('{"headline": "Payments Engineer", "bio": "Led the Stripe Connect migration at Acme Corp."}')
+        background = (
+            "Senior backend engineer with 6 years in fintech. Built reconciliation services, ledger APIs "
+            "and payout scheduling in Python and Go, with PostgreSQL and Kafka. "
+        )
+        payload = {
+            "name": "Ana", "skills": ["Python", "Payments"], "experience_years": 6,
+            "current_bio": background + "Led the Stripe Connect migration at Acme Corp.",
+        }
+        with patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai._get_model", return_value=model):
+            client.post("/api/v1/profile/enhance", json=payload)
+            # Similar enough for a semantic hit, but another freelancer's history
+            client.post("/api/v1/profile/enhance", json={
+                **payload, "name": "Sam", "current_bio": background + "Led the PayPal migration at Globex.",
+            })
+            client.post("/api/v1/profile/enhance", json={**payload, "current_bio": payload["current_bio"].upper()})
+
+        assert model.generate_content.call_count == 2
+
+    def test_suggestions_skip_current_skills(self, client, fresh_cache):
+        model = self._model(
+            '{"suggested_skills": [{"name": "Redux", "reason": "state"}, {"name": "Jest", "reason": "tests"}]}'
+        )
+        payload = {"headline": "React developer", "bio": "I build web apps", "current_skills": ["React"]}
+        with patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai._get_model", return_value=model):
+            client.post("/api/v1/profile/suggest-skills", json=payload)
+            data = client.post(
+                "/api/v1/profile/suggest-skills", json={**payload, "current_skills": ["React", "Jest"]}
+            ).json()
+
+        model.generate_content.assert_called_once()
+        assert [s["name"] for s in data["suggested_skills"]] == ["Redux"]
@@ -0,0 +1,191 @@
+"""Tests for streamed proposal / job-enhance generation."""
+import json
+import random
+from unittest.mock import AsyncMock, patch
+
+from prometheus_client import REGISTRY
+
+from src.streaming import IncrementalJsonParser
+
+PROPOSAL = {
+    "cover_letter": "Hi there,\n\nI have built \"similar\" dashboards – 5 years ✓ 😀",
+    "suggested_bid": 4200.5,
+    "suggested_milestones": [{"title": "Setup, design", "description": "x}y", "amount": 1000}],
+    "suggested_duration_weeks": 4,
+    "key_talking_points": ["React", "FastAPI"],
+}
+
+PROPOSAL_REQUEST = {
+    "job_title": "Build a dashboard",
+    "job_description": "React dashboard with charts",
+    "required_skills": ["React"],
+    "budget_min": 3000.0,
+    "budget_max": 5000.0,
+    "freelancer_name": "Ana",
+    "freelancer_skills": ["React"],
+}
+
+
+def _chunks(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def _events(response):
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def _fake_stream(chunks):
+    async def stream(**kwargs):
+        for chunk in chunks:
+            yield chunk
+    return stream
+
+
+class TestIncrementalJsonParser:
+    """IncrementalJsonParser"""
+
+    def test_any_chunking_yields_same_fields_and_text(self):
+        rng = random.Random(7)
+        for ensure_ascii in (True, False):
+            text = "```json\n" + json.dumps(PROPOSAL, ensure_ascii=ensure_ascii, indent=2) + "\n```"
+            for _ in range(50):
+                parser = IncrementalJsonParser({"cover_letter"})
+                deltas, fields = [], {}
+                i = 0
+                while i < len(text):
+                    size = rng.randint(1, 9)
+                    for event in parser.feed(text[i:i + size]):
+                        if event.kind == "delta":
+                            deltas.append(event.value)
+                        else:
+                            fields[event.field] = event.value
+                    i += size
+                assert "".join(deltas) == PROPOSAL["cover_letter"]
+                assert fields == PROPOSAL
+                assert parser.done
+
+    def test_fields_emitted_as_soon_as_complete(self):
+        parser = IncrementalJsonParser()
+        events = parser.feed('{"suggested_bid": 120, "cover_letter": "unfinished')
+        assert [(e.kind, e.field, e.value) for e in events] == [("field", "suggested_bid", 120)]
+        assert not parser.done
+
+    def test_only_requested_fields_stream(self):
+        parser = IncrementalJsonParser({"cover_letter"})
+        events = parser.feed('{"title": "abc", "cover_letter": "de')
+        assert [e for e in events if e.kind == "delta"] == [("delta", "cover_letter", "de")]
+
+
+class TestProposalStream:
+    """POST /api/v1/proposal/generate/stream"""
+
+    def test_streams_cover_letter_then_result(self, client):
+        text = json.dumps(PROPOSAL)
+        with patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai.stream_proposal_with_vertex", _fake_stream(_chunks(text))):
+            response = client.post("/api/v1/proposal/generate/stream", json=PROPOSAL_REQUEST)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _events(response)
+        deltas = [d["text"] for kind, d in events if kind == "delta"]
+        assert len(deltas) > 1
+        assert "".join(deltas) == PROPOSAL["cover_letter"]
+        kind, result = events[-1]
+        assert kind == "result"
+        assert result["suggested_bid"] == 4200.5
+        assert result["model_version"].startswith("proposal-gen-")
+
+    def test_truncated_stream_resets_and_falls_back(self, client):
+        text = json.dumps(PROPOSAL)[:60]
+        with patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai.stream_proposal_with_vertex", _fake_stream(_chunks(text))):
+            events = _events(client.post("/api/v1/proposal/generate/stream", json=PROPOSAL_REQUEST))
+
+        kinds = [kind for kind, _ in events]
+        assert "reset" in kinds
+        assert kinds[-1] == "result"
+        assert events[-1][1]["cover_letter"]
+
+    def test_dev_mode_streams_rule_based_result(self, client):
+        with patch("src.vertex_ai.is_vertex_enabled", return_value=False):
+            events = _events(client.post("/api/v1/proposal/generate/stream", json=PROPOSAL_REQUEST))
+        assert [kind for kind, _ in events] == ["delta", "result"]
+        assert events[0][1]["text"] == events[1][1]["cover_letter"]
+
+    def test_streamed_result_is_audited(self, client):
+        audit = AsyncMock()
+        with patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai.stream_proposal_with_vertex", _fake_stream(_chunks(json.dumps(PROPOSAL)))), \
+                patch("src.proposal_routes.log_ai_decision", audit):
+            events = _events(client.post("/api/v1/proposal/generate/stream", json=PROPOSAL_REQUEST))
+
+        audit.assert_awaited_once()
+        assert audit.await_args.kwargs["output"] == {"source": "vertex", "streamed": True}
+        assert audit.await_args.kwargs["latency_ms"] == events[-1][1]["latency_ms"]
+
+    def test_fallback_is_not_audited_as_vertex(self, client):
+        audit = AsyncMock()
+        with patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai.stream_proposal_with_vertex", _fake_stream(_chunks(json.dumps(PROPOSAL)[:60]))), \
+                patch("src.proposal_routes.log_ai_decision", audit):
+            client.post("/api/v1/proposal/generate/stream", json=PROPOSAL_REQUEST)
+
+        audit.assert_not_awaited()
+
+    def test_time_to_first_token_recorded(self, client):
+        labels = {"endpoint": "proposal_generate", "source": "vertex"}
+        before = REGISTRY.get_sample_value("ai_stream_time_to_first_token_seconds_count", labels) or 0
+        with patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai.stream_proposal_with_vertex", _fake_stream(_chunks(json.dumps(PROPOSAL)))):
+            client.post("/api/v1/proposal/generate/stream", json=PROPOSAL_REQUEST)
+        assert REGISTRY.get_sample_value("ai_stream_time_to_first_token_seconds_count", labels) == before + 1
+
+
+class TestJobEnhanceStream:
+    """POST /api/v1/job/enhance/stream"""
+
+    def test_streams_description_then_result(self, client):
+        enhanced = {
+            "improved_title": "Senior React Developer for Analytics Dashboard",
+            "improved_description": "We are building an analytics dashboard.\n\nYou will own the frontend.",
+            "suggested_skills": ["TypeScript"],
+            "suggested_milestones": [{"title": "MVP", "description": "Core", "estimated_amount": 2000}],
+            "tips": ["Add deliverables"],
+            "estimated_budget_range": {"min": 3000, "max": 5000},
+        }
+        with patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai.stream_job_enhance_with_vertex", _fake_stream(_chunks(json.dumps(enhanced)))):
+            response = client.post("/api/v1/job/enhance/stream", json={
+                "title": "React dev", "description": "Dashboard", "skills": ["React"],
+            })
+
+        events = _events(response)
+        streamed = {}
+        for kind, data in events:
+            if kind == "delta":
+                streamed[data["field"]] = streamed.get(data["field"], "") + data["text"]
+        assert streamed == {
+            "improved_title": enhanced["improved_title"],
+            "improved_description": enhanced["improved_description"],
+        }
+        assert events[-1][0] == "result"
+        assert events[-1][1]["estimated_budget_range"] == {"min": 3000.0, "max": 5000.0}
+
+    def test_streamed_result_is_audited(self, client):
+        enhanced = {
+            "improved_title": "React Developer", "improved_description": "Dashboard work.",
+            "suggested_skills": [], "suggested_milestones": [], "tips": [],
+        }
+        audit = AsyncMock()
+        with patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai.stream_job_enhance_with_vertex", _fake_stream(_chunks(json.dumps(enhanced)))), \
+                patch("src.job_enhance_routes.log_ai_decision", audit):
+            client.post("/api/v1/job/enhance/stream", json={"title": "React dev", "description": "Dashboard"})
+
+        audit.assert_awaited_once()
+        assert audit.await_args.kwargs["decision_type"] == "job_enhance"
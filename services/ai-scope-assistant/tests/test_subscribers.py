@@ -0,0 +1,121 @@
+"""Tests for ai-scope-assistant Pub/Sub handlers."""
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+from src import subscribers
+from src.subscribers import handle_job_published_fanout
+
+
+JOB_EVENT = {
+    "event": "job_published",
+    "job_id": "job-123",
+    "title": "Build a marketplace dashboard",
+    "description": "Dashboard with authentication, API and database for our team.",
+    "skills_required": ["React", "Node.js"],
+    "budget_min": 2000.0,
+    "budget_max": 5000.0,
+    "category": "web-development",
+}
+
+
+class TestJobPublishedFanout:
+    """handle_job_published_fanout"""
+
+    def test_runs_both_branches_on_same_payload(self):
+        scope = AsyncMock()
+        moderation = AsyncMock()
+        with patch.object(subscribers, "handle_job_published", scope), \
+                patch.object(subscribers, "handle_job_moderation", moderation):
+            asyncio.run(handle_job_published_fanout(JOB_EVENT))
+        scope.assert_awaited_once_with(JOB_EVENT)
+        moderation.assert_awaited_once_with(JOB_EVENT)
+
+    def test_branches_run_concurrently(self):
+        order = []
+
+        async def slow_branch(name):
+            order.append(f"{name}-start")
+            await asyncio.sleep(0.01)
+            order.append(f"{name}-end")
+
+        with patch.object(subscribers, "handle_job_published", lambda d: slow_branch("scope")), \
+                patch.object(subscribers, "handle_job_moderation", lambda d: slow_branch("moderation")):
+            asyncio.run(handle_job_published_fanout(JOB_EVENT))
+        assert order[:2] == ["scope-start", "moderation-start"]
+
+    def test_branch_failure_does_not_skip_other_branch(self):
+        moderation = AsyncMock()
+        with patch.object(subscribers, "handle_job_published", AsyncMock(side_effect=RuntimeError("boom"))), \
+                patch.object(subscribers, "handle_job_moderation", moderation):
+            asyncio.run(handle_job_published_fanout(JOB_EVENT))
+        moderation.assert_awaited_once()
+
+    def test_missing_job_id_skips_both(self):
+        scope = AsyncMock()
+        moderation = AsyncMock()
+        with patch.object(subscribers, "handle_job_published", scope), \
+                patch.object(subscribers, "handle_job_moderation", moderation):
+            asyncio.run(handle_job_published_fanout({"title": "no id"}))
+        scope.assert_not_awaited()
+        moderation.assert_not_awaited()
+
+    def test_combined_prompt_makes_single_vertex_call(self):
+        combined = AsyncMock(return_value={
+            "scope": {"milestones": [], "complexity_tier": "moderate", "model": "m"},
+            "moderation": {"confidence": 0.9, "quality": 0.8, "flags": [], "model": "m"},
+            "model": "m",
+            "latency_ms": 12,
+        })
+        callback = AsyncMock(return_value={})
+        scope = AsyncMock()
+        moderation = AsyncMock()
+        with patch.object(subscribers.settings, "combined_job_prompt", True), \
+                patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai.analyze_and_moderate_job_with_vertex", combined), \
+                patch("shared.callback.api_callback.patch", callback), \
+                patch.object(subscribers, "handle_job_published", scope), \
+                patch.object(subscribers, "handle_job_moderation", moderation):
+            asyncio.run(handle_job_published_fanout(JOB_EVENT))
+
+        combined.assert_awaited_once()
+        paths = sorted(call.args[0] for call in callback.await_args_list)
+        assert paths == ["/jobs/job-123/moderation", "/jobs/job-123/scope"]
+        scope.assert_not_awaited()
+        moderation.assert_not_awaited()
+
+    def test_failed_combined_callback_is_logged(self):
+        combined = AsyncMock(return_value={
+            "scope": {"milestones": [], "complexity_tier": "moderate", "model": "m"},
+            "moderation": {"confidence": 0.9, "quality": 0.8, "flags": [], "model": "m"},
+            "model": "m",
+            "latency_ms": 12,
+        })
+
+        async def callback(path, payload):
+            if path.endswith("/moderation"):
+                raise ConnectionError("api down")
+            return {}
+
+        with patch.object(subscribers.settings, "combined_job_prompt", True), \
+                patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai.analyze_and_moderate_job_with_vertex", combined), \
+                patch("shared.callback.api_callback.patch", side_effect=callback), \
+                patch.object(subscribers, "logger") as logger:
+            asyncio.run(handle_job_published_fanout(JOB_EVENT))
+
+        failures = [c for c in logger.error.call_args_list if c.args[0] == "job_fanout_branch_failed"]
+        assert [c.kwargs["branch"] for c in failures] == ["moderation"]
+        assert isinstance(failures[0].kwargs["exc_info"], ConnectionError)
+
+    def test_combined_prompt_falls_back_when_vertex_fails(self):
+        scope = AsyncMock()
+        moderation = AsyncMock()
+        with patch.object(subscribers.settings, "combined_job_prompt", True), \
+                patch("src.vertex_ai.is_vertex_enabled", return_value=True), \
+                patch("src.vertex_ai.analyze_and_moderate_job_with_vertex", AsyncMock(return_value=None)), \
+                patch.object(subscribers, "handle_job_published", scope), \
+                patch.object(subscribers, "handle_job_moderation", moderation):
+            asyncio.run(handle_job_published_fanout(JOB_EVENT))
+        scope.assert_awaited_once()
+        moderation.assert_awaited_once()
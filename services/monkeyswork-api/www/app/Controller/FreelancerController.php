@@ -433,7 +433,7 @@ final class FreelancerController
             if ($completeness >= 60) {
                 $pubsub = $this->pubsub ?? new PubSubPublisher();
                 try {
-                    $pubsub->profileReady($userId);
+                    $pubsub->profileReady($userId, $this->profileReadyPayload($userId));
                 } catch (\Throwable) {
                     // Non-critical: don't fail update if Pub/Sub is down
                 }
@@ -617,6 +617,35 @@ final class FreelancerController
         return min(100, $score);
     }
 
+    /**
+     * Profile fields ai-match-v1 embeds for candidate retrieval (profile-ready payload).
+     *
+     * @return array{skills: string[], headline: ?string, bio: ?string, hourly_rate: ?float, experience_years: ?int}
+     */
+    private function profileReadyPayload(string $userId): array
+    {
+        $pdo = $this->db->pdo();
+
+        $stmt = $pdo->prepare(
+            'SELECT headline, bio, hourly_rate, experience_years FROM "freelancerprofile" WHERE user_id = :id'
+        );
+        $stmt->execute(['id' => $userId]);
+        $row = $stmt->fetch(\PDO::FETCH_ASSOC) ?: [];
+
+        $skillStmt = $pdo->prepare(
+            'SELECT s.name FROM "freelancer_skills" fs JOIN "skill" s ON s.id = fs.skill_id WHERE fs.freelancer_id = :id'
+        );
+        $skillStmt->execute(['id' => $userId]);
+
+        return [
+            'skills'           => $skillStmt->fetchAll(\PDO::FETCH_COLUMN),
+            'headline'         => $row['headline'] ?? null,
+            'bio'              => $row['bio'] ?? null,
+            'hourly_rate'      => isset($row['hourly_rate']) ? (float) $row['hourly_rate'] : null,
+            'experience_years' => isset($row['experience_years']) ? (int) $row['experience_years'] : null,
+        ];
+    }
+
     /**
      * Build verification badge summary from verification rows.
      *
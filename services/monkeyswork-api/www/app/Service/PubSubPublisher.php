@@ -35,19 +35,21 @@ final class PubSubPublisher
      * @param string $topic   Topic name, e.g. "user-registered"
      * @param array  $payload Associative array — will be JSON-encoded
      * @param array  $attrs   Optional Pub/Sub message attributes
+     * @param string|null $orderingKey Entity id whose messages must be delivered in order
      */
-    public function publish(string $topic, array $payload, array $attrs = []): void
+    public function publish(string $topic, array $payload, array $attrs = [], ?string $orderingKey = null): void
     {
         $this->ensureTopic($topic);
 
-        $message = [
-            'messages' => [
-                [
-                    'data'       => base64_encode(json_encode($payload, JSON_THROW_ON_ERROR)),
-                    'attributes' => $attrs ?: new \stdClass(),
-                ],
-            ],
+        $pubsubMessage = [
+            'data'       => base64_encode(json_encode($payload, JSON_THROW_ON_ERROR)),
+            'attributes' => $attrs ?: new \stdClass(),
         ];
+        if ($orderingKey !== null && $orderingKey !== '') {
+            $pubsubMessage['orderingKey'] = $orderingKey;
+        }
+
+        $message = ['messages' => [$pubsubMessage]];
 
         $url = $this->baseUrl() . "/v1/projects/{$this->projectId}/topics/{$topic}:publish";
 
@@ -80,13 +82,16 @@ final class PubSubPublisher
         ]);
     }
 
-    public function profileReady(string $userId): void
+    /**
+     * @param array $profile Embedding inputs for ai-match-v1 (skills, headline, bio, hourly_rate, experience_years)
+     */
+    public function profileReady(string $userId, array $profile = []): void
     {
-        $this->publish('profile-ready', [
+        $this->publish('profile-ready', array_merge([
             'event'     => 'profile_ready',
             'user_id'   => $userId,
             'timestamp' => (new \DateTimeImmutable())->format('c'),
-        ]);
+        ], $profile), [], $userId);
     }
 
     public function jobPublished(string $jobId, array $jobData): void
@@ -95,7 +100,7 @@ final class PubSubPublisher
             'event'     => 'job_published',
             'job_id'    => $jobId,
             'timestamp' => (new \DateTimeImmutable())->format('c'),
-        ], $jobData));
+        ], $jobData), [], $jobId);
     }
 
     public function proposalSubmitted(string $proposalId, string $jobId, string $freelancerId): void
@@ -4,6 +4,9 @@ Shared callback client for AI microservices → PHP API internal endpoints.
 Usage:
     from shared.callback import api_callback
     await api_callback.patch(f"/verifications/{vid}", {"status": "approved", ...})
+
+Each call, retries included, is one CLIENT span (shared.tracing) whose
+context reaches the PHP API in the traceparent header.
 """
 
 import os
@@ -12,6 +15,9 @@ from typing import Any, Dict, Optional
 import httpx
 import structlog
 
+from shared.metrics import CALLBACK_LATENCY, callback_endpoint, observe
+from shared.tracing import client_span, inject, mark_error
+
 logger = structlog.get_logger()
 
 # PHP API internal base URL
@@ -39,6 +45,10 @@ class ApiCallback:
             )
         return self._client
 
+    async def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """GET from an internal endpoint."""
+        return await self._request("GET", path, None, params=params)
+
     async def post(self, path: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """POST to an internal endpoint."""
         return await self._request("POST", path, data)
@@ -52,64 +62,78 @@ class ApiCallback:
         return await self._request("PUT", path, data)
 
     async def _request(
-        self, method: str, path: str, data: Dict[str, Any], retries: int = 3
+        self,
+        method: str,
+        path: str,
+        data: Optional[Dict[str, Any]],
+        retries: int = 3,
+        params: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
-        """Make an HTTP request with retry logic."""
-        last_error = None
-
-        for attempt in range(1, retries + 1):
-            try:
-                start = time.monotonic()
-                response = await self.client.request(method, path, json=data)
-                elapsed_ms = int((time.monotonic() - start) * 1000)
-
-                logger.info(
-                    "api_callback",
-                    method=method,
-                    path=path,
-                    status=response.status_code,
-                    latency_ms=elapsed_ms,
-                    attempt=attempt,
-                )
-
-                response.raise_for_status()
-                return response.json()
-
-            except httpx.HTTPStatusError as e:
-                logger.warning(
-                    "api_callback_http_error",
-                    method=method,
-                    path=path,
-                    status=e.response.status_code,
-                    body=e.response.text[:500],
-                    attempt=attempt,
-                )
-                last_error = e
-                # Don't retry 4xx — they won't succeed
-                if 400 <= e.response.status_code < 500:
-                    break
-
-            except (httpx.ConnectError, httpx.TimeoutException) as e:
-                logger.warning(
-                    "api_callback_conn_error",
-                    method=method,
-                    path=path,
-                    error=str(e),
-                    attempt=attempt,
-                )
-                last_error = e
-
-            # Exponential backoff
-            if attempt < retries:
-                await _async_sleep(0.5 * (2 ** (attempt - 1)))
-
-        logger.error(
-            "api_callback_failed",
-            method=method,
-            path=path,
-            error=str(last_error),
-        )
-        return {"error": str(last_error)}
+        """Make an HTTP request with retry logic, traced as one CLIENT span."""
+        endpoint = callback_endpoint(path)
+        with client_span(f"{method} {endpoint}", **{"http.request.method": method, "url.template": endpoint}) as span:
+            headers = inject()
+            last_error = None
+
+            for attempt in range(1, retries + 1):
+                try:
+                    start = time.monotonic()
+                    response = await self.client.request(method, path, json=data, params=params, headers=headers or None)
+                    elapsed = time.monotonic() - start
+                    elapsed_ms = int(elapsed * 1000)
+                    observe(CALLBACK_LATENCY, (method, endpoint, str(response.status_code)), elapsed)
+                    span.set_attribute("http.response.status_code", response.status_code)
+                    span.set_attribute("http.request.resend_count", attempt - 1)
+
+                    logger.info(
+                        "api_callback",
+                        method=method,
+                        path=path,
+                        status=response.status_code,
+                        latency_ms=elapsed_ms,
+                        attempt=attempt,
+                    )
+
+                    response.raise_for_status()
+                    return response.json()
+
+                except httpx.HTTPStatusError as e:
+                    logger.warning(
+                        "api_callback_http_error",
+                        method=method,
+                        path=path,
+                        status=e.response.status_code,
+                        body=e.response.text[:500],
+                        attempt=attempt,
+                    )
+                    last_error = e
+                    # Don't retry 4xx — they won't succeed
+                    if 400 <= e.response.status_code < 500:
+                        break
+
+                except (httpx.ConnectError, httpx.TimeoutException) as e:
+                    observe(CALLBACK_LATENCY, (method, endpoint, type(e).__name__), time.monotonic() - start)
+                    logger.warning(
+                        "api_callback_conn_error",
+                        method=method,
+                        path=path,
+                        error=str(e),
+                        attempt=attempt,
+                    )
+                    last_error = e
+
+                # Exponential backoff
+                if attempt < retries:
+                    await _async_sleep(0.5 * (2 ** (attempt - 1)))
+
+            mark_error(span, str(last_error))
+            logger.error(
+                "api_callback_failed",
+                method=method,
+                path=path,
+                error=str(last_error),
+            )
+            return {"error": str(last_error)}
 
     async def close(self) -> None:
         if self._client and not self._client.is_closed:
@@ -0,0 +1,331 @@
+"""
+Provider-side context caching for static prompt prefixes.
+
+Usage:
+    # startup (main.py lifespan)
+    await context_cache.start(SERVICE_NAME, VERTEX_MODEL, CACHED_INSTRUCTIONS)
+
+    # per call (vertex_ai.py)
+    model, contents = context_cache.prepare("match_ranking", MATCH_RANKING_INSTRUCTIONS, prompt.text, _get_model())
+    response = model.generate_content(contents, ...)
+
+Prompts are split into static instructions (role, criteria, response schema)
+and a dynamic suffix holding the request data. The instructions are uploaded
+once as a Vertex AI CachedContent and calls only send the suffix. When no
+live cache exists for the instructions (dev, creation failed, expired, or
+below the provider's minimum size) prepare() falls back to sending the
+instructions inline, so callers never need to care whether caching is on.
+
+Each cache's display name is "<service>:<name>:<version>", where version is
+a hash of the instructions. At startup caches with a matching version are
+reused (replicas share them); caches for other versions are never used or
+extended again and lapse at their TTL, so replicas still running the
+previous deploy keep working during a rollout. A background task extends
+current caches before they expire.
+
+Env vars:
+  CONTEXT_CACHE_ENABLED: "false" disables provider caches (default: true)
+  CONTEXT_CACHE_BACKEND: "vertex" (default) or "memory" (local fake)
+  CONTEXT_CACHE_TTL_S: cache lifetime in seconds (default: 3600)
+  CONTEXT_CACHE_REFRESH_MARGIN_S: extend when this close to expiry (default: 300)
+  CONTEXT_CACHE_MIN_TOKENS: smallest prefix worth caching (default: 1024)
+"""
+
+import asyncio
+import hashlib
+import itertools
+import os
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+ENABLED = os.getenv("CONTEXT_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+BACKEND = os.getenv("CONTEXT_CACHE_BACKEND", "vertex")
+TTL_S = int(os.getenv("CONTEXT_CACHE_TTL_S", "3600"))
+REFRESH_MARGIN_S = int(os.getenv("CONTEXT_CACHE_REFRESH_MARGIN_S", "300"))
+MIN_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "1024"))
+
+INSTRUCTIONS_SEPARATOR = "\n\n"
+
+
+def instructions_version(instructions: str) -> str:
+    return hashlib.sha256(instructions.encode("utf-8")).hexdigest()[:12]
+
+
+@dataclass
+class CacheEntry:
+    name: str  # provider resource name
+    display_name: str
+    expire_time: float  # epoch seconds
+
+
+# ── Backends ─────────────────────────────────────────────────────────
+
+class VertexCacheBackend:
+    """vertexai.preview.caching.CachedContent."""
+
+    def __init__(self):
+        self._initialized = False
+
+    def _caching(self):
+        import vertexai
+        from vertexai.preview import caching
+
+        if not self._initialized:
+            vertexai.init(
+                project=os.getenv("GCP_PROJECT_ID", "monkeyswork"),
+                location=os.getenv("REGION", "us-central1"),
+            )
+            self._initialized = True
+        return caching
+
+    @staticmethod
+    def _entry(cache) -> CacheEntry:
+        return CacheEntry(cache.resource_name, cache.display_name, cache.expire_time.timestamp())
+
+    def list(self) -> List[CacheEntry]:
+        return [self._entry(c) for c in self._caching().CachedContent.list()]
+
+    def create(self, model_name: str, display_name: str, instructions: str, ttl_s: int) -> CacheEntry:
+        cache = self._caching().CachedContent.create(
+            model_name=model_name,
+            system_instruction=instructions,
+            display_name=display_name,
+            ttl=timedelta(seconds=ttl_s),
+        )
+        return self._entry(cache)
+
+    def refresh(self, entry: CacheEntry, ttl_s: int) -> CacheEntry:
+        cache = self._caching().CachedContent(cached_content_name=entry.name)
+        cache.update(ttl=timedelta(seconds=ttl_s))
+        return CacheEntry(entry.name, entry.display_name, time.time() + ttl_s)
+
+    def bind(self, entry: CacheEntry, base_model: Any) -> Any:
+        from vertexai.generative_models import GenerativeModel
+
+        cache = self._caching().CachedContent(cached_content_name=entry.name)
+        return GenerativeModel.from_cached_content(cached_content=cache)
+
+
+class _PrefixedModel:
+    """Model stand-in that re-attaches cached instructions locally."""
+
+    def __init__(self, backend: "InMemoryCacheBackend", entry: CacheEntry, base_model: Any):
+        self._backend = backend
+        self._entry = entry
+        self._base = base_model
+
+    def _contents(self, contents: str) -> str:
+        instructions = self._backend.lookup(self._entry)
+        return instructions + INSTRUCTIONS_SEPARATOR + contents
+
+    def generate_content(self, contents, *args, **kwargs):
+        return self._base.generate_content(self._contents(contents), *args, **kwargs)
+
+    async def generate_content_async(self, contents, *args, **kwargs):
+        return await self._base.generate_content_async(self._contents(contents), *args, **kwargs)
+
+
+class InMemoryCacheBackend:
+    """Local fake with the provider's semantics (TTL expiry, not-found errors)."""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._caches: Dict[str, Tuple[CacheEntry, str]] = {}
+        self._ids = itertools.count(1)
+        self.created = 0
+        self.refreshed = 0
+
+    def _live(self, name: str) -> Tuple[CacheEntry, str]:
+        from google.api_core.exceptions import NotFound
+
+        found = self._caches.get(name)
+        if found is None or found[0].expire_time <= self.clock():
+            self._caches.pop(name, None)
+            raise NotFound(f"Cached content not found: {name}")
+        return found
+
+    def list(self) -> List[CacheEntry]:
+        now = self.clock()
+        return [entry for entry, _ in self._caches.values() if entry.expire_time > now]
+
+    def create(self, model_name: str, display_name: str, instructions: str, ttl_s: int) -> CacheEntry:
+        name = f"cachedContents/{next(self._ids)}"
+        entry = CacheEntry(name, display_name, self.clock() + ttl_s)
+        self._caches[name] = (entry, instructions)
+        self.created += 1
+        return entry
+
+    def refresh(self, entry: CacheEntry, ttl_s: int) -> CacheEntry:
+        current, instructions = self._live(entry.name)
+        updated = CacheEntry(current.name, current.display_name, self.clock() + ttl_s)
+        self._caches[entry.name] = (updated, instructions)
+        self.refreshed += 1
+        return updated
+
+    def lookup(self, entry: CacheEntry) -> str:
+        return self._live(entry.name)[1]
+
+    def bind(self, entry: CacheEntry, base_model: Any) -> Any:
+        return _PrefixedModel(self, entry, base_model)
+
+
+# ── Manager ──────────────────────────────────────────────────────────
+
+class ContextCache:
+    """Creates, reuses, refreshes and invalidates cached prompt prefixes."""
+
+    def __init__(
+        self,
+        backend: Any = None,
+        ttl_s: int = TTL_S,
+        refresh_margin_s: int = REFRESH_MARGIN_S,
+        min_tokens: int = MIN_TOKENS,
+        enabled: bool = ENABLED,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.backend = backend
+        self.ttl_s = ttl_s
+        self.refresh_margin_s = refresh_margin_s
+        self.min_tokens = min_tokens
+        self.enabled = enabled
+        self.clock = clock
+        self.service = ""
+        self.model_name = ""
+        self._instructions: Dict[str, str] = {}
+        self._entries: Dict[str, CacheEntry] = {}
+        self._models: Dict[str, Any] = {}  # entry name → bound model
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _display_name(self, name: str, instructions: str) -> str:
+        return f"{self.service}:{name}:{instructions_version(instructions)}"
+
+    def _cacheable(self, name: str, instructions: str) -> bool:
+        from shared.prompting import estimate_tokens
+
+        tokens = estimate_tokens(instructions)
+        if tokens < self.min_tokens:
+            logger.info("context_cache_prefix_too_small", name=name, tokens=tokens, min_tokens=self.min_tokens)
+            return False
+        return True
+
+    # ── Lifecycle ────────────────────────────────────────────────────
+
+    async def start(self, service: str, model_name: str, instructions: Mapping[str, str]) -> None:
+        """Create or reuse caches for every prefix and start the refresher."""
+        if not self.enabled:
+            return
+        if self.backend is None:
+            self.backend = InMemoryCacheBackend() if BACKEND == "memory" else VertexCacheBackend()
+        self.service = service
+        self.model_name = model_name
+        self._instructions = {
+            name: text for name, text in instructions.items() if self._cacheable(name, text)
+        }
+
+        existing: Dict[str, CacheEntry] = {}
+        try:
+            for entry in await asyncio.to_thread(self.backend.list):
+                if entry.display_name.startswith(f"{service}:"):
+                    existing[entry.display_name] = entry
+        except Exception:
+            logger.exception("context_cache_list_failed")
+
+        wanted = {self._display_name(n, t): n for n, t in self._instructions.items()}
+        for display_name, entry in existing.items():
+            if display_name in wanted:
+                self._entries[wanted[display_name]] = entry
+            else:
+                # Other instructions version: left to expire, never extended
+                logger.info("context_cache_superseded", display_name=display_name)
+
+        await self.refresh_due()
+        self._task = asyncio.create_task(self._refresh_loop())
+        logger.info("context_cache_started", caches=sorted(self._entries), backend=type(self.backend).__name__)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _refresh_loop(self) -> None:
+        interval = max(1.0, min(60.0, self.refresh_margin_s / 2))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh_due()
+            except Exception:
+                logger.exception("context_cache_refresh_loop_error")
+
+    async def refresh_due(self) -> None:
+        """Create missing caches and extend the ones close to expiry."""
+        now = self.clock()
+        for name, instructions in self._instructions.items():
+            entry = self._entries.get(name)
+            if entry is not None and entry.expire_time - now > self.refresh_margin_s:
+                continue
+            if entry is not None:
+                try:
+                    self._entries[name] = await asyncio.to_thread(self.backend.refresh, entry, self.ttl_s)
+                    logger.info("context_cache_refreshed", name=name)
+                    continue
+                except Exception as e:
+                    logger.warning("context_cache_refresh_failed", name=name, error=str(e))
+                    self._forget(name)
+            await self._create(name, instructions)
+
+    async def _create(self, name: str, instructions: str) -> None:
+        try:
+            self._entries[name] = await asyncio.to_thread(
+                self.backend.create,
+                self.model_name,
+                self._display_name(name, instructions),
+                instructions,
+                self.ttl_s,
+            )
+            logger.info("context_cache_created", name=name, version=instructions_version(instructions))
+        except Exception as e:
+            logger.warning("context_cache_create_failed", name=name, error=str(e))
+
+    def _forget(self, name: str) -> None:
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            self._models.pop(entry.name, None)
+
+    # ── Call path ────────────────────────────────────────────────────
+
+    def prepare(self, name: str, instructions: str, prompt: str, base_model: Any) -> Tuple[Any, str]:
+        """
+        Model and contents for one call.
+
+        Uses the cached prefix when a live cache for exactly these
+        instructions exists; otherwise the instructions are sent inline.
+        """
+        entry = self._entries.get(name)
+        if (
+            entry is not None
+            and self._instructions.get(name) == instructions
+            and entry.expire_time > self.clock()
+        ):
+            try:
+                model = self._models.get(entry.name)
+                if model is None:
+                    model = self._models[entry.name] = self.backend.bind(entry, base_model)
+                self.hits += 1
+                return model, prompt
+            except Exception as e:
+                logger.warning("context_cache_bind_failed", name=name, error=str(e))
+                self._forget(name)
+        self.misses += 1
+        return base_model, instructions + INSTRUCTIONS_SEPARATOR + prompt
+
+
+# Singleton instance
+context_cache = ContextCache()
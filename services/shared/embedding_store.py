@@ -0,0 +1,507 @@
+"""
+On-disk embedding store: quantized vectors in memory-mapped segments.
+
+Usage:
+    store = EmbeddingStore("/var/lib/ai-match/index", dim=384, dtype="int8")
+    store.open()                        # maps existing segments, copies nothing
+    store.put(["user-1"], vectors)      # buffered in memory
+    store.delete(["user-2"])
+    store.flush()                       # pending rows → one new segment
+    store.search(query, k=10)           # [("user-1", 0.93), ...] best first
+    store.compact()                     # merge segments into one IVF-clustered segment
+
+Layout under path:
+    MANIFEST.json      {"dim", "dtype", "meta", "segments": [...]}, replaced atomically
+    <seg>.vec.npy      (n, dim) int8 or float16 vectors
+    <seg>.scale.npy    (n,) float32 per-row scale (int8 only)
+    <seg>.ids.npy      (n,) fixed-width bytes, the id of each row
+    <seg>.del.npy      ids this segment deletes (tombstones)
+    <seg>.ivf.npz      centroids + per-list row offsets (compacted segments)
+    <seg>.pq-<id>.npy  (n, m) uint8 product-quantization codes for codebook <id>
+
+Segments are immutable and searched in place through np.load(mmap_mode="r"):
+every process mapping the same files shares one copy in the page cache, and
+opening the store reads only the id tables. A later segment's row for an id
+shadows earlier rows, and tombstones hide an id. Any process may write: it
+takes an flock on LOCK to add a segment or compact, and other processes
+pick up the new manifest on their next search. flush() never compacts:
+merging and clustering a large store takes seconds, so the owner runs
+compact() off the request path once should_compact says so.
+
+int8 rows keep a per-row scale (symmetric, max-abs / 127), which keeps cosine
+scores within ~0.01 of float32 at a quarter of the size; float16 halves it.
+Compaction sorts rows by k-means list so a search scores only the nprobe
+nearest lists of the big segment plus the small segments appended since.
+
+With a shared.pq.ProductQuantizer (trained offline by the match pipeline),
+compaction also writes PQ codes, and searching that segment scans only the
+codes (m bytes per row) with ADC lookup tables, then re-scores the best
+`rescore` rows exactly from the vectors. The vectors stay on disk and only
+those few hundred rows are paged in per query, so resident memory per
+million profiles is the ~48 MB of codes instead of the full matrix.
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import structlog
+
+from shared.pq import adc_scores
+
+logger = structlog.get_logger()
+
+MANIFEST = "MANIFEST.json"
+LOCK = "LOCK"
+DTYPES = {"int8": np.int8, "float16": np.float16}
+SEGMENT_FILES = ("vec.npy", "scale.npy", "ids.npy", "del.npy", "ivf.npz")
+_CHUNK_ROWS = 16384
+# Compaction clusters the merged segment once it has this many rows
+IVF_MIN_ROWS = 4096
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """(quantized rows, per-row scales or None)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "float16":
+        return vectors.astype(np.float16), None
+    scale = np.abs(vectors).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0
+    return np.round(vectors / scale[:, None]).astype(np.int8), scale.astype(np.float32)
+
+
+def dequantize(rows: np.ndarray, scale: Optional[np.ndarray]) -> np.ndarray:
+    out = rows.astype(np.float32)
+    if scale is not None:
+        out *= scale[:, None]
+    return out
+
+
+def _pq_file(name: str, pq_id: str) -> str:
+    return f"{name}.pq-{pq_id}.npy"
+
+
+class _Segment:
+    def __init__(self, path: str, name: str, pq_id: Optional[str] = None):
+        base = os.path.join(path, name)
+        self.name = name
+        self.vec = np.load(f"{base}.vec.npy", mmap_mode="r")
+        self.scale = np.load(f"{base}.scale.npy", mmap_mode="r") if os.path.exists(f"{base}.scale.npy") else None
+        self.ids: List[str] = [b.decode() for b in np.load(f"{base}.ids.npy").tolist()]
+        self.deleted: List[str] = [b.decode() for b in np.load(f"{base}.del.npy").tolist()]
+        self.centroids = self.offsets = None
+        if os.path.exists(f"{base}.ivf.npz"):
+            with np.load(f"{base}.ivf.npz") as ivf:
+                self.centroids, self.offsets = ivf["centroids"], ivf["offsets"]
+        self.codes = None
+        if pq_id and os.path.exists(os.path.join(path, _pq_file(name, pq_id))):
+            self.codes = np.load(os.path.join(path, _pq_file(name, pq_id)), mmap_mode="r")
+        self.live = np.zeros(len(self.ids), dtype=bool)
+
+    @property
+    def settled(self) -> bool:
+        """Nothing compaction could improve: no dead rows, tombstones or missing clustering."""
+        return bool(self.live.all()) and not self.deleted and (
+            self.centroids is not None or len(self.ids) < IVF_MIN_ROWS
+        )
+
+    def rows_to_score(self, query: np.ndarray, nprobe: int) -> Iterable[Tuple[int, int]]:
+        """(start, stop) row ranges worth scoring for query."""
+        if self.centroids is None:
+            return [(0, len(self.ids))]
+        nprobe = min(nprobe, len(self.centroids))
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return [(int(self.offsets[c]), int(self.offsets[c + 1])) for c in np.sort(probe)]
+
+    def score(self, start: int, stop: int, query: np.ndarray) -> np.ndarray:
+        scores = self.vec[start:stop].astype(np.float32) @ query
+        if self.scale is not None:
+            scores *= self.scale[start:stop]
+        return scores
+
+    def score_rows(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Exact scores for a sorted set of rows (pages in only those rows)."""
+        scores = self.vec[rows].astype(np.float32) @ query
+        if self.scale is not None:
+            scores *= self.scale[rows]
+        return scores
+
+
+class EmbeddingStore:
+    """Append-only, memory-mapped, quantized vector store keyed by string id."""
+
+    def __init__(
+        self,
+        path: str,
+        dim: int,
+        dtype: str = "int8",
+        meta: Optional[dict] = None,
+        nprobe: int = 16,
+        max_segments: int = 8,
+        quantizer=None,
+        rescore: int = 300,
+    ):
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {sorted(DTYPES)}, got {dtype!r}")
+        self.path = path
+        self.dim = dim
+        self.dtype = dtype
+        self.meta = meta or {}
+        self.nprobe = nprobe
+        self.max_segments = max_segments
+        if quantizer is not None and quantizer.dim != dim:
+            raise ValueError(f"quantizer dim {quantizer.dim} does not match store dim {dim}")
+        self.quantizer = quantizer
+        self.rescore = rescore
+        self._segments: List[_Segment] = []
+        self._where: Dict[str, Tuple[int, int]] = {}  # id → (segment, row)
+        self._manifest_mtime = None
+        self._refresh_lock = threading.Lock()
+        self._pending: Dict[str, np.ndarray] = {}
+        self._pending_deleted: set = set()
+
+    # ── Manifest ─────────────────────────────────────────────────────
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _header(self) -> dict:
+        return {"dim": self.dim, "dtype": self.dtype, "meta": self.meta}
+
+    def _read_manifest(self) -> Optional[dict]:
+        try:
+            with open(self._file(MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_manifest(self, segments: List[str]) -> None:
+        tmp = self._file(f".{MANIFEST}.tmp")
+        with open(tmp, "w") as f:
+            json.dump({**self._header(), "segments": segments}, f)
+        os.replace(tmp, self._file(MANIFEST))
+
+    @contextmanager
+    def _locked(self):
+        with open(self._file(LOCK), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def open(self) -> bool:
+        """
+        Map the store at path, creating it if missing.
+
+        Returns False when the files were written with another dim, dtype or
+        meta (e.g. a different embedding model); they are then discarded.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        with self._locked():
+            manifest = self._read_manifest()
+            compatible = manifest is None or {k: manifest.get(k) for k in self._header()} == self._header()
+            if not compatible:
+                logger.warning("embedding_store_reset", path=self.path, found={
+                    k: manifest.get(k) for k in self._header()
+                }, expected=self._header())
+                old = manifest.get("segments", [])
+                self._write_manifest([])
+                self._remove_files(old)
+            elif manifest is None:
+                self._write_manifest([])
+        self.refresh(force=True)
+        logger.info("embedding_store_opened", path=self.path, vectors=len(self._where), segments=len(self._segments))
+        return compatible
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Re-map segments if another process changed the manifest.
+
+        Segments appended since the last refresh are mapped and their rows
+        shadow or tombstone the older ones in place; only a manifest that
+        replaced segments (compaction, reset) rebuilds the id table.
+        """
+        try:
+            mtime = os.stat(self._file(MANIFEST)).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if not force and mtime == self._manifest_mtime:
+            return
+        with self._refresh_lock:
+            if not force and mtime == self._manifest_mtime:
+                return
+            for attempt in range(3):
+                manifest = self._read_manifest() or {"segments": []}
+                try:
+                    known = {s.name: s for s in self._segments}
+                    pq_id = self.quantizer.id if self.quantizer is not None else None
+                    segments = [known.get(name) or _Segment(self.path, name, pq_id) for name in manifest["segments"]]
+                    break
+                except FileNotFoundError:
+                    # A compaction removed the files between our manifest read and open
+                    time.sleep(0.01 * (attempt + 1))
+            else:
+                raise RuntimeError(f"embedding store at {self.path} keeps changing under refresh")
+
+            mapped = [s.name for s in self._segments]
+            appended = manifest["segments"][:len(mapped)] == mapped
+            where = self._where if appended else {}
+            first = len(mapped) if appended else 0
+            # Fresh liveness for the segments (re)mapped here, swapped in at the end
+            live = {s: np.ones(len(segments[s].ids), dtype=bool) for s in range(first, len(segments))}
+
+            def kill(s: int, row: int) -> None:
+                (live[s] if s in live else segments[s].live)[row] = False
+
+            for s in range(first, len(segments)):
+                for row, id_ in enumerate(segments[s].ids):
+                    previous = where.get(id_)
+                    if previous is not None:
+                        kill(*previous)
+                    where[id_] = (s, row)
+                for id_ in segments[s].deleted:
+                    previous = where.pop(id_, None)
+                    if previous is not None:
+                        kill(*previous)
+            for s, mask in live.items():
+                segments[s].live = mask
+
+            self._segments, self._where, self._manifest_mtime = segments, where, mtime
+
+    # ── Writes ───────────────────────────────────────────────────────
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending) + len(self._pending_deleted)
+
+    def put(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        for id_, vector in zip(ids, np.asarray(vectors, dtype=np.float32)):
+            self._pending[id_] = vector
+            self._pending_deleted.discard(id_)
+
+    def delete(self, ids: Iterable[str]) -> None:
+        for id_ in ids:
+            self._pending.pop(id_, None)
+            self._pending_deleted.add(id_)
+
+    def _write_segment(self, name: str, ids, rows, scale, deleted, ivf=None, codes=None) -> None:
+        base = self._file(name)
+        np.save(f"{base}.vec.npy", rows)
+        if scale is not None:
+            np.save(f"{base}.scale.npy", scale)
+        np.save(f"{base}.ids.npy", np.array([i.encode() for i in ids], dtype="S") if ids else np.array([], dtype="S1"))
+        np.save(f"{base}.del.npy", np.array([i.encode() for i in deleted], dtype="S") if deleted else np.array([], dtype="S1"))
+        if ivf is not None:
+            np.savez(f"{base}.ivf.npz", **ivf)
+        if codes is not None:
+            np.save(self._file(_pq_file(name, self.quantizer.id)), codes)
+
+    def _new_segment_name(self) -> str:
+        return f"seg-{time.time_ns():020d}-{os.getpid()}"
+
+    def flush(self) -> None:
+        """Write pending puts and deletes as one segment."""
+        if not self.pending:
+            return
+        ids = list(self._pending)
+        vectors = np.stack([self._pending[i] for i in ids]) if ids else np.zeros((0, self.dim), np.float32)
+        rows, scale = quantize(vectors, self.dtype)
+        name = self._new_segment_name()
+        # Segment files are complete before the manifest names them
+        self._write_segment(name, ids, rows, scale, sorted(self._pending_deleted))
+        with self._locked():
+            manifest = self._read_manifest() or {"segments": []}
+            self._write_manifest(manifest["segments"] + [name])
+        self._pending.clear()
+        self._pending_deleted.clear()
+        self.refresh(force=True)
+
+    @property
+    def should_compact(self) -> bool:
+        """More than max_segments segments have piled up (see compact)."""
+        return len(self._segments) > self.max_segments
+
+    def compact(self, nlist: Optional[int] = None) -> None:
+        """Merge every segment into one, dropping shadowed rows and tombstones."""
+        with self._locked():
+            self.refresh(force=True)
+            old = [s.name for s in self._segments]
+            if not old or (len(old) == 1 and not self.needs_compaction()):
+                return
+            start = time.monotonic()
+            ids: List[str] = []
+            rows, scales = [], []
+            for segment in self._segments:
+                live = np.flatnonzero(segment.live)
+                ids += [segment.ids[r] for r in live]
+                rows.append(np.asarray(segment.vec[live]))
+                if segment.scale is not None:
+                    scales.append(np.asarray(segment.scale[live]))
+            rows = np.concatenate(rows) if rows else np.zeros((0, self.dim), DTYPES[self.dtype])
+            scale = np.concatenate(scales) if scales else None
+
+            ivf = None
+            if len(ids) >= IVF_MIN_ROWS:
+                ivf, order = self._cluster(rows, scale, nlist)
+                rows, ids = rows[order], [ids[i] for i in order]
+                scale = scale[order] if scale is not None else None
+            codes = self._encode(rows, scale) if self.quantizer is not None else None
+
+            name = self._new_segment_name()
+            self._write_segment(name, ids, rows, scale, [], ivf, codes)
+            self._write_manifest([name])
+            self._remove_files(old)
+            self.refresh(force=True)
+        logger.info(
+            "embedding_store_compacted",
+            path=self.path,
+            segments_merged=len(old),
+            vectors=len(ids),
+            clustered=ivf is not None,
+            pq_codebook=self.quantizer.id if self.quantizer is not None else None,
+            elapsed_ms=int((time.monotonic() - start) * 1000),
+        )
+
+    def _cluster(self, rows: np.ndarray, scale, nlist: Optional[int]):
+        """Spherical k-means on a sample; returns ({centroids, offsets}, row order by list)."""
+        n = len(rows)
+        nlist = nlist or max(2, int(np.sqrt(n)))
+        rng = np.random.default_rng(0)
+        sample_idx = rng.choice(n, size=min(n, nlist * 64), replace=False)
+        sample = dequantize(rows[sample_idx], scale[sample_idx] if scale is not None else None)
+        sample /= np.maximum(np.linalg.norm(sample, axis=1, keepdims=True), 1e-12)
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(10):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+
+        assign = np.empty(n, dtype=np.int32)
+        for start in range(0, n, _CHUNK_ROWS):
+            block = dequantize(rows[start:start + _CHUNK_ROWS], scale[start:start + _CHUNK_ROWS] if scale is not None else None)
+            assign[start:start + _CHUNK_ROWS] = np.argmax(block @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.searchsorted(assign[order], np.arange(nlist + 1))
+        return {"centroids": centroids.astype(np.float32), "offsets": offsets}, order
+
+    def needs_compaction(self) -> bool:
+        """
+        True when compaction would change something: several segments, dead
+        rows or tombstones, a big segment without IVF lists, or no codes for
+        the current PQ codebook (e.g. the pipeline published a new one).
+        """
+        self.refresh()
+        if len(self._segments) != 1:
+            return len(self._segments) > 1
+        segment = self._segments[0]
+        return not segment.settled or (self.quantizer is not None and segment.codes is None)
+
+    def _encode(self, rows: np.ndarray, scale) -> np.ndarray:
+        codes = np.empty((len(rows), self.quantizer.m), dtype=np.uint8)
+        for start in range(0, len(rows), _CHUNK_ROWS):
+            block = dequantize(rows[start:start + _CHUNK_ROWS], scale[start:start + _CHUNK_ROWS] if scale is not None else None)
+            codes[start:start + len(block)] = self.quantizer.encode(block)
+        return codes
+
+    def _remove_files(self, segment_names: Iterable[str]) -> None:
+        # Processes that still map these keep reading them until they refresh
+        names = set(segment_names)
+        pq_files = [f for f in os.listdir(self.path) if ".pq-" in f and f.split(".pq-")[0] in names]
+        for file in [f"{name}.{ext}" for name in names for ext in SEGMENT_FILES] + pq_files:
+            try:
+                os.remove(self._file(file))
+            except FileNotFoundError:
+                pass
+
+    # ── Reads ────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        self.refresh()
+        overridden = sum(1 for id_ in self._pending_deleted | self._pending.keys() if id_ in self._where)
+        return len(self._where) - overridden + len(self._pending)
+
+    def __contains__(self, id_: str) -> bool:
+        if id_ in self._pending:
+            return True
+        self.refresh()
+        return id_ in self._where and id_ not in self._pending_deleted
+
+    @property
+    def segments(self) -> int:
+        return len(self._segments)
+
+    def search(self, query: np.ndarray, k: int = 10) -> List[Tuple[str, float]]:
+        """Top-k ids by inner product with query, best first."""
+        self.refresh()
+        query = np.asarray(query, dtype=np.float32)
+        hidden = self._pending_deleted | set(self._pending)
+        found: List[Tuple[float, str]] = []
+        table = self.quantizer.lookup_table(query) if self.quantizer is not None else None
+
+        for segment in self._segments:
+            if table is not None and segment.codes is not None:
+                found += self._search_pq(segment, query, table, max(self.rescore, k + len(hidden)))
+                continue
+            for start, stop in segment.rows_to_score(query, self.nprobe):
+                for lo in range(start, stop, _CHUNK_ROWS):
+                    hi = min(stop, lo + _CHUNK_ROWS)
+                    scores = segment.score(lo, hi, query)
+                    scores[~segment.live[lo:hi]] = -np.inf
+                    take = min(k + len(hidden), hi - lo)
+                    top = np.argpartition(-scores, take - 1)[:take] if take < hi - lo else np.arange(hi - lo)
+                    found += [(float(scores[i]), segment.ids[lo + i]) for i in top if scores[i] > -np.inf]
+
+        for id_, vector in self._pending.items():
+            found.append((float(vector @ query), id_))
+        hidden -= set(self._pending)
+
+        found.sort(reverse=True)
+        results = []
+        for score, id_ in found:
+            if id_ in hidden:
+                continue
+            results.append((id_, score))
+            if len(results) == k:
+                break
+        return results
+
+    def _search_pq(self, segment: _Segment, query: np.ndarray, table: np.ndarray, rescore: int) -> List[Tuple[float, str]]:
+        """ADC over the probed lists' codes, then exact scores for the best `rescore` rows."""
+        rows, approx = [], []
+        for start, stop in segment.rows_to_score(query, self.nprobe):
+            for lo in range(start, stop, _CHUNK_ROWS):
+                hi = min(stop, lo + _CHUNK_ROWS)
+                scores = adc_scores(segment.codes[lo:hi], table)
+                scores[~segment.live[lo:hi]] = -np.inf
+                take = min(rescore, hi - lo)
+                top = np.argpartition(-scores, take - 1)[:take] if take < hi - lo else np.arange(hi - lo)
+                top = top[scores[top] > -np.inf]
+                rows.append(lo + top)
+                approx.append(scores[top])
+        if not rows:
+            return []
+        rows, approx = np.concatenate(rows), np.concatenate(approx)
+        if len(rows) > rescore:
+            rows = rows[np.argpartition(-approx, rescore - 1)[:rescore]]
+        rows = np.sort(rows)
+        exact = segment.score_rows(rows, query)
+        return [(float(score), segment.ids[row]) for row, score in zip(rows.tolist(), exact.tolist())]
+
+    def get(self, id_: str) -> Optional[np.ndarray]:
+        """The stored (dequantized) vector for id, or None."""
+        if id_ in self._pending:
+            return self._pending[id_]
+        if id_ in self._pending_deleted or id_ not in self._where:
+            return None
+        s, row = self._where[id_]
+        segment = self._segments[s]
+        return dequantize(segment.vec[row:row + 1], segment.scale[row:row + 1] if segment.scale is not None else None)[0]
@@ -0,0 +1,131 @@
+"""
+Local text embeddings (CPU, batched) for similarity search.
+
+Usage:
+    from shared.embeddings import get_embedder
+    embedder = get_embedder()
+    vectors = embedder.embed(["Senior React developer", "React engineer"])  # (2, dim) float32, unit length
+
+Backends (EMBEDDING_BACKEND):
+  sentence-transformers  EMBEDDING_MODEL (default all-MiniLM-L6-v2, the model
+                         the match pipeline plans for its two-tower encoder)
+  hashing                signed feature hashing of words, word bigrams and
+                         character trigrams; no model download, stable across
+                         processes, good at near-duplicate wording but not at
+                         synonyms
+  auto (default)         sentence-transformers when installed, else hashing
+
+Vectors are L2-normalized, so a dot product is the cosine similarity.
+"""
+
+import os
+import re
+import unicodedata
+import zlib
+from typing import List, Optional, Sequence
+
+import numpy as np
+import structlog
+
+logger = structlog.get_logger()
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "auto")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold, NFKC-normalize and collapse whitespace."""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return " ".join(text.split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Words of normalized text; keeps tech names like c++, c#, node.js."""
+    return _TOKEN_RE.findall(normalize_text(text))
+
+
+class HashingEmbedder:
+    """Signed feature hashing into a fixed-size vector."""
+
+    name = "hashing"
+    # Cosine similarity at which two inputs count as the same request
+    default_threshold = 0.88
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        words = tokenize(text)
+        features = [f"w:{w}" for w in words]
+        features += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+        for w in words:
+            padded = f"<{w}>"
+            features += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+        return features
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                # Words and bigrams weigh more than character trigrams
+                weight = 1.0 if feature[0] == "c" else 2.0
+                out[row, h % self.dim] += weight if (h >> 31) & 1 else -weight
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+
+class SentenceTransformerEmbedder:
+    """sentence-transformers model on CPU."""
+
+    name = "sentence-transformers"
+    default_threshold = 0.92
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, batch_size: int = EMBEDDING_BATCH_SIZE):
+        from sentence_transformers import SentenceTransformer
+
+        self._model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self._model.get_sentence_embedding_dimension()
+        self.batch_size = batch_size
+        self.model_name = model_name
+        logger.info("embedding_model_loaded", model=model_name, dim=self.dim)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self._model.encode(
+            [normalize_text(t) for t in texts],
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return vectors.astype(np.float32, copy=False)
+
+
+_embedder = None
+
+
+def get_embedder(backend: Optional[str] = None):
+    """Process-wide embedder for the configured backend."""
+    global _embedder
+    if _embedder is not None and backend is None:
+        return _embedder
+
+    choice = backend or EMBEDDING_BACKEND
+    embedder = None
+    if choice in ("auto", "sentence-transformers"):
+        try:
+            embedder = SentenceTransformerEmbedder()
+        except Exception as e:  # not installed, or the model can't be loaded
+            if choice == "sentence-transformers":
+                raise
+            logger.info("embedding_fallback_hashing", reason=str(e))
+    if embedder is None:
+        embedder = HashingEmbedder()
+
+    if backend is None:
+        _embedder = embedder
+    return embedder
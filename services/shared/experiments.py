@@ -0,0 +1,239 @@
+"""
+Traffic-split A/B and shadow experiments.
+
+Usage:
+    from shared.experiments import CONTROL, TREATMENT, Outcome, get_experiment
+
+    experiment = get_experiment("match-ranker", treatment_share=0.1, mode="shadow")
+    arm = experiment.assign(job_id)                  # "control" | "treatment", stable per id
+
+    # split: the assigned arm serves the request
+    if experiment.serves_treatment(job_id): ...
+    experiment.observe(arm, Outcome(score=0.82, latency_ms=4.1))
+
+    # shadow: control serves; the treatment runs afterwards, off the critical path
+    experiment.shadow(job_id, decision_id, control_outcome, run_treatment)   # async fn → Outcome
+
+Assignment hashes "<experiment>:<salt>:<entity id>", so an entity stays in
+its arm across requests, pods and restarts, and changing the salt reshuffles.
+Shadow runs are background tasks capped at max_shadow in flight; when the cap
+is reached the shadow is skipped (and counted) rather than queued, so a slow
+treatment can never build up work behind live traffic.
+
+Each arm keeps fixed-bucket latency and score histograms (snapshot()). Shadow
+runs are recorded as pairs with the control outcome they shadowed: the last
+max_pairs in memory and, with a pair_log service name, one
+"experiment_pair" row per pair in shared.feature_log for offline analysis.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import structlog
+
+logger = structlog.get_logger()
+
+CONTROL = "control"
+TREATMENT = "treatment"
+ARMS = (CONTROL, TREATMENT)
+
+LATENCY_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+SCORE_BOUNDS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+@dataclass
+class Outcome:
+    score: float
+    latency_ms: float
+    detail: Dict[str, Any] = field(default_factory=dict)  # e.g. ranked ids, risk tier
+
+
+class Distribution:
+    """Fixed-bucket histogram with count, mean and interpolated quantiles."""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last bucket: above the top bound
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([*map(str, self.bounds), "+Inf"], self.counts)),
+        }
+
+
+class Experiment:
+    """Deterministic control/treatment assignment plus per-arm and paired outcomes."""
+
+    def __init__(
+        self,
+        name: str,
+        treatment_share: float = 0.0,
+        mode: str = "shadow",
+        salt: str = "",
+        max_shadow: int = 8,
+        max_pairs: int = 1000,
+        pair_log: Optional[str] = None,
+    ):
+        if mode not in ("shadow", "split"):
+            raise ValueError(f"experiment mode must be shadow or split, not {mode!r}")
+        self.name = name
+        self.treatment_share = min(max(treatment_share, 0.0), 1.0)
+        self.mode = mode
+        self.salt = salt
+        self.max_shadow = max_shadow
+        self.pair_log = pair_log
+        self.pairs: deque = deque(maxlen=max_pairs)
+        self.latency = {arm: Distribution(LATENCY_BOUNDS_MS) for arm in ARMS}
+        self.scores = {arm: Distribution(SCORE_BOUNDS) for arm in ARMS}
+        self.shadow_stats = {"started": 0, "completed": 0, "dropped": 0, "errors": 0}
+        self._inflight: set = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.treatment_share > 0
+
+    def assign(self, entity_id: str) -> str:
+        if not self.enabled:
+            return CONTROL
+        digest = hashlib.sha256(f"{self.name}:{self.salt}:{entity_id}".encode()).digest()
+        position = int.from_bytes(digest[:8], "big") / 2 ** 64
+        return TREATMENT if position < self.treatment_share else CONTROL
+
+    def serves_treatment(self, entity_id: str) -> bool:
+        """True when the treatment engine should answer this request (split mode only)."""
+        return self.mode == "split" and self.assign(entity_id) == TREATMENT
+
+    def observe(self, arm: str, outcome: Outcome) -> None:
+        self.latency[arm].add(outcome.latency_ms)
+        self.scores[arm].add(outcome.score)
+
+    # ── Shadow runs ──────────────────────────────────────────────────
+
+    def shadow(
+        self,
+        entity_id: str,
+        decision_id: str,
+        control: Outcome,
+        treatment: Callable[[], Awaitable[Outcome]],
+    ) -> Optional[asyncio.Task]:
+        """Run treatment in the background for entities in the treatment arm (shadow mode)."""
+        if self.mode != "shadow" or self.assign(entity_id) != TREATMENT:
+            return None
+        if len(self._inflight) >= self.max_shadow:
+            self.shadow_stats["dropped"] += 1
+            return None
+        self.shadow_stats["started"] += 1
+        task = asyncio.get_running_loop().create_task(self._run_shadow(entity_id, decision_id, control, treatment))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+        return task
+
+    async def _run_shadow(self, entity_id: str, decision_id: str, control: Outcome, treatment) -> None:
+        start = time.monotonic()
+        try:
+            outcome = await treatment()
+        except Exception:
+            self.shadow_stats["errors"] += 1
+            logger.exception("experiment_shadow_failed", experiment=self.name, entity_id=entity_id)
+            return
+        if not outcome.latency_ms:
+            outcome.latency_ms = (time.monotonic() - start) * 1000
+        self.shadow_stats["completed"] += 1
+        self.observe(TREATMENT, outcome)
+        self.record_pair(entity_id, decision_id, control, outcome)
+
+    def record_pair(self, entity_id: str, decision_id: str, control: Outcome, treatment: Outcome) -> None:
+        pair = {
+            "experiment": self.name,
+            "entity_id": entity_id,
+            "decision_id": decision_id,
+            "control_score": control.score,
+            "treatment_score": treatment.score,
+            "control_latency_ms": control.latency_ms,
+            "treatment_latency_ms": treatment.latency_ms,
+            "control": control.detail,
+            "treatment": treatment.detail,
+        }
+        self.pairs.append(pair)
+        if self.pair_log:
+            try:
+                from shared.feature_log import get_feature_log
+
+                get_feature_log(self.pair_log).log(
+                    "experiment_pair",
+                    entity_id=entity_id,
+                    decision_id=decision_id,
+                    features={"experiment": self.name},
+                    output={k: v for k, v in pair.items() if k not in ("experiment", "entity_id", "decision_id")},
+                )
+            except Exception:
+                logger.exception("experiment_pair_log_failed", experiment=self.name)
+
+    async def drain(self) -> None:
+        """Wait for in-flight shadow runs (shutdown, tests)."""
+        if self._inflight:
+            await asyncio.gather(*list(self._inflight), return_exceptions=True)
+
+    # ── Reporting ────────────────────────────────────────────────────
+
+    def snapshot(self) -> Dict[str, Any]:
+        deltas = [p["treatment_score"] - p["control_score"] for p in self.pairs]
+        return {
+            "name": self.name,
+            "mode": self.mode,
+            "treatment_share": self.treatment_share,
+            "arms": {
+                arm: {"latency_ms": self.latency[arm].snapshot(), "score": self.scores[arm].snapshot()}
+                for arm in ARMS
+            },
+            "shadow": {**self.shadow_stats, "in_flight": len(self._inflight)},
+            "pairs": {
+                "count": len(deltas),
+                "mean_score_delta": sum(deltas) / len(deltas) if deltas else None,
+            },
+        }
+
+
+_experiments: Dict[str, Experiment] = {}
+
+
+def get_experiment(name: str, **kwargs) -> Experiment:
+    """Process-wide experiment, created with kwargs on first use."""
+    experiment = _experiments.get(name)
+    if experiment is None:
+        experiment = _experiments[name] = Experiment(name, **kwargs)
+    return experiment
+
+
+def experiments() -> List[Experiment]:
+    return list(_experiments.values())
@@ -0,0 +1,257 @@
+"""
+Per-decision feature snapshot log for building training sets.
+
+Usage:
+    from shared.feature_log import get_feature_log
+
+    get_feature_log("ai-fraud-v1").log(
+        "fraud_check", entity_id="acc-1", decision_id=record_id,
+        features={"account_age_days": 2, ...}, output={"fraud_score": 0.4},
+        model_version="fraud-v1.0.0",
+    )
+
+Each decision is logged with the exact feature values the service scored,
+next to the audit record (same decision_id). Rows are buffered and written
+as columnar files partitioned by decision type and hour:
+
+    <FEATURE_LOG_DIR>/<decision_type>/dt=2026-10-19/hour=14/<service>-<pid>-<ts>.parquet
+
+Parquet via pyarrow when it is installed, gzipped JSON lines otherwise (same
+layout, .jsonl.gz). A buffer is closed when the hour rolls over, every
+FEATURE_LOG_FLUSH_ROWS rows or FEATURE_LOG_FLUSH_S seconds, and at shutdown
+(flush()). With a gs:// FEATURE_LOG_DIR files are written locally and
+uploaded. shared.training_set joins the files with labels.
+
+log() only appends: closed buffers are handed to a background writer
+thread, so encoding and uploading a file never runs on the request (or
+event loop) that happened to close it.
+
+Environment:
+  FEATURE_LOG_DIR          local directory or gs://bucket/prefix; empty disables logging
+  FEATURE_LOG_FLUSH_ROWS   default 5000
+  FEATURE_LOG_FLUSH_S      default 300
+"""
+
+import gzip
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+FEATURE_LOG_DIR = os.getenv("FEATURE_LOG_DIR", "")
+FEATURE_LOG_FLUSH_ROWS = int(os.getenv("FEATURE_LOG_FLUSH_ROWS", "5000"))
+FEATURE_LOG_FLUSH_S = float(os.getenv("FEATURE_LOG_FLUSH_S", "300"))
+
+HOUR = 3600
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+
+        return pyarrow
+    except ImportError:
+        return None
+
+
+def partition(decision_type: str, ts: float) -> str:
+    """Relative directory of the hour containing ts."""
+    t = datetime.fromtimestamp(ts, tz=timezone.utc)
+    return f"{decision_type}/dt={t:%Y-%m-%d}/hour={t:%H}"
+
+
+class FeatureLog:
+    """Buffered, hourly-partitioned writer of decision feature rows."""
+
+    def __init__(
+        self,
+        service: str,
+        root: str = FEATURE_LOG_DIR,
+        flush_rows: int = FEATURE_LOG_FLUSH_ROWS,
+        flush_s: float = FEATURE_LOG_FLUSH_S,
+        clock=time.time,
+    ):
+        self.service = service
+        self.root = root
+        self.flush_rows = max(1, flush_rows)
+        self.flush_s = flush_s
+        self._clock = clock
+        # (decision_type, hour start) → rows
+        self._buffers: Dict[tuple, List[dict]] = {}
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+        # Closed buffers waiting for the writer thread
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self.files_written = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.root)
+
+    def log(
+        self,
+        decision_type: str,
+        entity_id: str,
+        features: Dict[str, Any],
+        output: Optional[Dict[str, Any]] = None,
+        decision_id: Optional[str] = None,
+        model_version: Optional[str] = None,
+        ts: Optional[float] = None,
+    ) -> None:
+        if not self.enabled:
+            return
+        ts = self._clock() if ts is None else ts
+        row = {
+            "decision_id": decision_id,
+            "decision_type": decision_type,
+            "entity_id": entity_id,
+            "service": self.service,
+            "model_version": model_version,
+            "ts": ts,
+            "features": features,
+            "output": output or {},
+        }
+        key = (decision_type, int(ts // HOUR) * HOUR)
+        with self._lock:
+            # A new hour closes every earlier hour's buffer
+            due = [k for k in self._buffers if k[1] < key[1]]
+            self._buffers.setdefault(key, []).append(row)
+            if self._opened_at is None:
+                self._opened_at = self._clock()
+            if len(self._buffers[key]) >= self.flush_rows or self._clock() - self._opened_at >= self.flush_s:
+                due = list(self._buffers)
+            batches = [(k, self._buffers.pop(k)) for k in due]
+            if not self._buffers:
+                self._opened_at = None
+            self._hand_off(batches)
+
+    def flush(self) -> None:
+        """Write every buffered row and wait for the writer (call at shutdown)."""
+        with self._lock:
+            batches, self._buffers, self._opened_at = list(self._buffers.items()), {}, None
+            self._hand_off(batches)
+        self.join()
+
+    def join(self) -> None:
+        """Block until every closed buffer has been written."""
+        self._queue.join()
+
+    def _hand_off(self, batches: List[tuple]) -> None:
+        """Queue closed buffers for the writer thread (caller holds _lock)."""
+        if not batches:
+            return
+        for batch in batches:
+            self._queue.put(batch)
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._write_queued, name=f"feature-log-{self.service}", daemon=True)
+            self._writer.start()
+
+    def _write_queued(self) -> None:
+        while True:
+            (decision_type, hour), rows = self._queue.get()
+            try:
+                self._write(decision_type, hour, rows)
+            finally:
+                self._queue.task_done()
+
+    # ── Files ────────────────────────────────────────────────────────
+
+    def _write(self, decision_type: str, hour: float, rows: List[dict]) -> None:
+        pa = _pyarrow()
+        ext = "parquet" if pa is not None else "jsonl.gz"
+        name = f"{self.service}-{os.getpid()}-{time.time_ns()}.{ext}"
+        relative = f"{partition(decision_type, hour)}/{name}"
+        remote = self.root.startswith("gs://")
+        local = os.path.join(tempfile.gettempdir(), name) if remote else os.path.join(self.root, relative)
+        try:
+            os.makedirs(os.path.dirname(local), exist_ok=True)
+            tmp = f"{local}.tmp"
+            if pa is not None:
+                import pyarrow.parquet as pq
+
+                pq.write_table(pa.Table.from_pylist(rows), tmp, compression="zstd")
+            else:
+                with gzip.open(tmp, "wt") as f:
+                    for row in rows:
+                        f.write(json.dumps(row, default=str) + "\n")
+            os.replace(tmp, local)
+            if remote:
+                self._upload(local, relative)
+                os.remove(local)
+            self.files_written += 1
+            logger.info("feature_log_written", decision_type=decision_type, rows=len(rows), file=relative)
+        except Exception:
+            logger.exception("feature_log_write_failed", decision_type=decision_type, rows=len(rows))
+
+    def _upload(self, local: str, relative: str) -> None:
+        from google.cloud import storage
+
+        bucket, _, prefix = self.root[len("gs://"):].partition("/")
+        name = f"{prefix.rstrip('/')}/{relative}" if prefix else relative
+        storage.Client().bucket(bucket).blob(name).upload_from_filename(local)
+
+
+# ── Reading ──────────────────────────────────────────────────────────
+
+def _read_file(path: str) -> List[dict]:
+    if path.endswith(".parquet"):
+        pa = _pyarrow()
+        if pa is None:
+            raise RuntimeError(f"pyarrow is needed to read {path}")
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path).to_pylist()
+    with gzip.open(path, "rt") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def read_feature_log(
+    root: str, decision_type: str, start: Optional[float] = None, end: Optional[float] = None
+) -> Iterator[dict]:
+    """
+    Logged rows of one decision type with start <= ts < end, oldest hour first.
+
+    Only the hourly partitions overlapping [start, end) are opened, so
+    incremental builds read just the new hours. root is a local directory
+    (copy gs:// logs down first, e.g. with gsutil -m rsync).
+    """
+    base = os.path.join(root, decision_type)
+    if not os.path.isdir(base):
+        return
+    first = partition(decision_type, int(start // HOUR) * HOUR) if start is not None else None
+    last = partition(decision_type, end) if end is not None else None
+    for day in sorted(os.listdir(base)):
+        for hour in sorted(os.listdir(os.path.join(base, day))):
+            part = f"{decision_type}/{day}/{hour}"
+            if (first and part < first) or (last and part > last):
+                continue
+            directory = os.path.join(root, part)
+            for name in sorted(os.listdir(directory)):
+                if name.endswith(".tmp"):
+                    continue
+                for row in _read_file(os.path.join(directory, name)):
+                    if (start is None or row["ts"] >= start) and (end is None or row["ts"] < end):
+                        yield row
+
+
+_logs: Dict[str, FeatureLog] = {}
+
+
+def get_feature_log(service: str) -> FeatureLog:
+    """Process-wide log for a service, created on first use."""
+    log = _logs.get(service)
+    if log is None:
+        log = _logs[service] = FeatureLog(service)
+        logger.info("feature_log_created", service=service, root=FEATURE_LOG_DIR or None,
+                    format="parquet" if _pyarrow() is not None else "jsonl.gz")
+    return log
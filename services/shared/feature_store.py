@@ -0,0 +1,386 @@
+"""
+Feature store: named feature views read by entity id.
+
+Usage:
+    from shared.feature_store import get_feature_store
+
+    store = get_feature_store()
+    store.write("fraud_account", "user-1", {"proposals_sent_1h": 12})
+    store.get("fraud_account", "user-1")                  # {"proposals_sent_1h": 12, ...defaults}
+    store.get_many("match_freelancer", ["u1", "u2"])      # {"u1": {...}, "u2": {...}}
+    store.get_historical("fraud_account", [("user-1", ts)])   # values as of ts (training)
+
+A feature view is a fixed set of typed features about one kind of entity
+(an account, a freelancer). Every write is stored as a timestamped snapshot
+of the whole view, merged with the previous snapshot, so an offline read
+"as of" a label's timestamp sees exactly the values the services could have
+read at that moment, never later ones. Values older than the view's ttl_s
+count as missing and read as the feature defaults.
+
+Online reads go through an in-process read-through cache (LRU + TTL), and
+get_many fetches every uncached entity in one backend round trip.
+
+Backends (FEATURE_STORE_URL):
+  ""                         in-process SQLite (dev and tests)
+  sqlite:////path/to/db      SQLite file, shared by the workers on one host
+  redis://host:6379/0        Redis / Memorystore: one sorted set of snapshots per entity
+
+Environment:
+  FEATURE_STORE_URL            backend, see above (default in-process)
+  FEATURE_CACHE_TTL_S          read-through cache TTL (default 30)
+  FEATURE_CACHE_MAX_ENTRIES    default 10000
+  FEATURE_STORE_RETENTION_S    snapshot history kept (default 180 days)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+FEATURE_STORE_URL = os.getenv("FEATURE_STORE_URL", "")
+FEATURE_CACHE_TTL_S = float(os.getenv("FEATURE_CACHE_TTL_S", "30"))
+FEATURE_CACHE_MAX_ENTRIES = int(os.getenv("FEATURE_CACHE_MAX_ENTRIES", "10000"))
+FEATURE_STORE_RETENTION_S = float(os.getenv("FEATURE_STORE_RETENTION_S", str(180 * 86400)))
+
+# (values, event_time) of the latest snapshot at or before a point in time
+Record = Tuple[Dict[str, Any], float]
+
+_CASTS = {"int": int, "float": float, "str": str, "bool": bool, "list": list}
+
+
+# ── Definitions ──────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class Feature:
+    name: str
+    dtype: str = "float"  # int | float | str | bool | list
+    default: Any = None
+    description: str = ""
+
+    def coerce(self, value: Any) -> Any:
+        if value is None:
+            return self.default
+        try:
+            return _CASTS[self.dtype](value)
+        except (TypeError, ValueError):
+            return self.default
+
+
+@dataclass(frozen=True)
+class FeatureView:
+    name: str
+    entity: str
+    features: Tuple[Feature, ...]
+    ttl_s: Optional[float] = None  # None = values never go stale
+    description: str = ""
+    _by_name: Dict[str, Feature] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._by_name.update({f.name: f for f in self.features})
+
+    @property
+    def names(self) -> List[str]:
+        return [f.name for f in self.features]
+
+    def defaults(self) -> Dict[str, Any]:
+        # Fresh lists so callers can't mutate a shared default
+        return {f.name: list(f.default) if isinstance(f.default, list) else f.default for f in self.features}
+
+    def coerce(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Known features only, cast to their dtype; unknown keys are dropped."""
+        return {k: self._by_name[k].coerce(v) for k, v in values.items() if k in self._by_name}
+
+
+FRAUD_ACCOUNT = FeatureView(
+    name="fraud_account",
+    entity="account_id",
+    description="Account behaviour used by ai-fraud-v1 and the fraud training set",
+    ttl_s=7 * 86400,
+    features=(
+        Feature("account_created_at", "float", description="Unix time the account was created"),
+        Feature("email_domain", "str"),
+        Feature("ip_country", "str"),
+        Feature("device_fingerprint_count", "int"),
+        Feature("proposals_sent_1h", "int"),
+        Feature("proposals_sent_7d", "int"),
+        Feature("proposals_sent_30d", "int"),
+        Feature("proposals_sent_total", "int"),
+        Feature("avg_response_time_seconds", "float"),
+        Feature("profile_completeness", "float"),
+        Feature("payment_method_changes_30d", "int"),
+        Feature("dispute_count", "int"),
+        Feature("text_similarity_score", "float", description="Max similarity to the account's earlier cover letters"),
+    ),
+)
+
+MATCH_FREELANCER = FeatureView(
+    name="match_freelancer",
+    entity="freelancer_id",
+    description="Freelancer profile signals used by ai-match-v1 ranking",
+    ttl_s=30 * 86400,
+    features=(
+        Feature("skills", "list", default=[]),
+        Feature("hourly_rate", "float"),
+        Feature("experience_years", "int"),
+        Feature("profile_completeness", "float"),
+        Feature("verification_level", "str"),
+        Feature("avg_rating", "float"),
+        Feature("total_jobs_completed", "int"),
+    ),
+)
+
+FEATURE_VIEWS: Dict[str, FeatureView] = {v.name: v for v in (FRAUD_ACCOUNT, MATCH_FREELANCER)}
+
+
+# ── Backends ─────────────────────────────────────────────────────────
+
+class LocalBackend:
+    """Embedded SQLite backend (in-process by default, or a file)."""
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS features ("
+                " view TEXT NOT NULL, entity_id TEXT NOT NULL, event_time REAL NOT NULL, value_json TEXT NOT NULL,"
+                " PRIMARY KEY (view, entity_id, event_time))"
+            )
+
+    def write(self, view: str, entity_id: str, values: Dict[str, Any], event_time: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?)",
+                (view, entity_id, event_time, json.dumps(values)),
+            )
+
+    def read_latest(self, view: str, entity_ids: Sequence[str]) -> Dict[str, Record]:
+        out: Dict[str, Record] = {}
+        with self._lock:
+            for start in range(0, len(entity_ids), 500):
+                chunk = list(entity_ids[start:start + 500])
+                rows = self._conn.execute(
+                    "SELECT f.entity_id, f.value_json, f.event_time FROM features f"
+                    " JOIN (SELECT entity_id, MAX(event_time) AS t FROM features"
+                    f"       WHERE view = ? AND entity_id IN ({','.join('?' * len(chunk))}) GROUP BY entity_id) m"
+                    " ON f.entity_id = m.entity_id AND f.event_time = m.t WHERE f.view = ?",
+                    [view, *chunk, view],
+                ).fetchall()
+                out.update({entity_id: (json.loads(value), t) for entity_id, value, t in rows})
+        return out
+
+    def read_as_of(self, view: str, keys: Sequence[Tuple[str, float]]) -> List[Optional[Record]]:
+        out: List[Optional[Record]] = []
+        with self._lock:
+            for entity_id, as_of in keys:
+                row = self._conn.execute(
+                    "SELECT value_json, event_time FROM features"
+                    " WHERE view = ? AND entity_id = ? AND event_time <= ? ORDER BY event_time DESC LIMIT 1",
+                    (view, entity_id, as_of),
+                ).fetchone()
+                out.append((json.loads(row[0]), row[1]) if row else None)
+        return out
+
+    def prune(self, before: float) -> None:
+        """Drop snapshots older than before, keeping each entity's latest."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM features WHERE event_time < ? AND event_time < ("
+                " SELECT MAX(event_time) FROM features f WHERE f.view = features.view AND f.entity_id = features.entity_id)",
+                (before,),
+            )
+
+
+class RedisBackend:
+    """
+    Redis / Memorystore backend.
+
+    Each entity is a sorted set fs:<view>:<entity_id> of JSON snapshots
+    scored by event time; multi-gets are pipelined into one round trip.
+    """
+
+    def __init__(self, url: str, retention_s: float = FEATURE_STORE_RETENTION_S):
+        import redis
+
+        self.url = url
+        self.retention_s = retention_s
+        self._client = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _key(view: str, entity_id: str) -> str:
+        return f"fs:{view}:{entity_id}"
+
+    def write(self, view: str, entity_id: str, values: Dict[str, Any], event_time: float) -> None:
+        key = self._key(view, entity_id)
+        member = json.dumps({"t": event_time, "v": values})
+        pipe = self._client.pipeline(transaction=False)
+        pipe.zadd(key, {member: event_time})
+        pipe.zremrangebyscore(key, "-inf", f"({event_time - self.retention_s}")
+        pipe.execute()
+
+    def read_latest(self, view: str, entity_ids: Sequence[str]) -> Dict[str, Record]:
+        pipe = self._client.pipeline(transaction=False)
+        for entity_id in entity_ids:
+            pipe.zrevrange(self._key(view, entity_id), 0, 0)
+        out: Dict[str, Record] = {}
+        for entity_id, members in zip(entity_ids, pipe.execute()):
+            if members:
+                snapshot = json.loads(members[0])
+                out[entity_id] = (snapshot["v"], snapshot["t"])
+        return out
+
+    def read_as_of(self, view: str, keys: Sequence[Tuple[str, float]]) -> List[Optional[Record]]:
+        pipe = self._client.pipeline(transaction=False)
+        for entity_id, as_of in keys:
+            pipe.zrevrangebyscore(self._key(view, entity_id), as_of, "-inf", start=0, num=1)
+        out: List[Optional[Record]] = []
+        for members in pipe.execute():
+            snapshot = json.loads(members[0]) if members else None
+            out.append((snapshot["v"], snapshot["t"]) if snapshot else None)
+        return out
+
+    def prune(self, before: float) -> None:
+        # Trimmed on every write
+        return None
+
+
+def make_backend(url: str = FEATURE_STORE_URL):
+    if url.startswith("redis://") or url.startswith("rediss://"):
+        return RedisBackend(url)
+    if url.startswith("sqlite:///"):
+        return LocalBackend(url[len("sqlite:///"):])
+    if url:
+        raise ValueError(f"unsupported FEATURE_STORE_URL: {url!r}")
+    return LocalBackend()
+
+
+# ── Store ────────────────────────────────────────────────────────────
+
+class FeatureStore:
+    """Typed reads and writes of feature views over a backend, with a read-through cache."""
+
+    def __init__(
+        self,
+        backend=None,
+        views: Optional[Dict[str, FeatureView]] = None,
+        cache_ttl_s: float = FEATURE_CACHE_TTL_S,
+        cache_max_entries: int = FEATURE_CACHE_MAX_ENTRIES,
+        clock=time.time,
+    ):
+        self.backend = backend if backend is not None else LocalBackend()
+        self.views = views if views is not None else FEATURE_VIEWS
+        self.cache_ttl_s = cache_ttl_s
+        self.cache_max_entries = max(1, cache_max_entries)
+        self._clock = clock
+        # (view, entity_id) → (record or None, cached_at); misses are cached too
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[Optional[Record], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"cache_hits": 0, "cache_misses": 0, "backend_reads": 0, "writes": 0}
+
+    def view(self, name: str) -> FeatureView:
+        try:
+            return self.views[name]
+        except KeyError:
+            raise KeyError(f"unknown feature view: {name!r}") from None
+
+    def _values(self, view: FeatureView, record: Optional[Record], as_of: float) -> Dict[str, Any]:
+        values = view.defaults()
+        if record is None:
+            return values
+        stored, event_time = record
+        if view.ttl_s is not None and as_of - event_time > view.ttl_s:
+            return values
+        values.update(view.coerce(stored))
+        return values
+
+    # ── Online reads ─────────────────────────────────────────────────
+
+    def get(self, view: str, entity_id: str) -> Dict[str, Any]:
+        return self.get_many(view, [entity_id])[entity_id]
+
+    def get_many(self, view: str, entity_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Current features per entity id (defaults for unknown or stale entities)."""
+        spec = self.view(view)
+        now = self._clock()
+        records: Dict[str, Optional[Record]] = {}
+        missing: List[str] = []
+        with self._lock:
+            for entity_id in dict.fromkeys(entity_ids):
+                cached = self._cache.get((view, entity_id))
+                if cached is not None and now - cached[1] <= self.cache_ttl_s:
+                    self._cache.move_to_end((view, entity_id))
+                    records[entity_id] = cached[0]
+                    self.stats["cache_hits"] += 1
+                else:
+                    missing.append(entity_id)
+            self.stats["cache_misses"] += len(missing)
+
+        if missing:
+            fetched = self.backend.read_latest(view, missing)
+            with self._lock:
+                self.stats["backend_reads"] += 1
+                for entity_id in missing:
+                    records[entity_id] = fetched.get(entity_id)
+                    self._cache[(view, entity_id)] = (records[entity_id], now)
+                    self._cache.move_to_end((view, entity_id))
+                while len(self._cache) > self.cache_max_entries:
+                    self._cache.popitem(last=False)
+
+        return {entity_id: self._values(spec, record, now) for entity_id, record in records.items()}
+
+    # ── Writes ───────────────────────────────────────────────────────
+
+    def write(self, view: str, entity_id: str, values: Dict[str, Any], event_time: Optional[float] = None) -> None:
+        """
+        Record new values for some of the view's features, as of event_time (default now).
+
+        Features left out, or passed as None, keep their previous values.
+        """
+        spec = self.view(view)
+        event_time = self._clock() if event_time is None else event_time
+        previous = self.backend.read_as_of(view, [(entity_id, event_time)])[0]
+        updates = spec.coerce({k: v for k, v in values.items() if v is not None})
+        snapshot = {**(previous[0] if previous else {}), **updates}
+        self.backend.write(view, entity_id, snapshot, event_time)
+        with self._lock:
+            self._cache.pop((view, entity_id), None)
+            self.stats["writes"] += 1
+
+    # ── Offline reads ────────────────────────────────────────────────
+
+    def get_historical(self, view: str, keys: Sequence[Tuple[str, float]]) -> List[Dict[str, Any]]:
+        """
+        Point-in-time features for (entity_id, as_of) pairs, e.g. label rows.
+
+        Only snapshots written at or before as_of are visible, and one older
+        than the view's ttl_s at as_of reads as defaults, as it would have online.
+        """
+        spec = self.view(view)
+        records = self.backend.read_as_of(view, list(keys))
+        return [self._values(spec, record, as_of) for (_, as_of), record in zip(keys, records)]
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+_store: Optional[FeatureStore] = None
+
+
+def get_feature_store() -> FeatureStore:
+    """Process-wide store for FEATURE_STORE_URL, created on first use."""
+    global _store
+    if _store is None:
+        _store = FeatureStore(make_backend())
+        logger.info("feature_store_created", backend=type(_store.backend).__name__)
+    return _store
@@ -0,0 +1,374 @@
+"""
+End-to-end throughput harness for the AI service subscribers.
+
+Usage (from services/):
+    python -m shared.loadtest --events 500
+    python -m shared.loadtest --services ai-match-v1 --vertex-latency-ms 800 --json
+
+For every service, a subprocess starts the service's own subscribers
+(src.main._start_subscribers, so subscription names, ordering keys and
+handlers are the deployed ones) on the in-process Pub/Sub broker, publishes
+N synthetic events to each subscribed topic and waits until every delivery
+is acked. Vertex AI and the PHP internal API are replaced by stubs that
+only sleep for the configured latency.
+
+Reported per service:
+  - deliveries acked per second
+  - publish → ack latency percentiles (queueing + handler time)
+  - event-loop lag percentiles (how late a 10 ms timer fires)
+and per subscription:
+  - messages handled per second
+  - handler duration percentiles (p50/p95/p99), from the same measurement
+    as the ai_pubsub_handler_duration_seconds metric
+
+Services run in separate processes because each ships its own `src` package.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+import types
+import uuid
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+from unittest.mock import patch
+
+SERVICES_DIR = Path(__file__).resolve().parent.parent
+SERVICES = ("ai-scope-assistant", "ai-match-v1", "ai-fraud-v1", "verification-automation")
+
+LAG_INTERVAL = 0.01
+
+
+# ── Synthetic events ─────────────────────────────────────────────────
+
+_SKILLS = ["Python", "React", "Node.js", "PostgreSQL", "AWS", "Figma", "Go", "Kubernetes"]
+
+
+def _now() -> str:
+    from datetime import datetime, timezone
+    return datetime.now(timezone.utc).isoformat()
+
+
+def synthetic_event(topic: str, rng: random.Random) -> dict:
+    """One event shaped like what the PHP API publishes on topic."""
+    if topic == "job-published":
+        budget_min = float(rng.randrange(200, 5000, 100))
+        return {
+            "event": "job_published",
+            "job_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "title": f"Build a {rng.choice(['dashboard', 'mobile app', 'API', 'landing page'])}",
+            "description": "We need an experienced developer for a new project. " * rng.randint(1, 6),
+            "skills": rng.sample(_SKILLS, 3),
+            "budget_min": budget_min,
+            "budget_max": budget_min * 2,
+            "category": "web-development",
+            "experience_level": rng.choice(["entry", "intermediate", "expert", None]),
+            "timestamp": _now(),
+        }
+    if topic == "user-registered":
+        return {
+            "event": "user_registered",
+            "user_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "role": rng.choice(["freelancer", "client"]),
+            "email": f"user{rng.randint(1, 10**6)}@{rng.choice(['gmail.com', 'mailinator.com', 'acme.io'])}",
+            "timestamp": _now(),
+        }
+    if topic == "profile-ready":
+        return {
+            "event": "profile_ready",
+            "user_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "skills": rng.sample(_SKILLS, 4),
+            "bio": "Full-stack engineer focused on web platforms.",
+            "hourly_rate": float(rng.randint(20, 150)),
+            "experience_years": rng.randint(0, 15),
+            "timestamp": _now(),
+        }
+    if topic == "verification-submitted":
+        return {
+            "event": "verification_submitted",
+            "verification_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "user_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "type": rng.choice(["identity", "skill_assessment", "portfolio", "work_history"]),
+            "timestamp": _now(),
+        }
+    return {"event": topic.replace("-", "_"), "timestamp": _now()}
+
+
+# ── Stubbed Vertex AI / PHP API ──────────────────────────────────────
+
+_VERTEX_RESULTS = {
+    "analyze_scope_with_vertex": {
+        "milestones": [], "total_estimated_hours": 40, "complexity_tier": "moderate", "model": "stub",
+    },
+    "moderate_job_with_vertex": {"confidence": 0.9, "quality": 0.8, "flags": [], "model": "stub"},
+    "rank_with_vertex": {"rankings": [{"freelancer_id": "f-1", "score": 0.9}], "model": "stub"},
+    "generate_profile_embedding": {"primary_domain": "backend", "model": "stub"},
+    "analyze_account_fraud": {
+        "fraud_score": 0.1, "risk_tier": "low", "risk_factors": [], "recommended_action": "allow", "model": "stub",
+    },
+    "analyze_with_vertex": {"confidence": 0.9, "checks": [], "model": "stub"},
+}
+_VERTEX_RESULTS["analyze_and_moderate_job_with_vertex"] = {
+    "scope": _VERTEX_RESULTS["analyze_scope_with_vertex"],
+    "moderation": _VERTEX_RESULTS["moderate_job_with_vertex"],
+    "model": "stub",
+    "latency_ms": 0,
+}
+
+_CANDIDATES = [
+    {"freelancer_id": f"f-{i}", "skills": _SKILLS[i % len(_SKILLS):][:3], "hourly_rate": 50.0}
+    for i in range(20)
+]
+
+
+def _vertex_stub_module(latency: float) -> types.ModuleType:
+    module = types.ModuleType("src.vertex_ai")
+
+    def make(name: str):
+        async def stub(*args, **kwargs):
+            await asyncio.sleep(latency)
+            return dict(_VERTEX_RESULTS.get(name, {"model": "stub"}))
+        stub.__name__ = name
+        return stub
+
+    module.is_vertex_enabled = lambda: True
+    module.__getattr__ = make
+    return module
+
+
+@contextmanager
+def stubbed_backends(vertex_latency: float, api_latency: float) -> Iterator[None]:
+    """Replace src.vertex_ai and the PHP API callback with latency-only stubs."""
+    from shared.callback import api_callback
+
+    async def fake_request(method, path, data=None, retries=3, params=None):
+        await asyncio.sleep(api_latency)
+        if method == "GET" and path.endswith("/candidates"):
+            return {"candidates": _CANDIDATES}
+        return {"ok": True}
+
+    with ExitStack() as stack:
+        stack.enter_context(patch.dict(sys.modules, {"src.vertex_ai": _vertex_stub_module(vertex_latency)}))
+        stack.enter_context(patch.object(api_callback, "_request", fake_request))
+        yield
+
+
+# ── Measurement ──────────────────────────────────────────────────────
+
+def percentiles(
+    values: List[float], scale: float = 1000.0, points: Sequence[int] = (50, 90, 99),
+) -> Dict[str, float]:
+    """Percentiles (p50/p90/p99 by default) and max of values, scaled (seconds → ms by default)."""
+    if not values:
+        return {**{f"p{q}": 0.0 for q in points}, "max": 0.0}
+    ordered = sorted(values)
+
+    def pick(q: int) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))] * scale, 2)
+
+    return {**{f"p{q}": pick(q) for q in points}, "max": round(ordered[-1] * scale, 2)}
+
+
+@contextmanager
+def recorded_handler_durations(durations: Dict[str, List[float]]) -> Iterator[None]:
+    """Collect the handler durations shared.pubsub observes, per subscription."""
+    from shared import pubsub
+    from shared.metrics import PUBSUB_HANDLER_LATENCY
+
+    observe = pubsub.observe
+
+    def record(histogram, labels: tuple, value: float) -> None:
+        if histogram is PUBSUB_HANDLER_LATENCY:
+            durations.setdefault(labels[0], []).append(value)
+        observe(histogram, labels, value)
+
+    with patch.object(pubsub, "observe", record):
+        yield
+
+
+async def _sample_loop_lag(samples: List[float], stop: asyncio.Event) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + LAG_INTERVAL
+        await asyncio.sleep(LAG_INTERVAL)
+        samples.append(max(0.0, loop.time() - expected))
+
+
+async def run_service(
+    service: str,
+    events: int,
+    vertex_latency: float,
+    api_latency: float,
+    timeout: float = 120.0,
+    seed: int = 42,
+) -> dict:
+    """
+    Drive the already-importable `src` service through the in-memory broker.
+
+    Requires shared.pubsub.PUBSUB_BACKEND == "memory".
+    """
+    import src.main as service_main
+    from shared import pubsub
+    from shared.pubsub_memory import broker
+
+    if pubsub.PUBSUB_BACKEND != "memory":
+        raise RuntimeError("run_service needs PUBSUB_BACKEND=memory")
+
+    broker.reset()
+    rng = random.Random(seed)
+    lag: List[float] = []
+    handler_durations: Dict[str, List[float]] = {}
+    stop = asyncio.Event()
+
+    with stubbed_backends(vertex_latency, api_latency), recorded_handler_durations(handler_durations):
+        before = asyncio.all_tasks()
+        await service_main._start_subscribers()
+        # Let the subscriber tasks create their topics and subscriptions
+        for _ in range(20):
+            await asyncio.sleep(0.01)
+            if broker.subscriptions():
+                break
+        workers = asyncio.all_tasks() - before - {asyncio.current_task()}
+        lag_task = asyncio.create_task(_sample_loop_lag(lag, stop))
+
+        topics = sorted(path.rsplit("/", 1)[-1] for path in broker.subscribed_topics())
+        start = time.perf_counter()
+        for topic in topics:
+            for _ in range(events):
+                pubsub.publish_message(topic, synthetic_event(topic, rng))
+
+        deadline = start + timeout
+        while broker.pending() and time.perf_counter() < deadline:
+            await asyncio.sleep(0.005)
+        elapsed = time.perf_counter() - start
+        timed_out = broker.pending() > 0
+
+        stop.set()
+        await lag_task
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    return {
+        "service": service,
+        "topics": topics,
+        "published": broker.published,
+        "deliveries": broker.acked,
+        "elapsed_s": round(elapsed, 3),
+        "msgs_per_s": round(broker.acked / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": percentiles(broker.ack_latencies),
+        "loop_lag_ms": percentiles(lag),
+        "subscriptions": {
+            name: {
+                "handled": len(durations),
+                "msgs_per_s": round(len(durations) / elapsed, 1) if elapsed else 0.0,
+                "handler_ms": percentiles(durations, points=(50, 95, 99)),
+            }
+            for name, durations in sorted(handler_durations.items())
+        },
+        "timed_out": timed_out,
+    }
+
+
+# ── CLI ──────────────────────────────────────────────────────────────
+
+def _worker(args: argparse.Namespace) -> None:
+    import structlog
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    sys.path.insert(0, str(SERVICES_DIR / args.worker))
+    from shared import pubsub
+    pubsub.PUBSUB_BACKEND = "memory"
+
+    result = asyncio.run(run_service(
+        args.worker,
+        events=args.events,
+        vertex_latency=args.vertex_latency_ms / 1000,
+        api_latency=args.api_latency_ms / 1000,
+        timeout=args.timeout,
+        seed=args.seed,
+    ))
+    print(json.dumps(result))
+
+
+def _spawn(service: str, args: argparse.Namespace) -> Optional[dict]:
+    env = dict(
+        os.environ,
+        PUBSUB_BACKEND="memory",
+        PUBSUB_POLL_INTERVAL=str(args.poll_interval),
+        PUBSUB_MAX_MESSAGES=str(args.max_messages),
+        PROFILE_DEBOUNCE_QUIET_S=str(args.profile_quiet_s),
+        PYTHONPATH=os.pathsep.join([str(SERVICES_DIR / service), str(SERVICES_DIR)]),
+    )
+    cmd = [
+        sys.executable, "-m", "shared.loadtest",
+        "--worker", service,
+        "--events", str(args.events),
+        "--vertex-latency-ms", str(args.vertex_latency_ms),
+        "--api-latency-ms", str(args.api_latency_ms),
+        "--timeout", str(args.timeout),
+        "--seed", str(args.seed),
+    ]
+    proc = subprocess.run(cmd, cwd=SERVICES_DIR / service, env=env, capture_output=True, text=True)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        print(f"{service}: harness failed\n{proc.stderr[-2000:]}", file=sys.stderr)
+        return None
+    return json.loads(lines[-1])
+
+
+def _print_table(results: List[dict]) -> None:
+    header = f"{'service':<26}{'msgs':>7}{'msgs/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'lag p99':>10}{'lag max':>10}"
+    print(header)
+    print("─" * len(header))
+    for r in results:
+        flag = "  (timed out)" if r["timed_out"] else ""
+        print(
+            f"{r['service']:<26}{r['deliveries']:>7}{r['msgs_per_s']:>10}"
+            f"{r['latency_ms']['p50']:>10}{r['latency_ms']['p99']:>10}"
+            f"{r['loop_lag_ms']['p99']:>10}{r['loop_lag_ms']['max']:>10}{flag}"
+        )
+        for name, sub in r["subscriptions"].items():
+            handler = sub["handler_ms"]
+            print(
+                f"  {name:<24}{sub['handled']:>7}{sub['msgs_per_s']:>10}"
+                f"   handler p50 {handler['p50']} / p95 {handler['p95']} / p99 {handler['p99']} ms"
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay synthetic events through the AI service subscribers")
+    parser.add_argument("--services", nargs="+", default=list(SERVICES), choices=SERVICES)
+    parser.add_argument("--events", type=int, default=200, help="events per subscribed topic")
+    parser.add_argument("--vertex-latency-ms", type=float, default=400.0)
+    parser.add_argument("--api-latency-ms", type=float, default=20.0)
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="PUBSUB_POLL_INTERVAL for the run")
+    parser.add_argument("--max-messages", type=int, default=100, help="PUBSUB_MAX_MESSAGES for the run")
+    parser.add_argument("--profile-quiet-s", type=float, default=0.0, help="PROFILE_DEBOUNCE_QUIET_S for the run")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--worker", choices=SERVICES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        _worker(args)
+        return 0
+
+    results = [r for r in (_spawn(s, args) for s in args.services) if r]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_table(results)
+    return 0 if len(results) == len(args.services) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""
+Prometheus metrics for the AI services.
+
+Usage:
+    # main.py
+    from shared.metrics import install_metrics
+    install_metrics(app)                 # GET /metrics + per-route request latency
+
+    # vertex_ai.py
+    model = observe_model(_get_model(), "proposal_fraud")
+    response = model.generate_content(...)        # latency, errors by class, a span
+
+    # wherever the rules answer after Vertex AI failed
+    record_fallback("proposal_fraud")
+
+Token counts (shared.prompting.log_token_usage), Pub/Sub handlers
+(shared.pubsub.subscribe_async) and internal API callbacks
+(shared.callback.ApiCallback) are recorded by the shared modules themselves.
+
+Multi-process mode: the images run uvicorn with 2 workers, so a scrape hits
+one of them at random. With PROMETHEUS_MULTIPROC_DIR set (the Dockerfiles
+set it and clear it before uvicorn starts) every worker writes its samples
+to mmapped files in that directory and /metrics aggregates all workers.
+Without it (dev, tests) the process-local default registry is served.
+
+Recording costs one perf_counter pair and one labelled observe per event;
+label values are bounded (route templates, capabilities, subscriptions,
+callback paths with ids folded to {id}), never raw request data.
+
+Recording is best-effort: observe/inc/dec swallow errors from the sample
+store (e.g. an unwritable PROMETHEUS_MULTIPROC_DIR) and log them once, so a
+metrics problem never fails a Vertex AI call, a Pub/Sub ack or a callback.
+
+Env vars:
+  PROMETHEUS_MULTIPROC_DIR: shared sample directory for multi-worker mode
+"""
+
+import os
+import re
+import time
+from typing import Any, Callable, Dict, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client import generate_latest, multiprocess
+import structlog
+from opentelemetry.trace import SpanKind
+
+from shared.tracing import get_tracer, mark_error
+
+logger = structlog.get_logger()
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+VERTEX_BUCKETS = (0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 20.0, 60.0)
+
+REQUEST_LATENCY = Histogram(
+    "ai_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+VERTEX_LATENCY = Histogram(
+    "ai_vertex_request_duration_seconds",
+    "Vertex AI generate_content latency (streams: until the last chunk)",
+    ["capability", "outcome"],
+    buckets=VERTEX_BUCKETS,
+)
+VERTEX_ERRORS = Counter(
+    "ai_vertex_errors_total",
+    "Failed Vertex AI calls by exception class",
+    ["capability", "error"],
+)
+VERTEX_TOKENS = Counter(
+    "ai_vertex_tokens_total",
+    "Vertex AI tokens by kind (input, output, cached)",
+    ["capability", "kind"],
+)
+FALLBACKS = Counter(
+    "ai_fallback_total",
+    "Requests answered by the rules because Vertex AI failed or returned nothing usable",
+    ["capability"],
+)
+PUBSUB_HANDLER_LATENCY = Histogram(
+    "ai_pubsub_handler_duration_seconds",
+    "Pub/Sub message handler latency",
+    ["subscription", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+PUBSUB_BACKLOG = Gauge(
+    "ai_pubsub_backlog_messages",
+    "Messages pulled but not yet acked",
+    ["subscription"],
+    multiprocess_mode="livesum",
+)
+PUBSUB_REDELIVERIES = Counter(
+    "ai_pubsub_redeliveries_total",
+    "Messages delivered more than once",
+    ["subscription"],
+)
+CALLBACK_LATENCY = Histogram(
+    "ai_callback_duration_seconds",
+    "Internal API callback latency per attempt",
+    ["method", "endpoint", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+_ID_SEGMENT = re.compile(r"/[^/]*\d[^/]*")
+_record_failed = False
+
+
+# ── Recording ────────────────────────────────────────────────────────
+
+def observe(histogram: Histogram, labels: tuple, value: float) -> None:
+    _best_effort(lambda: histogram.labels(*labels).observe(value))
+
+
+def inc(metric: Any, labels: tuple, amount: float = 1) -> None:
+    _best_effort(lambda: metric.labels(*labels).inc(amount))
+
+
+def dec(gauge: Gauge, labels: tuple, amount: float = 1) -> None:
+    _best_effort(lambda: gauge.labels(*labels).dec(amount))
+
+
+def _best_effort(record: Callable[[], None]) -> None:
+    # labels() opens the worker's sample file in multi-process mode, so it
+    # is inside the try as well
+    global _record_failed
+    try:
+        record()
+    except Exception as e:
+        if not _record_failed:
+            _record_failed = True
+            logger.warning("metrics_record_failed", error=str(e), multiproc_dir=MULTIPROC_DIR)
+
+
+# ── Exposition ───────────────────────────────────────────────────────
+
+def render() -> bytes:
+    """Exposition text for every worker (multi-process) or this process."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges (lifespan shutdown, multi-process mode)."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def install_metrics(app) -> None:
+    """Add per-route request latency and GET /metrics to a FastAPI app."""
+    from fastapi import Response
+
+    app.add_middleware(RequestMetricsMiddleware, source=app)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(render(), media_type=CONTENT_TYPE_LATEST)
+
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware timing each HTTP request until its body is sent.
+
+    Labels use the matched route's path template; the router leaves the
+    matched endpoint in the scope, which is mapped back to its path.
+    Unmatched paths share one "unmatched" label.
+    """
+
+    def __init__(self, app, source):
+        self.app = app
+        self.source = source
+        self._paths: Optional[Dict[Callable, str]] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            observe(REQUEST_LATENCY, (scope["method"], self._route(scope), str(status)), time.perf_counter() - start)
+
+    def _route(self, scope) -> str:
+        if self._paths is None:
+            self._paths = {
+                route.endpoint: route.path
+                for route in self.source.routes
+                if getattr(route, "endpoint", None) is not None
+            }
+        return self._paths.get(scope.get("endpoint"), "unmatched")
+
+
+# ── Vertex AI ────────────────────────────────────────────────────────
+
+def observe_model(model: Any, capability: str) -> Any:
+    """Wrap a GenerativeModel so generate_content(_async) calls are timed and traced per capability."""
+    return _ObservedModel(model, capability)
+
+
+class _ObservedModel:
+    __slots__ = ("_model", "_capability")
+
+    def __init__(self, model: Any, capability: str):
+        self._model = model
+        self._capability = capability
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._model, name)
+
+    def generate_content(self, *args, **kwargs):
+        span, start = self._start()
+        try:
+            response = self._model.generate_content(*args, **kwargs)
+        except Exception as e:
+            self._done(span, start, error=e)
+            raise
+        if kwargs.get("stream"):
+            return self._sync_stream(response, span, start)
+        self._done(span, start, response)
+        return response
+
+    async def generate_content_async(self, *args, **kwargs):
+        span, start = self._start()
+        try:
+            response = await self._model.generate_content_async(*args, **kwargs)
+        except Exception as e:
+            self._done(span, start, error=e)
+            raise
+        if kwargs.get("stream"):
+            return self._async_stream(response, span, start)
+        self._done(span, start, response)
+        return response
+
+    def _sync_stream(self, chunks, span, start: float):
+        last = None
+        try:
+            for last in chunks:
+                yield last
+        except Exception as e:
+            self._done(span, start, error=e)
+            raise
+        self._done(span, start, last)  # usage metadata arrives on the final chunk
+
+    async def _async_stream(self, chunks, span, start: float):
+        last = None
+        try:
+            async for last in chunks:
+                yield last
+        except Exception as e:
+            self._done(span, start, error=e)
+            raise
+        self._done(span, start, last)
+
+    def _start(self):
+        span = get_tracer().start_span(
+            f"vertex generate_content {self._capability}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "gen_ai.system": "vertex_ai",
+                "gen_ai.request.model": str(getattr(self._model, "_model_name", "") or ""),
+                "ai.capability": self._capability,
+            },
+        )
+        return span, time.perf_counter()
+
+    def _done(self, span, start: float, response: Any = None, error: Optional[BaseException] = None) -> None:
+        outcome = "ok" if error is None else "error"
+        observe(VERTEX_LATENCY, (self._capability, outcome), time.perf_counter() - start)
+        if error is not None:
+            inc(VERTEX_ERRORS, (self._capability, type(error).__name__))
+            span.record_exception(error)
+            mark_error(span, type(error).__name__)
+        else:
+            usage = getattr(response, "usage_metadata", None)
+            for attribute, field in (
+                ("gen_ai.usage.input_tokens", "prompt_token_count"),
+                ("gen_ai.usage.output_tokens", "candidates_token_count"),
+            ):
+                value = getattr(usage, field, None)
+                if isinstance(value, int):
+                    span.set_attribute(attribute, value)
+        span.end()
+
+
+def record_tokens(capability: str, input_tokens: int, output_tokens: int, cached_tokens: Optional[int]) -> None:
+    inc(VERTEX_TOKENS, (capability, "input"), input_tokens)
+    inc(VERTEX_TOKENS, (capability, "output"), output_tokens)
+    if cached_tokens:
+        inc(VERTEX_TOKENS, (capability, "cached"), cached_tokens)
+
+
+def record_fallback(capability: str) -> None:
+    inc(FALLBACKS, (capability,))
+
+
+# ── Callbacks ────────────────────────────────────────────────────────
+
+def callback_endpoint(path: str) -> str:
+    """Path with id segments folded, e.g. /jobs/job-42/matches → /jobs/{id}/matches."""
+    return _ID_SEGMENT.sub("/{id}", path)
@@ -0,0 +1,295 @@
+"""
+Model versions and the registries trained model artifacts are fetched from.
+
+Usage:
+    from shared.model_registry import make_registry
+
+    registry = make_registry("vertex")                    # or gs://bucket/models, or a local dir
+    version = registry.resolve("fraud-v1", "latest")      # ModelVersion(name="fraud-v1", 1, 2, 0)
+    path = registry.fetch(version)                        # local directory with the artifact
+
+Versions are named like the pipelines register them (ModelVersion.display_name,
+e.g. mw-fraud-v1-v1.2.0). Registries:
+
+  vertex                   Vertex AI Model Registry: models labelled model_name=mw-<name>,
+                           artifacts downloaded from each model's artifact_uri
+  gs://bucket/prefix       <prefix>/<display_name>/ directories in Cloud Storage
+  /path/to/models          <path>/<display_name>/ directories on disk (dev and tests)
+
+Fetched artifacts are cached under MODEL_CACHE_DIR (default /tmp/models).
+
+The manifest (MODEL_MANIFEST_URI, a local file or gs:// object) names the
+version each service should serve; running services poll it and hot-swap
+(shared.model_serving). Promote or roll back from services/:
+
+    python -m shared.model_registry --manifest gs://.../manifest.json promote fraud-v1 v1.2.0
+    python -m shared.model_registry --manifest gs://.../manifest.json rollback fraud-v1
+    python -m shared.model_registry --manifest gs://.../manifest.json show
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "/tmp/models")
+MODEL_MANIFEST_URI = os.getenv("MODEL_MANIFEST_URI", "")
+
+
+@dataclass
+class ModelVersion:
+    name: str
+    major: int
+    minor: int
+    patch: int
+
+    @property
+    def display_name(self) -> str:
+        return f"mw-{self.name}-v{self.major}.{self.minor}.{self.patch}"
+
+    def bump_patch(self) -> 'ModelVersion':
+        return ModelVersion(self.name, self.major, self.minor, self.patch + 1)
+
+    def bump_minor(self) -> 'ModelVersion':
+        return ModelVersion(self.name, self.major, self.minor + 1, 0)
+
+    def bump_major(self) -> 'ModelVersion':
+        return ModelVersion(self.name, self.major + 1, 0, 0)
+
+    @classmethod
+    def parse(cls, display_name: str) -> 'ModelVersion':
+        match = re.match(r'mw-(.+)-v(\d+)\.(\d+)\.(\d+)', display_name)
+        if not match:
+            raise ValueError(f"Invalid model version format: {display_name}")
+        return cls(
+            name=match.group(1),
+            major=int(match.group(2)),
+            minor=int(match.group(3)),
+            patch=int(match.group(4)),
+        )
+
+    @property
+    def key(self) -> tuple:
+        return (self.major, self.minor, self.patch)
+
+    @property
+    def version(self) -> str:
+        return f"v{self.major}.{self.minor}.{self.patch}"
+
+
+class ModelRegistry:
+    """Lists the versions of a model and fetches one version's artifact directory."""
+
+    def display_names(self, name: str) -> List[str]:
+        raise NotImplementedError
+
+    def download(self, version: ModelVersion, dest: str) -> None:
+        raise NotImplementedError
+
+    def versions(self, name: str) -> List[ModelVersion]:
+        """Registered versions of name, oldest first."""
+        found = []
+        for display_name in self.display_names(name):
+            try:
+                version = ModelVersion.parse(display_name)
+            except ValueError:
+                continue
+            if version.name == name:
+                found.append(version)
+        return sorted(found, key=lambda v: v.key)
+
+    def resolve(self, name: str, spec: str = "latest") -> Optional[ModelVersion]:
+        """The version matching spec ("latest", "v1.2.0", "1.2.0" or a display name), or None."""
+        versions = self.versions(name)
+        if not versions:
+            return None
+        if spec in ("", "latest"):
+            return versions[-1]
+        wanted = spec if spec.startswith("mw-") else f"mw-{name}-v{spec.lstrip('v')}"
+        return next((v for v in versions if v.display_name == wanted), None)
+
+    def fetch(self, version: ModelVersion) -> str:
+        """Local directory holding the version's artifact (downloaded once)."""
+        dest = os.path.join(MODEL_CACHE_DIR, version.display_name)
+        if not os.path.exists(os.path.join(dest, ".complete")):
+            os.makedirs(dest, exist_ok=True)
+            self.download(version, dest)
+            open(os.path.join(dest, ".complete"), "w").close()
+            logger.info("model_artifact_fetched", model=version.display_name, path=dest)
+        return dest
+
+
+class LocalModelRegistry(ModelRegistry):
+    def __init__(self, root: str):
+        self.root = root
+
+    def display_names(self, name: str) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return [d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d))]
+
+    def fetch(self, version: ModelVersion) -> str:
+        return os.path.join(self.root, version.display_name)
+
+
+class GcsModelRegistry(ModelRegistry):
+    def __init__(self, uri: str):
+        self.bucket, _, prefix = uri[len("gs://"):].partition("/")
+        self.prefix = f"{prefix.rstrip('/')}/" if prefix else ""
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from google.cloud import storage
+
+            self._client = storage.Client()
+        return self._client
+
+    def display_names(self, name: str) -> List[str]:
+        blobs = self.client.list_blobs(self.bucket, prefix=f"{self.prefix}mw-{name}-v", delimiter="/")
+        list(blobs)  # prefixes are populated once the page is read
+        return [p[len(self.prefix):].rstrip("/") for p in blobs.prefixes]
+
+    def download(self, version: ModelVersion, dest: str) -> None:
+        _download_prefix(self.client, self.bucket, f"{self.prefix}{version.display_name}/", dest)
+
+
+class VertexModelRegistry(ModelRegistry):
+    def __init__(self, project: Optional[str] = None, region: Optional[str] = None):
+        self.project = project or os.getenv("GCP_PROJECT_ID", "monkeyswork")
+        self.region = region or os.getenv("REGION", "us-central1")
+        self._artifacts = {}
+
+    def display_names(self, name: str) -> List[str]:
+        from google.cloud import aiplatform
+
+        aiplatform.init(project=self.project, location=self.region)
+        models = aiplatform.Model.list(filter=f'labels.model_name="mw-{name}"')
+        self._artifacts.update({m.display_name: m.uri for m in models})
+        return [m.display_name for m in models]
+
+    def download(self, version: ModelVersion, dest: str) -> None:
+        from google.cloud import storage
+
+        uri = self._artifacts.get(version.display_name)
+        if not uri:
+            self.display_names(version.name)
+            uri = self._artifacts[version.display_name]
+        bucket, _, prefix = uri[len("gs://"):].partition("/")
+        _download_prefix(storage.Client(), bucket, f"{prefix.rstrip('/')}/", dest)
+
+
+def _download_prefix(client, bucket: str, prefix: str, dest: str) -> None:
+    for blob in client.list_blobs(bucket, prefix=prefix):
+        relative = blob.name[len(prefix):]
+        if not relative or relative.endswith("/"):
+            continue
+        path = os.path.join(dest, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        blob.download_to_filename(path)
+
+
+def make_registry(uri: str) -> ModelRegistry:
+    if uri == "vertex":
+        return VertexModelRegistry()
+    if uri.startswith("gs://"):
+        return GcsModelRegistry(uri)
+    return LocalModelRegistry(uri)
+
+
+# ── Manifest ─────────────────────────────────────────────────────────
+#
+# {"models": {"fraud-v1": {"version": "v1.2.0", "previous": "v1.1.0", "updated_at": 1760000000.0}}}
+
+def read_manifest(uri: str) -> Dict[str, dict]:
+    """Model name → entry; empty when the manifest does not exist yet."""
+    if uri.startswith("gs://"):
+        from google.cloud import storage
+
+        bucket, _, name = uri[len("gs://"):].partition("/")
+        blob = storage.Client().bucket(bucket).blob(name)
+        if not blob.exists():
+            return {}
+        text = blob.download_as_text()
+    else:
+        if not os.path.exists(uri):
+            return {}
+        with open(uri) as f:
+            text = f.read()
+    return json.loads(text).get("models", {})
+
+
+def write_manifest(uri: str, models: Dict[str, dict]) -> None:
+    text = json.dumps({"models": models}, indent=2, sort_keys=True)
+    if uri.startswith("gs://"):
+        from google.cloud import storage
+
+        bucket, _, name = uri[len("gs://"):].partition("/")
+        storage.Client().bucket(bucket).blob(name).upload_from_string(text, content_type="application/json")
+        return
+    tmp = f"{uri}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, uri)
+
+
+def manifest_version(uri: str, name: str) -> Optional[str]:
+    """The version spec the manifest names for a model, or None."""
+    entry = read_manifest(uri).get(name)
+    return entry.get("version") if entry else None
+
+
+def promote(uri: str, name: str, version: str) -> dict:
+    """Point the manifest at version, remembering the current one for rollback."""
+    models = read_manifest(uri)
+    current = models.get(name, {}).get("version")
+    models[name] = {"version": version, "previous": current, "updated_at": time.time()}
+    write_manifest(uri, models)
+    logger.info("model_promoted", model=name, version=version, previous=current)
+    return models[name]
+
+
+def rollback(uri: str, name: str) -> dict:
+    """Point the manifest back at the previously promoted version."""
+    entry = read_manifest(uri).get(name) or {}
+    if not entry.get("previous"):
+        raise ValueError(f"no previous version of {name} to roll back to")
+    return promote(uri, name, entry["previous"])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Show, promote or roll back served model versions")
+    parser.add_argument("--manifest", default=MODEL_MANIFEST_URI, help="manifest path or gs:// URI")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("show")
+    promote_cmd = commands.add_parser("promote")
+    promote_cmd.add_argument("name", help="model name, e.g. fraud-v1")
+    promote_cmd.add_argument("version", help="v1.2.0 or latest")
+    rollback_cmd = commands.add_parser("rollback")
+    rollback_cmd.add_argument("name")
+    args = parser.parse_args(argv)
+    if not args.manifest:
+        parser.error("--manifest or MODEL_MANIFEST_URI is required")
+
+    if args.command == "promote":
+        result = promote(args.manifest, args.name, args.version)
+    elif args.command == "rollback":
+        result = rollback(args.manifest, args.name)
+    else:
+        result = read_manifest(args.manifest)
+    json.dump(result, sys.stdout, indent=2, sort_keys=True)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,400 @@
+"""
+In-process serving of registered models.
+
+Usage:
+    from shared.model_serving import get_model_server
+
+    server = get_model_server("fraud-v1", "latest")
+    await server.start()                            # at startup: load, then poll the manifest
+    model = server.model                            # take one reference per request
+    if model is not None:
+        score = await model.score(features)         # one row, micro-batched with concurrent calls
+        scores = model.predict(rows)                # or a whole batch at once
+        version = model.display_name                # stamp the version that actually scored
+
+The version is resolved in MODEL_REGISTRY_URI (shared.model_registry) and the
+artifact directory is loaded into the process, so a check costs one in-memory
+prediction instead of a network hop to an endpoint. The directory holds the
+model file and a metadata.json:
+
+    {"features": ["account_age_days", ...],          # column order the model was trained on
+     "categories": {"entity_type": ["proposal", ...]}}  # optional: string features → index
+
+Model files, by kind:
+  model.json / model.ubj   XGBoost booster (xgboost)
+  model.onnx               ONNX graph (onnxruntime)
+  model.joblib             scikit-learn estimator (joblib)
+  linear.json              logistic regression {"coef": [...], "intercept": b} (numpy only)
+
+Rows are dicts of feature values; missing or None values become NaN. The
+prediction is the positive-class probability (or the regression output).
+Callers keep their rule-based scoring as the fallback: server.model is None
+when no registry is configured or the load failed.
+
+Hot swap: the server polls MODEL_MANIFEST_URI (shared.model_registry) every
+MODEL_REFRESH_S. When the manifest names another version it is fetched,
+loaded and warmed in a worker thread while the current model keeps serving,
+then swapped in with a single reference assignment; requests already holding
+the old model finish on it. The replaced model stays resident, so rolling
+back to it (rollback(), or the manifest naming it again) is instant. A pinned
+server (pin(), MODEL_PINNED) ignores the manifest.
+
+Environment:
+  MODEL_REGISTRY_URI     vertex, gs://bucket/prefix or a local directory; empty disables
+  MODEL_MANIFEST_URI     served-version manifest (local file or gs://); empty = MODEL_VERSION only
+  MODEL_REFRESH_S        manifest poll interval (default 60)
+  MODEL_BATCH_MAX        rows per micro-batch (default 64)
+  MODEL_BATCH_WAIT_MS    how long a request waits for others to join its batch (default 2)
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import structlog
+
+from shared.model_registry import MODEL_MANIFEST_URI, ModelRegistry, ModelVersion, make_registry, manifest_version
+
+logger = structlog.get_logger()
+
+MODEL_REGISTRY_URI = os.getenv("MODEL_REGISTRY_URI", "")
+MODEL_BATCH_MAX = int(os.getenv("MODEL_BATCH_MAX", "64"))
+MODEL_BATCH_WAIT_MS = float(os.getenv("MODEL_BATCH_WAIT_MS", "2"))
+MODEL_REFRESH_S = float(os.getenv("MODEL_REFRESH_S", "60"))
+
+
+# ── Loaded models ────────────────────────────────────────────────────
+
+class LoadedModel:
+    """A model artifact in memory, scoring feature dicts in batches."""
+
+    def __init__(
+        self,
+        version: ModelVersion,
+        kind: str,
+        features: List[str],
+        predict_matrix: Callable[[np.ndarray], np.ndarray],
+        categories: Optional[Dict[str, List[str]]] = None,
+    ):
+        self.version = version
+        self.kind = kind
+        self.features = features
+        self.categories = {k: {v: i for i, v in enumerate(vs)} for k, vs in (categories or {}).items()}
+        self._predict_matrix = predict_matrix
+        self._batcher: Optional["BatchingScorer"] = None
+
+    @property
+    def display_name(self) -> str:
+        return self.version.display_name
+
+    def matrix(self, rows: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """(len(rows), len(features)) float32 matrix in training column order."""
+        out = np.full((len(rows), len(self.features)), np.nan, dtype=np.float32)
+        for j, name in enumerate(self.features):
+            codes = self.categories.get(name)
+            for i, row in enumerate(rows):
+                value = row.get(name)
+                if value is None:
+                    continue
+                if codes is not None:
+                    value = codes.get(value)
+                    if value is None:
+                        continue
+                out[i, j] = float(value)
+        return out
+
+    def predict(self, rows: Sequence[Dict[str, Any]]) -> np.ndarray:
+        if not rows:
+            return np.zeros(0, dtype=np.float32)
+        return np.asarray(self._predict_matrix(self.matrix(rows)), dtype=np.float32).reshape(len(rows))
+
+    async def score(self, row: Dict[str, Any]) -> float:
+        """Score one row, batched with concurrent callers of this model."""
+        if self._batcher is None:
+            self._batcher = BatchingScorer(self.predict)
+        return await self._batcher.score(row)
+
+
+def _xgboost(path: str):
+    import xgboost
+
+    booster = xgboost.Booster()
+    booster.load_model(path)
+    return lambda x: booster.inplace_predict(x)
+
+
+def _onnx(path: str):
+    import onnxruntime
+
+    session = onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"])
+    input_name = session.get_inputs()[0].name
+
+    def predict(x):
+        output = session.run(None, {input_name: x})[-1]
+        if isinstance(output, list):  # ZipMap: one {label: probability} dict per row
+            return np.array([row.get(1, row.get("1", 0.0)) for row in output])
+        output = np.asarray(output)
+        return output[:, -1] if output.ndim == 2 else output
+
+    return predict
+
+
+def _sklearn(path: str):
+    import joblib
+
+    estimator = joblib.load(path)
+    if hasattr(estimator, "predict_proba"):
+        return lambda x: estimator.predict_proba(x)[:, 1]
+    return estimator.predict
+
+
+def _linear(path: str):
+    with open(path) as f:
+        spec = json.load(f)
+    coef = np.asarray(spec["coef"], dtype=np.float32)
+    intercept = float(spec.get("intercept", 0.0))
+
+    def predict(x):
+        z = np.nan_to_num(x) @ coef + intercept
+        return 1.0 / (1.0 + np.exp(-z))
+
+    return predict
+
+
+# file name → (kind, loader), in preference order
+_LOADERS = (
+    ("model.onnx", "onnx", _onnx),
+    ("model.json", "xgboost", _xgboost),
+    ("model.ubj", "xgboost", _xgboost),
+    ("model.joblib", "sklearn", _sklearn),
+    ("linear.json", "linear", _linear),
+)
+
+
+def load_model(path: str, version: ModelVersion) -> LoadedModel:
+    """Load the artifact directory of one registered version."""
+    with open(os.path.join(path, "metadata.json")) as f:
+        metadata = json.load(f)
+    for filename, kind, loader in _LOADERS:
+        model_file = os.path.join(path, filename)
+        if os.path.exists(model_file):
+            return LoadedModel(version, kind, metadata["features"], loader(model_file), metadata.get("categories"))
+    raise FileNotFoundError(f"no supported model file in {path}")
+
+
+# ── Micro-batching ───────────────────────────────────────────────────
+
+class BatchingScorer:
+    """
+    Coalesces concurrent single-row requests into one predict call.
+
+    The first request of a batch waits up to max_wait_ms for others; a full
+    batch is scored immediately. Prediction runs in a worker thread so the
+    event loop keeps accepting requests meanwhile.
+    """
+
+    def __init__(
+        self,
+        predict: Callable[[List[dict]], Sequence[float]],
+        max_batch: int = MODEL_BATCH_MAX,
+        max_wait_ms: float = MODEL_BATCH_WAIT_MS,
+    ):
+        self.predict = predict
+        self.max_batch = max(1, max_batch)
+        self.max_wait_s = max_wait_ms / 1000.0
+        self._pending: List[tuple] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+
+    async def score(self, row: dict) -> float:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((row, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait_s, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch: List[tuple]) -> None:
+        self.batches += 1
+        try:
+            scores = await asyncio.to_thread(self.predict, [row for row, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), score in zip(batch, scores):
+            if not future.done():
+                future.set_result(float(score))
+
+
+# ── Servers ──────────────────────────────────────────────────────────
+
+class ModelServer:
+    """One named model: loaded and warmed at startup, hot-swapped from the manifest."""
+
+    def __init__(
+        self,
+        name: str,
+        version_spec: str = "latest",
+        registry_uri: str = MODEL_REGISTRY_URI,
+        manifest_uri: str = MODEL_MANIFEST_URI,
+        refresh_s: float = MODEL_REFRESH_S,
+        pinned: bool = False,
+    ):
+        self.name = name
+        self.version_spec = version_spec
+        self.registry_uri = registry_uri
+        self.manifest_uri = manifest_uri
+        self.refresh_s = refresh_s
+        self.pinned = pinned
+        self.model: Optional[LoadedModel] = None
+        self.previous: Optional[LoadedModel] = None
+        self.swaps = 0
+        self._registry: Optional[ModelRegistry] = None
+        self._lock = threading.Lock()  # one load/swap at a time (poller vs pin/rollback)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.registry_uri)
+
+    @property
+    def version(self) -> Optional[str]:
+        model = self.model
+        return model.display_name if model is not None else None
+
+    @property
+    def registry(self) -> ModelRegistry:
+        if self._registry is None:
+            self._registry = make_registry(self.registry_uri)
+        return self._registry
+
+    def _wanted_spec(self) -> str:
+        if self.manifest_uri and not self.pinned:
+            return manifest_version(self.manifest_uri, self.name) or self.version_spec
+        return self.version_spec
+
+    def _load_version(self, version: ModelVersion) -> LoadedModel:
+        start = time.monotonic()
+        model = load_model(self.registry.fetch(version), version)
+        model.predict([{}])  # warm-up: first call pays for lazy initialisation
+        logger.info("model_loaded", model=model.display_name, kind=model.kind, features=len(model.features),
+                    load_ms=int((time.monotonic() - start) * 1000))
+        return model
+
+    def _swap(self, model: LoadedModel) -> None:
+        old, self.model = self.model, model  # requests holding the old reference finish on it
+        self.previous = old
+        self.swaps += 1
+        logger.info("model_swapped", model=self.name, version=model.display_name,
+                    previous=old.display_name if old is not None else None)
+
+    def _activate(self, spec: str) -> bool:
+        """Serve the version spec resolves to; True if the active model changed."""
+        with self._lock:
+            version = self.registry.resolve(self.name, spec)
+            if version is None:
+                logger.warning("model_version_not_found", model=self.name, spec=spec, registry=self.registry_uri)
+                return False
+            if self.model is not None and self.model.version == version:
+                return False
+            if self.previous is not None and self.previous.version == version:
+                self._swap(self.previous)  # already resident: instant
+                return True
+            self._swap(self._load_version(version))
+            return True
+
+    def load(self) -> Optional[LoadedModel]:
+        """Load the manifest's (or the configured) version; None (rules only) on failure."""
+        if not self.enabled:
+            return None
+        try:
+            self._activate(self._wanted_spec())
+        except Exception:
+            logger.exception("model_load_failed", model=self.name, spec=self.version_spec)
+        return self.model
+
+    def refresh(self) -> bool:
+        """Poll the manifest once and hot-swap if it names another version."""
+        if not self.enabled or not self.manifest_uri or self.pinned:
+            return False
+        try:
+            return self._activate(self._wanted_spec())
+        except Exception:
+            logger.exception("model_refresh_failed", model=self.name)
+            return False
+
+    def pin(self, spec: str) -> bool:
+        """Serve spec and stop following the manifest until unpin()."""
+        self.pinned = True
+        self.version_spec = spec
+        return self._activate(spec)
+
+    def unpin(self) -> None:
+        self.pinned = False
+
+    def rollback(self) -> bool:
+        """Swap back to the previously served model (still in memory) and pin it."""
+        with self._lock:
+            if self.previous is None:
+                return False
+            self.pinned = True
+            self.version_spec = self.previous.version.version
+            self._swap(self.previous)
+            return True
+
+    async def start(self) -> None:
+        """Load off the event loop, then poll the manifest in the background."""
+        await asyncio.to_thread(self.load)
+        if self.enabled and self.manifest_uri and self._task is None:
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_s)
+            await asyncio.to_thread(self.refresh)
+
+    async def score(self, row: dict) -> float:
+        """Score one row with the active model, batched with concurrent callers."""
+        model = self.model
+        if model is None:
+            raise RuntimeError(f"model {self.name} is not loaded")
+        return await model.score(row)
+
+
+_servers: Dict[str, ModelServer] = {}
+
+
+def get_model_server(
+    name: str, version_spec: str = "latest", pinned: bool = False, key: Optional[str] = None
+) -> ModelServer:
+    """
+    Process-wide server for a model, created on first use (start() it at startup).
+
+    key (default: name) lets one process serve two versions of a model side
+    by side, e.g. key="match-v1:treatment" for an experiment arm.
+    """
+    key = key or name
+    server = _servers.get(key)
+    if server is None:
+        server = _servers[key] = ModelServer(name, version_spec, pinned=pinned)
+    return server
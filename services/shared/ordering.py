@@ -0,0 +1,128 @@
+"""
+Per-entity serial execution for Pub/Sub handlers.
+
+Usage:
+    from shared.ordering import KeyedSerialExecutor
+    executor = KeyedSerialExecutor()
+    task = executor.submit(job_id, lambda: handler(data), token=message_id,
+                           timestamp=data.get("timestamp"))
+
+Work for the same key (job_id, user_id, ...) never runs concurrently, and
+only the latest state is computed: submitting newer work for a key cancels
+whatever is still queued or in flight for it. Work for different keys runs
+concurrently.
+"""
+
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+import structlog
+
+logger = structlog.get_logger()
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO-8601 event timestamp; None if missing or malformed."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+class KeyedSerialExecutor:
+    """Run at most one handler per key; newer submissions supersede older ones."""
+
+    def __init__(self, name: str = "", max_tracked_keys: int = 10_000):
+        self.name = name
+        self.max_tracked_keys = max_tracked_keys
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._tokens: Dict[str, str] = {}
+        # Newest accepted event time per key (LRU-bounded)
+        self._latest: "OrderedDict[str, datetime]" = OrderedDict()
+        self.superseded = 0
+        self.stale = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def submit(
+        self,
+        key: str,
+        work: Callable[[], Awaitable[None]],
+        *,
+        token: Optional[str] = None,
+        timestamp: Optional[str] = None,
+    ) -> Optional[asyncio.Task]:
+        """
+        Schedule work for key.
+
+        Returns the task running it, or None if the event is older than one
+        already accepted for the key (stale). A token equal to the in-flight
+        one (e.g. a redelivered message_id) returns the existing task instead
+        of restarting it.
+        """
+        current = self._tasks.get(key)
+        if current is not None and token is not None and self._tokens.get(key) == token:
+            return current
+
+        event_time = _parse_timestamp(timestamp)
+        latest = self._latest.get(key)
+        if event_time is not None and latest is not None:
+            try:
+                is_stale = event_time < latest
+            except TypeError:  # naive vs aware timestamps
+                is_stale = False
+            if is_stale:
+                self.stale += 1
+                logger.info("ordered_work_stale", executor=self.name, key=key)
+                return None
+        if event_time is not None:
+            self._latest[key] = event_time
+            self._latest.move_to_end(key)
+            if len(self._latest) > self.max_tracked_keys:
+                self._latest.popitem(last=False)
+
+        if current is not None and not current.done():
+            current.cancel()
+            self.superseded += 1
+            logger.info("ordered_work_superseded", executor=self.name, key=key)
+
+        task = asyncio.create_task(self._run(key, work, current))
+        self._tasks[key] = task
+        if token is not None:
+            self._tokens[key] = token
+        else:
+            self._tokens.pop(key, None)
+        task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        return task
+
+    async def _run(
+        self,
+        key: str,
+        work: Callable[[], Awaitable[None]],
+        previous: Optional[asyncio.Task],
+    ) -> None:
+        # Let the superseded run unwind before starting, so a key never
+        # has two handlers interleaving their callbacks.
+        if previous is not None and not previous.done():
+            await asyncio.wait({previous})
+        await work()
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+            self._tokens.pop(key, None)
+
+    async def wait_for_capacity(self, limit: int) -> None:
+        """Block until fewer than limit keys are in flight."""
+        while len(self._tasks) >= limit:
+            await asyncio.wait(set(self._tasks.values()), return_when=asyncio.FIRST_COMPLETED)
+
+    async def drain(self) -> None:
+        """Wait for everything currently scheduled to finish."""
+        while self._tasks:
+            await asyncio.wait(set(self._tasks.values()))
@@ -0,0 +1,141 @@
+"""
+Product quantization (PQ) with asymmetric distance computation (ADC).
+
+Usage:
+    pq = ProductQuantizer.train(vectors, m=48, embedder=embedder.name)   # offline (see ml/match_v1/pipeline.py)
+    pq.save("codebook.npz")
+    ...
+    pq = ProductQuantizer.load("codebook.npz")        # service startup; check pq.embedder
+    codes = pq.encode(vectors)                        # (n, m) uint8
+    table = pq.lookup_table(query)                    # (m, 256) float32
+    scores = adc_scores(codes, table)                 # ≈ vectors @ query
+
+Each vector is split into m sub-vectors of dim / m values, and each
+sub-vector is replaced by the index of its nearest centroid in that
+subspace's 256-entry codebook, so a 384-dim float32 vector (1536 bytes)
+becomes m bytes. A query is not quantized: its inner product with every
+centroid is computed once per search (the lookup table), and a vector's
+approximate score is the sum of m table entries picked by its codes.
+
+Codebook file (.npz), also written by the match pipeline:
+    codebooks   (m, 256, dim // m) float32
+    embedder    () str, name of the embedder the training vectors came from
+                (shared.embeddings *.name); centroids only fit that embedder's
+                vectors, even where another embedder has the same dim
+"""
+
+import hashlib
+import io
+from typing import Optional
+
+import numpy as np
+import structlog
+
+logger = structlog.get_logger()
+
+KSUB = 256
+_CHUNK_ROWS = 65536
+
+
+def adc_scores(codes: np.ndarray, table: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Approximate inner products: sum over subspaces of table[j, codes[:, j]]."""
+    if out is None:
+        out = np.zeros(len(codes), dtype=np.float32)
+    else:
+        out[:] = 0
+    for j in range(codes.shape[1]):
+        out += table[j].take(codes[:, j])
+    return out
+
+
+class ProductQuantizer:
+    """m sub-quantizers of 256 centroids each."""
+
+    def __init__(self, codebooks: np.ndarray, embedder: Optional[str] = None):
+        self.codebooks = np.ascontiguousarray(codebooks, dtype=np.float32)
+        self.embedder = embedder
+        self.m, ksub, self.dsub = self.codebooks.shape
+        if ksub != KSUB:
+            raise ValueError(f"expected {KSUB} centroids per subspace, got {ksub}")
+        self.dim = self.m * self.dsub
+        self.id = hashlib.sha256(self.codebooks.tobytes()).hexdigest()[:12]
+
+    @classmethod
+    def train(
+        cls, vectors: np.ndarray, m: int = 48, iterations: int = 20, seed: int = 0, embedder: Optional[str] = None,
+    ) -> "ProductQuantizer":
+        """k-means (256 centroids) in each of the m subspaces."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n, dim = vectors.shape
+        if dim % m:
+            raise ValueError(f"dim {dim} is not divisible by m={m}")
+        if n < KSUB:
+            raise ValueError(f"need at least {KSUB} training vectors, got {n}")
+        dsub = dim // m
+        rng = np.random.default_rng(seed)
+        codebooks = np.empty((m, KSUB, dsub), dtype=np.float32)
+        for j in range(m):
+            sub = vectors[:, j * dsub:(j + 1) * dsub]
+            centroids = sub[rng.choice(n, size=KSUB, replace=False)].copy()
+            for _ in range(iterations):
+                assign = cls._nearest(sub, centroids)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assign, sub)
+                counts = np.bincount(assign, minlength=KSUB)[:, None]
+                # Empty centroids keep their position
+                centroids = np.where(counts > 0, sums / np.maximum(counts, 1), centroids)
+            codebooks[j] = centroids
+        logger.info("pq_trained", vectors=n, dim=dim, m=m)
+        return cls(codebooks, embedder)
+
+    @staticmethod
+    def _nearest(sub: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        # argmin ‖x − c‖² = argmin (‖c‖² − 2·x·c)
+        return np.argmin((centroids * centroids).sum(axis=1) - 2 * sub @ centroids.T, axis=1)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for start in range(0, len(vectors), _CHUNK_ROWS):
+            block = vectors[start:start + _CHUNK_ROWS]
+            for j in range(self.m):
+                sub = block[:, j * self.dsub:(j + 1) * self.dsub]
+                codes[start:start + len(block), j] = self._nearest(sub, self.codebooks[j])
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return np.concatenate([self.codebooks[j][codes[:, j]] for j in range(self.m)], axis=1)
+
+    def lookup_table(self, query: np.ndarray) -> np.ndarray:
+        """(m, 256) inner products of each query sub-vector with each centroid."""
+        sub = np.asarray(query, dtype=np.float32).reshape(self.m, 1, self.dsub)
+        return (self.codebooks * sub).sum(axis=2)
+
+    # ── Files ────────────────────────────────────────────────────────
+
+    def save(self, path: str) -> None:
+        if self.embedder is None:
+            np.savez(path, codebooks=self.codebooks)
+        else:
+            np.savez(path, codebooks=self.codebooks, embedder=np.array(self.embedder))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ProductQuantizer":
+        with np.load(io.BytesIO(data)) as f:
+            embedder = str(f["embedder"]) if "embedder" in f.files else None
+            return cls(f["codebooks"], embedder)
+
+    @classmethod
+    def load(cls, uri: str) -> "ProductQuantizer":
+        """Codebook from a local path or gs://bucket/object."""
+        if uri.startswith("gs://"):
+            from google.cloud import storage
+
+            bucket, _, name = uri[len("gs://"):].partition("/")
+            data = storage.Client().bucket(bucket).blob(name).download_as_bytes()
+        else:
+            with open(uri, "rb") as f:
+                data = f.read()
+        pq = cls.from_bytes(data)
+        logger.info("pq_codebook_loaded", uri=uri, id=pq.id, m=pq.m, dim=pq.dim, embedder=pq.embedder)
+        return pq
@@ -0,0 +1,283 @@
+"""
+Prompt compaction and per-capability token budgets for Vertex AI calls.
+
+Usage:
+    from shared.prompting import PromptBuilder, log_token_usage
+
+    builder = PromptBuilder(SCOPE_PROMPT, "scope_analysis")
+    builder.add("title", title, priority=0)
+    builder.add("description", description, priority=2, min_tokens=200)
+    prompt = builder.build()           # fits PROMPT_BUDGET_SCOPE_ANALYSIS
+    ...
+    log_token_usage("scope_analysis", response, prompt)
+
+Every template placeholder is a field with a priority (0 = keep intact,
+larger = cut first). When the rendered prompt exceeds the capability's
+budget, the highest-priority-number fields are shortened first: text fields
+are cut at a word boundary, item lists (candidates, evidence entries) lose
+trailing items. A field never shrinks below its min_tokens / min_items.
+
+Token counts are estimated at ~4 characters per token, which is close
+enough for Gemini on English text to size budgets; log_token_usage records
+the exact counts from the response's usage metadata when they are present.
+"""
+
+import json
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import structlog
+
+from shared.metrics import record_tokens
+
+logger = structlog.get_logger()
+
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = " …[truncated]"
+
+# Default input budgets (tokens) per capability.
+# Override with PROMPT_BUDGET_<CAPABILITY>, e.g. PROMPT_BUDGET_MATCH_RANKING=8000.
+DEFAULT_BUDGETS: Dict[str, int] = {
+    "scope_analysis": 2500,
+    "job_moderation": 2500,
+    "scope_moderation": 3000,
+    "scope_moderation_batch": 24000,
+    "job_enhance": 2500,
+    "proposal": 3500,
+    "match_ranking": 12000,
+    "profile_embedding": 1500,
+    "account_fraud": 800,
+    "proposal_fraud": 2000,
+    "behavior_anomaly": 800,
+    "verification": 4000,
+}
+FALLBACK_BUDGET = 4000
+
+
+def budget_for(capability: str) -> int:
+    """Input token budget for a capability (env override wins)."""
+    env = os.getenv(f"PROMPT_BUDGET_{capability.upper()}")
+    if env:
+        try:
+            return int(env)
+        except ValueError:
+            logger.warning("prompt_budget_invalid", capability=capability, value=env)
+    return DEFAULT_BUDGETS.get(capability, FALLBACK_BUDGET)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars per token)."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+# ── Compaction ───────────────────────────────────────────────────────
+
+def dedupe_skills(skills: Optional[Iterable[Any]]) -> List[str]:
+    """Strip, drop blanks and case-insensitive duplicates; keep first spelling and order."""
+    seen = set()
+    result = []
+    for skill in skills or []:
+        name = " ".join(str(skill).split())
+        key = name.lower()
+        if name and key not in seen:
+            seen.add(key)
+            result.append(name)
+    return result
+
+
+def _compact_value(value: Any, abbreviations: Mapping[str, str]) -> Any:
+    if isinstance(value, dict):
+        return {
+            abbreviations.get(k, k): _compact_value(v, abbreviations)
+            for k, v in value.items()
+            if v is not None and v != "" and v != [] and v != {}
+        }
+    if isinstance(value, (list, tuple)):
+        return [_compact_value(v, abbreviations) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def compact_json(value: Any, abbreviations: Optional[Mapping[str, str]] = None) -> str:
+    """
+    Minified JSON with empty fields dropped and keys renamed via abbreviations.
+
+    Whole-number floats are written as ints (75.0 → 75).
+    """
+    return json.dumps(
+        _compact_value(value, abbreviations or {}),
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+
+
+def abbreviation_legend(abbreviations: Mapping[str, str]) -> str:
+    """One-line key legend to place next to abbreviated JSON in a prompt."""
+    return ", ".join(f"{short}={name}" for name, short in abbreviations.items())
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Cut text to about max_tokens, at a word boundary, with a marker."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max(0, max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER))
+    cut = text[:limit]
+    space = cut.rfind(" ")
+    if space > limit * 0.8:
+        cut = cut[:space]
+    return cut.rstrip() + TRUNCATION_MARKER
+
+
+# ── Budgeted prompt assembly ─────────────────────────────────────────
+
+@dataclass
+class _Field:
+    name: str
+    value: Any
+    priority: int
+    min_tokens: int = 0
+    render: Optional[Callable[[Sequence[Any]], str]] = None  # set for item lists
+    min_items: int = 0
+    text: str = ""
+
+    @property
+    def is_items(self) -> bool:
+        return self.render is not None
+
+
+@dataclass
+class BuiltPrompt:
+    text: str
+    capability: str
+    budget: int
+    tokens: int
+    truncated: Dict[str, str] = field(default_factory=dict)  # field → "chars a→b" / "items a→b"
+
+    def __str__(self) -> str:
+        return self.text
+
+
+class PromptBuilder:
+    """Fills a str.format template and trims fields to the capability budget."""
+
+    def __init__(
+        self,
+        template: str,
+        capability: str,
+        budget: Optional[int] = None,
+        reserved_tokens: int = 0,
+    ):
+        """reserved_tokens: input sent alongside the template (e.g. cached instructions)."""
+        self.template = template
+        self.capability = capability
+        self.budget = (budget if budget is not None else budget_for(capability)) - reserved_tokens
+        self._fields: Dict[str, _Field] = {}
+
+    def add(self, name: str, value: Any, priority: int = 0, min_tokens: int = 0) -> "PromptBuilder":
+        """A text field. priority 0 is never truncated."""
+        self._fields[name] = _Field(name, "" if value is None else str(value), priority, min_tokens)
+        return self
+
+    def add_items(
+        self,
+        name: str,
+        items: Sequence[Any],
+        render: Callable[[Sequence[Any]], str] = compact_json,
+        priority: int = 1,
+        min_items: int = 1,
+    ) -> "PromptBuilder":
+        """A list rendered as one block; trailing items are dropped to fit."""
+        self._fields[name] = _Field(name, list(items or []), priority, render=render, min_items=min_items)
+        return self
+
+    def _render(self) -> str:
+        return self.template.format(**{f.name: f.text for f in self._fields.values()})
+
+    def build(self) -> BuiltPrompt:
+        for f in self._fields.values():
+            f.text = f.render(f.value) if f.is_items else f.value
+
+        truncated: Dict[str, str] = {}
+        tokens = estimate_tokens(self._render())
+        cuttable = sorted(
+            (f for f in self._fields.values() if f.priority > 0),
+            key=lambda f: -f.priority,
+        )
+        for f in cuttable:
+            if tokens <= self.budget:
+                break
+            excess = tokens - self.budget
+            if f.is_items:
+                before = len(f.value)
+                kept = before
+                while kept > f.min_items and estimate_tokens(f.text) > 0 and excess > 0:
+                    kept -= 1
+                    shorter = f.render(f.value[:kept])
+                    excess -= estimate_tokens(f.text) - estimate_tokens(shorter)
+                    f.text = shorter
+                if kept < before:
+                    truncated[f.name] = f"items {before}→{kept}"
+            else:
+                current = estimate_tokens(f.text)
+                target = max(f.min_tokens, current - excess)
+                if target < current:
+                    before = len(f.text)
+                    f.text = truncate_text(f.text, target)
+                    truncated[f.name] = f"chars {before}→{len(f.text)}"
+            tokens = estimate_tokens(self._render())
+
+        text = self._render()
+        if truncated:
+            logger.info(
+                "prompt_truncated",
+                capability=self.capability,
+                budget=self.budget,
+                tokens=tokens,
+                fields=truncated,
+            )
+        if tokens > self.budget:
+            logger.warning(
+                "prompt_over_budget", capability=self.capability, budget=self.budget, tokens=tokens
+            )
+        return BuiltPrompt(text, self.capability, self.budget, tokens, truncated)
+
+
+# ── Usage accounting ─────────────────────────────────────────────────
+
+def log_token_usage(capability: str, response: Any, prompt: Any = None) -> Dict[str, int]:
+    """
+    Log input/output tokens of one generation (and count them in shared.metrics).
+
+    Uses response.usage_metadata when the SDK returns it, otherwise estimates
+    from the prompt and the response text.
+    """
+    usage = getattr(response, "usage_metadata", None)
+    input_tokens = getattr(usage, "prompt_token_count", None)
+    output_tokens = getattr(usage, "candidates_token_count", None)
+    exact = isinstance(input_tokens, int) and isinstance(output_tokens, int)
+
+    if not exact:
+        input_tokens = estimate_tokens(str(prompt or ""))
+        try:
+            output_tokens = estimate_tokens(response.text)
+        except Exception:
+            output_tokens = 0
+
+    counts = {"input_tokens": input_tokens, "output_tokens": output_tokens}
+    cached = getattr(usage, "cached_content_token_count", None)
+    record_tokens(capability, input_tokens, output_tokens, cached if isinstance(cached, int) else None)
+    logger.info(
+        "vertex_token_usage",
+        capability=capability,
+        estimated=not exact,
+        budget=getattr(prompt, "budget", None),
+        cached_tokens=cached if isinstance(cached, int) else None,
+        **counts,
+    )
+    return counts
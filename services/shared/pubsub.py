@@ -5,28 +5,56 @@ Usage:
     from shared.pubsub import create_subscriber, pull_messages
 
 All services use the Pub/Sub emulator in dev (PUBSUB_EMULATOR_HOST env var).
+PUBSUB_BACKEND=memory swaps in the in-process broker from shared.pubsub_memory
+(no emulator needed; used by the load-test harness).
 """
 
 import os
 import json
+import time
 import asyncio
+from collections import OrderedDict
+from contextlib import contextmanager
 from typing import Callable, Awaitable, Optional
 from google.cloud import pubsub_v1
 from google.api_core.exceptions import AlreadyExists
 import structlog
 
+from shared.schemas import schema_registry, EventValidationError
+from shared.ordering import KeyedSerialExecutor
+from shared.metrics import PUBSUB_BACKLOG, PUBSUB_HANDLER_LATENCY, PUBSUB_REDELIVERIES, dec, inc, observe
+from shared.tracing import consume_span, inject, publish_span
+
 logger = structlog.get_logger()
 
 PROJECT_ID = os.getenv("GCP_PROJECT_ID", "monkeyswork")
+PUBSUB_BACKEND = os.getenv("PUBSUB_BACKEND", "gcp")
+MAX_MESSAGES = int(os.getenv("PUBSUB_MAX_MESSAGES", "10"))
+POLL_INTERVAL = float(os.getenv("PUBSUB_POLL_INTERVAL", "1.0"))
+REDELIVERY_WINDOW = 10_000
+# Pulled messages still being handled get their ack deadline pushed back by
+# PUBSUB_ACK_EXTENSION_S every half of it, for at most PUBSUB_MAX_LEASE_S
+ACK_EXTENSION_S = int(os.getenv("PUBSUB_ACK_EXTENSION_S", "60"))
+MAX_LEASE_S = float(os.getenv("PUBSUB_MAX_LEASE_S", "7200"))
+# modify_ack_deadline ack_ids per request
+_MAX_MODIFY_IDS = 1000
 
 
 def _get_publisher() -> pubsub_v1.PublisherClient:
     """Get a Pub/Sub publisher client (emulator-aware)."""
-    return pubsub_v1.PublisherClient()
+    if PUBSUB_BACKEND == "memory":
+        from shared.pubsub_memory import broker, InMemoryPublisher
+        return InMemoryPublisher(broker)
+    return pubsub_v1.PublisherClient(
+        publisher_options=pubsub_v1.types.PublisherOptions(enable_message_ordering=True)
+    )
 
 
 def _get_subscriber() -> pubsub_v1.SubscriberClient:
     """Get a Pub/Sub subscriber client (emulator-aware)."""
+    if PUBSUB_BACKEND == "memory":
+        from shared.pubsub_memory import broker, InMemorySubscriber
+        return InMemorySubscriber(broker)
     return pubsub_v1.SubscriberClient()
 
 
@@ -42,14 +70,27 @@ def ensure_topic(topic_name: str) -> str:
     return topic_path
 
 
-def ensure_subscription(topic_name: str, subscription_name: str) -> str:
-    """Ensure a subscription exists for the given topic."""
+def ensure_subscription(
+    topic_name: str,
+    subscription_name: str,
+    enable_message_ordering: bool = False,
+) -> str:
+    """
+    Ensure a subscription exists for the given topic.
+
+    Ordering can only be set when the subscription is created; an existing
+    subscription keeps whatever it was created with.
+    """
     subscriber = _get_subscriber()
     topic_path = f"projects/{PROJECT_ID}/topics/{topic_name}"
     sub_path = subscriber.subscription_path(PROJECT_ID, subscription_name)
     try:
         subscriber.create_subscription(
-            request={"name": sub_path, "topic": topic_path}
+            request={
+                "name": sub_path,
+                "topic": topic_path,
+                "enable_message_ordering": enable_message_ordering,
+            }
         )
         logger.info("subscription_created", subscription=subscription_name, topic=topic_name)
     except AlreadyExists:
@@ -57,23 +98,91 @@ def ensure_subscription(topic_name: str, subscription_name: str) -> str:
     return sub_path
 
 
-def publish_message(topic_name: str, data: dict, **attributes: str) -> None:
-    """Publish a JSON message to a topic."""
+def publish_message(
+    topic_name: str,
+    data: dict,
+    ordering_key: str = "",
+    **attributes: str,
+) -> None:
+    """
+    Publish a JSON message to a topic.
+
+    Messages sharing an ordering_key (e.g. a job_id) are delivered in publish
+    order to subscriptions created with message ordering enabled.
+
+    The current trace context travels in the traceparent attribute.
+
+    Raises EventValidationError if the event does not match its schema.
+    """
+    schema_registry.validate(topic_name, data)
     publisher = _get_publisher()
     topic_path = publisher.topic_path(PROJECT_ID, topic_name)
     message_bytes = json.dumps(data).encode("utf-8")
-    future = publisher.publish(topic_path, message_bytes, **attributes)
-    future.result(timeout=5)
+    with publish_span(topic_name):
+        future = publisher.publish(
+            topic_path, message_bytes, ordering_key=ordering_key, **inject(attributes)
+        )
+        try:
+            future.result(timeout=5)
+        except Exception:
+            # A failed ordered publish pauses the key until resumed
+            if ordering_key:
+                publisher.resume_publish(topic_path, ordering_key)
+            raise
     logger.info("message_published", topic=topic_name, data_keys=list(data.keys()))
 
 
+def key_by(field: str) -> Callable[[dict], Optional[str]]:
+    """Ordering-key extractor for subscribe_async, e.g. key_by("job_id")."""
+    def extract(data: dict) -> Optional[str]:
+        value = data.get(field)
+        return str(value) if value else None
+    return extract
+
+
+@contextmanager
+def _observed_handler(topic_name: str, subscription_name: str, message, data: dict):
+    """Handler latency metric and CONSUMER span for one message."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with consume_span(topic_name, subscription_name, message, data):
+            yield
+        outcome = "ok"
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    finally:
+        observe(PUBSUB_HANDLER_LATENCY, (subscription_name, outcome), time.perf_counter() - start)
+
+
+async def _run_handler(
+    topic_name: str,
+    subscription_name: str,
+    handler: Callable[[dict], Awaitable[None]],
+    message,
+    data: dict,
+) -> None:
+    try:
+        with _observed_handler(topic_name, subscription_name, message, data):
+            await handler(data)
+    except asyncio.CancelledError:
+        logger.info("message_superseded", topic=topic_name, event_name=data.get("event", "unknown"))
+        raise
+    except Exception:
+        logger.exception("message_handler_error", topic=topic_name)
+
+
 async def subscribe_async(
     topic_name: str,
     subscription_name: str,
     handler: Callable[[dict], Awaitable[None]],
     *,
-    max_messages: int = 10,
-    poll_interval: float = 1.0,
+    max_messages: int = MAX_MESSAGES,
+    poll_interval: float = POLL_INTERVAL,
+    ordering_key: Optional[Callable[[dict], Optional[str]]] = None,
+    max_in_flight: int = 50,
+    ack_extension_s: int = ACK_EXTENSION_S,
 ) -> None:
     """
     Async polling subscriber — pulls messages in a loop.
@@ -82,14 +191,55 @@ async def subscribe_async(
         topic_name: Topic to subscribe to
         subscription_name: Subscription name
         handler: Async function called with each decoded JSON message
-        max_messages: Max messages per pull
-        poll_interval: Seconds between pulls
+        max_messages: Max messages per pull (PUBSUB_MAX_MESSAGES)
+        poll_interval: Seconds between pulls (PUBSUB_POLL_INTERVAL)
+        ordering_key: Optional function returning the entity key of a
+            message (see key_by). Keyed messages run serially per key on a
+            KeyedSerialExecutor: a newer message for a key cancels the
+            older one still in flight, and messages with an older
+            timestamp than one already seen are skipped. Different keys
+            run concurrently, up to max_in_flight.
+        max_in_flight: Max keys processed concurrently when ordering_key is set
+        ack_extension_s: Ack deadline (seconds) requested for messages still
+            being handled (PUBSUB_ACK_EXTENSION_S)
+
+    Messages are acked once their handler finishes. Until then their lease
+    is extended in the background, so a handler that waits longer than the
+    subscription's ack deadline (e.g. on a batch prediction job) is not
+    redelivered meanwhile; leases held past MAX_LEASE_S are let go.
+
+    Messages that fail schema validation are logged, counted and acked
+    without reaching the handler.
+
+    Metrics (shared.metrics): handler latency by outcome, messages pulled
+    but not yet acked, and redeliveries (delivery_attempt > 1, or a
+    message_id seen among the last REDELIVERY_WINDOW deliveries). Each
+    handler runs in a CONSUMER span parented by the message's traceparent
+    attribute or correlation_id (shared.tracing).
     """
+    schema_registry.load()
     ensure_topic(topic_name)
-    sub_path = ensure_subscription(topic_name, subscription_name)
+    sub_path = ensure_subscription(
+        topic_name, subscription_name, enable_message_ordering=ordering_key is not None
+    )
     subscriber = _get_subscriber()
+    executor = KeyedSerialExecutor(name=subscription_name)
+    # Filled by executor tasks as they finish (or are superseded)
+    pending_acks: list = []
+    recent_ids: "OrderedDict[str, None]" = OrderedDict()
+    # ack_id → time pulled, for messages not acked yet
+    leased: dict = {}
+    lease_keeper = asyncio.create_task(
+        _keep_leases(subscriber, sub_path, subscription_name, leased, ack_extension_s)
+    )
+    asyncio.current_task().add_done_callback(lambda _: lease_keeper.cancel())
 
-    logger.info("subscriber_started", topic=topic_name, subscription=subscription_name)
+    logger.info(
+        "subscriber_started",
+        topic=topic_name,
+        subscription=subscription_name,
+        ordered=ordering_key is not None,
+    )
 
     while True:
         try:
@@ -98,16 +248,54 @@ async def subscribe_async(
                 timeout=5,
             )
 
-            ack_ids = []
+            ack_ids, pending_acks = pending_acks, []
+            pulled_at = time.monotonic()
+            for msg in response.received_messages:
+                leased[msg.ack_id] = pulled_at
+            inc(PUBSUB_BACKLOG, (subscription_name,), len(response.received_messages))
             for msg in response.received_messages:
+                if _is_redelivery(msg, recent_ids):
+                    inc(PUBSUB_REDELIVERIES, (subscription_name,))
                 try:
                     data = json.loads(msg.message.data.decode("utf-8"))
+                    if schema_registry.should_validate(topic_name):
+                        schema_registry.validate(topic_name, data)
                     logger.info(
                         "message_received",
                         topic=topic_name,
-                        event=data.get("event", "unknown"),
+                        event_name=data.get("event", "unknown"),
                     )
-                    await handler(data)
+                    key = ordering_key(data) if ordering_key else None
+                    if key is None:
+                        with _observed_handler(topic_name, subscription_name, msg.message, data):
+                            await handler(data)
+                        ack_ids.append(msg.ack_id)
+                        continue
+
+                    await executor.wait_for_capacity(max_in_flight)
+                    task = executor.submit(
+                        key,
+                        lambda m=msg.message, d=data: _run_handler(topic_name, subscription_name, handler, m, d),
+                        token=msg.message.message_id or None,
+                        timestamp=data.get("timestamp"),
+                    )
+                    if task is None:
+                        # Older than what we already processed for this key
+                        ack_ids.append(msg.ack_id)
+                    else:
+                        task.add_done_callback(
+                            lambda t, a=msg.ack_id: pending_acks.append(a)
+                        )
+                except EventValidationError as e:
+                    logger.warning(
+                        "message_rejected",
+                        topic=topic_name,
+                        schema=e.schema,
+                        version=e.version,
+                        path=e.path,
+                        error=str(e),
+                    )
+                    # Malformed events never succeed on redelivery
                     ack_ids.append(msg.ack_id)
                 except Exception:
                     logger.exception("message_handler_error", topic=topic_name)
@@ -115,6 +303,10 @@ async def subscribe_async(
                     ack_ids.append(msg.ack_id)
 
             if ack_ids:
+                # Unacked ids are dropped either way (failed acks redeliver)
+                dec(PUBSUB_BACKLOG, (subscription_name,), len(ack_ids))
+                for ack_id in ack_ids:
+                    leased.pop(ack_id, None)
                 subscriber.acknowledge(
                     request={"subscription": sub_path, "ack_ids": ack_ids}
                 )
@@ -123,3 +315,43 @@ async def subscribe_async(
             logger.exception("pull_error", topic=topic_name)
 
         await asyncio.sleep(poll_interval)
+
+
+async def _keep_leases(subscriber, sub_path: str, subscription_name: str, leased: dict, extension_s: int) -> None:
+    """Extend the ack deadline of leased messages every extension_s / 2 seconds."""
+    while True:
+        await asyncio.sleep(extension_s / 2)
+        cutoff = time.monotonic() - MAX_LEASE_S
+        expired = [ack_id for ack_id, pulled_at in leased.items() if pulled_at < cutoff]
+        for ack_id in expired:
+            leased.pop(ack_id, None)
+        if expired:
+            logger.warning("message_lease_expired", subscription=subscription_name, messages=len(expired))
+        ack_ids = list(leased)
+        for i in range(0, len(ack_ids), _MAX_MODIFY_IDS):
+            try:
+                await asyncio.to_thread(
+                    subscriber.modify_ack_deadline,
+                    request={
+                        "subscription": sub_path,
+                        "ack_ids": ack_ids[i:i + _MAX_MODIFY_IDS],
+                        "ack_deadline_seconds": extension_s,
+                    },
+                )
+            except Exception:
+                logger.exception("lease_extension_failed", subscription=subscription_name)
+
+
+def _is_redelivery(msg, recent_ids: "OrderedDict[str, None]") -> bool:
+    if (getattr(msg, "delivery_attempt", 0) or 0) > 1:
+        return True
+    message_id = msg.message.message_id
+    if not message_id:
+        return False
+    if message_id in recent_ids:
+        recent_ids.move_to_end(message_id)
+        return True
+    recent_ids[message_id] = None
+    if len(recent_ids) > REDELIVERY_WINDOW:
+        recent_ids.popitem(last=False)
+    return False
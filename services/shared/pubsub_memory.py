@@ -0,0 +1,189 @@
+"""
+In-process Pub/Sub stand-in for local runs, tests and load testing.
+
+Usage:
+    PUBSUB_BACKEND=memory  →  shared.pubsub uses this instead of Google Cloud
+
+Implements the subset of pubsub_v1.PublisherClient / SubscriberClient that
+shared.pubsub relies on (topic/subscription paths, create_*, publish,
+resume_publish, pull, acknowledge, modify_ack_deadline). Every subscription
+gets its own copy of each message, as with the real service. Messages are
+never redelivered.
+
+The broker also records publish → ack time for every delivery, which the
+load-test harness (shared.loadtest) uses for latency percentiles.
+"""
+
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Deque, Dict, List, Optional, Tuple
+
+from google.api_core.exceptions import AlreadyExists, NotFound
+
+
+@dataclass
+class _Subscription:
+    topic: str
+    enable_message_ordering: bool = False
+    queue: Deque[Tuple[str, SimpleNamespace]] = field(default_factory=deque)
+    # ack_id → publish time (perf_counter) of deliveries not yet acked
+    outstanding: Dict[str, float] = field(default_factory=dict)
+
+
+class InMemoryBroker:
+    """Topics, subscriptions and delivery bookkeeping shared by all clients."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._topics: Dict[str, List[str]] = {}
+        self._subscriptions: Dict[str, _Subscription] = {}
+        self._ids = itertools.count(1)
+        self.published = 0
+        self.acked = 0
+        self.ack_latencies: List[float] = []
+
+    def reset(self) -> None:
+        with self._lock:
+            self._topics.clear()
+            self._subscriptions.clear()
+            self.published = 0
+            self.acked = 0
+            self.ack_latencies = []
+
+    # ── Admin ────────────────────────────────────────────────────────
+
+    def create_topic(self, topic_path: str) -> None:
+        with self._lock:
+            if topic_path in self._topics:
+                raise AlreadyExists(f"Topic already exists: {topic_path}")
+            self._topics[topic_path] = []
+
+    def create_subscription(self, sub_path: str, topic_path: str, ordered: bool) -> None:
+        with self._lock:
+            if sub_path in self._subscriptions:
+                raise AlreadyExists(f"Subscription already exists: {sub_path}")
+            if topic_path not in self._topics:
+                raise NotFound(f"Topic not found: {topic_path}")
+            self._subscriptions[sub_path] = _Subscription(topic_path, ordered)
+            self._topics[topic_path].append(sub_path)
+
+    def subscribed_topics(self) -> List[str]:
+        """Topic paths that have at least one subscription."""
+        with self._lock:
+            return [topic for topic, subs in self._topics.items() if subs]
+
+    def subscriptions(self, topic_path: Optional[str] = None) -> List[str]:
+        with self._lock:
+            if topic_path is None:
+                return list(self._subscriptions)
+            return list(self._topics.get(topic_path, []))
+
+    # ── Data path ────────────────────────────────────────────────────
+
+    def publish(self, topic_path: str, data: bytes, ordering_key: str, attributes: dict) -> str:
+        with self._lock:
+            if topic_path not in self._topics:
+                raise NotFound(f"Topic not found: {topic_path}")
+            message_id = str(next(self._ids))
+            now = time.perf_counter()
+            for sub_path in self._topics[topic_path]:
+                message = SimpleNamespace(
+                    message_id=message_id,
+                    data=data,
+                    ordering_key=ordering_key,
+                    attributes=dict(attributes),
+                    publish_time=now,
+                )
+                self._subscriptions[sub_path].queue.append((f"{sub_path}:{message_id}", message))
+            self.published += 1
+            return message_id
+
+    def pull(self, sub_path: str, max_messages: int) -> List[SimpleNamespace]:
+        with self._lock:
+            sub = self._subscriptions.get(sub_path)
+            if sub is None:
+                raise NotFound(f"Subscription not found: {sub_path}")
+            received = []
+            while sub.queue and len(received) < max_messages:
+                ack_id, message = sub.queue.popleft()
+                sub.outstanding[ack_id] = message.publish_time
+                received.append(SimpleNamespace(ack_id=ack_id, message=message))
+            return received
+
+    def acknowledge(self, sub_path: str, ack_ids: List[str]) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            sub = self._subscriptions.get(sub_path)
+            if sub is None:
+                return
+            for ack_id in ack_ids:
+                published_at = sub.outstanding.pop(ack_id, None)
+                if published_at is not None:
+                    self.acked += 1
+                    self.ack_latencies.append(now - published_at)
+
+    def pending(self) -> int:
+        """Deliveries not yet acknowledged, across all subscriptions."""
+        with self._lock:
+            return sum(len(s.queue) + len(s.outstanding) for s in self._subscriptions.values())
+
+
+class InMemoryPublisher:
+    """Drop-in for pubsub_v1.PublisherClient."""
+
+    def __init__(self, broker: InMemoryBroker):
+        self._broker = broker
+
+    @staticmethod
+    def topic_path(project: str, topic: str) -> str:
+        return f"projects/{project}/topics/{topic}"
+
+    def create_topic(self, request: dict) -> None:
+        self._broker.create_topic(request["name"])
+
+    def publish(self, topic: str, data: bytes, ordering_key: str = "", **attributes: str) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(self._broker.publish(topic, data, ordering_key, attributes))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def resume_publish(self, topic: str, ordering_key: str) -> None:
+        return None
+
+
+class InMemorySubscriber:
+    """Drop-in for pubsub_v1.SubscriberClient (synchronous pull)."""
+
+    def __init__(self, broker: InMemoryBroker):
+        self._broker = broker
+
+    @staticmethod
+    def subscription_path(project: str, subscription: str) -> str:
+        return f"projects/{project}/subscriptions/{subscription}"
+
+    def create_subscription(self, request: dict) -> None:
+        self._broker.create_subscription(
+            request["name"], request["topic"], bool(request.get("enable_message_ordering"))
+        )
+
+    def pull(self, request: dict, timeout: Optional[float] = None) -> SimpleNamespace:
+        messages = self._broker.pull(request["subscription"], request.get("max_messages", 10))
+        return SimpleNamespace(received_messages=messages)
+
+    def acknowledge(self, request: dict) -> None:
+        self._broker.acknowledge(request["subscription"], request["ack_ids"])
+
+    def modify_ack_deadline(self, request: dict) -> None:
+        # Deliveries here never expire, so there is no lease to extend
+        return None
+
+
+# Singleton instance
+broker = InMemoryBroker()
@@ -0,0 +1,546 @@
+"""
+Offline replay of captured requests through the rule engines.
+
+Usage (from services/):
+    python -m shared.replay
+    python -m shared.replay --services ai-match-v1 --processes 4 --repeat 5
+    python -m shared.replay --baseline-ref origin/main          # diff against another commit
+    python -m shared.replay --save before.json                  # ... or against a saved run
+    python -m shared.replay --baseline before.json --json
+    python -m shared.replay --generate --requests 100           # rewrite the synthetic corpus
+
+Each service's engine is called in-process on captured request payloads:
+
+    ai-match-v1          rank_candidates(MatchRequest)
+    ai-fraud-v1          compute_fraud_score(FraudCheckRequest)
+    ai-scope-assistant   analyze_scope(ScopeRequest)
+
+first single-threaded, then (with --processes N > 1) spread over a pool of
+N worker processes. Reported per mode: requests per second and per-request
+engine latency percentiles. Audit writes are disabled and the feature log is
+off; the in-process model is used only if MODEL_REGISTRY_URI is set.
+
+A corpus is JSONL or Parquet, one request per row: {"id": ..., "request":
+{...}} or the bare request payload (ids then default to the row number).
+By default replay_corpus/<service>.jsonl next to this module is used: a
+synthetic corpus committed so the replay runs offline.
+
+With --baseline-ref the same corpus is replayed on a git worktree of that
+ref, and every request whose output changed is reported with the changed
+fields. Volatile fields (latency_ms, decision_id) are ignored.
+
+Services run in separate processes because each ships its own `src`
+package; the worker runs this file by path so it also works on trees that
+predate it.
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from unittest.mock import patch
+
+SERVICES_DIR = Path(__file__).resolve().parent.parent
+CORPUS_DIR = Path(__file__).resolve().parent / "replay_corpus"
+
+# service → (request model, engine function) in src.routes
+ENGINES = {
+    "ai-match-v1": ("MatchRequest", "rank_candidates"),
+    "ai-fraud-v1": ("FraudCheckRequest", "compute_fraud_score"),
+    "ai-scope-assistant": ("ScopeRequest", "analyze_scope"),
+}
+SERVICES = tuple(ENGINES)
+
+VOLATILE_FIELDS = frozenset({"latency_ms", "decision_id"})
+MAX_CHANGES_PER_REQUEST = 20
+
+
+# ── Corpus ───────────────────────────────────────────────────────────
+
+def corpus_path(service: str, corpus: Optional[str] = None) -> Path:
+    """corpus may be a file, or a directory holding <service>.jsonl / <service>.parquet."""
+    path = Path(corpus) if corpus else CORPUS_DIR
+    if path.is_file():
+        return path
+    for suffix in (".jsonl", ".parquet"):
+        candidate = path / f"{service}{suffix}"
+        if candidate.exists():
+            return candidate
+    raise FileNotFoundError(f"no {service}.jsonl or {service}.parquet in {path}")
+
+
+def _record(row: Dict[str, Any], index: int) -> Dict[str, Any]:
+    if "request" in row:
+        request = row["request"]
+        if isinstance(request, str):  # Parquet column of JSON strings
+            request = json.loads(request)
+        return {"id": str(row.get("id") or index), "request": request}
+    return {"id": str(index), "request": row}
+
+
+def load_corpus(path: Path) -> List[Dict[str, Any]]:
+    """[{"id", "request"}] from a JSONL or Parquet file."""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        rows = pq.read_table(path).to_pylist()
+    else:
+        with open(path) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    return [_record(row, i) for i, row in enumerate(rows)]
+
+
+# ── Synthetic corpus ─────────────────────────────────────────────────
+
+_SKILLS = [
+    "Python", "React", "Node.js", "PostgreSQL", "AWS", "Figma", "Go", "Kubernetes",
+    "TypeScript", "Django", "Flutter", "Swift", "Docker", "GraphQL", "Vue.js", "Solidity",
+]
+_LEVELS = ["entry", "mid", "senior", "expert", None]
+_FILLER = (
+    "the team needs a reliable partner to deliver this project on schedule with clear communication "
+    "and weekly demos of progress across the main user flows and admin screens"
+).split()
+_KEYWORDS = [
+    "landing page", "simple", "template", "dashboard", "crud", "api", "database", "authentication",
+    "real-time", "websocket", "payment", "integration", "scalable", "machine learning",
+    "enterprise", "compliance", "gdpr", "kubernetes", "high-availability",
+]
+
+
+def _match_request(rng: random.Random, i: int) -> dict:
+    budget_min = float(rng.randrange(15, 80, 5))
+    size = rng.choices([5, 10, 25, 50, 100], weights=[40, 30, 18, 9, 3])[0]
+    return {
+        "job_id": f"job-{i:05d}",
+        "job_skills": rng.sample(_SKILLS, rng.randint(0, 5)),
+        "job_budget_min": budget_min if rng.random() < 0.8 else None,
+        "job_budget_max": budget_min * rng.choice([1.5, 2.0, 3.0]) if rng.random() < 0.8 else None,
+        "experience_level": rng.choice(_LEVELS),
+        "limit": rng.choice([10, 20, 50]),
+        "candidates": [
+            {
+                "freelancer_id": f"fl-{rng.randrange(10**6):06d}",
+                "skills": rng.sample(_SKILLS, rng.randint(0, 6)),
+                "hourly_rate": float(rng.randrange(10, 200)) if rng.random() < 0.9 else None,
+                "experience_years": rng.randint(0, 20) if rng.random() < 0.9 else None,
+                "profile_completeness": float(rng.randrange(0, 101, 5)) if rng.random() < 0.9 else None,
+                "verification_level": rng.choice(["verified", "basic", None]),
+                "avg_rating": round(rng.uniform(2.5, 5.0), 1) if rng.random() < 0.8 else None,
+                "total_jobs_completed": rng.randint(0, 120) if rng.random() < 0.8 else None,
+            }
+            for _ in range(size)
+        ],
+    }
+
+
+def _fraud_request(rng: random.Random, i: int) -> dict:
+    budget_min = float(rng.randrange(100, 5000, 50))
+    job_skills = rng.sample(_SKILLS, rng.randint(0, 4))
+    return {
+        "account_id": f"acc-{rng.randrange(10**6):06d}",
+        "entity_type": rng.choice(["proposal", "proposal", "account"]),
+        "entity_id": f"prop-{i:05d}",
+        "cover_letter": rng.choice([
+            None, "hi", "I can do it", "Interested, please check my profile.",
+            " ".join(rng.choices(_FILLER, k=rng.randint(10, 80))),
+        ]),
+        "bid_amount": round(budget_min * rng.uniform(0.1, 1.5), 2) if rng.random() < 0.8 else None,
+        "job_budget_min": budget_min,
+        "job_budget_max": budget_min * 2,
+        "job_skills": job_skills,
+        "freelancer_skills": rng.sample(_SKILLS, rng.randint(0, 5)),
+        "account_age_days": rng.choice([0, 1, 2, 7, 30, 365, None]),
+        "proposals_last_hour": rng.choice([0, 1, 2, 4, 6, 8, 12, 25, None]),
+        "total_proposals": rng.choice([0, 3, 15, 25, 80, None]),
+    }
+
+
+def _scope_request(rng: random.Random, i: int) -> dict:
+    words = rng.choices([50, 120, 250, 600, 1500], weights=[30, 30, 20, 15, 5])[0]
+    text = [rng.choice(_FILLER) for _ in range(words)]
+    for _ in range(rng.randint(0, 6)):
+        text.insert(rng.randrange(len(text)), rng.choice(_KEYWORDS))
+    budget_max = rng.choice([None, 800.0, 3000.0, 8000.0, 20000.0, 75000.0])
+    return {
+        "job_id": f"job-{i:05d}",
+        "title": f"Build a {rng.choice(['dashboard', 'mobile app', 'API', 'landing page', 'platform'])}",
+        "description": " ".join(text).capitalize() + ".",
+        "category": rng.choice(["", "web-development", "mobile", "data"]),
+        "skills_required": rng.sample(_SKILLS, rng.randint(0, 9)),
+        "budget_type": rng.choice(["fixed", "hourly"]),
+        "budget_min": budget_max / 2 if budget_max else None,
+        "budget_max": budget_max,
+    }
+
+
+_GENERATORS = {
+    "ai-match-v1": _match_request,
+    "ai-fraud-v1": _fraud_request,
+    "ai-scope-assistant": _scope_request,
+}
+
+
+def generate_corpus(service: str, requests: int, seed: int = 42) -> List[Dict[str, Any]]:
+    rng = random.Random(f"{service}:{seed}")
+    prefix = service.split("-")[1]
+    return [
+        {"id": f"{prefix}-{i:05d}", "request": _GENERATORS[service](rng, i)}
+        for i in range(requests)
+    ]
+
+
+def write_corpus(path: Path, records: List[Dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+# ── Engines ──────────────────────────────────────────────────────────
+
+def normalize(value: Any) -> Any:
+    """JSON-safe output with volatile fields dropped."""
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in value.items() if k not in VOLATILE_FIELDS}
+    if isinstance(value, list):
+        return [normalize(v) for v in value]
+    return value
+
+
+@contextmanager
+def quiet_engine() -> Iterator[None]:
+    """No audit rows from replayed decisions (src.routes.audit_ai_decision / log_ai_decision)."""
+    import src.routes as routes
+
+    name = next((n for n in ("audit_ai_decision", "log_ai_decision") if hasattr(routes, n)), None)
+    if name is not None:
+        with patch.object(routes, name, lambda *args, **kwargs: None):
+            yield
+    else:
+        yield
+
+
+def engine(service: str) -> Tuple[Callable[[dict], Any], Callable[[Any], Any]]:
+    """(parse, run) for the already-importable `src` service."""
+    import src.routes as routes
+
+    request_model, function = ENGINES[service]
+    return getattr(routes, request_model).model_validate, getattr(routes, function)
+
+
+def _dump(response: Any) -> Any:
+    return normalize(response.model_dump(mode="json"))
+
+
+def _run_records(run: Callable, requests: List[Any]) -> Tuple[List[float], List[Any]]:
+    latencies, outputs = [], []
+    for request in requests:
+        start = time.perf_counter()
+        response = run(request)
+        latencies.append(time.perf_counter() - start)
+        outputs.append(_dump(response))
+    return latencies, outputs
+
+
+def replay_single(service: str, records: List[Dict[str, Any]], repeat: int = 1, warmup: int = 20) -> dict:
+    """Every record through the engine on this thread; outputs from the first pass."""
+    parse, run = engine(service)
+    requests = [parse(r["request"]) for r in records]
+    with quiet_engine():
+        _run_records(run, requests[:warmup])
+        latencies: List[float] = []
+        outputs: List[Any] = []
+        start = time.perf_counter()
+        for i in range(repeat):
+            lat, out = _run_records(run, requests)
+            latencies.extend(lat)
+            if i == 0:
+                outputs = out
+        elapsed = time.perf_counter() - start
+    return _result("single", 1, latencies, elapsed, records, outputs)
+
+
+# Per-process state of a replay pool
+_pool_state: Dict[str, Any] = {}
+
+
+def _pool_init(service: str, records: List[Dict[str, Any]], warmup: int) -> None:
+    import structlog
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    parse, run = engine(service)
+    _pool_state["quiet"] = quiet_engine()
+    _pool_state["quiet"].__enter__()
+    _pool_state["run"] = run
+    _pool_state["requests"] = [parse(r["request"]) for r in records]
+    _run_records(run, _pool_state["requests"][:warmup])
+
+
+def _pool_chunk(indices: List[int]) -> Tuple[List[int], List[float], List[Any]]:
+    requests = _pool_state["requests"]
+    latencies, outputs = _run_records(_pool_state["run"], [requests[i] for i in indices])
+    return indices, latencies, outputs
+
+
+def _pool_ready(_: int) -> bool:
+    return True
+
+
+def replay_pool(
+    service: str, records: List[Dict[str, Any]], processes: int, repeat: int = 1, warmup: int = 20
+) -> dict:
+    """Records × repeat spread over a pool of worker processes; throughput is wall-clock."""
+    work = [i for _ in range(repeat) for i in range(len(records))]
+    chunk = max(1, math.ceil(len(work) / (processes * 4)))
+    chunks = [work[i:i + chunk] for i in range(0, len(work), chunk)]
+    outputs: List[Any] = [None] * len(records)
+    latencies: List[float] = []
+    with ProcessPoolExecutor(processes, initializer=_pool_init, initargs=(service, records, warmup)) as pool:
+        # Start (and warm) every worker before the clock starts
+        list(pool.map(_pool_ready, range(processes * 2)))
+        start = time.perf_counter()
+        for indices, lat, out in pool.map(_pool_chunk, chunks):
+            latencies.extend(lat)
+            for i, output in zip(indices, out):
+                if outputs[i] is None:
+                    outputs[i] = output
+        elapsed = time.perf_counter() - start
+    return _result("multi", processes, latencies, elapsed, records, outputs)
+
+
+def _result(mode: str, processes: int, latencies: List[float], elapsed: float, records, outputs) -> dict:
+    return {
+        "mode": mode,
+        "processes": processes,
+        "requests": len(latencies),
+        "elapsed_s": round(elapsed, 4),
+        "requests_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latencies": latencies,
+        "outputs": {r["id"]: out for r, out in zip(records, outputs)},
+    }
+
+
+# ── Diffs ────────────────────────────────────────────────────────────
+
+def _changes(baseline: Any, current: Any, path: str, tolerance: float, out: List[dict]) -> None:
+    if len(out) >= MAX_CHANGES_PER_REQUEST:
+        return
+    if isinstance(baseline, dict) and isinstance(current, dict):
+        for key in sorted(set(baseline) | set(current)):
+            _changes(baseline.get(key), current.get(key), f"{path}.{key}" if path else key, tolerance, out)
+    elif isinstance(baseline, list) and isinstance(current, list):
+        if len(baseline) != len(current):
+            out.append({"path": f"{path}.length", "baseline": len(baseline), "current": len(current)})
+        for i, (b, c) in enumerate(zip(baseline, current)):
+            _changes(b, c, f"{path}[{i}]", tolerance, out)
+    elif (
+        isinstance(baseline, (int, float)) and isinstance(current, (int, float))
+        and not isinstance(baseline, bool) and not isinstance(current, bool)
+    ):
+        if abs(baseline - current) > tolerance:
+            out.append({"path": path, "baseline": baseline, "current": current})
+    elif baseline != current:
+        out.append({"path": path, "baseline": baseline, "current": current})
+
+
+def diff_outputs(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.0) -> List[dict]:
+    """Per request id, the fields whose value changed (missing on either side counts as a change)."""
+    diffs = []
+    for request_id in sorted(set(baseline) | set(current)):
+        if request_id not in baseline or request_id not in current:
+            side = "baseline" if request_id not in baseline else "current"
+            diffs.append({"id": request_id, "changes": [{"path": "", "missing_in": side}]})
+            continue
+        changes: List[dict] = []
+        _changes(baseline[request_id], current[request_id], "", tolerance, changes)
+        if changes:
+            diffs.append({"id": request_id, "changes": changes})
+    return diffs
+
+
+def summarize(run: dict) -> dict:
+    """The run without raw latencies and outputs, with latency percentiles in ms."""
+    from shared.loadtest import percentiles
+
+    summary = {k: v for k, v in run.items() if k not in ("latencies", "outputs")}
+    summary["latency_ms"] = percentiles(run["latencies"])
+    return summary
+
+
+# ── CLI ──────────────────────────────────────────────────────────────
+
+def _worker(args: argparse.Namespace) -> None:
+    import structlog
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    records = load_corpus(Path(args.corpus))
+    runs = [replay_single(args.worker, records, repeat=args.repeat, warmup=args.warmup)]
+    if args.processes > 1:
+        runs.append(replay_pool(args.worker, records, args.processes, repeat=args.repeat, warmup=args.warmup))
+    print(json.dumps({"service": args.worker, "requests": len(records), "runs": runs}))
+
+
+def _spawn(tree: Path, service: str, corpus: Path, args: argparse.Namespace) -> Optional[dict]:
+    """Replay service from the services/ dir of tree in a fresh interpreter."""
+    services_dir = tree / "services"
+    env = dict(
+        os.environ,
+        FEATURE_LOG_DIR="",
+        PYTHONPATH=os.pathsep.join([str(services_dir / service), str(services_dir)]),
+    )
+    cmd = [
+        sys.executable, str(Path(__file__).resolve()),
+        "--worker", service,
+        "--corpus", str(corpus),
+        "--processes", str(args.processes),
+        "--repeat", str(args.repeat),
+        "--warmup", str(args.warmup),
+    ]
+    proc = subprocess.run(cmd, cwd=services_dir / service, env=env, capture_output=True, text=True)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        print(f"{service} ({tree}): replay failed\n{proc.stderr[-2000:]}", file=sys.stderr)
+        return None
+    return json.loads(lines[-1])
+
+
+@contextmanager
+def worktree(ref: str) -> Iterator[Path]:
+    """A detached git worktree of ref, removed afterwards."""
+    repo = SERVICES_DIR.parent
+    path = Path(tempfile.mkdtemp(prefix="replay-baseline-"))
+    subprocess.run(
+        ["git", "-C", str(repo), "worktree", "add", "--detach", "--quiet", str(path), ref],
+        check=True, capture_output=True,
+    )
+    try:
+        yield path
+    finally:
+        subprocess.run(["git", "-C", str(repo), "worktree", "remove", "--force", str(path)], capture_output=True)
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _report(current: dict, baseline: Optional[dict], tolerance: float) -> dict:
+    report = {
+        "service": current["service"],
+        "requests": current["requests"],
+        "runs": [summarize(run) for run in current["runs"]],
+    }
+    single = current["runs"][0]["outputs"]
+    for run in current["runs"][1:]:
+        # The pool must reproduce the single-threaded outputs
+        report[f"{run['mode']}_mismatches"] = len(diff_outputs(single, run["outputs"], tolerance))
+    if baseline is not None:
+        report["baseline_runs"] = [summarize(run) for run in baseline["runs"]]
+        diffs = diff_outputs(baseline["runs"][0]["outputs"], single, tolerance)
+        report["changed"] = len(diffs)
+        report["diffs"] = diffs
+    return report
+
+
+def _fmt(value: Any) -> str:
+    text = json.dumps(value)
+    return text if len(text) <= 40 else text[:37] + "..."
+
+
+def _print_table(reports: List[dict], show_diffs: int) -> None:
+    header = f"{'service':<22}{'mode':<10}{'reqs':>7}{'req/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'vs base':>10}"
+    print(header)
+    print("─" * len(header))
+    for r in reports:
+        base = {run["mode"]: run for run in r.get("baseline_runs", [])}
+        for run in r["runs"]:
+            mode = run["mode"] if run["processes"] == 1 else f"{run['mode']}×{run['processes']}"
+            delta = ""
+            if run["mode"] in base and base[run["mode"]]["requests_per_s"]:
+                delta = f"{run['requests_per_s'] / base[run['mode']]['requests_per_s'] - 1:+.1%}"
+            print(
+                f"{r['service']:<22}{mode:<10}{run['requests']:>7}{run['requests_per_s']:>11}"
+                f"{run['latency_ms']['p50']:>9}{run['latency_ms']['p99']:>9}{run['latency_ms']['max']:>9}{delta:>10}"
+            )
+    for r in reports:
+        if r.get("multi_mismatches"):
+            print(f"\n{r['service']}: {r['multi_mismatches']} requests differ between single and multi-process runs")
+        if "changed" not in r:
+            continue
+        print(f"\n{r['service']}: {r['changed']}/{r['requests']} outputs changed vs baseline")
+        for diff in r["diffs"][:show_diffs]:
+            for change in diff["changes"][:3]:
+                if "missing_in" in change:
+                    print(f"  {diff['id']}  missing in {change['missing_in']}")
+                else:
+                    print(f"  {diff['id']}  {change['path']}: {_fmt(change['baseline'])} → {_fmt(change['current'])}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay captured requests through the rule engines")
+    parser.add_argument("--services", nargs="+", default=list(SERVICES), choices=SERVICES)
+    parser.add_argument("--corpus", help="JSONL/Parquet file (one service) or directory of <service>.jsonl|parquet")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="pool size for the multi-process run")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the corpus per run")
+    parser.add_argument("--warmup", type=int, default=20, help="requests run before timing")
+    parser.add_argument("--baseline-ref", help="git ref to replay the same corpus on and diff against")
+    parser.add_argument("--baseline", help="results file from an earlier --save to diff against")
+    parser.add_argument("--save", help="write full results (including outputs) to this file")
+    parser.add_argument("--tolerance", type=float, default=0.0, help="absolute tolerance for numeric diffs")
+    parser.add_argument("--show-diffs", type=int, default=10, help="changed requests listed per service")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--generate", action="store_true", help="write the synthetic corpus instead of replaying")
+    parser.add_argument("--requests", type=int, default=100, help="requests per service for --generate")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--worker", choices=SERVICES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        _worker(args)
+        return 0
+
+    if args.generate:
+        target = Path(args.corpus) if args.corpus else CORPUS_DIR
+        for service in args.services:
+            path = target / f"{service}.jsonl"
+            write_corpus(path, generate_corpus(service, args.requests, args.seed))
+            print(f"{service}: {args.requests} requests → {path}")
+        return 0
+
+    corpora = {s: corpus_path(s, args.corpus) for s in args.services}
+    current = {s: _spawn(SERVICES_DIR.parent, s, corpora[s], args) for s in args.services}
+
+    baseline: Dict[str, Optional[dict]] = {}
+    if args.baseline_ref:
+        with worktree(args.baseline_ref) as tree:
+            baseline = {s: _spawn(tree, s, corpora[s], args) for s in args.services}
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = {r["service"]: r for r in json.load(f)}
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump([r for r in current.values() if r], f)
+
+    reports = [_report(r, baseline.get(s), args.tolerance) for s, r in current.items() if r]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        _print_table(reports, args.show_diffs)
+    return 0 if len(reports) == len(args.services) else 1
+
+
+if __name__ == "__main__":
+    # Run by path (see _spawn): this directory must not shadow top-level modules
+    if sys.path and Path(sys.path[0]).resolve() == Path(__file__).resolve().parent:
+        sys.path.pop(0)
+    sys.exit(main())
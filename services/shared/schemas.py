@@ -0,0 +1,219 @@
+"""
+Compiled JSON Schema validation for Pub/Sub events.
+
+Usage:
+    from shared.schemas import schema_registry, EventValidationError
+    schema_registry.load()                          # once, at startup
+    schema_registry.validate("job-published", data)  # raises EventValidationError
+
+Schemas are read from data/schemas/<name>.v<N>.json (EVENT_SCHEMA_DIR) and
+compiled once with fastjsonschema, which generates a plain Python function per
+schema, so validating an event costs about as much as the hand-written checks
+the handlers would otherwise do.
+
+Resolution:
+  - envelope events ({"event_type", "event_version", "data"}) use
+    <event_type>.v<major of event_version>
+  - flat events published by the PHP API use the schema registered for the
+    topic (TOPIC_SCHEMAS), latest version
+
+Env vars:
+  EVENT_VALIDATION: "true" (default) or "false"
+  EVENT_SCHEMA_DIR: directory holding the schema files
+  EVENT_VALIDATION_SAMPLE_RATES: per-topic sampling for hot topics,
+      e.g. "job-published=0.1,profile-ready=0.25" (default 1.0 everywhere)
+"""
+
+import os
+import re
+import json
+import random
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+import structlog
+
+logger = structlog.get_logger()
+
+VALIDATION_ENABLED = os.getenv("EVENT_VALIDATION", "true").lower() == "true"
+SCHEMA_DIR = os.getenv(
+    "EVENT_SCHEMA_DIR",
+    str(Path(__file__).resolve().parent.parent.parent / "data" / "schemas"),
+)
+
+# Flat PHP payloads carry no version, so the topic decides the schema
+TOPIC_SCHEMAS = {
+    "job-published": "job_published",
+    "user-registered": "user_registered",
+    "profile-ready": "profile_ready",
+    "verification-submitted": "verification_submitted",
+}
+
+_SCHEMA_FILE_RE = re.compile(r"^(?P<name>.+)\.v(?P<version>\d+)\.json$")
+_UUID_RE = re.compile(
+    r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"
+)
+
+
+class EventValidationError(ValueError):
+    """An event did not match its schema."""
+
+    def __init__(self, schema: str, version: str, message: str, path: str = ""):
+        super().__init__(f"{schema}.{version}: {message}")
+        self.schema = schema
+        self.version = version
+        self.path = path
+
+
+def _parse_sample_rates(raw: str) -> Dict[str, float]:
+    """Parse "topic=rate,topic=rate" into a dict, ignoring malformed entries."""
+    rates = {}
+    for item in raw.split(","):
+        topic, sep, rate = item.partition("=")
+        if not sep:
+            continue
+        try:
+            rates[topic.strip()] = max(0.0, min(1.0, float(rate)))
+        except ValueError:
+            logger.warning("invalid_event_sample_rate", entry=item)
+    return rates
+
+
+class SchemaRegistry:
+    """Compiled event validators keyed by (schema name, version)."""
+
+    def __init__(
+        self,
+        schema_dir: str = SCHEMA_DIR,
+        sample_rates: Optional[Dict[str, float]] = None,
+        enabled: bool = VALIDATION_ENABLED,
+    ):
+        self.schema_dir = schema_dir
+        self.enabled = enabled
+        self.sample_rates = (
+            sample_rates if sample_rates is not None
+            else _parse_sample_rates(os.getenv("EVENT_VALIDATION_SAMPLE_RATES", ""))
+        )
+        self._validators: Dict[Tuple[str, str], Callable[[dict], dict]] = {}
+        self._latest: Dict[str, str] = {}
+        self._rejections: Counter = Counter()
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    # ── Loading ──────────────────────────────────────────────────────
+
+    def load(self) -> int:
+        """Compile every schema in schema_dir. Returns the number compiled."""
+        with self._lock:
+            if self._loaded:
+                return len(self._validators)
+            self._loaded = True
+
+            if not self.enabled:
+                logger.info("event_validation_disabled")
+                return 0
+
+            try:
+                import fastjsonschema
+            except ImportError:
+                logger.warning("event_validation_unavailable", reason="fastjsonschema not installed")
+                self.enabled = False
+                return 0
+
+            schema_dir = Path(self.schema_dir)
+            if not schema_dir.is_dir():
+                logger.warning("event_schema_dir_missing", path=str(schema_dir))
+                self.enabled = False
+                return 0
+
+            for schema_file in sorted(schema_dir.glob("*.json")):
+                match = _SCHEMA_FILE_RE.match(schema_file.name)
+                if not match:
+                    continue
+                name, version = match.group("name"), f"v{match.group('version')}"
+                try:
+                    with open(schema_file) as f:
+                        definition = json.load(f)
+                    # use_default=False: validation must never mutate the event
+                    self._validators[(name, version)] = fastjsonschema.compile(
+                        definition,
+                        formats={"uuid": _UUID_RE.pattern},
+                        use_default=False,
+                    )
+                except Exception as e:
+                    logger.error("event_schema_compile_failed", schema=schema_file.name, error=str(e))
+                    continue
+                if int(version[1:]) >= int(self._latest.get(name, "v0")[1:]):
+                    self._latest[name] = version
+
+            logger.info("event_schemas_compiled", count=len(self._validators), path=str(schema_dir))
+            return len(self._validators)
+
+    # ── Validation ───────────────────────────────────────────────────
+
+    def resolve(self, topic: str, data: dict) -> Optional[Tuple[str, str]]:
+        """Return the (schema, version) that applies to an event, if any."""
+        if "event_type" in data and "data" in data:
+            name = str(data.get("event_type"))
+            major = str(data.get("event_version", "")).split(".", 1)[0]
+            version = f"v{major}" if major.isdigit() else self._latest.get(name)
+        else:
+            name = TOPIC_SCHEMAS.get(topic)
+            version = self._latest.get(name) if name else None
+
+        if name and version and (name, version) in self._validators:
+            return name, version
+        return None
+
+    def should_validate(self, topic: str) -> bool:
+        """Sampling decision for the consume path."""
+        rate = self.sample_rates.get(topic, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+    def validate(self, topic: str, data: dict) -> bool:
+        """
+        Validate an event against its schema.
+
+        Returns True when a schema was applied, False when none applies.
+        Raises EventValidationError (and counts the rejection) on mismatch.
+        """
+        if not self.enabled:
+            return False
+        if not self._loaded:
+            self.load()
+
+        if not isinstance(data, dict):
+            name = TOPIC_SCHEMAS.get(topic, topic)
+            version = self._latest.get(name, "v1")
+            self._count_rejection(name, version)
+            raise EventValidationError(name, version, "event is not an object")
+
+        resolved = self.resolve(topic, data)
+        if resolved is None:
+            return False
+
+        name, version = resolved
+        try:
+            self._validators[resolved](data)
+        except Exception as e:
+            self._count_rejection(name, version)
+            raise EventValidationError(
+                name, version,
+                getattr(e, "message", str(e)),
+                path=getattr(e, "name", ""),
+            ) from e
+        return True
+
+    def _count_rejection(self, name: str, version: str) -> None:
+        with self._lock:
+            self._rejections[(name, version)] += 1
+
+    def rejection_counts(self) -> Dict[str, int]:
+        """Rejections so far, keyed "<schema>.<version>"."""
+        with self._lock:
+            return {f"{name}.{version}": n for (name, version), n in self._rejections.items()}
+
+
+# Singleton instance
+schema_registry = SchemaRegistry()
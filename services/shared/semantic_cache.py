@@ -0,0 +1,210 @@
+"""
+Semantic response cache for generative endpoints.
+
+Usage:
+    from shared.semantic_cache import get_semantic_cache
+
+    cache = get_semantic_cache("job_enhance")
+    hit = cache.lookup(key_text, partition="")
+    if hit and not cache.sample_guard():
+        return personalize(hit.value, request)
+    fresh = await call_vertex(...)
+    if not hit or not cache.check_guard(hit, fresh):   # logs agreement, evicts on drift
+        cache.store(key_text, fresh, partition="")
+
+Requests are embedded locally (shared.embeddings) and matched against
+previous requests by cosine similarity; a hit at or above the threshold
+returns the stored response, which the caller personalizes (names, budgets,
+skills the user already has) before serving. partition is an exact-match
+key for inputs that must never be mixed, such as the requested tone.
+
+Entries are evicted least-recently-used once max_entries is reached and
+expire ttl_s after they were stored. With guard_rate > 0 a sample of hits
+still calls Vertex: the fresh answer is compared with the cached one, the
+agreement is logged, and an entry whose answer drifted is replaced.
+
+Environment (per cache, NAME is the upper-cased cache name):
+  SEMANTIC_CACHE_ENABLED          "true" to serve hits (default true)
+  SEMANTIC_CACHE_THRESHOLD[_NAME] similarity needed for a hit (default: embedder's)
+  SEMANTIC_CACHE_MAX_ENTRIES      default 5000
+  SEMANTIC_CACHE_TTL_S            default 86400
+  SEMANTIC_CACHE_GUARD_RATE       fraction of hits re-checked (default 0.05)
+  SEMANTIC_CACHE_INDEX            auto | brute | hnsw (default auto)
+"""
+
+import json
+import os
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+import structlog
+
+from shared.embeddings import get_embedder, normalize_text
+from shared.vector_index import make_index
+
+logger = structlog.get_logger()
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+SEMANTIC_CACHE_TTL_S = float(os.getenv("SEMANTIC_CACHE_TTL_S", "86400"))
+SEMANTIC_CACHE_GUARD_RATE = float(os.getenv("SEMANTIC_CACHE_GUARD_RATE", "0.05"))
+SEMANTIC_CACHE_INDEX = os.getenv("SEMANTIC_CACHE_INDEX", "auto")
+
+# A guarded hit whose cached answer is less similar than this to the fresh one is replaced
+GUARD_AGREEMENT_THRESHOLD = 0.6
+# Neighbours examined per lookup; more than one so a partition filter can skip some
+_SEARCH_K = 8
+
+
+@dataclass
+class CacheHit:
+    key: int
+    value: Any
+    similarity: float
+
+
+@dataclass
+class _Entry:
+    text: str
+    value: Any
+    partition: str
+    stored_at: float
+
+
+class SemanticCache:
+    """Similarity-matched response cache with LRU + TTL eviction."""
+
+    def __init__(
+        self,
+        name: str,
+        embedder=None,
+        threshold: Optional[float] = None,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl_s: float = SEMANTIC_CACHE_TTL_S,
+        guard_rate: float = SEMANTIC_CACHE_GUARD_RATE,
+        index_kind: str = SEMANTIC_CACHE_INDEX,
+        enabled: bool = SEMANTIC_CACHE_ENABLED,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+    ):
+        self.name = name
+        self.embedder = embedder or get_embedder()
+        self.threshold = threshold if threshold is not None else self.embedder.default_threshold
+        self.max_entries = max(1, max_entries)
+        self.ttl_s = ttl_s
+        self.guard_rate = guard_rate
+        self.enabled = enabled
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._index = make_index(self.embedder.dim, capacity=self.max_entries, kind=index_kind)
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()  # oldest use first
+        self._next_key = 0
+        self.stats: Dict[str, int] = {
+            "hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0,
+            "guard_checks": 0, "guard_mismatches": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _embed(self, text: str):
+        return self.embedder.embed([normalize_text(text)])[0]
+
+    def _drop(self, key: int) -> None:
+        self._entries.pop(key, None)
+        self._index.remove(key)
+
+    def lookup(self, text: str, partition: str = "") -> Optional[CacheHit]:
+        """Best stored response for a request similar to text, or None."""
+        if not self.enabled or not self._entries:
+            return None
+        now = self._clock()
+        for key, similarity in self._index.search(self._embed(text), k=_SEARCH_K):
+            if similarity < self.threshold:
+                break
+            entry = self._entries.get(key)
+            if entry is None or entry.partition != partition:
+                continue
+            if now - entry.stored_at > self.ttl_s:
+                self._drop(key)
+                self.stats["expired"] += 1
+                continue
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            logger.info("semantic_cache_hit", cache=self.name, similarity=round(similarity, 4))
+            return CacheHit(key, entry.value, similarity)
+        self.stats["misses"] += 1
+        return None
+
+    def store(self, text: str, value: Any, partition: str = "") -> None:
+        """Remember value as the response for text."""
+        if not self.enabled:
+            return
+        while len(self._entries) >= self.max_entries:
+            oldest, _ = self._entries.popitem(last=False)
+            self._index.remove(oldest)
+            self.stats["evictions"] += 1
+        key = self._next_key
+        self._next_key += 1
+        self._index.add(key, self._embed(text))
+        self._entries[key] = _Entry(text, value, partition, self._clock())
+        self.stats["stores"] += 1
+
+    def sample_guard(self) -> bool:
+        """True for the fraction of hits that should still call Vertex."""
+        return self.guard_rate > 0 and self._rng.random() < self.guard_rate
+
+    def check_guard(self, hit: CacheHit, fresh: Any, cached: Any = None) -> bool:
+        """
+        Compare a guarded hit with the fresh response; True if they agree.
+
+        cached is what the hit would have served (defaults to hit.value).
+        Agreement is the embedding similarity of the two responses. Below
+        GUARD_AGREEMENT_THRESHOLD the cached entry is dropped and the caller
+        should store() the fresh response in its place.
+        """
+        vectors = self.embedder.embed([
+            normalize_text(json.dumps(hit.value if cached is None else cached, sort_keys=True, default=str)),
+            normalize_text(json.dumps(fresh, sort_keys=True, default=str)),
+        ])
+        agreement = float(vectors[0] @ vectors[1])
+        self.stats["guard_checks"] += 1
+        agreed = agreement >= GUARD_AGREEMENT_THRESHOLD
+        if not agreed:
+            self.stats["guard_mismatches"] += 1
+            self._drop(hit.key)
+        logger.info(
+            "semantic_cache_guard",
+            cache=self.name,
+            similarity=round(hit.similarity, 4),
+            agreement=round(agreement, 4),
+            agreed=agreed,
+        )
+        return agreed
+
+    def clear(self) -> None:
+        for key in list(self._entries):
+            self._drop(key)
+
+
+_caches: Dict[str, SemanticCache] = {}
+
+
+def get_semantic_cache(name: str) -> SemanticCache:
+    """Process-wide cache for one endpoint, created on first use."""
+    cache = _caches.get(name)
+    if cache is None:
+        threshold = os.getenv(f"SEMANTIC_CACHE_THRESHOLD_{name.upper()}") or os.getenv("SEMANTIC_CACHE_THRESHOLD")
+        cache = SemanticCache(name, threshold=float(threshold) if threshold else None)
+        _caches[name] = cache
+        logger.info(
+            "semantic_cache_created",
+            cache=name,
+            embedder=cache.embedder.name,
+            threshold=cache.threshold,
+            index=cache._index.kind,
+        )
+    return cache
@@ -0,0 +1,279 @@
+"""
+OpenTelemetry tracing across the Pub/Sub, Vertex AI and callback hops.
+
+Usage:
+    # main.py lifespan
+    init_tracing(SERVICE_NAME)            # exporter from TRACING_EXPORTER
+    ...
+    shutdown_tracing()
+
+    # tests
+    exporter = init_tracing("ai-match-v1", exporter="memory", slow_ms=0)
+    ... exporter.get_finished_spans()
+
+Spans come from the shared modules, so handlers need no changes:
+  - shared.pubsub: one CONSUMER span per handled message, one PRODUCER span
+    per publish (trace context injected into the message attributes)
+  - shared.metrics.observe_model: one span per generate_content call
+  - shared.callback.ApiCallback: one CLIENT span per callback, retries
+    included, with the trace context sent as a traceparent header
+
+Propagation: a message's parent is the W3C traceparent attribute when the
+publisher set one. The PHP API does not, so otherwise the event's
+correlation_id becomes the trace id (a UUID as-is, anything else hashed):
+every service handling the same event then lands in the same trace, under
+the untraced publish as a shared parent.
+
+Tail-based sampling: every span is recorded, but a trace's spans are held
+in memory until its local root (the span whose parent is remote or absent)
+ends. The trace is then exported if any span failed, if the root took at
+least TRACE_SLOW_MS, or else with probability TRACE_SAMPLE_RATIO. The
+probabilistic part is a function of the trace id, so services keep or drop
+the same healthy traces; the slow/failed decision is per service, i.e. a
+trace is kept in the services where it was slow or failed. Spans ending
+after their root follow the decision already taken.
+
+Without the SDK installed, or with TRACING_EXPORTER=none, the API's no-op
+tracer is used: spans are non-recording and nothing is buffered.
+
+Env vars:
+  TRACING_EXPORTER: none (default) | gcp (Cloud Trace) | console | memory
+  TRACE_SLOW_MS: roots at least this slow are always kept (default: 2000)
+  TRACE_SAMPLE_RATIO: share of other traces kept (default: 0.01)
+  TRACE_MAX_PENDING: traces awaiting a decision before the oldest is dropped (default: 10000)
+"""
+
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+import structlog
+from opentelemetry import trace
+from opentelemetry.context import Context
+from opentelemetry.trace import NonRecordingSpan, SpanContext, SpanKind, Status, StatusCode, TraceFlags
+from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+
+logger = structlog.get_logger()
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "2000"))
+TRACE_SAMPLE_RATIO = float(os.getenv("TRACE_SAMPLE_RATIO", "0.01"))
+TRACE_MAX_PENDING = int(os.getenv("TRACE_MAX_PENDING", "10000"))
+
+_propagator = TraceContextTextMapPropagator()
+_provider = None
+_noop_tracer = trace.NoOpTracer()
+
+
+# ── Setup ────────────────────────────────────────────────────────────
+
+def init_tracing(
+    service_name: str,
+    exporter: str = TRACING_EXPORTER,
+    slow_ms: float = TRACE_SLOW_MS,
+    sample_ratio: float = TRACE_SAMPLE_RATIO,
+    max_pending: int = TRACE_MAX_PENDING,
+):
+    """
+    Install this process's tracer provider; returns the span exporter.
+
+    Replaces any provider from an earlier call (tests); the process-global
+    OpenTelemetry provider is left alone.
+    """
+    global _provider
+    shutdown_tracing()
+    if exporter == "none":
+        return None
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
+    except ImportError:
+        logger.warning("tracing_unavailable", reason="opentelemetry-sdk not installed")
+        return None
+
+    if exporter == "gcp":
+        from opentelemetry.exporter.cloud_trace import CloudTraceSpanExporter
+
+        span_exporter, processor = CloudTraceSpanExporter(), BatchSpanProcessor
+    elif exporter == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+        span_exporter, processor = ConsoleSpanExporter(), SimpleSpanProcessor
+    elif exporter == "memory":
+        from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+        span_exporter, processor = InMemorySpanExporter(), SimpleSpanProcessor
+    else:
+        raise ValueError(f"TRACING_EXPORTER must be none, gcp, console or memory, not {exporter!r}")
+
+    _provider = TracerProvider(resource=Resource.create({
+        "service.name": service_name,
+        "service.version": os.getenv("SERVICE_VERSION", "1.0.0"),
+    }))
+    _provider.add_span_processor(
+        TailSamplingProcessor(processor(span_exporter), slow_ms, sample_ratio, max_pending)
+    )
+    logger.info("tracing_started", service=service_name, exporter=exporter, slow_ms=slow_ms, ratio=sample_ratio)
+    return span_exporter
+
+
+def shutdown_tracing() -> None:
+    """Flush and drop the provider (lifespan shutdown)."""
+    global _provider
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+
+
+def get_tracer():
+    if _provider is None:
+        return _noop_tracer
+    return _provider.get_tracer("monkeyswork.ai")
+
+
+# ── Propagation ──────────────────────────────────────────────────────
+
+def inject(carrier: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """carrier plus the current trace context (traceparent), for headers or message attributes."""
+    carrier = {} if carrier is None else carrier
+    _propagator.inject(carrier)
+    return carrier
+
+
+def message_context(attributes: Optional[Mapping[str, str]], data: Mapping[str, Any]) -> Context:
+    """Parent context of a received message: its traceparent, else its correlation_id."""
+    if attributes:
+        context = _propagator.extract(dict(attributes))
+        if trace.get_current_span(context).get_span_context().is_valid:
+            return context
+    correlation_id = data.get("correlation_id")
+    if not correlation_id:
+        return Context()
+    parent = SpanContext(
+        trace_id=_correlation_trace_id(str(correlation_id)),
+        span_id=int.from_bytes(hashlib.sha256(f"span:{correlation_id}".encode()).digest()[:8], "big") or 1,
+        is_remote=True,
+        trace_flags=TraceFlags(TraceFlags.SAMPLED),
+    )
+    return trace.set_span_in_context(NonRecordingSpan(parent), Context())
+
+
+def _correlation_trace_id(correlation_id: str) -> int:
+    try:
+        trace_id = uuid.UUID(correlation_id).int
+    except ValueError:
+        trace_id = 0
+    return trace_id or int.from_bytes(hashlib.sha256(correlation_id.encode()).digest()[:16], "big")
+
+
+# ── Spans ────────────────────────────────────────────────────────────
+
+@contextmanager
+def consume_span(topic: str, subscription: str, message: Any, data: Mapping[str, Any]) -> Iterator[Any]:
+    """CONSUMER span around one message handler, parented by the message's context."""
+    attributes = {
+        "messaging.system": "gcp_pubsub",
+        "messaging.operation.type": "process",
+        "messaging.destination.name": topic,
+        "messaging.destination.subscription.name": subscription,
+        "messaging.message.id": getattr(message, "message_id", "") or "",
+        "event.name": str(data.get("event", "unknown")),
+    }
+    if data.get("correlation_id"):
+        attributes["correlation_id"] = str(data["correlation_id"])
+    with get_tracer().start_as_current_span(
+        f"{subscription} process",
+        context=message_context(getattr(message, "attributes", None), data),
+        kind=SpanKind.CONSUMER,
+        attributes=attributes,
+    ) as span:
+        yield span
+
+
+def publish_span(topic: str):
+    return get_tracer().start_as_current_span(
+        f"{topic} publish",
+        kind=SpanKind.PRODUCER,
+        attributes={"messaging.system": "gcp_pubsub", "messaging.destination.name": topic},
+    )
+
+
+def client_span(name: str, **attributes: Any):
+    return get_tracer().start_as_current_span(name, kind=SpanKind.CLIENT, attributes=attributes)
+
+
+def mark_error(span: Any, description: str) -> None:
+    span.set_status(Status(StatusCode.ERROR, description))
+
+
+# ── Tail sampling ────────────────────────────────────────────────────
+
+class TailSamplingProcessor:
+    """
+    SpanProcessor holding each trace until its local root ends, then
+    passing the whole trace to the next processor if the trace is kept.
+    """
+
+    def __init__(self, next_processor, slow_ms: float, sample_ratio: float, max_pending: int = 10_000):
+        self.next = next_processor
+        self.slow_ns = slow_ms * 1e6
+        self.sample_ratio = sample_ratio
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[int, List[Any]]" = OrderedDict()
+        # Recent decisions, for spans that end after their root
+        self._decided: "OrderedDict[int, bool]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"kept": 0, "dropped": 0, "evicted": 0}
+
+    def on_start(self, span, parent_context=None) -> None:
+        pass
+
+    def _on_ending(self, span) -> None:
+        pass
+
+    def on_end(self, span) -> None:
+        trace_id = span.context.trace_id
+        with self._lock:
+            decided = self._decided.get(trace_id)
+            if decided is None:
+                spans = self._pending.setdefault(trace_id, [])
+                spans.append(span)
+                if not _is_local_root(span):
+                    if len(self._pending) > self.max_pending:
+                        self._pending.popitem(last=False)
+                        self.stats["evicted"] += 1
+                    return
+                del self._pending[trace_id]
+                decided = self._keep(span, spans)
+                self.stats["kept" if decided else "dropped"] += 1
+                self._decided[trace_id] = decided
+                if len(self._decided) > self.max_pending:
+                    self._decided.popitem(last=False)
+            else:
+                spans = [span]
+        if decided:
+            for finished in spans:
+                self.next.on_end(finished)
+
+    def _keep(self, root, spans: List[Any]) -> bool:
+        if any(s.status.status_code is StatusCode.ERROR for s in spans):
+            return True
+        if root.end_time - root.start_time >= self.slow_ns:
+            return True
+        # Low 64 bits of the trace id: the same decision in every service
+        return (root.context.trace_id & 0xFFFFFFFFFFFFFFFF) / 2 ** 64 < self.sample_ratio
+
+    def shutdown(self) -> None:
+        self.next.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.next.force_flush(timeout_millis)
+
+
+def _is_local_root(span) -> bool:
+    return span.parent is None or span.parent.is_remote
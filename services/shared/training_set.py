@@ -0,0 +1,182 @@
+"""
+Join logged decision features (shared.feature_log) with later labels.
+
+Usage (from services/):
+    python -m shared.training_set --logs /data/feature-logs --decision-type fraud_check \\
+        --labels fraud_labels.csv --key entity_id:account_id --label is_fraud --label-time labeled_at \\
+        --start 2026-10-01 --end 2026-10-08 --out fraud-2026-10-01.parquet
+
+    python -m shared.training_set --logs /data/feature-logs --decision-type match_rank \\
+        --labels hires.parquet --key job_id --key entity_id:freelancer_id --label hired --label-time hired_at ...
+
+Every label row is matched with the latest logged decision for the same key
+made at or before the label's time (and within --max-age-days of it), so a
+training row carries exactly the features the service scored when it made
+the decision, never values computed later. Labels without such a decision
+are dropped and counted. --start/--end select the hourly log partitions
+read, so a daily job only reads the new day.
+
+Key fields are looked up on the logged row (entity_id, decision_id, ...)
+and then in its features; LOG_FIELD:LABEL_COLUMN maps differing names.
+"""
+
+import argparse
+import bisect
+import csv
+import json
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from shared.feature_log import read_feature_log
+
+
+def to_timestamp(value: Any) -> float:
+    """Unix seconds from a number, datetime or ISO-8601 string (naive = UTC)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    raise ValueError(f"not a timestamp: {value!r}")
+
+
+def _key_of(row: dict, fields: Sequence[str]) -> Optional[Tuple]:
+    values = []
+    for name in fields:
+        value = row.get(name, (row.get("features") or {}).get(name))
+        if value is None:
+            return None
+        values.append(str(value))
+    return tuple(values)
+
+
+def flatten(row: dict) -> Dict[str, Any]:
+    """Decision metadata, then features as columns, then output_<name> columns."""
+    flat = {k: v for k, v in row.items() if k not in ("features", "output")}
+    flat.update(row.get("features") or {})
+    flat.update({f"output_{k}": v for k, v in (row.get("output") or {}).items()})
+    return flat
+
+
+def build_training_set(
+    decisions: Iterable[dict],
+    labels: Iterable[dict],
+    keys: Sequence[Tuple[str, str]] = (("entity_id", "entity_id"),),
+    label_column: str = "label",
+    label_time_column: str = "labeled_at",
+    max_age_s: Optional[float] = None,
+) -> Tuple[List[dict], Dict[str, int]]:
+    """
+    Point-in-time join of decision rows with labels.
+
+    keys are (log field, label column) pairs. Returns the flattened training
+    rows (with `label` and `label_ts` columns) and join statistics.
+    """
+    log_fields = [k for k, _ in keys]
+    label_fields = [c for _, c in keys]
+
+    by_key: Dict[Tuple, List[Tuple[float, dict]]] = defaultdict(list)
+    for row in decisions:
+        key = _key_of(row, log_fields)
+        if key is not None:
+            by_key[key].append((row["ts"], row))
+    for rows in by_key.values():
+        rows.sort(key=lambda r: r[0])
+    times = {key: [t for t, _ in rows] for key, rows in by_key.items()}
+
+    out: List[dict] = []
+    stats = {"labels": 0, "joined": 0, "no_decision": 0, "too_old": 0}
+    for label in labels:
+        stats["labels"] += 1
+        key = tuple(str(label.get(c)) for c in label_fields)
+        label_ts = to_timestamp(label[label_time_column])
+        i = bisect.bisect_right(times.get(key, []), label_ts) - 1
+        if i < 0:
+            stats["no_decision"] += 1
+            continue
+        ts, decision = by_key[key][i]
+        if max_age_s is not None and label_ts - ts > max_age_s:
+            stats["too_old"] += 1
+            continue
+        out.append({**flatten(decision), "label": label[label_column], "label_ts": label_ts})
+        stats["joined"] += 1
+    return out, stats
+
+
+# ── Files ────────────────────────────────────────────────────────────
+
+def read_labels(path: str) -> List[dict]:
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path).to_pylist()
+    if path.endswith(".jsonl"):
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def write_rows(rows: List[dict], path: str) -> None:
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("pyarrow is needed to write Parquet; use a .csv output") from None
+
+        pq.write_table(pa.Table.from_pylist(rows), path, compression="zstd")
+        return
+    columns = list(dict.fromkeys(c for row in rows for c in row))
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: json.dumps(v) if isinstance(v, (list, dict)) else v for k, v in row.items()})
+
+
+def _parse_key(value: str) -> Tuple[str, str]:
+    log_field, _, label_column = value.partition(":")
+    return log_field, label_column or log_field
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build a training set from decision feature logs and labels")
+    parser.add_argument("--logs", required=True, help="FEATURE_LOG_DIR root (local copy)")
+    parser.add_argument("--decision-type", required=True)
+    parser.add_argument("--labels", required=True, help=".csv, .jsonl or .parquet")
+    parser.add_argument("--key", action="append", type=_parse_key, help="LOG_FIELD[:LABEL_COLUMN], repeatable")
+    parser.add_argument("--label", default="label", help="label column")
+    parser.add_argument("--label-time", default="labeled_at", help="label timestamp column")
+    parser.add_argument("--start", help="first decision time read (ISO date/time)")
+    parser.add_argument("--end", help="decision time read up to, exclusive")
+    parser.add_argument("--max-age-days", type=float, help="drop labels this long after their decision")
+    parser.add_argument("--out", required=True, help=".parquet or .csv")
+    args = parser.parse_args(argv)
+
+    start = to_timestamp(args.start) if args.start else None
+    end = to_timestamp(args.end) if args.end else None
+    rows, stats = build_training_set(
+        read_feature_log(args.logs, args.decision_type, start, end),
+        read_labels(args.labels),
+        keys=args.key or [("entity_id", "entity_id")],
+        label_column=args.label,
+        label_time_column=args.label_time,
+        max_age_s=args.max_age_days * 86400 if args.max_age_days is not None else None,
+    )
+    write_rows(rows, args.out)
+    json.dump({"out": args.out, **stats}, sys.stdout)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+In-memory nearest-neighbour indexes over unit-length vectors (inner product).
+
+Usage:
+    index = make_index(dim=384)          # brute force, IVF or HNSW (see below)
+    index.add(7, vector)
+    index.add_many([8, 9], matrix)
+    index.search(query, k=5)             # [(7, 0.97), ...] best first
+    index.remove(7)
+    ids, matrix = index.items()          # every live vector, for persistence
+
+BruteForceIndex keeps vectors in one contiguous NumPy matrix and scores a
+query with a single matrix-vector product; it is exact and fast up to tens
+of thousands of vectors. IvfIndex (NumPy only) clusters the vectors with
+k-means and scores just the nprobe closest clusters. HnswIndex wraps hnswlib
+(optional dependency).
+
+make_index(kind=...):
+  brute | ivf | hnsw   that index (hnsw falls back to ivf without hnswlib)
+  auto (default)       brute force up to BRUTE_FORCE_LIMIT vectors, above it
+                       hnsw when hnswlib is installed, else ivf
+"""
+
+import os
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import structlog
+
+logger = structlog.get_logger()
+
+VECTOR_INDEX = os.getenv("VECTOR_INDEX", "auto")
+BRUTE_FORCE_LIMIT = int(os.getenv("VECTOR_INDEX_BRUTE_FORCE_LIMIT", "50000"))
+
+
+class BruteForceIndex:
+    """Exact search by matrix-vector product."""
+
+    kind = "brute"
+
+    def __init__(self, dim: int, capacity: int = 1024):
+        self.dim = dim
+        self._vectors = np.zeros((max(1, capacity), dim), dtype=np.float32)
+        self._ids: List[int] = []
+        self._rows: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, id_: int) -> bool:
+        return id_ in self._rows
+
+    def add(self, id_: int, vector: np.ndarray) -> None:
+        row = self._rows.get(id_)
+        if row is None:
+            row = len(self._ids)
+            if row == len(self._vectors):
+                grown = np.zeros((row * 2, self.dim), dtype=np.float32)
+                grown[:row] = self._vectors
+                self._vectors = grown
+            self._ids.append(id_)
+            self._rows[id_] = row
+        self._vectors[row] = vector
+
+    def add_many(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        for id_, vector in zip(ids, vectors):
+            self.add(int(id_), vector)
+
+    def remove(self, id_: int) -> None:
+        row = self._rows.pop(id_, None)
+        if row is None:
+            return
+        last = len(self._ids) - 1
+        if row != last:
+            # Move the last vector into the hole so the matrix stays dense
+            moved = self._ids[last]
+            self._vectors[row] = self._vectors[last]
+            self._ids[row] = moved
+            self._rows[moved] = row
+            self._moved(row, last)
+        self._ids.pop()
+
+    def _moved(self, row: int, last: int) -> None:
+        """Hook for subclasses keeping per-row data alongside the vectors."""
+
+    def items(self) -> Tuple[List[int], np.ndarray]:
+        return list(self._ids), self._vectors[:len(self._ids)].copy()
+
+    def search(self, query: np.ndarray, k: int = 1) -> List[Tuple[int, float]]:
+        n = len(self._ids)
+        if n == 0 or k <= 0:
+            return []
+        scores = self._vectors[:n] @ np.asarray(query, dtype=np.float32)
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+        top = top[np.argsort(-scores[top])]
+        return [(self._ids[i], float(scores[i])) for i in top]
+
+
+class IvfIndex(BruteForceIndex):
+    """
+    Inverted-file index: k-means clusters, search the nprobe nearest ones.
+
+    Until train_at vectors have been added the index searches exhaustively.
+    It then trains nlist centroids (spherical k-means on the stored vectors)
+    and retrains whenever the collection has doubled since the last run, so
+    incremental adds never need a manual rebuild.
+    """
+
+    kind = "ivf"
+
+    def __init__(self, dim: int, capacity: int = 1024, nlist: int = 0, nprobe: int = 8, seed: int = 0):
+        super().__init__(dim, capacity)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self._rng = np.random.default_rng(seed)
+        self._centroids = None
+        self._lists = np.zeros(max(1, capacity), dtype=np.int32)
+        self._trained_at = 0
+
+    @property
+    def _target_nlist(self) -> int:
+        # ~√n clusters balances centroid scoring against list scans
+        return self.nlist or max(1, int(np.sqrt(len(self._ids))))
+
+    @property
+    def train_at(self) -> int:
+        return max(256, 39 * (self.nlist or 16))
+
+    def add(self, id_: int, vector: np.ndarray) -> None:
+        self.add_many([id_], np.asarray(vector, dtype=np.float32)[None, :])
+
+    def add_many(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        for id_, vector in zip(ids, vectors):
+            super().add(int(id_), vector)
+        if len(self._lists) < len(self._vectors):
+            grown = np.zeros(len(self._vectors), dtype=np.int32)
+            grown[:len(self._lists)] = self._lists
+            self._lists = grown
+        n = len(self._ids)
+        if n >= self.train_at and n >= 2 * self._trained_at:
+            self.train()
+        elif self._centroids is not None:
+            rows = np.fromiter((self._rows[int(i)] for i in ids), dtype=np.int64)
+            self._lists[rows] = np.argmax(self._vectors[rows] @ self._centroids.T, axis=1)
+
+    def _moved(self, row: int, last: int) -> None:
+        self._lists[row] = self._lists[last]
+
+    def train(self, iterations: int = 10) -> None:
+        """(Re)cluster the stored vectors and reassign every row."""
+        n = len(self._ids)
+        nlist = min(self._target_nlist, n)
+        if nlist < 2:
+            return
+        data = self._vectors[:n]
+        sample = data[self._rng.choice(n, size=min(n, nlist * 64), replace=False)]
+        centroids = sample[self._rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            # An empty cluster keeps its previous centroid
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+        self._centroids = centroids.astype(np.float32)
+        self._lists[:n] = np.argmax(data @ self._centroids.T, axis=1)
+        self._trained_at = n
+        logger.info("ivf_index_trained", vectors=n, nlist=nlist)
+
+    def search(self, query: np.ndarray, k: int = 1) -> List[Tuple[int, float]]:
+        n = len(self._ids)
+        if self._centroids is None or n == 0 or k <= 0:
+            return super().search(query, k)
+        query = np.asarray(query, dtype=np.float32)
+        nprobe = min(self.nprobe, len(self._centroids))
+        probe = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+        rows = np.flatnonzero(np.isin(self._lists[:n], probe))
+        if len(rows) < k:
+            return super().search(query, k)
+        scores = self._vectors[rows] @ query
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+        top = top[np.argsort(-scores[top])]
+        return [(self._ids[rows[i]], float(scores[i])) for i in top]
+
+
+class HnswIndex:
+    """Approximate search with hnswlib (pip install hnswlib)."""
+
+    kind = "hnsw"
+
+    def __init__(self, dim: int, capacity: int = 10_000, m: int = 16, ef_construction: int = 200, ef: int = 64):
+        import hnswlib
+
+        self.dim = dim
+        self._index = hnswlib.Index(space="ip", dim=dim)
+        self._index.init_index(max_elements=max(1, capacity), M=m, ef_construction=ef_construction)
+        self._index.set_ef(ef)
+        self._live: set = set()
+        self._deleted: set = set()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __contains__(self, id_: int) -> bool:
+        return id_ in self._live
+
+    def add(self, id_: int, vector: np.ndarray) -> None:
+        if self._index.get_current_count() >= self._index.get_max_elements():
+            self._index.resize_index(self._index.get_max_elements() * 2)
+        if id_ in self._deleted:
+            # Re-adding a removed label updates its vector in place
+            self._index.unmark_deleted(id_)
+            self._deleted.discard(id_)
+        self._index.add_items(np.asarray(vector, dtype=np.float32)[None, :], [id_])
+        self._live.add(id_)
+
+    def add_many(self, ids: Sequence[int], vectors: np.ndarray) -> None:
+        for id_, vector in zip(ids, vectors):
+            self.add(int(id_), vector)
+
+    def remove(self, id_: int) -> None:
+        if id_ in self._live:
+            self._index.mark_deleted(id_)
+            self._live.discard(id_)
+            self._deleted.add(id_)
+
+    def search(self, query: np.ndarray, k: int = 1) -> List[Tuple[int, float]]:
+        k = min(k, len(self._live))
+        if k <= 0:
+            return []
+        labels, distances = self._index.knn_query(np.asarray(query, dtype=np.float32)[None, :], k=k)
+        # hnswlib's "ip" distance is 1 - inner product
+        return [(int(label), 1.0 - float(dist)) for label, dist in zip(labels[0], distances[0])]
+
+    def items(self) -> Tuple[List[int], np.ndarray]:
+        ids = sorted(self._live)
+        if not ids:
+            return [], np.zeros((0, self.dim), dtype=np.float32)
+        return ids, np.asarray(self._index.get_items(ids), dtype=np.float32)
+
+
+def make_index(dim: int, capacity: int = 1024, kind: str = VECTOR_INDEX):
+    """Index for dim-sized vectors; see the module docstring for how kind is resolved."""
+    large = capacity > BRUTE_FORCE_LIMIT
+    if kind == "hnsw" or (kind == "auto" and large):
+        try:
+            return HnswIndex(dim, capacity)
+        except ImportError:
+            logger.warning("hnswlib_unavailable_using_ivf", capacity=capacity)
+            kind = "ivf"
+    if kind == "ivf":
+        return IvfIndex(dim, capacity)
+    return BruteForceIndex(dim, capacity)
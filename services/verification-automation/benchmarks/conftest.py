@@ -0,0 +1,8 @@
+"""Fixtures for the verification-automation benchmarks (pytest benchmarks/ --benchmark-only)."""
+import logging
+
+import structlog
+
+import src.main  # noqa: F401  (puts shared/ on sys.path)
+
+structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
@@ -0,0 +1,28 @@
+"""Benchmarks for rule-based evidence scoring (_analyze_evidence_rules)."""
+import pytest
+
+from src.routes import _analyze_evidence_rules
+
+EVIDENCE = {
+    "identity": {
+        "government_id_url": "gs://evidence/id.jpg", "selfie_url": "gs://evidence/selfie.jpg",
+        "full_name": "Ada Lovelace", "date_of_birth": "1990-12-10", "address": "1 Main St", "id_number": "X123",
+    },
+    "portfolio": {
+        "urls": [f"https://example.com/work/{i}" for i in range(5)],
+        "description": "Selected client work across e-commerce, fintech and healthcare dashboards.",
+        "client_references": ["ref-1"],
+    },
+    "skill_assessment": {"test_score": 84, "certification_url": "https://cert.example.com/1", "years_experience": 5},
+    "work_history": {
+        "previous_jobs": [{"company": f"Co {i}"} for i in range(4)],
+        "linkedin_url": "https://linkedin.com/in/ada", "references": ["ref-1"],
+    },
+    "payment_method": {"stripe_connected": True, "tax_id": "12-3456789", "billing_address": "1 Main St"},
+}
+
+
+@pytest.mark.parametrize("verification_type", list(EVIDENCE))
+def test_analyze_evidence_rules(benchmark, verification_type):
+    confidence = benchmark(_analyze_evidence_rules, verification_type, EVIDENCE[verification_type])
+    assert 0.0 <= confidence <= 1.0
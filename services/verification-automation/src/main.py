@@ -8,6 +8,9 @@ Subscribes to:
 Callbacks to PHP API:
   - POST /internal/verifications — create verification
   - PATCH /internal/verifications/{id} — update with AI result
+
+Exposes:
+  - GET /metrics — Prometheus metrics (shared.metrics)
 """
 
 import os
@@ -21,6 +24,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
 
 from src.routes import router
 from src.config import settings
+from shared.metrics import install_metrics, mark_process_dead
+from shared.tracing import init_tracing, shutdown_tracing
 
 logger = structlog.get_logger()
 
@@ -60,18 +65,39 @@ async def _start_subscribers():
         logger.exception("subscriber_start_failed")
 
 
+async def _start_context_cache():
+    """Create or reuse provider-side caches for the static prompt prefixes."""
+    try:
+        from src.vertex_ai import CACHED_INSTRUCTIONS, VERTEX_MODEL, is_vertex_enabled
+
+        if not is_vertex_enabled():
+            return
+        from shared.context_cache import context_cache
+
+        await context_cache.start(SERVICE_NAME, VERTEX_MODEL, CACHED_INSTRUCTIONS)
+    except Exception:
+        logger.exception("context_cache_start_failed")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("service_starting", service=SERVICE_NAME, version=VERSION)
+    init_tracing(SERVICE_NAME)
     await _start_subscribers()
+    await _start_context_cache()
     yield
     for task in _subscriber_tasks:
         task.cancel()
+    from shared.context_cache import context_cache
+    await context_cache.stop()
+    await asyncio.to_thread(shutdown_tracing)
+    mark_process_dead()
     logger.info("service_stopping", service=SERVICE_NAME)
 
 
 app = FastAPI(title=SERVICE_NAME, version=VERSION, lifespan=lifespan)
 app.include_router(router)
+install_metrics(app)
 
 
 @app.get("/healthz")
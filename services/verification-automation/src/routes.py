@@ -63,6 +63,7 @@ async def _analyze_evidence_with_ai(verification_type: str, evidence: dict) -> t
     Returns (confidence, model_version, checks).
     """
     from src.vertex_ai import analyze_with_vertex, is_vertex_enabled
+    from shared.metrics import record_fallback
 
     if is_vertex_enabled():
         result = await analyze_with_vertex(verification_type, evidence)
@@ -73,6 +74,7 @@ async def _analyze_evidence_with_ai(verification_type: str, evidence: dict) -> t
                 result.get("checks", []),
             )
         logger.warning("vertex_fallback_to_rules", type=verification_type)
+        record_fallback("verification")
 
     # Fallback: rule-based scoring
     confidence = _analyze_evidence_rules(verification_type, evidence)
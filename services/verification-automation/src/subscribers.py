@@ -57,6 +57,8 @@ async def handle_verification_submitted(data: dict) -> None:
       confidence 0.50-0.84 → human_review
       confidence < 0.50 → auto_rejected
     """
+    from shared.metrics import record_fallback
+
     verification_id = data.get("verification_id")
     user_id = data.get("user_id")
     verif_type = data.get("type", "identity")
@@ -81,11 +83,13 @@ async def handle_verification_submitted(data: dict) -> None:
                 model_version = result.get("model", "vertex-unknown")
                 checks = result.get("checks", [])
             else:
+                record_fallback("verification")
                 confidence = _analyze_verification(verif_type)
         else:
             confidence = _analyze_verification(verif_type)
     except Exception:
         logger.exception("ai_analysis_error", type=verif_type)
+        record_fallback("verification")
         confidence = _analyze_verification(verif_type)
 
     # Decision logic
@@ -42,11 +42,10 @@ def _get_model():
 
 # ── Prompts per verification type ────────────────────────────────────
 
-VERIFICATION_PROMPTS = {
-    "identity": """You are an identity verification AI. Analyze the following identity evidence and determine a confidence score (0.0 to 1.0) for whether this identity is legitimate.
-
-Evidence provided:
-{evidence}
+# Static instructions (cached provider-side, see shared.context_cache);
+# VERIFICATION_PROMPT carries only the evidence.
+VERIFICATION_INSTRUCTIONS = {
+    "identity": """You are an identity verification AI. Analyze the identity evidence below and determine a confidence score (0.0 to 1.0) for whether this identity is legitimate.
 
 Evaluate based on:
 - Document completeness (government ID, selfie, etc.)
@@ -54,12 +53,9 @@ Evaluate based on:
 - Document quality indicators
 
 Respond in JSON only:
-{{"confidence": <float 0.0-1.0>, "checks": [{{"check": "<name>", "passed": <bool>, "notes": "<detail>"}}], "summary": "<brief assessment>"}}""",
-
-    "portfolio": """You are a portfolio verification AI. Analyze the following portfolio evidence and determine a confidence score (0.0 to 1.0) for the quality and authenticity of this freelancer's portfolio.
+{"confidence": <float 0.0-1.0>, "checks": [{"check": "<name>", "passed": <bool>, "notes": "<detail>"}], "summary": "<brief assessment>"}""",
 
-Evidence provided:
-{evidence}
+    "portfolio": """You are a portfolio verification AI. Analyze the portfolio evidence below and determine a confidence score (0.0 to 1.0) for the quality and authenticity of this freelancer's portfolio.
 
 Evaluate based on:
 - Number and variety of portfolio items
@@ -68,12 +64,9 @@ Evaluate based on:
 - Client references if provided
 
 Respond in JSON only:
-{{"confidence": <float 0.0-1.0>, "checks": [{{"check": "<name>", "passed": <bool>, "notes": "<detail>"}}], "summary": "<brief assessment>"}}""",
-
-    "skill_assessment": """You are a skill assessment verification AI. Analyze the following skill evidence and determine a confidence score (0.0 to 1.0) for this freelancer's claimed skill proficiency.
+{"confidence": <float 0.0-1.0>, "checks": [{"check": "<name>", "passed": <bool>, "notes": "<detail>"}], "summary": "<brief assessment>"}""",
 
-Evidence provided:
-{evidence}
+    "skill_assessment": """You are a skill assessment verification AI. Analyze the skill evidence below and determine a confidence score (0.0 to 1.0) for this freelancer's claimed skill proficiency.
 
 Evaluate based on:
 - Test scores or assessment results
@@ -82,12 +75,9 @@ Evaluate based on:
 - Consistency of claims
 
 Respond in JSON only:
-{{"confidence": <float 0.0-1.0>, "checks": [{{"check": "<name>", "passed": <bool>, "notes": "<detail>"}}], "summary": "<brief assessment>"}}""",
+{"confidence": <float 0.0-1.0>, "checks": [{"check": "<name>", "passed": <bool>, "notes": "<detail>"}], "summary": "<brief assessment>"}""",
 
-    "work_history": """You are a work history verification AI. Analyze the following employment evidence and determine a confidence score (0.0 to 1.0) for the authenticity of this freelancer's work history.
-
-Evidence provided:
-{evidence}
+    "work_history": """You are a work history verification AI. Analyze the employment evidence below and determine a confidence score (0.0 to 1.0) for the authenticity of this freelancer's work history.
 
 Evaluate based on:
 - Number of previous positions
@@ -96,12 +86,9 @@ Evaluate based on:
 - Consistency and timeline gaps
 
 Respond in JSON only:
-{{"confidence": <float 0.0-1.0>, "checks": [{{"check": "<name>", "passed": <bool>, "notes": "<detail>"}}], "summary": "<brief assessment>"}}""",
-
-    "payment_method": """You are a payment verification AI. Analyze the following payment method evidence and determine a confidence score (0.0 to 1.0) for whether the payment setup is complete and legitimate.
+{"confidence": <float 0.0-1.0>, "checks": [{"check": "<name>", "passed": <bool>, "notes": "<detail>"}], "summary": "<brief assessment>"}""",
 
-Evidence provided:
-{evidence}
+    "payment_method": """You are a payment verification AI. Analyze the payment method evidence below and determine a confidence score (0.0 to 1.0) for whether the payment setup is complete and legitimate.
 
 Evaluate based on:
 - Bank account or payment provider connected
@@ -109,9 +96,12 @@ Evaluate based on:
 - Billing address verified
 
 Respond in JSON only:
-{{"confidence": <float 0.0-1.0>, "checks": [{{"check": "<name>", "passed": <bool>, "notes": "<detail>"}}], "summary": "<brief assessment>"}}""",
+{"confidence": <float 0.0-1.0>, "checks": [{"check": "<name>", "passed": <bool>, "notes": "<detail>"}], "summary": "<brief assessment>"}""",
 }
 
+VERIFICATION_PROMPT = """Evidence provided:
+{evidence}"""
+
 
 async def analyze_with_vertex(
     verification_type: str,
@@ -127,23 +117,34 @@ async def analyze_with_vertex(
         logger.info("vertex_skipped_dev_mode", type=verification_type)
         return None  # Caller should fall back to rules
 
-    prompt_template = VERIFICATION_PROMPTS.get(verification_type)
-    if not prompt_template:
+    instructions = VERIFICATION_INSTRUCTIONS.get(verification_type)
+    if not instructions:
         logger.warning("no_prompt_for_type", type=verification_type)
         return None
 
-    prompt = prompt_template.format(evidence=json.dumps(evidence, indent=2))
+    from shared.prompting import PromptBuilder, compact_json, estimate_tokens, log_token_usage
+    from shared.context_cache import context_cache
+    from shared.metrics import observe_model
+
+    prompt = (
+        PromptBuilder(VERIFICATION_PROMPT, "verification", reserved_tokens=estimate_tokens(instructions))
+        .add("evidence", compact_json(evidence), priority=1, min_tokens=500)
+        .build()
+    )
 
     try:
-        model = _get_model()
-        response = model.generate_content(
-            prompt,
+        model, contents = context_cache.prepare(
+            f"verification_{verification_type}", instructions, prompt.text, _get_model(),
+        )
+        response = observe_model(model, "verification").generate_content(
+            contents,
             generation_config={
                 "temperature": 0.1,
                 "max_output_tokens": 1024,
                 "response_mime_type": "application/json",
             },
         )
+        log_token_usage("verification", response, prompt)
 
         # Parse response
         text = response.text.strip()
@@ -176,4 +177,10 @@ async def analyze_with_vertex(
 def is_vertex_enabled() -> bool:
     """Check if Vertex AI should be used (production only)."""
     return ENVIRONMENT != "dev"
-""", "Complexity": 7, "Description": "New Vertex AI integration module for verification-automation. Uses Gemini 2.0 Flash with type-specific prompts. Falls back to rule-based scoring in dev mode.", "EmptyFile": false, "IsArtifact": false, "Overwrite": false, "TargetFile": "/Volumes/Yorch/Dev/MonkeysWork/monkeyswork-repo/services/verification-automation/src/vertex_ai.py"}
+
+
+# Instruction prefixes cached provider-side at startup (shared.context_cache)
+CACHED_INSTRUCTIONS = {
+    f"verification_{verification_type}": instructions
+    for verification_type, instructions in VERIFICATION_INSTRUCTIONS.items()
+}
@@ -9,3 +9,10 @@ def test_health():
     assert response.status_code == 200
     assert response.json()["status"] == "ok"
     assert response.json()["service"] == "verification-automation"
+
+
+def test_metrics():
+    client.get("/healthz")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert 'ai_http_request_duration_seconds_count{method="GET",route="/healthz",status="200"}' in response.text
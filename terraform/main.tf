@@ -574,6 +574,13 @@ resource "google_project_iam_member" "api_core_secrets" {
   member  = "serviceAccount:${google_service_account.services["api-core"].email}"
 }
 
+# AI service pods run as api-core and export traces (TRACING_EXPORTER=gcp)
+resource "google_project_iam_member" "api_core_cloudtrace" {
+  project = var.project_id
+  role    = "roles/cloudtrace.agent"
+  member  = "serviceAccount:${google_service_account.services["api-core"].email}"
+}
+
 resource "google_project_iam_member" "ai_scope_subscriber" {
   project = var.project_id
   role    = "roles/pubsub.subscriber"